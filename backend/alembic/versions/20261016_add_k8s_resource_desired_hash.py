@@ -0,0 +1,25 @@
+"""add kubernetes resource desired hash columns
+
+Revision ID: k8s_desired_hash_001
+Revises: plugin_metric_rollups_001
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'k8s_desired_hash_001'
+down_revision = 'plugin_metric_rollups_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('kubernetes_resources', sa.Column('desired_hash', sa.String(64), nullable=True))
+    op.add_column('kubernetes_resources', sa.Column('observed_resource_version', sa.String(64), nullable=True))
+
+
+def downgrade():
+    op.drop_column('kubernetes_resources', 'observed_resource_version')
+    op.drop_column('kubernetes_resources', 'desired_hash')
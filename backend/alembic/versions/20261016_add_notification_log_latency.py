@@ -0,0 +1,23 @@
+"""add delivery latency to notification logs
+
+Revision ID: notification_log_latency_001
+Revises: server_daily_rollups_001
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'notification_log_latency_001'
+down_revision = 'server_daily_rollups_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('notification_logs', sa.Column('latency_ms', sa.Float(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('notification_logs', 'latency_ms')
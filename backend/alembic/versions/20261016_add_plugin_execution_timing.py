@@ -0,0 +1,25 @@
+"""add plugin execution timing columns
+
+Revision ID: plugin_exec_timing_001
+Revises: add_docker_hosts_001
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'plugin_exec_timing_001'
+down_revision = 'add_docker_hosts_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('plugin_executions', sa.Column('queue_wait_ms', sa.Integer(), nullable=True))
+    op.add_column('plugin_executions', sa.Column('duration_ms', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('plugin_executions', 'duration_ms')
+    op.drop_column('plugin_executions', 'queue_wait_ms')
@@ -0,0 +1,41 @@
+"""add plugin metric rollups table
+
+Revision ID: plugin_metric_rollups_001
+Revises: plugin_exec_timing_001
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'plugin_metric_rollups_001'
+down_revision = 'plugin_exec_timing_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'plugin_metric_rollups',
+        sa.Column('tier', sa.String(length=8), nullable=False),
+        sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('plugin_id', sa.String(length=100), nullable=False),
+        sa.Column('metric_name', sa.String(length=200), nullable=False),
+        sa.Column('avg_value', sa.Float(), nullable=True),
+        sa.Column('min_value', sa.Float(), nullable=True),
+        sa.Column('max_value', sa.Float(), nullable=True),
+        sa.Column('last_value', sa.Float(), nullable=True),
+        sa.Column('sample_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('tier', 'bucket', 'plugin_id', 'metric_name')
+    )
+    op.create_index(
+        'idx_metric_rollups_series',
+        'plugin_metric_rollups',
+        ['tier', 'plugin_id', 'metric_name', 'bucket']
+    )
+
+
+def downgrade():
+    op.drop_index('idx_metric_rollups_series', table_name='plugin_metric_rollups')
+    op.drop_table('plugin_metric_rollups')
@@ -0,0 +1,59 @@
+"""add server daily rollups table
+
+Revision ID: server_daily_rollups_001
+Revises: k8s_desired_hash_001
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'server_daily_rollups_001'
+down_revision = 'k8s_desired_hash_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'server_daily_rollups',
+        sa.Column('server_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('tenant_id', sa.String(length=50), nullable=False, server_default='default'),
+        sa.Column('snapshot_count', sa.Integer(), nullable=False),
+        sa.Column('cpu_count', sa.Integer(), nullable=False),
+        sa.Column('cpu_sum', sa.Float(), nullable=True),
+        sa.Column('cpu_min', sa.Float(), nullable=True),
+        sa.Column('cpu_max', sa.Float(), nullable=True),
+        sa.Column('cpu_p95', sa.Float(), nullable=True),
+        sa.Column('memory_count', sa.Integer(), nullable=False),
+        sa.Column('memory_sum', sa.Float(), nullable=True),
+        sa.Column('memory_min', sa.Float(), nullable=True),
+        sa.Column('memory_max', sa.Float(), nullable=True),
+        sa.Column('memory_p95', sa.Float(), nullable=True),
+        sa.Column('disk_count', sa.Integer(), nullable=False),
+        sa.Column('disk_sum', sa.Float(), nullable=True),
+        sa.Column('disk_min', sa.Float(), nullable=True),
+        sa.Column('disk_max', sa.Float(), nullable=True),
+        sa.Column('disk_p95', sa.Float(), nullable=True),
+        sa.Column('temperatures', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=True),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['server_id'], ['server_profiles.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('server_id', 'day')
+    )
+    op.create_index('ix_server_daily_rollups_tenant_id', 'server_daily_rollups', ['tenant_id'])
+    # Reports aggregate one server's snapshots over a time window
+    op.create_index(
+        'idx_server_snapshots_server_time',
+        'server_snapshots',
+        ['server_id', 'timestamp']
+    )
+
+
+def downgrade():
+    op.drop_index('idx_server_snapshots_server_time', table_name='server_snapshots')
+    op.drop_index('ix_server_daily_rollups_tenant_id', table_name='server_daily_rollups')
+    op.drop_table('server_daily_rollups')
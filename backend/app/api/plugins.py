@@ -14,6 +14,7 @@ from sqlalchemy import select, desc
 from app.core.database import get_db
 from app.models import Plugin, PluginMetric, PluginExecution
 from app.services.cache import cache
+from app.services.response_cache import TAG_PLUGINS, invalidate_cache_tags
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
@@ -140,6 +141,7 @@ async def enable_plugin(
     
     # Clear cache
     await cache.delete(f"plugin:{plugin_id}")
+    invalidate_cache_tags(TAG_PLUGINS)
     
     return {
         "success": True,
@@ -2,110 +2,371 @@
 WebSocket API for Real-Time Metrics
 
 Streams plugin metrics, status updates, and execution events in real-time.
+
+Broadcasts never wait on a socket. Each message is serialized once and put on
+a bounded queue per connection; a writer task per connection drains it, so a
+slow browser only delays itself. When a queue is full the oldest message is
+dropped, and a pending metrics:update for the same plugin is replaced in
+place instead of queueing a second copy.
+
+Connections are indexed by subscribed plugin_id, so a broadcast only visits
+interested clients. With the Redis backplane enabled, broadcasts are also
+published on a pub/sub channel and delivered by every uvicorn worker.
 """
 import logging
 import asyncio
 import json
-from typing import Set
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
 from datetime import datetime
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from fastapi.websockets import WebSocketState
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Message types where only the newest pending message per plugin matters
+COALESCED_TYPES = {"metrics:update"}
+
+
+class ClientConnection:
+    """A WebSocket with its subscriptions, outgoing queue and writer task."""
+
+    def __init__(self, websocket: WebSocket, max_queue: int, send_timeout: float):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.plugin_ids: Set[str] = set()  # Empty set = subscribe to all
+        self.metric_names: Set[str] = set()  # Empty set = subscribe to all metrics
+        # Items are [coalesce_key, payload] so a pending payload can be replaced
+        self._queue: Deque[List[Any]] = deque()
+        self._pending: Dict[Tuple[str, str], List[Any]] = {}
+        self._wakeup = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def wants(self, plugin_id: Optional[str], metric_name: Optional[str]) -> bool:
+        if plugin_id and self.plugin_ids and plugin_id not in self.plugin_ids:
+            return False
+        if metric_name and self.metric_names and metric_name not in self.metric_names:
+            return False
+        return True
+
+    def enqueue(self, payload: str, coalesce_key: Optional[Tuple[str, str]] = None):
+        """Queue a serialized message without waiting."""
+        if coalesce_key is not None:
+            pending = self._pending.get(coalesce_key)
+            if pending is not None:
+                pending[1] = payload
+                self.coalesced += 1
+                return
+
+        if len(self._queue) >= self.max_queue:
+            oldest_key, _ = self._queue.popleft()
+            if oldest_key is not None:
+                self._pending.pop(oldest_key, None)
+            self.dropped += 1
+
+        item = [coalesce_key, payload]
+        self._queue.append(item)
+        if coalesce_key is not None:
+            self._pending[coalesce_key] = item
+        self._wakeup.set()
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    async def run_writer(self, on_failure):
+        """Send queued messages until cancelled or the socket fails."""
+        try:
+            while True:
+                if not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                key, payload = self._queue.popleft()
+                if key is not None:
+                    self._pending.pop(key, None)
+
+                if self.websocket.client_state != WebSocketState.CONNECTED:
+                    break
+                await asyncio.wait_for(self.websocket.send_text(payload), timeout=self.send_timeout)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to send to WebSocket: {e}")
+        await on_failure(self)
+
 
 class ConnectionManager:
-    """Manage WebSocket connections and broadcasting."""
-    
-    def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
-        # Track subscriptions per connection: {websocket: {'plugin_ids': [...], 'metric_names': [...]}}
-        self.subscriptions: dict = {}
-        self._lock = asyncio.Lock()
-    
+    """Manage WebSocket connections and fan-out of broadcasts."""
+
+    def __init__(
+        self,
+        max_queue: int = settings.websocket_client_queue_size,
+        send_timeout: float = settings.websocket_send_timeout_seconds
+    ):
+        """
+        Initialize connection manager.
+
+        Args:
+            max_queue: Outgoing messages buffered per connection
+            send_timeout: Seconds a single send may take before the
+                connection is dropped
+        """
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.connections: Dict[WebSocket, ClientConnection] = {}
+        # Topic index: plugin_id -> clients subscribed to it explicitly;
+        # clients without plugin filters are in _all_plugins
+        self._by_plugin: Dict[str, Set[ClientConnection]] = {}
+        self._all_plugins: Set[ClientConnection] = set()
+        self.backplane: Optional["RedisBackplane"] = None
+
+    @property
+    def active_connections(self) -> Set[WebSocket]:
+        return set(self.connections)
+
     async def connect(self, websocket: WebSocket):
         """Accept and register a new WebSocket connection."""
         await websocket.accept()
-        async with self._lock:
-            self.active_connections.add(websocket)
-            self.subscriptions[websocket] = {
-                'plugin_ids': set(),  # Empty set = subscribe to all
-                'metric_names': set()  # Empty set = subscribe to all metrics
-            }
-        logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
-    
+        client = ClientConnection(websocket, self.max_queue, self.send_timeout)
+        self.connections[websocket] = client
+        self._all_plugins.add(client)
+        client.writer = asyncio.create_task(client.run_writer(self._drop_client))
+        logger.info(f"WebSocket connected. Total connections: {len(self.connections)}")
+
     async def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection."""
-        async with self._lock:
-            self.active_connections.discard(websocket)
-            self.subscriptions.pop(websocket, None)
-        logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
-    
+        client = self.connections.get(websocket)
+        if client is None:
+            return
+        self._unregister(client)
+        if client.writer and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+        logger.info(f"WebSocket disconnected. Total connections: {len(self.connections)}")
+
+    async def _drop_client(self, client: ClientConnection):
+        # Writer failed or timed out: stop routing to it and close the socket
+        self._unregister(client)
+        try:
+            await client.websocket.close()
+        except Exception:
+            pass
+
+    def _unregister(self, client: ClientConnection):
+        self.connections.pop(client.websocket, None)
+        self._all_plugins.discard(client)
+        for plugin_id in client.plugin_ids:
+            subscribers = self._by_plugin.get(plugin_id)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self._by_plugin[plugin_id]
+
+    def _reindex(self, client: ClientConnection, plugin_ids: Set[str]):
+        self._unregister(client)
+        client.plugin_ids = set(plugin_ids)
+        self.connections[client.websocket] = client
+        if client.plugin_ids:
+            for plugin_id in client.plugin_ids:
+                self._by_plugin.setdefault(plugin_id, set()).add(client)
+        else:
+            self._all_plugins.add(client)
+
+    def subscribe(self, websocket: WebSocket, plugin_ids=(), metric_names=()):
+        """Add plugin and/or metric filters for a connection."""
+        client = self.connections.get(websocket)
+        if client is None:
+            return
+        if plugin_ids:
+            self._reindex(client, client.plugin_ids | set(plugin_ids))
+        if metric_names:
+            client.metric_names.update(metric_names)
+
+    def unsubscribe(self, websocket: WebSocket, plugin_ids=(), metric_names=()):
+        """Remove plugin and/or metric filters for a connection."""
+        client = self.connections.get(websocket)
+        if client is None:
+            return
+        if plugin_ids:
+            self._reindex(client, client.plugin_ids - set(plugin_ids))
+        if metric_names:
+            client.metric_names.difference_update(metric_names)
+
+    def get_subscriptions(self, websocket: WebSocket) -> Dict[str, Set[str]]:
+        """Current filters of a connection (empty set = all)."""
+        client = self.connections.get(websocket)
+        if client is None:
+            return {"plugin_ids": set(), "metric_names": set()}
+        return {"plugin_ids": set(client.plugin_ids), "metric_names": set(client.metric_names)}
+
+    def _targets(self, plugin_id: Optional[str]) -> Set[ClientConnection]:
+        if not plugin_id:
+            return set(self.connections.values())
+        return self._all_plugins | self._by_plugin.get(plugin_id, set())
+
     async def broadcast(self, message: dict, plugin_id: str = None, metric_name: str = None):
         """
         Broadcast message to all connected clients (respecting subscriptions).
-        
+
+        Returns as soon as the message is queued for every recipient.
+
         Args:
             message: Dict to send as JSON
             plugin_id: Optional plugin ID for subscription filtering
             metric_name: Optional metric name for subscription filtering
         """
-        if not self.active_connections:
-            return
-        
         json_message = json.dumps(message, default=str)
-        
-        # Send to connections that match subscription, remove dead ones
-        dead_connections = set()
-        
-        async with self._lock:
-            for connection in self.active_connections:
-                # Check if connection is subscribed to this message
-                subs = self.subscriptions.get(connection, {'plugin_ids': set(), 'metric_names': set()})
-                
-                # If plugin_id specified, check subscription
-                if plugin_id:
-                    plugin_ids = subs.get('plugin_ids', set())
-                    # Empty set means subscribe to all, otherwise check if in set
-                    if plugin_ids and plugin_id not in plugin_ids:
-                        continue
-                
-                # If metric_name specified, check subscription
-                if metric_name:
-                    metric_names = subs.get('metric_names', set())
-                    if metric_names and metric_name not in metric_names:
-                        continue
-                
-                try:
-                    if connection.client_state == WebSocketState.CONNECTED:
-                        await connection.send_text(json_message)
-                    else:
-                        dead_connections.add(connection)
-                except Exception as e:
-                    logger.warning(f"Failed to send to WebSocket: {e}")
-                    dead_connections.add(connection)
-            
-            # Remove dead connections
-            self.active_connections -= dead_connections
-            for conn in dead_connections:
-                self.subscriptions.pop(conn, None)
-    
+        self.deliver(json_message, message.get("type"), plugin_id, metric_name)
+
+        if self.backplane is not None:
+            await self.backplane.publish(json_message, message.get("type"), plugin_id, metric_name)
+
+    def deliver(
+        self,
+        json_message: str,
+        message_type: Optional[str] = None,
+        plugin_id: Optional[str] = None,
+        metric_name: Optional[str] = None
+    ) -> int:
+        """
+        Queue an already serialized message for local subscribers.
+
+        Args:
+            json_message: Serialized message
+            message_type: Message type (decides coalescing)
+            plugin_id: Optional plugin ID for subscription filtering
+            metric_name: Optional metric name for subscription filtering
+
+        Returns:
+            Number of connections the message was queued for
+        """
+        coalesce_key = (message_type, plugin_id) if message_type in COALESCED_TYPES and plugin_id else None
+        delivered = 0
+        for client in self._targets(plugin_id):
+            if client.wants(plugin_id, metric_name):
+                client.enqueue(json_message, coalesce_key)
+                delivered += 1
+        return delivered
+
     async def send_personal(self, message: dict, websocket: WebSocket):
         """
         Send message to a specific client.
-        
+
         Args:
             message: Dict to send as JSON
             websocket: Target WebSocket connection
         """
+        client = self.connections.get(websocket)
+        if client is None:
+            return
         try:
-            json_message = json.dumps(message, default=str)
-            await websocket.send_text(json_message)
+            client.enqueue(json.dumps(message, default=str))
         except Exception as e:
             logger.error(f"Failed to send personal message: {e}")
 
+    async def start_backplane(self, redis_url: str = settings.redis_url,
+                              channel: str = settings.websocket_backplane_channel):
+        """Relay broadcasts through Redis pub/sub so every worker delivers them."""
+        if self.backplane is None:
+            self.backplane = RedisBackplane(self, redis_url, channel)
+            await self.backplane.start()
+
+    async def stop_backplane(self):
+        """Stop relaying broadcasts through Redis."""
+        if self.backplane is not None:
+            await self.backplane.stop()
+            self.backplane = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get fan-out statistics.
+
+        Returns:
+            Dictionary with connection, topic and queue counters
+        """
+        clients = list(self.connections.values())
+        return {
+            "connections": len(clients),
+            "topics": len(self._by_plugin),
+            "queued": sum(c.queued for c in clients),
+            "sent": sum(c.sent for c in clients),
+            "dropped": sum(c.dropped for c in clients),
+            "coalesced": sum(c.coalesced for c in clients),
+            "backplane": self.backplane is not None,
+        }
+
+
+class RedisBackplane:
+    """Redis pub/sub relay of broadcasts between workers."""
+
+    def __init__(self, manager: ConnectionManager, redis_url: str, channel: str):
+        self.manager = manager
+        self.redis_url = redis_url
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self._client = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self):
+        import redis.asyncio as aioredis
+
+        self._client = aioredis.from_url(self.redis_url, decode_responses=True)
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen(pubsub))
+        logger.info(f"WebSocket Redis backplane started on {self.channel}")
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        if self._client:
+            await self._client.close()
+            self._client = None
+
+    async def publish(self, json_message: str, message_type: Optional[str],
+                      plugin_id: Optional[str], metric_name: Optional[str]):
+        try:
+            await self._client.publish(self.channel, json.dumps({
+                "origin": self.origin,
+                "type": message_type,
+                "plugin_id": plugin_id,
+                "metric_name": metric_name,
+                "payload": json_message,
+            }))
+        except Exception as e:
+            logger.warning(f"WebSocket backplane publish failed: {e}")
+
+    async def _listen(self, pubsub):
+        while True:
+            try:
+                async for item in pubsub.listen():
+                    envelope = json.loads(item["data"])
+                    # Our own broadcasts were already delivered locally
+                    if envelope.get("origin") == self.origin:
+                        continue
+                    self.manager.deliver(
+                        envelope["payload"], envelope.get("type"),
+                        envelope.get("plugin_id"), envelope.get("metric_name")
+                    )
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except Exception as e:
+                logger.warning(f"WebSocket backplane listener error, retrying: {e}")
+                await asyncio.sleep(1)
+
 
 # Global connection manager instance
 manager = ConnectionManager()
@@ -201,13 +462,7 @@ async def handle_client_message(websocket: WebSocket, message: dict):
         plugin_ids = message.get("plugin_ids", [])
         metric_names = message.get("metric_names", [])
         
-        async with manager._lock:
-            if websocket in manager.subscriptions:
-                subs = manager.subscriptions[websocket]
-                if plugin_ids:
-                    subs['plugin_ids'].update(plugin_ids)
-                if metric_names:
-                    subs['metric_names'].update(metric_names)
+        manager.subscribe(websocket, plugin_ids, metric_names)
         
         await manager.send_personal({
             "type": "subscribed",
@@ -221,13 +476,7 @@ async def handle_client_message(websocket: WebSocket, message: dict):
         plugin_ids = message.get("plugin_ids", [])
         metric_names = message.get("metric_names", [])
         
-        async with manager._lock:
-            if websocket in manager.subscriptions:
-                subs = manager.subscriptions[websocket]
-                if plugin_ids:
-                    subs['plugin_ids'].difference_update(plugin_ids)
-                if metric_names:
-                    subs['metric_names'].difference_update(metric_names)
+        manager.unsubscribe(websocket, plugin_ids, metric_names)
         
         await manager.send_personal({
             "type": "unsubscribed",
@@ -238,8 +487,7 @@ async def handle_client_message(websocket: WebSocket, message: dict):
     
     elif msg_type == "get_subscriptions":
         # Get current subscriptions
-        async with manager._lock:
-            subs = manager.subscriptions.get(websocket, {'plugin_ids': set(), 'metric_names': set()})
+        subs = manager.get_subscriptions(websocket)
         
         await manager.send_personal({
             "type": "subscriptions",
@@ -0,0 +1,85 @@
+"""
+Async database access.
+
+An AsyncEngine (asyncpg for PostgreSQL, aiosqlite for SQLite) alongside the
+synchronous engine in app.core.database, for request paths that should not
+block the event loop on queries. It shares the pool settings of the sync
+engine and is created on first use.
+
+Usage:
+    @router.get("/items")
+    async def get_items(db: AsyncSession = Depends(get_async_db)):
+        return (await db.execute(select(Item))).scalars().all()
+
+Code written against a sync Session can run on it with
+await db.run_sync(func, *args).
+"""
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.db_pool import TimedAsyncQueuePool, register_engine, unregister_engine
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def _async_url() -> URL:
+    url = make_url(settings.get_async_database_url())
+    if url.get_driver_name() == "asyncpg" and "prepared_statement_cache_size" not in url.query:
+        # asyncpg prepares every statement; keep the prepared statements per connection
+        url = url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.database_statement_cache_size)}
+        )
+    return url
+
+
+def get_async_engine() -> AsyncEngine:
+    """Get the process-wide async engine."""
+    global _async_engine
+    if _async_engine is None:
+        options = settings.get_engine_options()
+        if not settings.is_sqlite:
+            options["poolclass"] = TimedAsyncQueuePool
+        _async_engine = create_async_engine(_async_url(), pool_logging_name="async", **options)
+        register_engine("async", _async_engine.sync_engine)
+    return _async_engine
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """Get the async session factory (objects stay usable after commit)."""
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(),
+            expire_on_commit=False,
+            autoflush=False
+        )
+    return _async_session_factory
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency that provides an async database session.
+
+    Yields a session and closes it (returning its connection to the pool)
+    after the request.
+    """
+    async with get_async_session_factory()() as session:
+        yield session
+
+
+async def dispose_async_engine():
+    """
+    Close all pooled async connections.
+
+    Should be called on application shutdown.
+    """
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        unregister_engine("async")
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
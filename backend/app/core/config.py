@@ -27,6 +27,13 @@ class Settings(BaseSettings):
     
     # Database Configuration
     database_url: str = "sqlite:///./data/homelab.db"
+    async_database_url: Optional[str] = None  # defaults to database_url on asyncpg / aiosqlite
+    database_pool_size: int = 10  # per engine and worker process (not used for SQLite)
+    database_max_overflow: int = 20  # extra connections allowed beyond pool_size under load
+    database_pool_timeout_seconds: float = 30.0  # wait for a free connection before failing
+    database_pool_recycle_seconds: int = 1800  # replace connections older than this
+    database_pool_pre_ping: bool = True  # test connections on checkout, drop ones the server closed
+    database_statement_cache_size: int = 500  # compiled SQL cache; asyncpg prepared statements
     
     # Security - JWT
     jwt_secret_key: str = "dev-secret-key-change-in-production"
@@ -38,6 +45,12 @@ class Settings(BaseSettings):
     
     # SSH Configuration
     ssh_key_path: str = "./data/homelab_id_rsa"
+    ssh_connect_timeout_seconds: float = 30.0
+    ssh_pool_max_connections_per_host: int = 2
+    ssh_pool_max_sessions_per_connection: int = 8  # keep below sshd MaxSessions (default 10)
+    ssh_pool_idle_timeout_seconds: float = 300.0
+    ssh_pool_health_check_interval_seconds: float = 60.0
+    ssh_credential_cache_ttl_seconds: float = 300.0
     
     # AI/LLM API Keys (optional)
     openai_api_key: Optional[str] = None
@@ -51,14 +64,71 @@ class Settings(BaseSettings):
     # Container Management
     docker_host: Optional[str] = None  # Defaults to local Unix socket
     compose_project_prefix: str = "unity"
-    
+
+    # Kubernetes informers (watch-backed cluster state cache)
+    k8s_informers_enabled: bool = True
+    k8s_informer_resync_seconds: int = 600  # full relist as a safety net
+    k8s_informer_watch_timeout_seconds: int = 300  # server-side watch timeout
+    k8s_informer_backoff_max_seconds: float = 60.0
+
+    # Kubernetes reconciliation
+    k8s_reconcile_interval_seconds: int = 30  # full resync; watch events trigger in between
+    k8s_reconcile_workers: int = 4
+    k8s_reconcile_retry_base_seconds: float = 5.0
+    k8s_reconcile_retry_max_seconds: float = 300.0
+
     # Scheduler Configuration
     enable_schedulers: bool = True
     snapshot_interval_hours: int = 24
+    snapshot_max_concurrency: int = 10
+    snapshot_command_timeout_seconds: float = 120.0
     infrastructure_collection_minutes: int = 5
+    infrastructure_collection_concurrency: int = 8
+    report_max_concurrency: int = 4
     container_scan_interval_hours: int = 6
+
+    # Container registry lookups
+    registry_digest_cache_ttl_seconds: int = 300
+    registry_max_connections: int = 10  # per registry host
+    registry_check_concurrency: int = 8  # unique images checked at once
+
+    # Vulnerability scanning (Trivy)
+    trivy_cache_dir: str = "./data/trivy-cache"  # shared cache/DB directory
+    trivy_use_docker: bool = False  # run the aquasec/trivy image instead of the binary
+    trivy_scan_concurrency: int = 2
+    trivy_scan_queue_size: int = 100
+    trivy_scan_timeout_seconds: float = 300.0
+    trivy_result_cache_size: int = 512
+    trivy_db_refresh_hours: int = 12
     threshold_check_interval_minutes: int = 1
-    
+
+    # Plugin Metric Ingestion
+    metric_ingest_queue_size: int = 10000
+    metric_ingest_batch_size: int = 500
+    metric_ingest_flush_interval_seconds: float = 2.0
+    metric_ingest_put_timeout_seconds: float = 5.0
+    metric_history_default_points: int = 300
+
+    # Metric Retention & Rollups
+    metric_raw_retention_days: int = 30
+    metric_rollups_enabled: bool = True
+    metric_rollup_refresh_seconds: int = 60
+    metric_rollup_1m_retention_days: int = 7
+    metric_rollup_1h_retention_days: int = 90
+    metric_rollup_1d_retention_days: int = 730
+
+    # Latest-value index (dashboard current values)
+    latest_index_seed_window_hours: int = 24
+    latest_index_redis_mirror: bool = False  # share across API workers via Redis
+
+    # Plugin Execution
+    plugin_max_concurrency: int = 8
+    plugin_default_timeout_seconds: float = 60.0
+    plugin_schedule_jitter_seconds: float = 5.0
+    plugin_thread_pool_size: int = 0  # 0 = min(32, cpu_count + 4)
+    plugin_process_pool_size: int = 0  # 0 = disabled, CPU-bound work uses the thread pool
+    plugin_loop_block_warn_ms: float = 100.0
+
     # API Configuration
     api_v1_prefix: str = "/api/v1"
     cors_origins: str = "http://localhost:3000,http://localhost:80"
@@ -85,6 +155,21 @@ class Settings(BaseSettings):
     redis_url: str = "redis://localhost:6379/0"
     redis_max_connections: int = 10
     
+    # Response Cache (CacheMiddleware)
+    response_cache_enabled: bool = False
+    response_cache_redis_enabled: bool = True
+    response_cache_default_ttl_seconds: int = 60  # Paths without a rule are never invalidated
+    response_cache_local_max_entries: int = 512
+    response_cache_local_max_bytes: int = 32 * 1024 * 1024
+    response_cache_local_ttl_seconds: float = 5.0  # L1 lifetime when Redis is shared
+    response_cache_max_body_bytes: int = 1024 * 1024
+    
+    # WebSocket fan-out
+    websocket_client_queue_size: int = 256
+    websocket_send_timeout_seconds: float = 10.0
+    websocket_redis_backplane: bool = False  # relay broadcasts across uvicorn workers
+    websocket_backplane_channel: str = "unity:ws:broadcast"
+    
     # Session Management
     session_expiry_hours: int = 24
     session_cookie_name: str = "unity_session"
@@ -92,9 +177,17 @@ class Settings(BaseSettings):
     session_cookie_httponly: bool = True
     session_cookie_samesite: str = "lax"
     
+    # Principal cache (per-process, keyed by token subject)
+    principal_cache_enabled: bool = True
+    principal_cache_max_entries: int = 1024
+    principal_cache_ttl_seconds: float = 60.0  # bounds staleness across workers
+    
     # API Key Configuration
     api_key_expiry_days: int = 90
     api_key_prefix: str = "unity_"
+    api_key_cache_max_entries: int = 1024
+    api_key_cache_ttl_seconds: float = 30.0  # bounds revocation lag across workers
+    api_key_usage_flush_interval_seconds: float = 10.0  # last-used/uses_count write-behind
     
     # Password Policy
     password_min_length: int = 8
@@ -108,6 +201,17 @@ class Settings(BaseSettings):
     max_login_attempts: int = 5
     login_attempt_window_minutes: int = 15
     lockout_duration_minutes: int = 30
+    rate_limit_backend: str = "memory"  # "memory" (per process) or "redis" (shared by all workers)
+    rate_limit_redis_prefix: str = "unity:rl:"
+    rate_limit_sweep_interval_seconds: float = 60.0  # drop idle in-process buckets
+
+    # Notification Delivery
+    notification_coalesce_seconds: float = 5.0  # merge alerts to one channel into a digest (0 = off)
+    notification_max_concurrency: int = 8  # deliveries in flight across all channels
+    notification_max_retries: int = 3  # per message, on transport errors and 429/5xx
+    notification_retry_backoff_seconds: float = 1.0  # first retry delay, doubled per retry
+    notification_http_timeout_seconds: float = 10.0
+    notification_max_connections_per_channel: int = 4
 
     # OAuth2 Configuration
     github_client_id: str = ""
@@ -140,6 +244,33 @@ class Settings(BaseSettings):
             return {"check_same_thread": False}
         return {}
 
+    def get_async_database_url(self) -> str:
+        """Get the database URL for the async engine (asyncpg / aiosqlite driver)."""
+        if self.async_database_url:
+            return self.async_database_url
+        scheme, sep, rest = self.database_url.partition("://")
+        if scheme.startswith("postgresql"):
+            return f"postgresql+asyncpg{sep}{rest}"
+        if scheme.startswith("sqlite"):
+            return f"sqlite+aiosqlite{sep}{rest}"
+        return self.database_url
+
+    def get_engine_options(self) -> dict:
+        """Get connection pool options shared by the sync and async engines."""
+        options = {
+            "pool_pre_ping": self.database_pool_pre_ping,
+            "pool_recycle": self.database_pool_recycle_seconds,
+            "query_cache_size": self.database_statement_cache_size,
+        }
+        if not self.is_sqlite:
+            # SQLite keeps SQLAlchemy's default pool for its URL type
+            options.update(
+                pool_size=self.database_pool_size,
+                max_overflow=self.database_max_overflow,
+                pool_timeout=self.database_pool_timeout_seconds,
+            )
+        return options
+
 
 # Global settings instance
 settings = Settings()
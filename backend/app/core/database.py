@@ -2,19 +2,30 @@
 Database configuration and session management.
 
 Provides SQLAlchemy engine, session factory, and dependency injection
-for database access throughout the application.
+for database access throughout the application. The async engine used by
+the API hot paths lives in app.core.async_database.
 """
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.db_pool import TimedQueuePool, register_engine
+
+# Pool sizing, pre-ping and recycling from settings; server databases get a
+# pool that records checkout wait times
+engine_options = settings.get_engine_options()
+if not settings.is_sqlite:
+    engine_options["poolclass"] = TimedQueuePool
 
 # Create database engine with configuration from settings
 engine = create_engine(
     settings.database_url,
-    connect_args=settings.get_database_connect_args()
+    connect_args=settings.get_database_connect_args(),
+    pool_logging_name="sync",
+    **engine_options
 )
+register_engine("sync", engine)
 
 # Session factory for creating database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -0,0 +1,130 @@
+"""
+Connection Pool Instrumentation
+
+Queue pools that time every connection checkout, so pool exhaustion shows up
+as a number instead of as slow requests. Each pool records into the
+PoolCheckoutStats registered under its logging name ("sync", "async"), which
+survives the pool being recreated (e.g. after engine.dispose()).
+
+Engines registered with register_engine() are reported by get_pool_metrics().
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Checkout waits kept for the percentile estimate
+RECENT_WAITS = 1024
+
+
+class PoolCheckoutStats:
+    """Checkout wait times of one connection pool."""
+
+    def __init__(self, window: int = RECENT_WAITS):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            self._recent.append(seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            recent = sorted(self._recent)
+            p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / attempts * 1000, 3) if attempts else 0.0,
+                "p95_wait_ms": round(p95 * 1000, 3),
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+_checkout_stats: Dict[str, PoolCheckoutStats] = {}
+_engines: Dict[str, Engine] = {}
+_stats_lock = threading.Lock()
+
+
+def get_checkout_stats(name: str) -> PoolCheckoutStats:
+    """Get (or create) the checkout stats registered under a pool name."""
+    stats = _checkout_stats.get(name)
+    if stats is None:
+        with _stats_lock:
+            stats = _checkout_stats.setdefault(name, PoolCheckoutStats())
+    return stats
+
+
+class _TimedCheckout:
+    """Mixin timing QueuePool._do_get, where a checkout waits for a free connection."""
+
+    def _do_get(self):
+        stats = get_checkout_stats(self._orig_logging_name or "default")
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        stats.record(time.perf_counter() - started)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool recording checkout wait times."""
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool recording checkout wait times."""
+
+
+def pool_status(engine: Engine, name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Current occupancy and checkout wait times of an engine's pool.
+
+    Args:
+        engine: Sync engine (for an AsyncEngine pass its sync_engine)
+        name: Pool logging name the stats are registered under
+    """
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+    name = name or getattr(pool, "_orig_logging_name", None)
+    if name in _checkout_stats:
+        status["checkout"] = _checkout_stats[name].get_stats()
+    return status
+
+
+def register_engine(name: str, engine: Engine):
+    """Include an engine's pool in get_pool_metrics() under name."""
+    _engines[name] = engine
+
+
+def unregister_engine(name: str):
+    _engines.pop(name, None)
+
+
+def get_pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Pool occupancy and checkout wait times of every registered engine."""
+    return {name: pool_status(engine, name) for name, engine in list(_engines.items())}
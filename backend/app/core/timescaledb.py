@@ -5,9 +5,11 @@ Handles TimescaleDB extension detection, hypertable creation, and optimizations.
 """
 from sqlalchemy import text
 from sqlalchemy.orm import Session
-from typing import List, Tuple
+from typing import Iterable, List, Tuple
 import logging
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -148,7 +150,8 @@ class TimescaleDBManager:
                 text(f"""
                     SELECT add_retention_policy(
                         '{table_name}',
-                        INTERVAL '{retain_for}'
+                        INTERVAL '{retain_for}',
+                        if_not_exists => TRUE
                     )
                 """)
             )
@@ -170,13 +173,116 @@ class TimescaleDBManager:
         success = True
         
         # Create hypertable
-        success &= self.create_hypertable('plugin_metrics', 'time', '7 days')
+        success &= self.create_hypertable('plugin_metrics', 'timestamp', '7 days')
         
         # Enable compression (compress after 7 days)
         success &= self.set_compression('plugin_metrics', '7 days')
         
-        # Set retention policy (30 days)
-        success &= self.set_retention_policy('plugin_metrics', '30 days')
+        # Raw samples only need to outlive the finest rollup's refresh window
+        success &= self.set_retention_policy(
+            'plugin_metrics', f'{settings.metric_raw_retention_days} days'
+        )
+        
+        return success
+    
+    def create_continuous_aggregate(
+        self,
+        view_name: str,
+        bucket_interval: str,
+        start_offset: str,
+        end_offset: str,
+        schedule_interval: str
+    ) -> bool:
+        """
+        Create a plugin_metrics continuous aggregate with a refresh policy.
+        
+        The view holds avg/min/max/last/count of numeric metric values per
+        (plugin_id, metric_name, bucket), matching the plugin_metric_rollups
+        table used when TimescaleDB is unavailable.
+        
+        Args:
+            view_name: Name of the materialized view
+            bucket_interval: time_bucket() width, e.g. '1 minute'
+            start_offset: Refresh window start relative to now
+            end_offset: Refresh window end relative to now
+            schedule_interval: How often the refresh policy runs
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            # CREATE MATERIALIZED VIEW ... WITH (timescaledb.continuous) cannot
+            # run inside a transaction block
+            connection = self.session.connection().execution_options(isolation_level="AUTOCOMMIT")
+            connection.execute(
+                text(f"""
+                    CREATE MATERIALIZED VIEW IF NOT EXISTS {view_name}
+                    WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+                    SELECT
+                        time_bucket(INTERVAL '{bucket_interval}', "timestamp") AS bucket,
+                        plugin_id,
+                        metric_name,
+                        avg((value #>> '{{}}')::double precision) AS avg_value,
+                        min((value #>> '{{}}')::double precision) AS min_value,
+                        max((value #>> '{{}}')::double precision) AS max_value,
+                        last((value #>> '{{}}')::double precision, "timestamp") AS last_value,
+                        count(*) AS sample_count
+                    FROM plugin_metrics
+                    WHERE jsonb_typeof(value) = 'number'
+                    GROUP BY bucket, plugin_id, metric_name
+                    WITH NO DATA
+                """)
+            )
+            connection.execute(
+                text(f"""
+                    SELECT add_continuous_aggregate_policy(
+                        '{view_name}',
+                        start_offset => INTERVAL '{start_offset}',
+                        end_offset => INTERVAL '{end_offset}',
+                        schedule_interval => INTERVAL '{schedule_interval}',
+                        if_not_exists => TRUE
+                    )
+                """)
+            )
+            logger.info(f"Created continuous aggregate: {view_name}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to create continuous aggregate {view_name}: {e}")
+            self.session.rollback()
+            return False
+    
+    def setup_metric_rollups(self, tiers: Iterable) -> bool:
+        """
+        Create continuous aggregates and retention for each rollup tier.
+        
+        Args:
+            tiers: RollupTier definitions (name, interval, retention_days, view)
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.is_available():
+            logger.warning("TimescaleDB not available, skipping continuous aggregates")
+            return False
+        
+        # Refresh each tier a little behind real time; coarser tiers less often
+        policies = {
+            "1m": ("2 hours", "1 minute", "1 minute"),
+            "1h": ("1 day", "1 hour", "30 minutes"),
+            "1d": ("3 days", "1 day", "1 hour"),
+        }
+        
+        success = True
+        for tier in tiers:
+            start_offset, end_offset, schedule = policies.get(
+                tier.name,
+                (f"{3 * tier.bucket_seconds} seconds", tier.interval, tier.interval)
+            )
+            success &= self.create_continuous_aggregate(
+                tier.view, tier.interval, start_offset, end_offset, schedule
+            )
+            success &= self.set_retention_policy(tier.view, f"{tier.retention_days} days")
         
         return success
     
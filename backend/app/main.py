@@ -2,6 +2,7 @@ from fastapi import FastAPI
 import app.models as models
 from fastapi.middleware.cors import CORSMiddleware
 from app.middleware.tenant_context import TenantContextMiddleware
+from app.middleware.cache_middleware import CacheMiddleware
 from app.routers import (
     profiles, ai, settings, reports, knowledge, system,
     terminal, plugins, thresholds, alerts, push, auth, users, credentials, docker_hosts
@@ -16,12 +17,26 @@ from app.routers.orchestration import deploy
 from app.database import engine, Base, get_db
 from app.services import report_generation
 from app.services.snapshot_service import SnapshotService
-from app.services.ssh import SSHService
 from app.core.k8s_autodiscovery import autodiscover_k8s_cluster
 from app.core.docker_autodiscovery import autodiscover_docker_host
-from app.services.threshold_monitor import ThresholdMonitor
+from app.services.monitoring.threshold_monitor import ThresholdMonitor
 from app.services.plugin_manager import PluginManager
-from app.services.k8s_reconciler import KubernetesReconciler
+from app.services.plugins.metric_ingestion import shutdown_metric_pipeline
+from app.services.auth.api_key_cache import shutdown_api_key_usage_buffer
+from app.services.monitoring.notification_dispatcher import shutdown_notification_dispatcher
+from app.services.plugins.execution_engine import get_execution_engine
+from app.plugins.executor import shutdown_executors
+from app.core.async_database import dispose_async_engine
+from app.services.core.ssh_pool import close_ssh_pool
+from app.services.containers.registry_client import close_registry_client
+from app.services.containers.security.scan_service import shutdown_scan_service
+from app.services.monitoring.metric_rollups import get_rollup_manager
+from app.services.monitoring.latest_values import get_latest_index
+from app.plugins.executor import get_thread_pool, run_in_executor
+from app.api.websocket import manager as ws_manager
+from app.core.config import settings as app_config
+from app.services.k8s_reconciler import get_reconciliation_engine
+from app.services.k8s_informer import get_informer_manager
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from sqlalchemy.orm import Session
 from sqlalchemy import text
@@ -51,6 +66,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Configure response caching (added before the tenant middleware so it runs
+# inside it and can key on the tenant)
+if app_config.response_cache_enabled:
+    app.add_middleware(CacheMiddleware)
+
 # Configure multi-tenancy middleware (disabled by default for backward compatibility)
 app.add_middleware(
     TenantContextMiddleware,
@@ -69,21 +89,24 @@ async def generate_all_server_reports_for_type(report_type: str):
     db: Session = next(db_gen)
     try:
         print(f"Running {report_type} report generation job...", flush=True)
-        profiles = db.query(models.ServerProfile).all()
-        for profile in profiles:
-            print(f"Generating {report_type} report for server: {profile.name} (ID: {profile.id})", flush=True)
-            if report_type == "24-hour":
-                await report_generation.generate_24_hour_report(db, profile.id)
-            elif report_type == "7-day":
-                await report_generation.generate_7_day_report(db, profile.id)
-            elif report_type == "monthly":
-                await report_generation.generate_monthly_report(db, profile.id)
-        print(f"{report_type} report generation job completed.", flush=True)
+        server_ids = [server_id for (server_id,) in db.query(models.ServerProfile.id).all()]
     except Exception as e:
         print(f"Error during {report_type} report generation: {e}", flush=True)
+        return
     finally:
         db.close()
 
+    # Servers are generated concurrently, each with its own session
+    try:
+        result = await report_generation.generate_reports_for_servers(report_type, server_ids)
+        print(
+            f"{report_type} report generation job completed: "
+            f"{len(result['generated'])} generated, {len(result['failed'])} failed.",
+            flush=True
+        )
+    except Exception as e:
+        print(f"Error during {report_type} report generation: {e}", flush=True)
+
 
 async def take_all_server_snapshots():
     db_gen = get_db()
@@ -91,18 +114,8 @@ async def take_all_server_snapshots():
     try:
         print("Running server snapshot job...", flush=True)
         profiles = db.query(models.ServerProfile).all()
-        for profile in profiles:
-            print(f"Taking snapshot for server: {profile.name} (ID: {profile.id})", flush=True)
-            
-            ssh_test_service = SSHService(profile)
-            ssh_test_result = await ssh_test_service.verify_connection()
-            print(f"SSH Connection Test for {profile.name} (ID: {profile.id}): {ssh_test_result}", flush=True)
-            
-            if ssh_test_result["success"]:
-                await SnapshotService.take_remote_snapshot(db, profile)
-            else:
-                print(f"Skipping snapshot for {profile.name} due to SSH connection failure: {ssh_test_result['message']}", flush=True)
-        print("Server snapshot job completed.", flush=True)
+        snapshots = await SnapshotService.take_all_remote_snapshots(db, profiles)
+        print(f"Server snapshot job completed: {len(snapshots)}/{len(profiles)} servers", flush=True)
     except Exception as e:
         print(f"Error during server snapshot generation: {e}", flush=True)
     finally:
@@ -125,7 +138,7 @@ async def check_thresholds():
 
 
 async def execute_enabled_plugins():
-    """Execute all enabled plugins and store metrics"""
+    """Execute all enabled plugins concurrently and store metrics"""
     global plugin_manager
 
     if not plugin_manager:
@@ -135,65 +148,65 @@ async def execute_enabled_plugins():
     db_gen = get_db()
     db: Session = next(db_gen)
     try:
-        # Recreate plugin manager with current db session
-        pm = PluginManager(db)
-
         logger.info("Running plugin execution job...")
 
-        # Get all enabled plugins
+        # Get all enabled plugins that are loaded in the plugin manager
         plugins = db.query(models.Plugin).filter(models.Plugin.enabled == True).all()
+        instances = {
+            plugin.id: plugin_manager.plugin_instances[plugin.id]
+            for plugin in plugins
+            if plugin.id in plugin_manager.plugin_instances
+        }
+
+        # Bounded concurrent run with per-plugin timeouts and jittered starts
+        results = await get_execution_engine().run_all(instances)
+
+        succeeded = sum(1 for r in results if r.success)
+        for r in results:
+            if not r.success:
+                logger.warning(f"Plugin {r.plugin_id} execution {r.status}: {r.error}")
+        slowest = max(results, key=lambda r: r.duration_ms + r.queue_wait_ms, default=None)
+
+        logger.info(
+            f"Plugin execution job completed: {succeeded}/{len(results)} succeeded"
+            + (f", slowest {slowest.plugin_id} ({slowest.duration_ms}ms run, "
+               f"{slowest.queue_wait_ms}ms queued)" if slowest else "")
+        )
 
-        for plugin in plugins:
-            try:
-                logger.info(f"Executing plugin: {plugin.id}")
-                result = await pm.execute_plugin(plugin.id)
+    except Exception as e:
+        logger.error(f"Error during plugin execution: {e}")
+    finally:
+        db.close()
 
-                if result.get("success"):
-                    logger.info(f"Plugin {plugin.id} executed successfully")
-                else:
-                    logger.warning(f"Plugin {plugin.id} execution failed: {result.get('error')}")
 
-            except Exception as e:
-                logger.error(f"Error executing plugin {plugin.id}: {e}")
+def seed_latest_values():
+    """Load current metric values and plugin executions into the latest-value index"""
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        return get_latest_index().seed(db)
+    finally:
+        db.close()
 
-        logger.info("Plugin execution job completed")
 
+async def refresh_metric_rollups():
+    """Bring plugin metric rollup tiers up to date"""
+    try:
+        written = await run_in_executor(get_thread_pool(), get_rollup_manager().refresh)
+        if written:
+            logger.debug(f"Metric rollups refreshed: {written}")
     except Exception as e:
-        logger.error(f"Error during plugin execution: {e}")
-    finally:
-        db.close()
+        logger.error(f"Error during metric rollup refresh: {e}")
 
 
 async def reconcile_kubernetes_resources():
-    """Reconcile all Kubernetes resources in enabled clusters"""
-    db_gen = get_db()
-    db: Session = next(db_gen)
+    """Queue all Kubernetes resources in enabled clusters for reconciliation"""
     try:
-        logger.info("Running Kubernetes reconciliation job...")
-
-        # Create reconciler instance
-        reconciler = KubernetesReconciler(db)
-
-        # Reconcile all resources
-        result = await reconciler.reconcile_all()
-
-        if result.get("error"):
-            logger.error(f"Kubernetes reconciliation failed: {result.get('error')}")
-        else:
-            logger.info(
-                f"Kubernetes reconciliation completed: "
-                f"{result['success']}/{result['total']} succeeded, "
-                f"{result['failed']} failed, "
-                f"{result['drift_detected']} drift detected, "
-                f"{result['changes_applied']} changes applied"
-            )
-
+        engine = get_reconciliation_engine()
+        queued = await engine.resync()
+        logger.debug(f"Kubernetes reconciliation resync queued {queued} resource(s): {engine.get_stats()}")
     except Exception as e:
-        logger.error(f"Error during Kubernetes reconciliation: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-    finally:
-        db.close()
+        logger.error(f"Error during Kubernetes reconciliation resync: {e}")
 
 
 # Include Routers (frontend adds /api prefix, nginx strips it)
@@ -261,6 +274,24 @@ async def startup_event():
             logger.exception("Plugin system initialization failed")
 
         
+        # Relay WebSocket broadcasts between workers
+        if app_config.websocket_redis_backplane:
+            try:
+                await ws_manager.start_backplane()
+            except Exception as e:
+                print(f"   ❌ WebSocket Redis backplane unavailable: {e}", flush=True)
+
+        # ============================================
+        # Seed latest-value index for dashboard reads
+        # ============================================
+        try:
+            seeded = await run_in_executor(get_thread_pool(), seed_latest_values)
+            print(f"\n📈 Latest-value index: {seeded['metrics']} series, "
+                  f"{seeded['executions']} plugin executions", flush=True)
+        except Exception as e:
+            print(f"   ❌ Error seeding latest-value index: {e}", flush=True)
+            logger.exception("Latest-value index seeding failed")
+
         # ============================================
         # Auto-discover Kubernetes Cluster
         # ============================================
@@ -359,14 +390,29 @@ async def startup_event():
         )
         print(f"   - Plugin execution: every 5 minutes", flush=True)
 
-        # Schedule Kubernetes reconciliation (every 30 seconds)
+        # Schedule metric rollup refresh (continuous aggregates need none)
+        if await run_in_executor(get_thread_pool(), get_rollup_manager().setup):
+            scheduler.add_job(
+                refresh_metric_rollups,
+                'interval',
+                seconds=app_config.metric_rollup_refresh_seconds,
+                id='metric_rollups',
+                max_instances=1,
+                coalesce=True
+            )
+            print(f"   - Metric rollups: every {app_config.metric_rollup_refresh_seconds} seconds", flush=True)
+
+        # Schedule Kubernetes reconciliation resync (watch events trigger in between)
+        get_reconciliation_engine().start()
         scheduler.add_job(
             reconcile_kubernetes_resources,
             'interval',
-            seconds=30,
-            id='k8s_reconciliation'
+            seconds=app_config.k8s_reconcile_interval_seconds,
+            id='k8s_reconciliation',
+            max_instances=1,
+            coalesce=True
         )
-        print(f"   - Kubernetes reconciliation: every 30 seconds", flush=True)
+        print(f"   - Kubernetes reconciliation: every {app_config.k8s_reconcile_interval_seconds} seconds", flush=True)
 
         scheduler.start()
         print("\n✅ Scheduler started successfully", flush=True)
@@ -407,7 +453,33 @@ async def shutdown_event():
     # Shutdown scheduler
     print("⏰ Shutting down scheduler...", flush=True)
     scheduler.shutdown()
+    get_execution_engine().cancel_all()
+    # Send alerts still waiting in a coalescing window (uses the thread pool)
+    await shutdown_notification_dispatcher()
+    shutdown_executors(wait=False)
     print("✅ Scheduler shut down", flush=True)
+
+    # Drain queued plugin metrics
+    print("📥 Flushing plugin metric ingestion queue...", flush=True)
+    shutdown_metric_pipeline()
+    print("✅ Metric ingestion pipeline stopped", flush=True)
+
+    # Write buffered API key usage
+    shutdown_api_key_usage_buffer()
+
+    # Close pooled SSH connections
+    await close_ssh_pool()
+    await close_registry_client()
+    await shutdown_scan_service()
+
+    await ws_manager.stop_backplane()
+
+    # Stop Kubernetes reconciliation and watches
+    await get_reconciliation_engine().stop()
+    get_informer_manager().stop_all()
+
+    # Close pooled async database connections
+    await dispose_async_engine()
     
     print("=" * 60, flush=True)
     print("👋 Unity shut down complete", flush=True)
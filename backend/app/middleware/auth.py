@@ -3,8 +3,10 @@ import time
 from typing import Callable
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
-from app.core.dependencies import get_current_user
-from app.core.database import SessionLocal
+from app.services.auth.principal import resolve_principal
+
+# Paths that never need a principal
+SKIP_AUTH_PATHS = ("/health", "/static", "/docs", "/redoc", "/openapi.json", "/favicon.ico")
 
 
 class AuthContextMiddleware(BaseHTTPMiddleware):
@@ -12,8 +14,11 @@ class AuthContextMiddleware(BaseHTTPMiddleware):
     Middleware to extract and attach authentication context to requests.
     
     This runs before route handlers and populates request.state with:
-    - user: Current authenticated user (if any)
+    - user: Current authenticated principal (if any)
     - auth_start_time: Request start time for logging
+    
+    The principal is resolved through the shared request-scoped resolver, so
+    route dependencies reuse it and a warm cache costs no database query.
     """
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
@@ -23,23 +28,13 @@ class AuthContextMiddleware(BaseHTTPMiddleware):
         
         # Try to extract user from request
         # Note: This is optional - dependencies will handle auth checks
-        try:
-            db = SessionLocal()
+        if not request.url.path.startswith(SKIP_AUTH_PATHS) and "authorization" in request.headers:
             try:
-                # Call get_current_user dependency manually
-                # This is just for logging/context, not authorization
-                user = await get_current_user(
-                    request=request,
-                    authorization=None,  # Will be extracted from headers
-                    db=db
-                )
-                request.state.user = user
-            finally:
-                db.close()
-        except Exception:
-            # Silently ignore auth errors in middleware
-            # Let the route dependencies handle proper auth checks
-            pass
+                request.state.user = resolve_principal(request)
+            except Exception:
+                # Silently ignore auth errors in middleware
+                # Let the route dependencies handle proper auth checks
+                pass
         
         # Process the request
         response = await call_next(request)
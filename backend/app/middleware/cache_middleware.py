@@ -2,33 +2,96 @@
 Response Caching Middleware
 
 Caches API responses to reduce database load and improve response times.
+
+Responses are cached as encoded bytes in the two-tier ResponseCache (an
+in-process LRU in front of Redis), so hits are replayed without parsing or
+re-serializing JSON. The cache key includes the tenant, the caller's role and
+a hash of their credentials, so one user never sees another user's cached
+data. Every response carries a strong ETag and matching If-None-Match
+requests get a 304.
+
+Write paths invalidate by tag (see invalidate_cache_tags), which allows much
+longer TTLs than a time-only cache.
 """
 import hashlib
-import json
 import logging
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
+from dataclasses import dataclass
+from http.cookies import SimpleCookie
+from typing import List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.services.cache import cache
+from app.core.config import settings
+from app.services.response_cache import (
+    TAG_ALERTS,
+    TAG_CONTAINERS,
+    TAG_PLUGINS,
+    CachedResponse,
+    ResponseCache,
+    get_response_cache,
+    make_etag,
+)
 
 logger = logging.getLogger(__name__)
 
 
-class CacheMiddleware(BaseHTTPMiddleware):
+@dataclass(frozen=True)
+class CacheRule:
+    """TTL and invalidation tags for paths starting with prefix."""
+    prefix: str
+    ttl: int
+    tags: Tuple[str, ...] = ()
+
+
+# First matching prefix wins. Dashboard values and a plugin's own health,
+# metrics and executions change with every plugin run, so they keep a short
+# TTL; the rest is invalidated by write paths. Unmatched paths have no
+# invalidation and fall back to the middleware's short default TTL.
+DEFAULT_RULES: Tuple[CacheRule, ...] = (
+    CacheRule("/api/v1/monitoring/dashboard", 30, (TAG_PLUGINS, TAG_ALERTS)),
+    CacheRule("/plugins/v2/", 30, (TAG_PLUGINS,)),
+    CacheRule("/api/v1/monitoring/alerts", 600, (TAG_ALERTS,)),
+    CacheRule("/alerts", 600, (TAG_ALERTS,)),
+    CacheRule("/plugins", 600, (TAG_PLUGINS,)),
+    CacheRule("/api/containers", 600, (TAG_CONTAINERS,)),
+)
+
+# Identity headers folded into the key (hashed, never stored)
+IDENTITY_HEADERS = (b"authorization", b"x-api-key")
+
+
+def _header(headers: Sequence[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CacheMiddleware:
     """Middleware to cache GET request responses."""
-    
-    def __init__(self, app, cache_ttl: int = 60, excluded_paths: list = None):
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        cache_ttl: int = settings.response_cache_default_ttl_seconds,
+        excluded_paths: list = None,
+        rules: Sequence[CacheRule] = DEFAULT_RULES,
+        cache: Optional[ResponseCache] = None,
+        max_body_bytes: int = settings.response_cache_max_body_bytes
+    ):
         """
         Initialize cache middleware.
-        
+
         Args:
-            app: FastAPI application
-            cache_ttl: Default cache TTL in seconds
+            app: ASGI application
+            cache_ttl: TTL for paths without a matching rule
             excluded_paths: Paths to exclude from caching
+            rules: Per-prefix TTLs and invalidation tags
+            cache: Response cache (defaults to the global one)
+            max_body_bytes: Larger responses are streamed through uncached
         """
-        super().__init__(app)
+        self.app = app
         self.cache_ttl = cache_ttl
         self.excluded_paths = excluded_paths or [
             "/docs",
@@ -36,120 +99,186 @@ class CacheMiddleware(BaseHTTPMiddleware):
             "/health",
             "/ws/",  # WebSocket endpoints
         ]
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Process request with caching."""
-        
-        # Only cache GET requests
-        if request.method != "GET":
-            return await call_next(request)
-        
-        # Check if path should be excluded
-        if any(request.url.path.startswith(path) for path in self.excluded_paths):
-            return await call_next(request)
-        
-        # Generate cache key
-        cache_key = self._generate_cache_key(request)
-        
-        # Try to get from cache
-        if cache.is_available:
-            try:
-                cached_response = await cache.get(cache_key)
-                if cached_response:
-                    logger.debug(f"Cache hit: {cache_key}")
-                    return JSONResponse(
-                        content=cached_response["data"],
-                        status_code=cached_response["status_code"],
-                        headers=cached_response.get("headers", {})
-                    )
-            except Exception as e:
-                logger.warning(f"Cache get error: {e}")
-        
-        # Call the actual endpoint
-        response = await call_next(request)
-        
-        # Cache successful responses
-        if response.status_code == 200 and cache.is_available:
+        self.rules = tuple(rules)
+        self._cache = cache
+        self.max_body_bytes = max_body_bytes
+
+    @property
+    def cache(self) -> ResponseCache:
+        if self._cache is None:
+            self._cache = get_response_cache()
+        return self._cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if any(path.startswith(p) for p in self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = scope["headers"]
+        cache_control = (_header(request_headers, b"cache-control") or b"").lower()
+        if b"no-store" in cache_control:
+            await self.app(scope, receive, send)
+            return
+
+        rule = self._rule_for_path(path)
+        key = self._generate_cache_key(scope)
+        if_none_match = _header(request_headers, b"if-none-match")
+
+        try:
+            lookup = await self.cache.lookup(key, rule.tags)
+        except Exception as e:
+            logger.warning(f"Cache lookup error: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        if lookup.entry is not None:
+            logger.debug(f"Cache hit: {path}")
+            await self._send_cached(send, lookup.entry, if_none_match, b"HIT")
+            return
+
+        status = 0
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        size = 0
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal status, start, size, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if status != 200 or not self._cacheable_headers(message.get("headers", [])):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            size += len(body)
+            if size > self.max_body_bytes:
+                # Too large to cache; stream what we have and the rest as-is
+                passthrough = True
+                await send(start)
+                if chunks:
+                    await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+                await send(message)
+                return
+
+            chunks.append(body)
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            headers = [
+                (k.decode("latin-1"), v.decode("latin-1"))
+                for k, v in start.get("headers", [])
+                if k.lower() not in (b"etag", b"x-cache")
+            ]
+            entry = CachedResponse(status=status, headers=headers, body=body, etag=make_etag(body))
             try:
-                # Read response body (create a copy since iterator can only be read once)
-                response_body = b""
-                async for chunk in response.body_iterator:
-                    response_body += chunk
-                
-                # Parse JSON if possible
-                try:
-                    data = json.loads(response_body.decode())
-                except:
-                    # Not JSON, skip caching - return new response with body
-                    return Response(
-                        content=response_body,
-                        status_code=response.status_code,
-                        headers=dict(response.headers),
-                        media_type=response.media_type
-                    )
-                
-                # Cache the response
-                cache_data = {
-                    "data": data,
-                    "status_code": response.status_code,
-                    "headers": dict(response.headers)
-                }
-                
-                # Determine TTL based on path
-                ttl = self._get_ttl_for_path(request.url.path)
-                
-                await cache.set(cache_key, cache_data, ttl=ttl)
-                logger.debug(f"Cached response: {cache_key} (TTL: {ttl}s)")
-                
-                # Return new response with cached data
-                return JSONResponse(
-                    content=data,
-                    status_code=response.status_code,
-                    headers=dict(response.headers)
-                )
+                await self.cache.store(lookup, entry, rule.ttl)
             except Exception as e:
                 logger.warning(f"Cache set error: {e}")
-                # Return new response if caching fails
-                return Response(
-                    content=response_body if 'response_body' in locals() else b"",
-                    status_code=response.status_code,
-                    headers=dict(response.headers),
-                    media_type=response.media_type
-                )
-        
-        return response
-    
-    def _generate_cache_key(self, request: Request) -> str:
-        """Generate cache key from request."""
-        # Include path and query parameters
-        key_parts = [request.url.path]
-        
+            await self._send_cached(send, entry, if_none_match, b"MISS")
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_cached(
+        self,
+        send: Send,
+        entry: CachedResponse,
+        if_none_match: Optional[bytes],
+        cache_status: bytes
+    ):
+        etag = entry.etag.encode("latin-1")
+        if if_none_match and self._etag_matches(if_none_match, etag):
+            headers = [
+                (k.encode("latin-1"), v.encode("latin-1")) for k, v in entry.headers
+                if k.lower() in ("cache-control", "vary", "x-tenant-id")
+            ]
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": headers + [(b"etag", etag), (b"x-cache", cache_status)],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in entry.headers]
+        await send({
+            "type": "http.response.start",
+            "status": entry.status,
+            "headers": headers + [(b"etag", etag), (b"x-cache", cache_status)],
+        })
+        await send({"type": "http.response.body", "body": entry.body})
+
+    @staticmethod
+    def _etag_matches(if_none_match: bytes, etag: bytes) -> bool:
+        if if_none_match.strip() == b"*":
+            return True
+        candidates = [c.strip() for c in if_none_match.split(b",")]
+        # Weak comparison, as required for If-None-Match
+        return any(c.removeprefix(b"W/") == etag for c in candidates)
+
+    @staticmethod
+    def _cacheable_headers(headers: Sequence[Tuple[bytes, bytes]]) -> bool:
+        if _header(headers, b"set-cookie") is not None:
+            return False
+        cache_control = (_header(headers, b"cache-control") or b"").lower()
+        return b"no-store" not in cache_control and b"private" not in cache_control
+
+    def _rule_for_path(self, path: str) -> CacheRule:
+        for rule in self.rules:
+            if path.startswith(rule.prefix):
+                return rule
+        return CacheRule(path, self.cache_ttl)
+
+    def _generate_cache_key(self, scope: Scope) -> str:
+        """Generate cache key from request path, query, tenant and caller."""
+        state = scope.get("state") or {}
+        headers = scope["headers"]
+
         # Sort query params for consistent keys
-        if request.url.query:
-            query_params = sorted(request.url.query.split("&"))
-            key_parts.extend(query_params)
-        
-        key_string = "|".join(key_parts)
-        
-        # Hash for shorter keys
-        key_hash = hashlib.md5(key_string.encode()).hexdigest()
-        
-        return f"api:cache:{key_hash}"
-    
-    def _get_ttl_for_path(self, path: str) -> int:
-        """Get cache TTL based on path."""
-        # Dashboard data - short TTL
-        if "/dashboard" in path:
-            return 60  # 1 minute
-        
-        # Plugin list - medium TTL
-        if "/plugins" in path and "/metrics" not in path:
-            return 300  # 5 minutes
-        
-        # Metrics - short TTL
-        if "/metrics" in path:
-            return 60  # 1 minute
-        
-        # Default TTL
-        return self.cache_ttl
+        query = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
 
+        user = state.get("user")
+        role = str(getattr(user, "role", None) or "anonymous")
+
+        identity = hashlib.sha256()
+        for name in IDENTITY_HEADERS:
+            identity.update(name + b"=" + (_header(headers, name) or b"") + b";")
+        cookie_header = _header(headers, b"cookie")
+        if cookie_header:
+            cookie = SimpleCookie()
+            try:
+                cookie.load(cookie_header.decode("latin-1"))
+            except Exception:
+                pass
+            morsel = cookie.get(settings.session_cookie_name)
+            if morsel is not None:
+                identity.update(b"session=" + morsel.value.encode("latin-1"))
+
+        key_string = "|".join([
+            state.get("tenant_id") or "default",
+            role,
+            identity.hexdigest(),
+            scope["path"],
+            urlencode(sorted(query)),
+        ])
+
+        # Hash for shorter keys
+        return hashlib.sha256(key_string.encode()).hexdigest()
@@ -7,9 +7,10 @@ for use in tenant-scoped queries throughout the application.
 from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi import Request
 from typing import Optional
-from jose import jwt, JWTError
 import logging
 
+from app.services.auth.principal import get_token_payload, resolve_principal
+
 logger = logging.getLogger(__name__)
 
 
@@ -55,10 +56,8 @@ class TenantContextMiddleware(BaseHTTPMiddleware):
             return "default"
         
         # Try to extract from Authorization header (JWT)
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            token = auth_header.replace("Bearer ", "")
-            tenant_id = self._extract_from_jwt(token)
+        if request.headers.get("Authorization", "").startswith("Bearer "):
+            tenant_id = self._extract_from_jwt(request)
             if tenant_id:
                 return tenant_id
         
@@ -72,15 +71,24 @@ class TenantContextMiddleware(BaseHTTPMiddleware):
         # Default tenant for backward compatibility
         return "default"
     
-    def _extract_from_jwt(self, token: str) -> Optional[str]:
-        """Extract tenant_id from JWT token"""
+    def _extract_from_jwt(self, request: Request) -> Optional[str]:
+        """
+        Extract tenant_id from the request's JWT (tenant_id claim, else the
+        principal's tenant).
+        
+        Uses the request-scoped token payload and principal shared with the
+        auth dependencies, so the token is decoded and verified only once.
+        """
         try:
-            # Decode without verification for now (verification happens in auth)
-            # In production, you should verify the signature
-            payload = jwt.decode(token, options={"verify_signature": False})
-            return payload.get("tenant_id")
+            payload = get_token_payload(request)
+            if not payload:
+                return None
+            if payload.get("tenant_id"):
+                return payload["tenant_id"]
+            principal = resolve_principal(request)
+            return principal.tenant_id if principal else None
         except Exception as e:
-            logger.debug(f"Failed to decode JWT: {e}")
+            logger.debug(f"Failed to resolve tenant from JWT: {e}")
             return None
     
     def _extract_from_api_key(self, api_key: str) -> Optional[str]:
@@ -565,6 +565,8 @@ class KubernetesResource(Base):
     reconciliation_status = Column(String(50), default='pending', index=True)  # pending, in_progress, success, failed, drift_detected
     reconciliation_message = Column(Text, nullable=True)
     drift_detected = Column(Boolean, default=False, index=True)  # Whether current state differs from desired
+    desired_hash = Column(String(64), nullable=True)  # Normalized manifest hash at the last clean reconcile
+    observed_resource_version = Column(String(64), nullable=True)  # Live resourceVersion at the last clean reconcile
 
     # Resource metadata
     labels = Column(JSON().with_variant(JSONB, "postgresql"), default={})  # K8s labels
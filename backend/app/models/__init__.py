@@ -4,7 +4,7 @@ Database models for Unity.
 from app.models.plugin import (
     Plugin, 
     PluginMetric, 
-    
+    PluginMetricRollup,
     PluginExecution,
     PluginAlert, 
     AlertHistory
@@ -27,6 +27,7 @@ from app.models.notifications import NotificationChannel, NotificationLog
 __all__ = [
     "Plugin",
     "PluginMetric", 
+    "PluginMetricRollup",
     "PluginExecution",
     "PluginAlert",
     "AlertHistory",
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, PrimaryKeyConstraint
-from sqlalchemy import JSON
+from sqlalchemy import Column, Integer, String, DateTime, Date, Float, Text, Boolean, ForeignKey, PrimaryKeyConstraint
+from sqlalchemy import JSON, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship # Import relationship for ORM
@@ -97,6 +97,43 @@ class KnowledgeItem(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 
+class ServerDailyRollup(Base):
+    """
+    Per-server, per-day aggregates of snapshot metrics.
+
+    Weekly and monthly reports merge these rows instead of rescanning raw
+    snapshots. Sums and counts are kept (not averages) so days merge exactly;
+    p95 is per day and only bounds the p95 of a longer period.
+    """
+    __tablename__ = "server_daily_rollups"
+
+    server_id = Column(Integer, ForeignKey('server_profiles.id', ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    tenant_id = Column(String(50), nullable=False, default="default", index=True)
+    snapshot_count = Column(Integer, nullable=False, default=0)
+
+    cpu_count = Column(Integer, nullable=False, default=0)
+    cpu_sum = Column(Float)
+    cpu_min = Column(Float)
+    cpu_max = Column(Float)
+    cpu_p95 = Column(Float)
+
+    memory_count = Column(Integer, nullable=False, default=0)
+    memory_sum = Column(Float)
+    memory_min = Column(Float)
+    memory_max = Column(Float)
+    memory_p95 = Column(Float)
+
+    disk_count = Column(Integer, nullable=False, default=0)
+    disk_sum = Column(Float)
+    disk_min = Column(Float)
+    disk_max = Column(Float)
+    disk_p95 = Column(Float)
+
+    temperatures = Column(JSON().with_variant(JSONB, "postgresql"), default={}) # {"sensor.sub": {"sum": s, "count": n, "max": m}}
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class ServerSnapshot(Base):
     __tablename__ = "server_snapshots"
 
@@ -107,4 +144,8 @@ class ServerSnapshot(Base):
 
     server_profile = relationship("ServerProfile", backref="snapshots")
 
+    __table_args__ = (
+        Index('idx_server_snapshots_server_time', 'server_id', 'timestamp'),
+    )
+
 
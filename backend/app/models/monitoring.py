@@ -91,6 +91,7 @@ class NotificationLog(Base):
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     success = Column(Boolean)
     message = Column(Text, nullable=True) # Success or error message
+    latency_ms = Column(Float, nullable=True) # Delivery time including retries
 
     alert = relationship("Alert", backref="notification_logs")
     channel = relationship("AlertChannel", backref="notification_logs")
@@ -6,7 +6,7 @@ Core models for plugin management, metrics storage, and status tracking.
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, Text, ForeignKey, Index, JSON
+from sqlalchemy import Column, String, Boolean, DateTime, Float, Integer, Text, ForeignKey, Index, JSON
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -88,6 +88,33 @@ class PluginMetric(Base):
         return f"<PluginMetric(plugin={self.plugin_id}, metric={self.metric_name}, timestamp={self.timestamp})>"
 
 
+class PluginMetricRollup(Base):
+    """
+    Pre-aggregated plugin metrics per rollup tier (1m, 1h, 1d).
+
+    Maintained by the rollup job on databases without TimescaleDB; on
+    TimescaleDB the same data lives in continuous aggregates instead.
+    """
+    __tablename__ = "plugin_metric_rollups"
+    
+    tier = Column(String(8), primary_key=True, nullable=False)
+    bucket = Column(DateTime(timezone=True), primary_key=True, nullable=False)
+    plugin_id = Column(String(100), primary_key=True, nullable=False)
+    metric_name = Column(String(200), primary_key=True, nullable=False)
+    avg_value = Column(Float)
+    min_value = Column(Float)
+    max_value = Column(Float)
+    last_value = Column(Float)
+    sample_count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index('idx_metric_rollups_series', 'tier', 'plugin_id', 'metric_name', 'bucket'),
+    )
+    
+    def __repr__(self):
+        return f"<PluginMetricRollup(tier={self.tier}, plugin={self.plugin_id}, metric={self.metric_name}, bucket={self.bucket})>"
+
+
 # class PluginStatus(Base):
 #     """Current status and health of each plugin."""
 #     __tablename__ = "plugin_status"
@@ -122,6 +149,8 @@ class PluginExecution(Base):
     status = Column(String(50), nullable=False, default='running')  # running, success, failed
     error_message = Column(Text)
     metrics_count = Column(Integer, default=0)
+    queue_wait_ms = Column(Integer)  # Time spent waiting for an execution slot
+    duration_ms = Column(Integer)  # Wall time of collect_data()
     
     # Relationships
     plugin = relationship("Plugin", back_populates="executions")
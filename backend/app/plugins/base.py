@@ -4,12 +4,22 @@ Base Plugin Interface for Unity
 All plugins (built-in and external) must inherit from PluginBase.
 """
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, List
+from functools import partial
+from typing import Any, Callable, Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 from pydantic import BaseModel
 
+from .executor import (
+    LoopBlockStats,
+    get_process_pool,
+    get_thread_pool,
+    measure_loop_blocking,
+    run_in_executor,
+)
+
 
 class PluginCategory(str, Enum):
     """Plugin categories for organization"""
@@ -38,6 +48,8 @@ class PluginMetadata(BaseModel):
     supported_os: List[str] = ["linux", "darwin", "windows"]
     dependencies: List[str] = []
     config_schema: Optional[Dict[str, Any]] = None
+    timeout_seconds: Optional[float] = None  # Max collect_data() runtime; None uses the engine default
+    blocking_io: bool = False  # collect_data() makes blocking calls; run it on the shared thread pool
 
 
 class PluginBase(ABC):
@@ -62,6 +74,7 @@ class PluginBase(ABC):
         self._last_execution: Optional[datetime] = None
         self._execution_count = 0
         self._last_error: Optional[str] = None
+        self._loop_block_stats = LoopBlockStats()
         
     @abstractmethod
     def get_metadata(self) -> PluginMetadata:
@@ -86,6 +99,61 @@ class PluginBase(ABC):
         """
         pass
     
+    @property
+    def loop_block_stats(self) -> LoopBlockStats:
+        """Event-loop blocking measurements for this plugin."""
+        # Subclasses that skip PluginBase.__init__ still get stats
+        if not hasattr(self, "_loop_block_stats"):
+            self._loop_block_stats = LoopBlockStats()
+        return self._loop_block_stats
+    
+    async def collect(self) -> Dict[str, Any]:
+        """
+        Run collect_data() the way the plugin's metadata asks for.
+        
+        Plugins with blocking_io=True have their whole collection run on
+        the shared thread pool in a private event loop, so blocking calls
+        cannot stall the application loop. Either way, the time spent
+        holding the application loop is recorded in loop_block_stats.
+        
+        Note: a timed-out offloaded collection cannot be interrupted; the
+        worker thread finishes in the background.
+        
+        Returns:
+            Dictionary containing collected metrics/data
+        """
+        metadata = self.get_metadata()
+        
+        if metadata.blocking_io:
+            coro = run_in_executor(get_thread_pool(), self._collect_in_thread)
+        else:
+            coro = self.collect_data()
+        
+        return await measure_loop_blocking(coro, self.loop_block_stats, metadata.id)
+    
+    def _collect_in_thread(self) -> Dict[str, Any]:
+        return asyncio.run(self.collect_data())
+    
+    async def run_blocking(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking call (HTTP, subprocess, socket, SDK) on the shared
+        plugin thread pool.
+        
+        Example:
+            result = await self.run_blocking(subprocess.run, cmd, capture_output=True)
+        """
+        return await run_in_executor(get_thread_pool(), partial(func, *args, **kwargs))
+    
+    async def run_cpu_bound(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run CPU-heavy work (large output parsing) on the shared process pool.
+        
+        func and its arguments must be picklable. Falls back to the thread
+        pool when the process pool is disabled.
+        """
+        executor = get_process_pool() or get_thread_pool()
+        return await run_in_executor(executor, partial(func, *args, **kwargs))
+    
     async def health_check(self) -> Dict[str, Any]:
         """
         Check if plugin is healthy and can execute.
@@ -155,7 +223,8 @@ class PluginBase(ABC):
             "enabled": self.enabled,
             "last_execution": self._last_execution.isoformat() if self._last_execution else None,
             "execution_count": self._execution_count,
-            "last_error": self._last_error
+            "last_error": self._last_error,
+            "loop_blocking": self.loop_block_stats.to_dict()
         }
     
     async def execute(self) -> Dict[str, Any]:
@@ -173,7 +242,7 @@ class PluginBase(ABC):
         
         try:
             self._last_execution = datetime.utcnow()
-            data = await self.collect_data()
+            data = await self.collect()
             self._execution_count += 1
             self._last_error = None
             
@@ -28,6 +28,7 @@ class BackupMonitorPlugin(PluginBase):
             category=PluginCategory.STORAGE,
             tags=["backup", "restic", "borg", "duplicati", "rsync", "disaster-recovery"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin"],
             dependencies=[],  # Checks for tools at runtime
             config_schema={
@@ -27,6 +27,7 @@ class DNSMonitorPlugin(PluginBase):
             category=PluginCategory.NETWORK,
             tags=["dns", "pi-hole", "adguard", "unbound", "blocking", "queries"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin"],
             dependencies=["requests"],
             config_schema={
@@ -29,6 +29,7 @@ class DockerMonitorPlugin(PluginBase):
             category=PluginCategory.CONTAINER,
             tags=["docker", "containers", "orchestration"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin", "windows"],
             dependencies=["docker"],
             config_schema={
@@ -26,6 +26,7 @@ class DownloadManagerMonitorPlugin(PluginBase):
             category=PluginCategory.APPLICATION,
             tags=["downloads", "qbittorrent", "transmission", "sabnzbd", "torrents", "usenet"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin", "windows"],
             dependencies=["requests"],
             config_schema={
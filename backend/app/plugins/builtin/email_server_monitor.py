@@ -26,6 +26,7 @@ class EmailServerMonitorPlugin(PluginBase):
             category=PluginCategory.NETWORK,
             tags=["email", "smtp", "imap", "postfix", "dovecot", "mail"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux"],
             dependencies=[],
             config_schema={
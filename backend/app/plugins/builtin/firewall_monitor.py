@@ -39,6 +39,7 @@ class FirewallMonitorPlugin(PluginBase):
             category=PluginCategory.SECURITY,
             tags=["security", "firewall", "iptables", "ufw", "firewalld", "network"],
             requires_sudo=True,
+            blocking_io=True,
             supported_os=["linux"],
             dependencies=[],
             config_schema={
@@ -25,6 +25,7 @@ class GitServerMonitorPlugin(PluginBase):
             category=PluginCategory.APPLICATION,
             tags=["git", "gitea", "gogs", "gitlab", "repositories", "ci-cd"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin", "windows"],
             dependencies=["requests"],
             config_schema={
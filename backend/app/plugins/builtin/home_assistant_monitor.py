@@ -25,6 +25,7 @@ class HomeAssistantMonitorPlugin(PluginBase):
             category=PluginCategory.IOT,
             tags=["home-assistant", "iot", "smart-home", "automation", "entities"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin", "windows"],
             dependencies=["requests"],
             config_schema={
@@ -26,6 +26,7 @@ class IPMIMonitorPlugin(PluginBase):
             category=PluginCategory.HARDWARE,
             tags=["ipmi", "bmc", "idrac", "ilo", "hardware", "sensors"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin"],
             dependencies=["ipmitool"],
             config_schema={
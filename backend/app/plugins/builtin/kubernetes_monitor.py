@@ -26,6 +26,7 @@ class KubernetesMonitorPlugin(PluginBase):
             category=PluginCategory.CONTAINER,
             tags=["kubernetes", "k8s", "containers", "orchestration", "pods"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin"],
             dependencies=[],  # Uses kubectl
             config_schema={
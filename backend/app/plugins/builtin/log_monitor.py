@@ -5,21 +5,128 @@ Monitors log files - pattern matching, error rate tracking, alerting.
 Essential for application debugging and system monitoring.
 """
 
+import asyncio
 import os
 import re
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from collections import defaultdict
 
 from app.plugins.base import PluginBase, PluginMetadata, PluginCategory
 
 
+READ_CHUNK_BYTES = 1024 * 1024
+
+# Numbered/named backreferences and conditionals change meaning once patterns are
+# combined; \A and \Z would anchor to the whole text instead of each line
+_UNCOMBINABLE = re.compile(r"\\\d|\\[AZ]|\(\?P=|\(\?\(")
+
+
+def _nth_newline(data: bytes, n: int) -> int:
+    """Index of the n-th (1-based) newline in data."""
+    index = -1
+    for _ in range(n):
+        index = data.index(b"\n", index + 1)
+    return index
+
+
+@dataclass(frozen=True)
+class LogPattern:
+    """A compiled log pattern"""
+    name: str
+    regex: "re.Pattern"
+    severity: str
+    alert: bool
+
+
+class LogPatternSet:
+    """
+    All patterns of a log config, compiled once.
+    
+    Every valid pattern is also joined into one case-insensitive, multiline
+    alternation that acts as a prefilter: the text is searched with it in a
+    single pass, and only the lines it hits are tested against the individual
+    patterns (a line can match several patterns, which one alternation cannot
+    report). Multiline mode keeps ^ and $ anchored to line boundaries, as they
+    are when a line is tested on its own. Patterns that cannot be combined
+    (e.g. conflicting group names, numeric backreferences or \A/\Z) disable
+    the prefilter and every line is tested directly.
+    """
+    
+    def __init__(self, patterns: Tuple[Tuple[str, str, str, bool], ...]):
+        self.patterns: List[LogPattern] = []
+        self.errors: Dict[str, str] = {}
+        
+        for name, regex, severity, alert in patterns:
+            try:
+                compiled = re.compile(regex, re.IGNORECASE)
+            except re.error as e:
+                self.errors[name] = str(e)
+                continue
+            self.patterns.append(LogPattern(name, compiled, severity, alert))
+        
+        self.prefilter: Optional[re.Pattern] = None
+        if self.patterns and not any(_UNCOMBINABLE.search(p.regex.pattern) for p in self.patterns):
+            try:
+                self.prefilter = re.compile(
+                    "|".join(f"(?:{p.regex.pattern})" for p in self.patterns),
+                    re.IGNORECASE | re.MULTILINE
+                )
+            except re.error:
+                self.prefilter = None
+    
+    def _match_line(self, line: str) -> Iterator[LogPattern]:
+        for pattern in self.patterns:
+            if pattern.regex.search(line):
+                yield pattern
+    
+    def scan(self, text: str) -> Iterator[Tuple[int, str, LogPattern]]:
+        """
+        Yield (line_number, line, pattern) for every pattern matching a line of text.
+        
+        Line numbers are 1-based within text.
+        """
+        if not self.patterns or not text:
+            return
+        
+        if self.prefilter is None:
+            for line_num, line in enumerate(text.split("\n"), start=1):
+                for pattern in self._match_line(line):
+                    yield line_num, line, pattern
+            return
+        
+        search = self.prefilter.search
+        length = len(text)
+        pos = 0
+        line_num = 1
+        counted_to = 0
+        while pos < length:
+            match = search(text, pos)
+            if match is None:
+                return
+            line_start = text.rfind("\n", 0, match.start()) + 1
+            line_end = text.find("\n", match.start())
+            if line_end == -1:
+                line_end = length
+            line_num += text.count("\n", counted_to, line_start)
+            counted_to = line_start
+            
+            line = text[line_start:line_end]
+            for pattern in self._match_line(line):
+                yield line_num, line, pattern
+            
+            # Continue on the next line so a match spanning lines cannot hide one
+            pos = line_end + 1
+
+
 class LogMonitorPlugin(PluginBase):
     """Monitors log files for patterns and errors"""
     
-    def __init__(self):
-        super().__init__()
-        self._file_positions: Dict[str, int] = {}  # Track file read positions
+    def __init__(self, hub_client=None, config: Optional[Dict[str, Any]] = None):
+        super().__init__(hub_client, config)
+        self._file_states: Dict[str, Tuple[int, int]] = {}  # path -> (inode, read offset)
+        self._pattern_sets: Dict[tuple, LogPatternSet] = {}  # compiled once per pattern config
     
     def get_metadata(self) -> PluginMetadata:
         return PluginMetadata(
@@ -95,8 +202,78 @@ class LogMonitorPlugin(PluginBase):
             {"name": "Permission Denied", "regex": r"(permission denied|access denied)", "severity": "error"}
         ]
     
+    def _get_pattern_set(self, patterns: List[Dict[str, Any]]) -> "LogPatternSet":
+        """Get the compiled pattern set for a pattern config (compiled once per config)"""
+        key = tuple(
+            (p.get("name", "Unknown"), p.get("regex") or "", p.get("severity", "info"), bool(p.get("alert", False)))
+            for p in patterns
+        )
+        pattern_set = self._pattern_sets.get(key)
+        if pattern_set is None:
+            pattern_set = LogPatternSet(key)
+            self._pattern_sets[key] = pattern_set
+        return pattern_set
+    
+    def _read_new_text(self, path: str, encoding: str, max_lines: int, tail_only: bool, stat_info: os.stat_result) -> Dict[str, Any]:
+        """
+        Read up to max_lines complete new lines from a log file.
+        
+        The file is read in large binary chunks and decoded once. The offset
+        and inode are remembered per path; a changed inode or a file shorter
+        than the saved offset means it was rotated or truncated, and reading
+        restarts at the beginning. In tail mode a trailing line without a
+        newline is left for the next check so lines are never split.
+        """
+        position = 0
+        rotated = False
+        state = self._file_states.get(path)
+        if tail_only and state is not None:
+            inode, offset = state
+            if inode != stat_info.st_ino or offset > stat_info.st_size:
+                rotated = True
+            else:
+                position = offset
+        
+        chunks = []
+        lines_read = 0
+        pending = b""
+        with open(path, "rb") as f:
+            f.seek(position)
+            while lines_read < max_lines:
+                block = f.read(READ_CHUNK_BYTES)
+                if not block:
+                    break
+                data = pending + block
+                end = data.rfind(b"\n") + 1
+                if end == 0:
+                    pending = data
+                    continue
+                count = data.count(b"\n", 0, end)
+                if lines_read + count > max_lines:
+                    end = _nth_newline(data, max_lines - lines_read) + 1
+                    count = max_lines - lines_read
+                chunks.append(data[:end])
+                position += end
+                lines_read += count
+                pending = data[end:]
+            
+            if pending and not tail_only and lines_read < max_lines:
+                # Full-read mode: the last line counts even without a newline
+                chunks.append(pending)
+                position += len(pending)
+                lines_read += 1
+        
+        self._file_states[path] = (stat_info.st_ino, position)
+        
+        return {
+            "text": b"".join(chunks).decode(encoding, errors="replace"),
+            "lines_read": lines_read,
+            "new_position": position,
+            "rotated": rotated
+        }
+    
     def _read_log_file(self, log_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Read and analyze a log file"""
+        """Read and analyze a log file (blocking; runs on a worker thread)"""
         
         name = log_config.get("name", "Unknown")
         path = log_config.get("path")
@@ -123,69 +300,50 @@ class LogMonitorPlugin(PluginBase):
             result["file_size_bytes"] = stat_info.st_size
             result["last_modified"] = datetime.fromtimestamp(stat_info.st_mtime).isoformat()
             
-            # Determine read position
             tail_only = self.config.get("tail_only", True)
             max_lines = self.config.get("max_lines_per_check", 1000)
             
-            current_position = 0
-            if tail_only and path in self._file_positions:
-                # Resume from last position
-                current_position = self._file_positions.get(path, 0)
-                # If file was truncated/rotated, start from beginning
-                if current_position > stat_info.st_size:
-                    current_position = 0
-            
-            # Read file
-            with open(path, 'r', encoding=encoding, errors='replace') as f:
-                f.seek(current_position)
-                lines = []
-                for i, line in enumerate(f):
-                    if i >= max_lines:
-                        break
-                    lines.append(line.rstrip('\n'))
-                
-                # Update position
-                new_position = f.tell()
-                self._file_positions[path] = new_position
+            read = self._read_new_text(path, encoding, max_lines, tail_only, stat_info)
+            result["lines_read"] = read["lines_read"]
+            result["new_position"] = read["new_position"]
+            if read["rotated"]:
+                result["rotated"] = True
             
-            result["lines_read"] = len(lines)
-            result["new_position"] = new_position
+            pattern_set = self._get_pattern_set(patterns)
+            for pattern_name, error in pattern_set.errors.items():
+                result[f"regex_error_{pattern_name}"] = error
             
             # Pattern matching
             matches = []
+            total_matches = 0
             match_counts = defaultdict(int)
             severity_counts = defaultdict(int)
             alerts = []
             
-            for line_num, line in enumerate(lines, start=1):
-                for pattern in patterns:
-                    pattern_name = pattern.get("name", "Unknown")
-                    regex = pattern.get("regex")
-                    severity = pattern.get("severity", "info")
-                    alert = pattern.get("alert", False)
-                    
-                    try:
-                        if re.search(regex, line, re.IGNORECASE):
-                            match_counts[pattern_name] += 1
-                            severity_counts[severity] += 1
-                            
-                            match_info = {
-                                "line_number": line_num,
-                                "pattern": pattern_name,
-                                "severity": severity,
-                                "line": line[:200]  # Truncate long lines
-                            }
-                            
-                            matches.append(match_info)
-                            
-                            if alert:
-                                alerts.append(match_info)
-                    except re.error as e:
-                        result[f"regex_error_{pattern_name}"] = str(e)
+            for line_num, line, pattern in pattern_set.scan(read["text"]):
+                total_matches += 1
+                match_counts[pattern.name] += 1
+                severity_counts[pattern.severity] += 1
+                
+                if len(matches) >= 100 and not pattern.alert:
+                    continue
+                
+                match_info = {
+                    "line_number": line_num,
+                    "pattern": pattern.name,
+                    "severity": pattern.severity,
+                    "line": line[:200]  # Truncate long lines
+                }
+                
+                if len(matches) < 100:  # Limit to 100 matches
+                    matches.append(match_info)
+                
+                if pattern.alert:
+                    alerts.append(match_info)
             
-            result["matches"] = matches[:100]  # Limit to 100 matches
+            result["matches"] = matches
             result["match_summary"] = {
-                "total_matches": len(matches),
+                "total_matches": total_matches,
                 "by_pattern": dict(match_counts),
                 "by_severity": dict(severity_counts)
             }
@@ -196,7 +354,7 @@ class LogMonitorPlugin(PluginBase):
             
         except PermissionError:
             result["error"] = "Permission denied"
-        except UnicodeDecodeError as e:
+        except LookupError as e:
             result["error"] = f"Encoding error: {str(e)}"
         except Exception as e:
             result["error"] = f"Unexpected error: {str(e)}"
@@ -215,15 +373,16 @@ class LogMonitorPlugin(PluginBase):
                 "message": "Please configure log_files in plugin config"
             }
         
-        results = []
         total_matches = 0
         total_alerts = 0
         severity_totals = defaultdict(int)
         
-        for log_config in log_files:
-            result = self._read_log_file(log_config)
-            results.append(result)
-            
+        # File reads and scans run on the shared thread pool, one task per file
+        results = await asyncio.gather(
+            *(self.run_blocking(self._read_log_file, log_config) for log_config in log_files)
+        )
+        
+        for result in results:
             if "match_summary" in result:
                 total_matches += result["match_summary"]["total_matches"]
                 for severity, count in result["match_summary"]["by_severity"].items():
@@ -240,7 +399,7 @@ class LogMonitorPlugin(PluginBase):
                 "total_alerts": total_alerts,
                 "by_severity": dict(severity_totals)
             },
-            "log_files": results
+            "log_files": list(results)
         }
         
         return data
@@ -25,6 +25,7 @@ class MediaServerMonitorPlugin(PluginBase):
             category=PluginCategory.APPLICATION,
             tags=["plex", "jellyfin", "emby", "media", "streaming", "transcode"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin", "windows"],
             dependencies=["requests"],
             config_schema={
@@ -26,6 +26,7 @@ class NetworkSwitchMonitorPlugin(PluginBase):
             category=PluginCategory.NETWORK,
             tags=["snmp", "switch", "network", "ports", "traffic"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin"],
             dependencies=["snmpwalk", "snmpget"],
             config_schema={
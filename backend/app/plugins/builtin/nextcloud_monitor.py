@@ -25,6 +25,7 @@ class NextcloudMonitorPlugin(PluginBase):
             category=PluginCategory.APPLICATION,
             tags=["nextcloud", "cloud", "storage", "sync", "files"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin", "windows"],
             dependencies=["requests"],
             config_schema={
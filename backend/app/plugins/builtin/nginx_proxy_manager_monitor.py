@@ -28,6 +28,7 @@ class NginxProxyManagerMonitorPlugin(PluginBase):
             category=PluginCategory.NETWORK,
             tags=["nginx", "npm", "reverse-proxy", "proxy", "ssl", "web"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin"],
             dependencies=["requests"],
             config_schema={
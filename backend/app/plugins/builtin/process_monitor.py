@@ -24,6 +24,7 @@ class ProcessMonitorPlugin(PluginBase):
             category=PluginCategory.SYSTEM,
             tags=["processes", "monitoring", "resources"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin", "windows"],
             dependencies=["psutil"],
             config_schema={
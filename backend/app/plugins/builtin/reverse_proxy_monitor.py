@@ -26,6 +26,7 @@ class ReverseProxyMonitorPlugin(PluginBase):
             category=PluginCategory.NETWORK,
             tags=["reverse-proxy", "traefik", "caddy", "proxy", "ssl", "routing"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin", "windows"],
             dependencies=["requests"],
             config_schema={
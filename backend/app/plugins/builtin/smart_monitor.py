@@ -27,6 +27,7 @@ class SMARTMonitorPlugin(PluginBase):
             category=PluginCategory.STORAGE,
             tags=["smart", "disk", "health", "hdd", "ssd", "failure-prediction"],
             requires_sudo=True,  # smartctl requires sudo
+            blocking_io=True,
             supported_os=["linux", "darwin"],
             dependencies=["smartmontools"],  # smartctl command
             config_schema={
@@ -26,6 +26,7 @@ class TemperatureMonitorPlugin(PluginBase):
             category=PluginCategory.SYSTEM,
             tags=["temperature", "humidity", "sensors", "environment", "cooling"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux"],
             dependencies=[],  # Uses lm-sensors
             config_schema={
@@ -27,6 +27,7 @@ class ThermalMonitorPlugin(PluginBase):
             category=PluginCategory.THERMAL,
             tags=["thermal", "temperature", "cpu", "gpu", "sensors"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin", "windows"],
             dependencies=["psutil"],
             config_schema={
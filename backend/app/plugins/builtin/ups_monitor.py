@@ -26,6 +26,7 @@ class UPSMonitorPlugin(PluginBase):
             category=PluginCategory.POWER,
             tags=["ups", "power", "battery", "nut", "backup-power", "runtime"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin"],
             dependencies=["nut-client"],  # Network UPS Tools client
             config_schema={
@@ -26,6 +26,7 @@ class VPNMeshMonitorPlugin(PluginBase):
             category=PluginCategory.NETWORK,
             tags=["vpn", "wireguard", "tailscale", "mesh", "peers"],
             requires_sudo=True,
+            blocking_io=True,
             supported_os=["linux", "darwin"],
             dependencies=[],
             config_schema={
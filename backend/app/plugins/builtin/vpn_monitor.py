@@ -27,6 +27,7 @@ class VPNMonitorPlugin(PluginBase):
             category=PluginCategory.SECURITY,
             tags=["vpn", "wireguard", "openvpn", "tunnel", "remote-access", "security"],
             requires_sudo=True,  # WireGuard and OpenVPN commands often need sudo
+            blocking_io=True,
             supported_os=["linux", "darwin"],
             dependencies=[],  # Uses system commands
             config_schema={
@@ -28,6 +28,7 @@ class WebServiceMonitorPlugin(PluginBase):
             category=PluginCategory.APPLICATION,
             tags=["http", "https", "web", "api", "ssl", "health-check"],
             requires_sudo=False,
+            blocking_io=True,
             supported_os=["linux", "darwin", "windows"],
             dependencies=["requests"],
             config_schema={
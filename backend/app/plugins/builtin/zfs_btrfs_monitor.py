@@ -27,6 +27,7 @@ class ZFSBTRFSMonitorPlugin(PluginBase):
             category=PluginCategory.STORAGE,
             tags=["zfs", "btrfs", "filesystem", "storage", "snapshots", "scrub"],
             requires_sudo=True,  # ZFS and BTRFS commands often need sudo
+            blocking_io=True,
             supported_os=["linux"],
             dependencies=[],  # Uses system commands
             config_schema={
@@ -0,0 +1,189 @@
+"""
+Shared Plugin Executors for Unity
+
+Many plugins call blocking libraries (requests, subprocess, docker, psutil)
+from inside `async def collect_data`. This module provides:
+- A shared, sized thread pool for blocking I/O
+- An optional process pool for CPU-heavy parsing
+- A coroutine wrapper that measures how long a plugin holds the event loop
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import types
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """
+    Get or create the shared plugin I/O thread pool.
+
+    Sized by settings.plugin_thread_pool_size (0 = min(32, cpu_count + 4)).
+
+    Returns:
+        ThreadPoolExecutor instance
+    """
+    global _thread_pool
+
+    if _thread_pool is None:
+        with _pool_lock:
+            if _thread_pool is None:
+                workers = settings.plugin_thread_pool_size or min(32, (os.cpu_count() or 1) + 4)
+                _thread_pool = ThreadPoolExecutor(
+                    max_workers=workers,
+                    thread_name_prefix="plugin-io"
+                )
+                logger.info(f"Plugin I/O thread pool started with {workers} workers")
+
+    return _thread_pool
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Get or create the shared plugin process pool.
+
+    Returns:
+        ProcessPoolExecutor, or None when settings.plugin_process_pool_size is 0
+    """
+    global _process_pool
+
+    if settings.plugin_process_pool_size <= 0:
+        return None
+
+    if _process_pool is None:
+        with _pool_lock:
+            if _process_pool is None:
+                _process_pool = ProcessPoolExecutor(max_workers=settings.plugin_process_pool_size)
+                logger.info(
+                    f"Plugin process pool started with {settings.plugin_process_pool_size} workers"
+                )
+
+    return _process_pool
+
+
+def shutdown_executors(wait: bool = True):
+    """
+    Shut down the shared plugin executors.
+
+    Should be called on application shutdown.
+    """
+    global _thread_pool, _process_pool
+
+    with _pool_lock:
+        if _thread_pool:
+            _thread_pool.shutdown(wait=wait, cancel_futures=True)
+            _thread_pool = None
+        if _process_pool:
+            _process_pool.shutdown(wait=wait, cancel_futures=True)
+            _process_pool = None
+
+
+async def run_in_executor(executor: Executor, func: Callable[..., Any], *args: Any) -> Any:
+    """Run func(*args) on the given executor from the running event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, func, *args)
+
+
+@dataclass
+class LoopBlockStats:
+    """How long a plugin's coroutine ran synchronously on the event loop."""
+    last_total_ms: float = 0.0
+    last_max_step_ms: float = 0.0
+    max_step_ms: float = 0.0
+    total_ms: float = 0.0
+    runs: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "last_total_ms": round(self.last_total_ms, 2),
+            "last_max_step_ms": round(self.last_max_step_ms, 2),
+            "max_step_ms": round(self.max_step_ms, 2),
+            "avg_total_ms": round(self.total_ms / self.runs, 2) if self.runs else 0.0,
+            "runs": self.runs,
+        }
+
+
+@types.coroutine
+def _timed_steps(coro: Awaitable[Any], on_step: Callable[[float], None]):
+    """
+    Drive a coroutine step by step, reporting the duration of each step.
+
+    A step is the synchronous stretch between two suspension points, i.e.
+    the time the coroutine keeps the event loop busy. Futures the inner
+    coroutine yields are passed through to the running task unchanged.
+    """
+    send_value: Any = None
+    throw_exc: Optional[BaseException] = None
+
+    while True:
+        started = time.perf_counter()
+        try:
+            if throw_exc is not None:
+                yielded = coro.throw(throw_exc)
+            else:
+                yielded = coro.send(send_value)
+        except StopIteration as stop:
+            on_step(time.perf_counter() - started)
+            return stop.value
+        except BaseException:
+            on_step(time.perf_counter() - started)
+            raise
+        on_step(time.perf_counter() - started)
+
+        try:
+            send_value = yield yielded
+            throw_exc = None
+        except BaseException as exc:
+            send_value = None
+            throw_exc = exc
+
+
+async def measure_loop_blocking(coro: Awaitable[Any], stats: LoopBlockStats, label: str = "") -> Any:
+    """
+    Await coro while recording how long it blocked the event loop.
+
+    Args:
+        coro: Coroutine to run
+        stats: Stats object updated in place
+        label: Name used in the slow-step warning
+
+    Returns:
+        Result of the coroutine
+    """
+    total = 0.0
+    max_step = 0.0
+
+    def on_step(seconds: float):
+        nonlocal total, max_step
+        total += seconds
+        max_step = max(max_step, seconds)
+
+    try:
+        return await _timed_steps(coro.__await__(), on_step)
+    finally:
+        stats.runs += 1
+        stats.last_total_ms = total * 1000
+        stats.last_max_step_ms = max_step * 1000
+        stats.total_ms += stats.last_total_ms
+        stats.max_step_ms = max(stats.max_step_ms, stats.last_max_step_ms)
+
+        if stats.last_max_step_ms >= settings.plugin_loop_block_warn_ms:
+            logger.warning(
+                f"Plugin {label or '?'} blocked the event loop for "
+                f"{stats.last_max_step_ms:.0f}ms in a single step "
+                f"({stats.last_total_ms:.0f}ms total); consider blocking_io=True "
+                f"or run_blocking()"
+            )
@@ -66,7 +66,8 @@ async def change_password(
 ):
     """Allow user to change their own password (requires current password verification)"""
     # Verify current password
-    if not AuthService.verify_password(password_data.current_password, current_user.hashed_password):
+    user = AuthService.get_user(db, current_user.id)
+    if not user or not AuthService.verify_password(password_data.current_password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
@@ -80,7 +81,7 @@ async def change_password(
         )
 
     # Update password
-    current_user.hashed_password = AuthService.get_password_hash(password_data.new_password)
+    user.hashed_password = AuthService.get_password_hash(password_data.new_password)
     db.commit()
 
     return {"message": "Password changed successfully"}
@@ -12,6 +12,8 @@ from app.models.containers import (
 )
 from app.services.auth.auth_service import get_current_active_user as get_current_user
 from app.models.users import User
+from app.services.response_cache import TAG_CONTAINERS, invalidate_cache_tags
+from app.services.containers.security.scan_service import ScanQueueFull, get_scan_service
 
 router = APIRouter(prefix="/api/containers", tags=["containers"])
 
@@ -143,6 +145,7 @@ async def sync_host(
         raise HTTPException(status_code=404, detail="Host not found")
     
     # TODO: Implement container discovery
+    invalidate_cache_tags(TAG_CONTAINERS)
     return {"message": "Sync initiated", "host_id": host_id}
 
 
@@ -445,29 +448,50 @@ async def delete_policy(
 # Security & Scanning Endpoints
 # ============================================================================
 
-@router.post("/security/scan/{container_id}")
+@router.post("/security/scan/{container_id}", status_code=status.HTTP_202_ACCEPTED)
 async def scan_container(
     container_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Scan container for vulnerabilities."""
+    """Scan container for vulnerabilities.
+
+    Returns a scan job at once: completed when the image digest was already
+    scanned with the current vulnerability DB, otherwise queued. Poll
+    GET /security/scan-jobs/{job_id} for the outcome.
+    """
     container = db.query(Container).filter(Container.id == container_id).first()
     if not container:
         raise HTTPException(status_code=404, detail="Container not found")
     
-    # Create scan record
-    scan = VulnerabilityScan(
-        container_id=container_id,
-        image=container.image,
-        image_digest=container.current_digest
-    )
-    db.add(scan)
-    db.commit()
-    
-    # TODO: Implement Trivy scan
+    if container.current_digest:
+        image = f"{container.image}@{container.current_digest}"
+    else:
+        image = f"{container.image}:{container.current_tag}"
+    
+    try:
+        job = await get_scan_service().submit(
+            image,
+            image_digest=container.current_digest,
+            container_id=container_id,
+            scan_type="manual"
+        )
+    except ScanQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     
-    return {"message": "Scan initiated", "scan_id": scan.id}
+    return job.to_dict()
+
+
+@router.get("/security/scan-jobs/{job_id}")
+async def get_scan_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get the status of a scan job."""
+    job = get_scan_service().get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    return job.to_dict()
 
 
 @router.get("/security/scans")
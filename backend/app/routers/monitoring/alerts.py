@@ -1,53 +1,54 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, select
 from typing import List, Optional
 from datetime import datetime, timedelta
 from app.database import get_db
+from app.core.async_database import get_async_db
 from app.core.dependencies import get_tenant_id
 from app import models
 from app.schemas_alerts import Alert, AlertUpdate, AlertChannel, AlertChannelCreate, AlertChannelUpdate, NotificationLogResponse
 from app.services.alert_channels import get_all_channels
+from app.services.response_cache import TAG_ALERTS, invalidate_cache_tags
 
 router = APIRouter(prefix="/alerts", tags=["alerts"])
 
 @router.get("/", response_model=List[Alert])
-def get_alerts(
+async def get_alerts(
     limit: int = 100,
     unresolved_only: bool = False,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     tenant_id: str = Depends(get_tenant_id)
 ):
     """Get alerts with optional filtering"""
-    query = db.query(models.Alert).filter(models.Alert.tenant_id == tenant_id).order_by(models.Alert.triggered_at.desc())
+    query = select(models.Alert).where(models.Alert.tenant_id == tenant_id).order_by(models.Alert.triggered_at.desc())
 
     if unresolved_only:
-        query = query.filter(models.Alert.resolved == False)
+        query = query.where(models.Alert.resolved == False)
 
-    alerts = query.limit(limit).all()
+    alerts = (await db.execute(query.limit(limit))).scalars().all()
     return alerts
 
 @router.get("/stats")
-def get_alert_stats(db: Session = Depends(get_db),
+async def get_alert_stats(db: AsyncSession = Depends(get_async_db),
     tenant_id: str = Depends(get_tenant_id)):
     """Get alert statistics for dashboard"""
-    total = db.query(models.Alert).filter(models.Alert.tenant_id == tenant_id).count()
-    unresolved = db.query(models.Alert).filter(models.Alert.tenant_id == tenant_id).filter(models.Alert.resolved == False).count()
-
-    # Count by severity
-    critical = db.query(models.Alert).filter(models.Alert.tenant_id == tenant_id).filter(
-        and_(models.Alert.severity == "critical", models.Alert.resolved == False)
-    ).count()
-    warning = db.query(models.Alert).filter(models.Alert.tenant_id == tenant_id).filter(
-        and_(models.Alert.severity == "warning", models.Alert.resolved == False)
-    ).count()
-    info = db.query(models.Alert).filter(models.Alert.tenant_id == tenant_id).filter(
-        and_(models.Alert.severity == "info", models.Alert.resolved == False)
-    ).count()
+    unresolved = models.Alert.resolved == False
+    row = (await db.execute(
+        select(
+            func.count(),
+            func.count().filter(unresolved),
+            func.count().filter(and_(models.Alert.severity == "critical", unresolved)),
+            func.count().filter(and_(models.Alert.severity == "warning", unresolved)),
+            func.count().filter(and_(models.Alert.severity == "info", unresolved)),
+        ).where(models.Alert.tenant_id == tenant_id)
+    )).one()
+    total, unresolved_count, critical, warning, info = row
 
     return {
         "total": total,
-        "unresolved": unresolved,
+        "unresolved": unresolved_count,
         "critical": critical,
         "warning": warning,
         "info": info
@@ -70,6 +71,7 @@ def update_alert(alert_id: int, alert_update: AlertUpdate, db: Session = Depends
         db_alert.resolved_at = datetime.now()
 
     db.commit()
+    invalidate_cache_tags(TAG_ALERTS)
     db.refresh(db_alert)
     return db_alert
 
@@ -84,6 +86,7 @@ def acknowledge_alert(alert_id: int, db: Session = Depends(get_db),
     db_alert.acknowledged = True
     db_alert.acknowledged_at = datetime.now()
     db.commit()
+    invalidate_cache_tags(TAG_ALERTS)
     db.refresh(db_alert)
     return db_alert
 
@@ -98,6 +101,7 @@ def resolve_alert(alert_id: int, db: Session = Depends(get_db),
     db_alert.resolved = True
     db_alert.resolved_at = datetime.now()
     db.commit()
+    invalidate_cache_tags(TAG_ALERTS)
     db.refresh(db_alert)
     return db_alert
 
@@ -111,6 +115,7 @@ def snooze_alert(alert_id: int, snooze_duration_minutes: int, db: Session = Depe
 
     db_alert.snoozed_until = datetime.now() + timedelta(minutes=snooze_duration_minutes)
     db.commit()
+    invalidate_cache_tags(TAG_ALERTS)
     db.refresh(db_alert)
     return db_alert
 
@@ -124,6 +129,7 @@ def delete_alert(alert_id: int, db: Session = Depends(get_db),
 
     db.delete(db_alert)
     db.commit()
+    invalidate_cache_tags(TAG_ALERTS)
     return {"message": "Alert deleted successfully"}
 
 @router.post("/acknowledge-all", response_model=List[Alert])
@@ -143,6 +149,7 @@ def bulk_acknowledge_alerts(alert_ids: List[int] = [], db: Session = Depends(get
         alert.acknowledged_at = datetime.now()
     
     db.commit()
+    invalidate_cache_tags(TAG_ALERTS)
     for alert in alerts_to_update:
         db.refresh(alert)
     return alerts_to_update
@@ -164,6 +171,7 @@ def bulk_resolve_alerts(alert_ids: List[int] = [], db: Session = Depends(get_db)
         alert.resolved_at = datetime.now()
     
     db.commit()
+    invalidate_cache_tags(TAG_ALERTS)
     for alert in alerts_to_update:
         db.refresh(alert)
     return alerts_to_update
@@ -194,6 +202,7 @@ def create_alert_channel(channel: AlertChannelCreate, db: Session = Depends(get_
     )
     db.add(db_channel)
     db.commit()
+    invalidate_cache_tags(TAG_ALERTS)
     db.refresh(db_channel)
     return db_channel
 
@@ -214,6 +223,7 @@ def update_alert_channel(
         setattr(db_channel, key, value)
 
     db.commit()
+    invalidate_cache_tags(TAG_ALERTS)
     db.refresh(db_channel)
     return db_channel
 
@@ -227,6 +237,7 @@ def delete_alert_channel(channel_id: int, db: Session = Depends(get_db),
 
     db.delete(db_channel)
     db.commit()
+    invalidate_cache_tags(TAG_ALERTS)
     return {"message": "Alert channel deleted successfully"}
 
 @router.get("/notification-logs", response_model=List[NotificationLogResponse])
@@ -4,19 +4,24 @@ Dashboard API endpoints.
 Provides unified metrics, alerts, and infrastructure data for frontend dashboards.
 """
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.async_database import get_async_db
+from app.core.db_pool import get_pool_metrics
 from app.services.monitoring import metrics_service
+from app.services.monitoring.metric_downsampling import TIME_RANGES, choose_bucket_seconds
+from app.services.plugins.metric_ingestion import get_metric_pipeline
+from app.services.core.rate_limiter import get_rate_limiter
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 
 @router.get("/overview")
 async def get_dashboard_overview(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """
     Get complete dashboard overview data.
@@ -52,17 +57,21 @@ async def get_dashboard_overview(
 @router.get("/metrics/history")
 async def get_metrics_history(
     time_range: str = Query("1h", regex="^(1h|6h|24h|7d)$"),
-    db: Session = Depends(get_db)
+    points: int = Query(settings.metric_history_default_points, ge=10, le=2000,
+                        description="Maximum number of points per metric"),
+    db: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, List[Dict[str, Any]]]:
     """
-    Get historical time-series data for key metrics.
+    Get downsampled time-series data for key metrics.
     
     Args:
         time_range: Time range for historical data (1h, 6h, 24h, 7d)
+        points: Maximum number of buckets per metric
     
     Returns:
         Dict with metric names as keys and time-series arrays as values.
-        Each array contains {timestamp, value} objects.
+        Each array contains {timestamp, value, avg, min, max, last, count}
+        buckets, where value is the bucket average.
     """
     # Define key metrics to fetch
     metrics_to_fetch = [
@@ -76,11 +85,13 @@ async def get_metrics_history(
     history = await metrics_service.get_multi_metric_history(
         db, 
         metrics_to_fetch, 
-        time_range
+        time_range,
+        points
     )
     
     return {
         "time_range": time_range,
+        "bucket_seconds": choose_bucket_seconds(TIME_RANGES[time_range], points),
         "metrics": history,
         "fetched_at": datetime.utcnow().isoformat()
     }
@@ -89,7 +100,7 @@ async def get_metrics_history(
 @router.get("/plugins/health")
 async def get_plugins_health(
     category: Optional[str] = Query(None, description="Filter by plugin category"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """
     Get detailed health status for all plugins.
@@ -130,31 +141,68 @@ async def get_single_metric_history(
     plugin_id: str,
     metric_name: str,
     time_range: str = Query("1h", regex="^(1h|6h|24h|7d)$"),
-    db: Session = Depends(get_db)
+    points: int = Query(settings.metric_history_default_points, ge=10, le=2000,
+                        description="Maximum number of points"),
+    db: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """
-    Get historical data for a specific plugin metric.
+    Get downsampled historical data for a specific plugin metric.
     
     Args:
         plugin_id: Plugin identifier
         metric_name: Metric name
         time_range: Time range (1h, 6h, 24h, 7d)
+        points: Maximum number of buckets
     
     Returns:
-        Time-series data for the specified metric.
+        Time-series buckets for the specified metric.
     """
     history = await metrics_service.get_metric_history(
         db,
         plugin_id,
         metric_name,
-        time_range
+        time_range,
+        points
     )
     
     return {
         "plugin_id": plugin_id,
         "metric_name": metric_name,
         "time_range": time_range,
+        "bucket_seconds": choose_bucket_seconds(TIME_RANGES[time_range], points),
         "data": history,
         "count": len(history),
         "fetched_at": datetime.utcnow().isoformat()
     }
+
+
+@router.get("/ingestion/stats")
+async def get_ingestion_stats() -> Dict[str, Any]:
+    """
+    Get plugin metric ingestion pipeline counters.
+    
+    Returns:
+        Queue depth, flush latency, throughput and drop counters, plus
+        allowed/rejected counts per rate-limited operation.
+    """
+    return {
+        "ingestion": get_metric_pipeline().get_stats(),
+        "rate_limits": get_rate_limiter().get_stats(),
+        "fetched_at": datetime.utcnow().isoformat()
+    }
+
+
+@router.get("/database/pool")
+async def get_database_pool_stats() -> Dict[str, Any]:
+    """
+    Get database connection pool metrics.
+    
+    Returns:
+        Per engine (sync, async): pool size, connections checked out and
+        overflow in use, plus checkout wait times (avg, p95, max) and
+        checkout timeouts.
+    """
+    return {
+        "pools": get_pool_metrics(),
+        "fetched_at": datetime.utcnow().isoformat()
+    }
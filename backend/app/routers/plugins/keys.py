@@ -15,6 +15,7 @@ from app.database import get_db
 from app.core.dependencies import get_tenant_id
 from app.models import PluginAPIKey, Plugin, User
 from app.services.auth import get_current_active_user
+from app.services.auth.api_key_cache import PLUGIN_KEY, invalidate_api_key
 from app.services.plugin_security import PluginSecurityService
 
 router = APIRouter(
@@ -216,6 +217,7 @@ async def revoke_api_key(
     key_record.revoked_at = datetime.utcnow()
     key_record.revoked_by = current_user.id
     db.commit()
+    invalidate_api_key(key_hash=key_record.key_hash, key_id=key_record.id, kind=PLUGIN_KEY)
     
     # Log action
     PluginSecurityService.log_plugin_action(
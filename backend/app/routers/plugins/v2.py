@@ -14,6 +14,8 @@ from app.database import get_db
 from app.core.dependencies import get_tenant_id
 from app.models import Plugin, PluginMetric, PluginExecution
 from app.services.plugin_manager import PluginManager
+from app.services.plugins.metric_ingestion import get_metric_pipeline
+from app.services.response_cache import TAG_PLUGINS, invalidate_cache_tags
 from app.schemas_plugins import (
     PluginListResponse,
     PluginInfo,
@@ -84,6 +86,7 @@ async def register_external_plugin(
     success = await manager.register_external_plugin(request.dict())
     
     if success:
+        invalidate_cache_tags(TAG_PLUGINS)
         return PluginActionResponse(
             success=True,
             message=f"Plugin {request.id} registered successfully",
@@ -122,6 +125,7 @@ async def enable_plugin(
     success = await manager.enable_plugin(plugin_id)
     
     if success:
+        invalidate_cache_tags(TAG_PLUGINS)
         return PluginActionResponse(
             success=True,
             message=f"Plugin {plugin_id} enabled",
@@ -143,6 +147,7 @@ async def disable_plugin(
     success = await manager.disable_plugin(plugin_id)
     
     if success:
+        invalidate_cache_tags(TAG_PLUGINS)
         return PluginActionResponse(
             success=True,
             message=f"Plugin {plugin_id} disabled",
@@ -166,6 +171,7 @@ async def execute_plugin(
     Useful for testing or triggering data collection outside of scheduled runs.
     """
     result = await manager.execute_plugin(plugin_id)
+    invalidate_cache_tags(TAG_PLUGINS)
     
     return PluginExecutionResponse(
         success=result.get("success", False),
@@ -206,6 +212,7 @@ async def update_plugin_config(
     success = await manager.update_plugin_config(plugin_id, request.config)
     
     if success:
+        invalidate_cache_tags(TAG_PLUGINS)
         return PluginActionResponse(
             success=True,
             message=f"Configuration updated for plugin {plugin_id}",
@@ -261,6 +268,7 @@ async def update_plugin_health(
     plugin.health_status = "healthy" if health_data.get("healthy") else "unhealthy"
     plugin.health_message = health_data.get("message")
     db.commit()
+    invalidate_cache_tags(TAG_PLUGINS)
     
     return PluginActionResponse(
         success=True,
@@ -291,14 +299,12 @@ async def report_plugin_metrics(
             detail=f"Plugin {plugin_id} not found"
         )
     
-    # Store metrics
-    metric = PluginMetric(
-        plugin_id=plugin_id,
-        timestamp=metric_data.timestamp or datetime.utcnow(),
-        data=metric_data.data
+    # Queue metrics for bulk ingestion
+    await get_metric_pipeline().submit_plugin_data(
+        plugin_id,
+        metric_data.data,
+        timestamp=metric_data.timestamp or datetime.utcnow()
     )
-    db.add(metric)
-    db.commit()
     
     return PluginActionResponse(
         success=True,
@@ -374,7 +380,9 @@ async def get_plugin_executions(
                 "completed_at": e.completed_at.isoformat() if e.completed_at else None,
                 "status": e.status,
                 "error_message": e.error_message,
-                "metrics_count": e.metrics_count
+                "metrics_count": e.metrics_count,
+                "queue_wait_ms": e.queue_wait_ms,
+                "duration_ms": e.duration_ms
             }
             for e in executions
         ],
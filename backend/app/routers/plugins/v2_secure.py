@@ -13,16 +13,21 @@ Enhanced with comprehensive security:
 from fastapi import APIRouter, Depends, HTTPException, Query, Header, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 from typing import List, Optional
 from datetime import datetime, timedelta
 
 from app.database import get_db
+from app.core.async_database import get_async_db
 from app.core.dependencies import get_tenant_id
 from app.models import Plugin, PluginMetric, PluginExecution, PluginAPIKey, User
 from app.services.plugin_manager import PluginManager
+from app.services.plugins.metric_ingestion import get_metric_pipeline
 from app.services.plugin_security import PluginSecurityService, rate_limiter
 from app.services.auth import get_current_active_user
+from app.services.auth.api_key_cache import PLUGIN_KEY, CachedAPIKey, get_api_key_cache, get_api_key_usage_buffer
+from app.services.response_cache import TAG_PLUGINS, invalidate_cache_tags
 from app.schemas_plugins import (
     PluginListResponse,
     PluginInfo,
@@ -52,44 +57,52 @@ def get_plugin_manager(db: Session = Depends(get_db)) -> PluginManager:
 
 async def verify_plugin_api_key(
     credentials: HTTPAuthorizationCredentials = Security(security),
-    db: Session = Depends(get_db)
-) -> tuple[str, PluginAPIKey]:
+    db: AsyncSession = Depends(get_async_db)
+) -> tuple[str, CachedAPIKey]:
     """
     Verify API key for external plugins.
     
+    Validated keys come from the hash-keyed cache (plugin keys only, so a
+    cached user key is never accepted here) and usage is recorded in the
+    write-behind buffer, so a warm call does not touch plugin_api_keys.
+    
     Returns:
         Tuple of (plugin_id, api_key_record)
     """
     api_key = credentials.credentials
     key_hash = PluginSecurityService.hash_api_key(api_key)
-    
-    # Find API key
-    stmt = select(PluginAPIKey).where(
-        and_(
-            PluginAPIKey.key_hash == key_hash,
-            PluginAPIKey.is_active == True
-        )
-    )
-    result = db.execute(stmt)
-    key_record = result.scalar_one_or_none()
-    
-    if not key_record:
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid API key"
+    cache = get_api_key_cache()
+    
+    key_record = cache.get(PLUGIN_KEY, key_hash)
+    if key_record is None:
+        # Find API key
+        stmt = select(PluginAPIKey).where(
+            and_(
+                PluginAPIKey.key_hash == key_hash,
+                PluginAPIKey.is_active == True
+            )
         )
+        result = await db.execute(stmt)
+        db_key = result.scalar_one_or_none()
+        
+        if not db_key:
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid API key"
+            )
+        
+        key_record = CachedAPIKey.from_plugin_key(db_key)
+        cache.set(key_record)
     
     # Check expiration
-    if key_record.expires_at and key_record.expires_at < datetime.utcnow():
+    if key_record.is_expired():
         raise HTTPException(
             status_code=401,
             detail="API key expired"
         )
     
-    # Update usage
-    key_record.last_used = datetime.utcnow()
-    key_record.uses_count += 1
-    db.commit()
+    # Update usage (flushed in bulk)
+    get_api_key_usage_buffer().record(PluginAPIKey, key_record.id)
     
     return key_record.plugin_id, key_record
 
@@ -171,6 +184,7 @@ async def register_external_plugin(
     )
     
     if success:
+        invalidate_cache_tags(TAG_PLUGINS)
         return PluginActionResponse(
             success=True,
             message=f"Plugin {request.id} registered successfully",
@@ -247,6 +261,7 @@ async def enable_plugin(
     )
     
     if success:
+        invalidate_cache_tags(TAG_PLUGINS)
         return PluginActionResponse(
             success=True,
             message=f"Plugin {plugin_id} enabled",
@@ -291,6 +306,7 @@ async def disable_plugin(
     )
     
     if success:
+        invalidate_cache_tags(TAG_PLUGINS)
         return PluginActionResponse(
             success=True,
             message=f"Plugin {plugin_id} disabled",
@@ -328,6 +344,7 @@ async def execute_plugin(
     rate_limiter.check_rate_limit(str(current_user.id), "plugin_execution")
     
     result = await manager.execute_plugin(plugin_id)
+    invalidate_cache_tags(TAG_PLUGINS)
     
     # Log action
     PluginSecurityService.log_plugin_action(
@@ -383,6 +400,7 @@ async def update_plugin_config(
     )
     
     if success:
+        invalidate_cache_tags(TAG_PLUGINS)
         return PluginActionResponse(
             success=True,
             message=f"Configuration updated for plugin {plugin_id}",
@@ -404,7 +422,7 @@ async def report_plugin_metrics(
     plugin_id: str,
     metric_data: PluginMetricData,
     auth_info: tuple = Depends(verify_plugin_api_key),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Report plugin metrics (for external plugins).
@@ -439,7 +457,7 @@ async def report_plugin_metrics(
     
     # Verify plugin exists
     stmt = select(Plugin).where(Plugin.id == plugin_id)
-    result = db.execute(stmt)
+    result = await db.execute(stmt)
     plugin = result.scalar_one_or_none()
     
     if not plugin:
@@ -448,14 +466,12 @@ async def report_plugin_metrics(
             detail=f"Plugin {plugin_id} not found"
         )
     
-    # Store metrics
-    metric = PluginMetric(
-        plugin_id=plugin_id,
-        timestamp=metric_data.timestamp or datetime.utcnow(),
-        data=metric_data.data
+    # Queue metrics for bulk ingestion
+    await get_metric_pipeline().submit_plugin_data(
+        plugin_id,
+        metric_data.data,
+        timestamp=metric_data.timestamp or datetime.utcnow()
     )
-    db.add(metric)
-    db.commit()
     
     # Log action
     PluginSecurityService.log_plugin_action(
@@ -475,7 +491,7 @@ async def report_plugin_health(
     plugin_id: str,
     health_data: dict,
     auth_info: tuple = Depends(verify_plugin_api_key),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update plugin health status (for external plugins).
@@ -506,7 +522,7 @@ async def report_plugin_health(
     rate_limiter.check_rate_limit(plugin_id, "health_check")
     
     stmt = select(Plugin).where(Plugin.id == plugin_id)
-    result = db.execute(stmt)
+    result = await db.execute(stmt)
     plugin = result.scalar_one_or_none()
     
     if not plugin:
@@ -518,7 +534,8 @@ async def report_plugin_health(
     plugin.last_health_check = datetime.utcnow()
     plugin.health_status = "healthy" if health_data.get("healthy") else "unhealthy"
     plugin.health_message = health_data.get("message")
-    db.commit()
+    await db.commit()
+    invalidate_cache_tags(TAG_PLUGINS)
     
     # Log action
     PluginSecurityService.log_plugin_action(
@@ -9,6 +9,7 @@ from app.models.containers import ContainerHost, Container
 from app.services.containers.container_monitor import ContainerMonitor
 from app.services.containers.update_checker import UpdateChecker
 from app.services.containers.health_validator import HealthValidator
+from app.services.response_cache import TAG_ALERTS, TAG_CONTAINERS, invalidate_cache_tags
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +66,8 @@ async def discover_containers():
                 logger.error(f"Error discovering containers on host {host.name}: {e}")
                 continue
         
+        if total_discovered or total_updated:
+            invalidate_cache_tags(TAG_CONTAINERS)
         logger.info(f"Container discovery completed: {total_discovered} discovered, {total_updated} updated")
         
     except Exception as e:
@@ -85,30 +88,10 @@ async def check_container_updates():
     try:
         logger.info("Starting container update check task...")
         
-        # Get all containers
-        containers = db.query(Container).filter(
-            Container.exclude_from_updates == False
-        ).all()
-        
-        if not containers:
-            logger.debug("No containers found for update checking")
-            return
-        
+        # Registry lookups are deduplicated per image and run concurrently
         checker = UpdateChecker(db)
-        updates_found = 0
-        
-        for container in containers:
-            try:
-                # Check for updates
-                result = await checker.check_update(container.id)
-                
-                if result.get('update_available'):
-                    updates_found += 1
-                    logger.info(f"Update available for {container.name}: {container.current_tag} → {result.get('available_tag')}")
-                
-            except Exception as e:
-                logger.error(f"Error checking updates for container {container.name}: {e}")
-                continue
+        result = await checker.check_all_containers()
+        updates_found = result["updates_found"]
         
         logger.info(f"Update check completed: {updates_found} updates available")
         
@@ -130,7 +113,7 @@ async def scan_container_security():
     try:
         logger.info("Starting container security scan task...")
         
-        from app.services.containers.security.trivy_scanner import TrivyScanner
+        from app.services.containers.security.scan_service import ScanQueueFull, get_scan_service
         
         # Get all containers
         containers = db.query(Container).all()
@@ -139,27 +122,34 @@ async def scan_container_security():
             logger.debug("No containers found for security scanning")
             return
         
-        scanner = TrivyScanner(db)
-        scanned = 0
-        critical_found = 0
+        # Containers sharing a digest share one scan; digests already scanned
+        # with the current vulnerability DB are served from cache
+        service = get_scan_service()
+        jobs = {}
         
         for container in containers:
+            if container.current_digest:
+                image = f"{container.image}@{container.current_digest}"
+            else:
+                image = f"{container.image}:{container.current_tag}"
             try:
-                # Scan container
-                result = await scanner.scan_container(container.id)
-                
-                scanned += 1
-                critical = result.get('critical_count', 0)
-                critical_found += critical
-                
-                if critical > 0:
-                    logger.warning(f"Critical vulnerabilities found in {container.name}: {critical}")
-                
+                job = await service.submit(
+                    image,
+                    image_digest=container.current_digest,
+                    container_id=container.id,
+                    scan_type="scheduled"
+                )
+                jobs[job.id] = job
+            except ScanQueueFull as e:
+                logger.warning(f"Stopped queueing security scans: {e}")
+                break
             except Exception as e:
-                logger.error(f"Error scanning container {container.name}: {e}")
+                logger.error(f"Error queueing scan for container {container.name}: {e}")
                 continue
         
-        logger.info(f"Security scan completed: {scanned} scanned, {critical_found} critical CVEs found")
+        cached = sum(1 for job in jobs.values() if job.cached)
+        logger.info(f"Security scan queued: {len(jobs)} scan jobs for {len(containers)} containers "
+                    f"({cached} served from cache)")
         
     except Exception as e:
         logger.error(f"Container security scan task failed: {e}")
@@ -262,6 +252,7 @@ async def validate_container_health():
                         )
                         db.add(alert)
                         db.commit()
+                        invalidate_cache_tags(TAG_ALERTS)
                 
             except Exception as e:
                 logger.error(f"Error checking health for container {container.name}: {e}")
@@ -8,6 +8,13 @@ from app.services.auth.jwt_handler import (
     verify_token
 )
 from app.services.auth.session_manager import SessionManager
+from app.services.auth.principal import (
+    Principal,
+    get_principal_cache,
+    get_token_payload,
+    invalidate_principal,
+    resolve_principal
+)
 
 __all__ = [
     # Password functions
@@ -21,4 +28,10 @@ __all__ = [
     "verify_token",
     # Session manager
     "SessionManager",
+    # Principal resolution
+    "Principal",
+    "get_principal_cache",
+    "get_token_payload",
+    "invalidate_principal",
+    "resolve_principal",
 ]
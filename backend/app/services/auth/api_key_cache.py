@@ -0,0 +1,348 @@
+"""
+API Key Validation Cache and Write-Behind Usage Tracking
+
+Validating an API key used to cost a lookup query plus a commit to bump its
+usage columns, so every call from an external plugin was a write transaction
+on the key table. Two pieces remove that:
+
+- APIKeyCache: a bounded TTL LRU of validated keys keyed by key kind and
+  SHA-256 hash, holding only what authorization needs (id, owner,
+  permissions, expiry). A key validated as one kind is never returned for
+  the other. Revoking a key invalidates it; the TTL bounds staleness in
+  other workers.
+- APIKeyUsageBuffer: last-used timestamps and use counts are recorded in
+  memory and written by a background thread every flush_interval seconds as
+  one executemany UPDATE per key table.
+
+Both user keys (api_keys) and external plugin keys (plugin_api_keys) use them.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Usage columns per key table: (last-used column, use-count column or None)
+USAGE_COLUMNS = {
+    "api_keys": ("last_used_at", None),
+    "plugin_api_keys": ("last_used", "uses_count"),
+}
+
+# Key kinds: user keys (api_keys) and external plugin keys (plugin_api_keys)
+USER_KEY = "user"
+PLUGIN_KEY = "plugin"
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Treat naive timestamps (stored as UTC) as UTC."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+@dataclass(frozen=True)
+class CachedAPIKey:
+    """A validated API key, detached from any DB session."""
+    id: Any
+    key_hash: str
+    kind: str
+    permissions: Tuple[str, ...]
+    expires_at: Optional[datetime] = None
+    user_id: Any = None
+    plugin_id: Optional[str] = None
+
+    @property
+    def scopes(self) -> Tuple[str, ...]:
+        return self.permissions
+
+    def is_expired(self, now: Optional[datetime] = None) -> bool:
+        if self.expires_at is None:
+            return False
+        return self.expires_at < (now or datetime.now(timezone.utc))
+
+    @classmethod
+    def from_user_key(cls, key) -> "CachedAPIKey":
+        """Snapshot an APIKey row."""
+        return cls(
+            id=key.id,
+            key_hash=key.key_hash,
+            kind=USER_KEY,
+            permissions=tuple(key.scopes or ()),
+            expires_at=_as_utc(key.expires_at),
+            user_id=key.user_id,
+        )
+
+    @classmethod
+    def from_plugin_key(cls, key) -> "CachedAPIKey":
+        """Snapshot a PluginAPIKey row."""
+        return cls(
+            id=key.id,
+            key_hash=key.key_hash,
+            kind=PLUGIN_KEY,
+            permissions=tuple(key.permissions or ()),
+            expires_at=_as_utc(key.expires_at),
+            plugin_id=key.plugin_id,
+        )
+
+
+class APIKeyCache:
+    """Thread-safe TTL LRU of validated API keys keyed by (kind, key hash)."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[CachedAPIKey, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, kind: str, key_hash: str) -> Optional[CachedAPIKey]:
+        """Get a validated key of the given kind (USER_KEY or PLUGIN_KEY)."""
+        cache_key = (kind, key_hash)
+        with self._lock:
+            item = self._entries.get(cache_key)
+            if item is None or item[1] <= time.monotonic() or item[0].kind != kind:
+                if item is not None:
+                    del self._entries[cache_key]
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self._stats["hits"] += 1
+            return item[0]
+
+    def set(self, entry: CachedAPIKey):
+        if self.max_entries <= 0:
+            return
+        cache_key = (entry.kind, entry.key_hash)
+        with self._lock:
+            self._entries.pop(cache_key, None)
+            self._entries[cache_key] = (entry, time.monotonic() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key_hash: Optional[str] = None, key_id: Any = None, kind: Optional[str] = None) -> int:
+        """
+        Drop cached keys by hash and/or key id.
+
+        Args:
+            key_hash: Hash of the key to drop
+            key_id: Primary key of the key row to drop
+            kind: Only drop keys of this kind (default: either kind)
+
+        Returns:
+            Number of entries removed
+        """
+        key_id = str(key_id) if key_id is not None else None
+        with self._lock:
+            stale = [
+                cache_key for cache_key, (entry, _) in self._entries.items()
+                if (kind is None or entry.kind == kind)
+                and (entry.key_hash == key_hash or (key_id is not None and str(entry.id) == key_id))
+            ]
+            for cache_key in stale:
+                del self._entries[cache_key]
+            self._stats["invalidations"] += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class APIKeyUsageBuffer:
+    """
+    Write-behind buffer for API key usage.
+
+    record() only touches memory; a background thread flushes pending usage
+    every flush_interval seconds, one executemany UPDATE per key table. Usage
+    that fails to flush is merged back and retried on the next cycle.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[Engine] = None,
+        flush_interval: float = settings.api_key_usage_flush_interval_seconds
+    ):
+        """
+        Initialize usage buffer.
+
+        Args:
+            engine: SQLAlchemy engine to write to (defaults to the app engine)
+            flush_interval: Seconds between flushes
+        """
+        if engine is None:
+            from app.core.database import engine as default_engine
+            engine = default_engine
+
+        self.engine = engine
+        self.flush_interval = flush_interval
+        # (model, key_id) -> [last_used, uses]
+        self._pending: Dict[Tuple[type, Any], List[Any]] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats = {"recorded": 0, "flushed_keys": 0, "flush_count": 0, "flush_errors": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and self._worker.is_alive()
+
+    def start(self):
+        """Start the background flush thread (idempotent)."""
+        with self._start_lock:
+            if self.running:
+                return
+            self._stop_event.clear()
+            self._worker = threading.Thread(target=self._run, name="api-key-usage", daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout: Optional[float] = 10.0):
+        """Stop the flush thread and write any pending usage."""
+        with self._start_lock:
+            if self._worker:
+                self._stop_event.set()
+                self._worker.join(timeout)
+                self._worker = None
+        self.flush()
+
+    def record(self, model: type, key_id: Any, used_at: Optional[datetime] = None):
+        """
+        Record one use of a key (memory only).
+
+        Args:
+            model: Key model (APIKey or PluginAPIKey)
+            key_id: Primary key of the key row
+            used_at: When the key was used (defaults to now)
+        """
+        used_at = used_at or datetime.now(timezone.utc)
+        with self._lock:
+            entry = self._pending.get((model, key_id))
+            if entry is None:
+                self._pending[(model, key_id)] = [used_at, 1]
+            else:
+                entry[0] = max(entry[0], used_at)
+                entry[1] += 1
+            self._stats["recorded"] += 1
+        if not self.running:
+            self.start()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write all pending usage to the database.
+
+        Returns:
+            Number of key rows updated
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        by_model: Dict[type, List[Dict[str, Any]]] = {}
+        for (model, key_id), (used_at, uses) in pending.items():
+            by_model.setdefault(model, []).append({"b_id": key_id, "b_used": used_at, "b_uses": uses})
+
+        try:
+            with self.engine.begin() as conn:
+                for model, params in by_model.items():
+                    conn.execute(self._update_statement(model), params)
+        except Exception as e:
+            logger.error(f"Failed to flush API key usage for {len(pending)} keys: {e}")
+            self._merge_back(pending)
+            with self._lock:
+                self._stats["flush_errors"] += 1
+            return 0
+
+        with self._lock:
+            self._stats["flushed_keys"] += len(pending)
+            self._stats["flush_count"] += 1
+        return len(pending)
+
+    @staticmethod
+    def _update_statement(model: type):
+        table = model.__table__
+        last_used_column, count_column = USAGE_COLUMNS[table.name]
+        values = {last_used_column: bindparam("b_used")}
+        if count_column:
+            values[count_column] = func.coalesce(table.c[count_column], 0) + bindparam("b_uses")
+        return update(table).where(table.c.id == bindparam("b_id")).values(**values)
+
+    def _merge_back(self, pending: Dict[Tuple[type, Any], List[Any]]):
+        with self._lock:
+            for key, (used_at, uses) in pending.items():
+                entry = self._pending.get(key)
+                if entry is None:
+                    self._pending[key] = [used_at, uses]
+                else:
+                    entry[0] = max(entry[0], used_at)
+                    entry[1] += uses
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, pending=len(self._pending))
+
+
+_api_key_cache: Optional[APIKeyCache] = None
+_usage_buffer: Optional[APIKeyUsageBuffer] = None
+
+
+def get_api_key_cache() -> APIKeyCache:
+    """Get the process-wide API key validation cache."""
+    global _api_key_cache
+    if _api_key_cache is None:
+        _api_key_cache = APIKeyCache(
+            settings.api_key_cache_max_entries,
+            settings.api_key_cache_ttl_seconds
+        )
+    return _api_key_cache
+
+
+def invalidate_api_key(key_hash: Optional[str] = None, key_id: Any = None, kind: Optional[str] = None) -> int:
+    """Drop a key from the validation cache (call after revoking it)."""
+    if _api_key_cache is None:
+        return 0
+    return _api_key_cache.invalidate(key_hash=key_hash, key_id=key_id, kind=kind)
+
+
+def get_api_key_usage_buffer() -> APIKeyUsageBuffer:
+    """Get the process-wide API key usage buffer."""
+    global _usage_buffer
+    if _usage_buffer is None:
+        _usage_buffer = APIKeyUsageBuffer()
+    return _usage_buffer
+
+
+def shutdown_api_key_usage_buffer():
+    """
+    Flush and stop the global usage buffer.
+
+    Should be called on application shutdown.
+    """
+    global _usage_buffer
+    if _usage_buffer is not None:
+        _usage_buffer.stop()
+        _usage_buffer = None
@@ -6,6 +6,13 @@ from typing import Optional
 from sqlalchemy.orm import Session
 from app.models.auth import APIKey
 from app.core.config import settings
+from app.services.auth.api_key_cache import (
+    USER_KEY,
+    CachedAPIKey,
+    get_api_key_cache,
+    get_api_key_usage_buffer,
+    invalidate_api_key
+)
 
 
 def generate_api_key() -> str:
@@ -81,37 +88,46 @@ def create_api_key(
     return api_key, plaintext_key
 
 
-def validate_api_key(db: Session, api_key: str) -> Optional[APIKey]:
+def validate_api_key(db: Session, api_key: str) -> Optional[CachedAPIKey]:
     """
     Validate an API key and return the associated key record.
     
+    Validated keys are served from the hash-keyed cache (user keys only, so a
+    cached plugin key is never accepted here); last_used_at is
+    recorded in the write-behind usage buffer instead of being committed here.
+    
     Args:
         db: Database session
         api_key: Plain text API key to validate
         
     Returns:
-        APIKey model if valid, None if invalid/expired/inactive
+        CachedAPIKey if valid, None if invalid/expired/inactive
     """
     key_hash = hash_api_key(api_key)
-    
-    # Query for the key
-    db_key = db.query(APIKey).filter(
-        APIKey.key_hash == key_hash,
-        APIKey.is_active == True
-    ).first()
-    
-    if not db_key:
-        return None
+    cache = get_api_key_cache()
+    
+    key = cache.get(USER_KEY, key_hash)
+    if key is None:
+        # Query for the key
+        db_key = db.query(APIKey).filter(
+            APIKey.key_hash == key_hash,
+            APIKey.is_active == True
+        ).first()
+        
+        if not db_key:
+            return None
+        
+        key = CachedAPIKey.from_user_key(db_key)
+        cache.set(key)
     
     # Check expiration
-    if db_key.expires_at and db_key.expires_at < datetime.utcnow():
+    if key.is_expired():
         return None
     
-    # Update last used timestamp
-    db_key.last_used_at = datetime.utcnow()
-    db.commit()
+    # Update last used timestamp (flushed in bulk)
+    get_api_key_usage_buffer().record(APIKey, key.id)
     
-    return db_key
+    return key
 
 
 def revoke_api_key(db: Session, key_id: str, user_id: str) -> bool:
@@ -136,6 +152,7 @@ def revoke_api_key(db: Session, key_id: str, user_id: str) -> bool:
     
     db_key.is_active = False
     db.commit()
+    invalidate_api_key(key_hash=db_key.key_hash, key_id=db_key.id, kind=USER_KEY)
     
     return True
 
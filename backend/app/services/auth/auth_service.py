@@ -4,11 +4,12 @@ from typing import Optional
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 
 from app.core.database import get_db
 from app import models, schemas
+from app.services.auth.principal import Principal, resolve_principal
 from sqlalchemy.orm import Session
 
 # Configuration for JWT
@@ -64,30 +65,33 @@ class AuthService:
 
 
 async def get_current_user(
+    request: Request,
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> models.User:
-    """Dependency to get current authenticated user"""
+) -> Principal:
+    """
+    Dependency to get current authenticated user.
+
+    Resolved once per request and served from the principal cache when warm,
+    so the result is a detached Principal rather than a User row; load the
+    row explicitly when it has to be modified.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    username = AuthService.decode_access_token(token)
-    if username is None:
+    principal = resolve_principal(request, db)
+    if principal is None:
         raise credentials_exception
 
-    user = AuthService.get_user_by_username(db, username=username)
-    if user is None:
-        raise credentials_exception
-
-    return user
+    return principal
 
 
 async def get_current_active_user(
-    current_user: models.User = Depends(get_current_user)
-) -> models.User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """Dependency to get current active user (checks is_active)"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -0,0 +1,213 @@
+"""
+Request Principal Resolution
+
+Resolves the authenticated principal of a request once and shares it between
+AuthContextMiddleware, TenantContextMiddleware and the route dependencies:
+
+- the bearer token is decoded once per request and kept on request.state
+- principals (user id, username, role, tenant, active flag) are cached in a
+  bounded, thread-safe TTL LRU keyed by token subject, so a warm request needs
+  no user-table query
+
+Cached principals are dropped when the user row is updated or deleted through
+the ORM, and when one of the user's sessions is revoked. The TTL bounds how
+long another worker's cached copy can lag behind such a change.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.users import User
+from app.services.auth.jwt_handler import decode_token
+
+logger = logging.getLogger(__name__)
+
+# request.state attributes
+STATE_TOKEN_PAYLOAD = "token_payload"
+STATE_PRINCIPAL = "principal"
+_STATE_RESOLVED = "_principal_resolved"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user of a request, detached from any DB session."""
+    id: Any
+    username: str
+    email: Optional[str]
+    role: str
+    tenant_id: str
+    is_active: bool
+    is_superuser: bool
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            role=user.role or "viewer",
+            tenant_id=getattr(user, "tenant_id", None) or "default",
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+            created_at=user.created_at,
+        )
+
+
+class PrincipalCache:
+    """Thread-safe TTL LRU of principals keyed by token subject."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Principal, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, subject: str) -> Optional[Principal]:
+        with self._lock:
+            item = self._entries.get(subject)
+            if item is None or item[1] <= time.monotonic():
+                if item is not None:
+                    del self._entries[subject]
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(subject)
+            self._stats["hits"] += 1
+            return item[0]
+
+    def set(self, subject: str, principal: Principal):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries.pop(subject, None)
+            self._entries[subject] = (principal, time.monotonic() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, subject: Optional[str] = None, user_id: Any = None) -> int:
+        """
+        Drop cached principals by subject and/or user id.
+
+        Returns:
+            Number of entries removed
+        """
+        user_id = str(user_id) if user_id is not None else None
+        with self._lock:
+            stale = [
+                key for key, (principal, _) in self._entries.items()
+                if key == subject or (user_id is not None and str(principal.id) == user_id)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self._stats["invalidations"] += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_principal_cache: Optional[PrincipalCache] = None
+
+
+def get_principal_cache() -> PrincipalCache:
+    """Get the process-wide principal cache."""
+    global _principal_cache
+    if _principal_cache is None:
+        max_entries = settings.principal_cache_max_entries if settings.principal_cache_enabled else 0
+        _principal_cache = PrincipalCache(max_entries, settings.principal_cache_ttl_seconds)
+    return _principal_cache
+
+
+def invalidate_principal(username: Optional[str] = None, user_id: Any = None) -> int:
+    """Drop a user's cached principal (call after changing or revoking a user)."""
+    if _principal_cache is None:
+        return 0
+    return _principal_cache.invalidate(subject=username, user_id=user_id)
+
+
+def _bearer_token(request: Request) -> Optional[str]:
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token.strip()
+
+
+def get_token_payload(request: Request) -> Optional[Dict[str, Any]]:
+    """Verified payload of the request's bearer token, decoded once per request."""
+    state = request.state
+    if hasattr(state, STATE_TOKEN_PAYLOAD):
+        return getattr(state, STATE_TOKEN_PAYLOAD)
+
+    token = _bearer_token(request)
+    payload = decode_token(token) if token else None
+    setattr(state, STATE_TOKEN_PAYLOAD, payload)
+    return payload
+
+
+def resolve_principal(request: Request, db: Optional[Session] = None) -> Optional[Principal]:
+    """
+    Resolve the principal of a request, at most once per request.
+
+    The principal comes from the cache when warm; otherwise the user row is
+    loaded (through db, or a short-lived session when db is None) and cached.
+
+    Returns:
+        Principal, or None if the request carries no valid token for a known user
+    """
+    state = request.state
+    if getattr(state, _STATE_RESOLVED, False):
+        return getattr(state, STATE_PRINCIPAL, None)
+
+    principal = None
+    payload = get_token_payload(request)
+    subject = payload.get("sub") if payload else None
+    if subject:
+        cache = get_principal_cache()
+        principal = cache.get(subject)
+        if principal is None:
+            principal = _load_principal(subject, db)
+            if principal is not None:
+                cache.set(subject, principal)
+
+    setattr(state, STATE_PRINCIPAL, principal)
+    setattr(state, _STATE_RESOLVED, True)
+    return principal
+
+
+def _load_principal(subject: str, db: Optional[Session]) -> Optional[Principal]:
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == subject).first()
+        return Principal.from_user(user) if user is not None else None
+    finally:
+        if own_session:
+            db.close()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User):
+    # Matching on id as well catches entries cached under a previous username
+    invalidate_principal(username=target.username, user_id=target.id)
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from redis import Redis
 from app.core.config import settings
+from app.services.auth.principal import invalidate_principal
 
 
 class SessionManager:
@@ -135,6 +136,8 @@ class SessionManager:
         if user_id:
             user_sessions_key = f"{self.user_sessions_prefix}{user_id}"
             self.redis.srem(user_sessions_key, session_id)
+            # Revocation must not be masked by a cached principal
+            invalidate_principal(user_id=user_id)
         
         return True
     
@@ -180,5 +183,6 @@ class SessionManager:
         # Clear user sessions set
         user_sessions_key = f"{self.user_sessions_prefix}{user_id}"
         self.redis.delete(user_sessions_key)
+        invalidate_principal(user_id=user_id)
         
         return count
@@ -110,6 +110,7 @@ class ClusterMetricsService:
                 storage_capacity += int(parse_resource_quantity(capacity.get("ephemeral_storage", "0")))
             
             # Try to get metrics from metrics-server
+            node_metrics = []
             try:
                 node_metrics = await client.get_node_metrics()
                 for metric in node_metrics:
@@ -146,7 +147,7 @@ class ClusterMetricsService:
             self.db.add(metric)
             
             # Also collect per-node metrics
-            await self._collect_node_metrics(cluster, nodes, client)
+            self._collect_node_metrics(cluster, nodes, pods, node_metrics)
             
             self.db.commit()
             self.db.refresh(metric)
@@ -161,22 +162,22 @@ class ClusterMetricsService:
             logger.error(f"Unexpected error collecting metrics for {cluster.name}: {e}", exc_info=True)
             return None
     
-    async def _collect_node_metrics(self, cluster: KubernetesCluster, nodes: List[Dict], client: KubernetesClient):
-        """Collect and store per-node metrics"""
+    def _collect_node_metrics(
+        self,
+        cluster: KubernetesCluster,
+        nodes: List[Dict],
+        pods: List[Dict],
+        node_metrics: List[Dict]
+    ):
+        """Collect and store per-node metrics from the cluster-wide reads"""
         try:
-            # Get metrics from metrics-server
-            node_metrics_map = {}
-            try:
-                node_metrics_list = await client.get_node_metrics()
-                for metric in node_metrics_list:
-                    node_name = metric.get("node_name")
-                    if node_name:
-                        node_metrics_map[node_name] = metric
-            except Exception:
-                pass
+            node_metrics_map = {
+                metric["node_name"]: metric
+                for metric in node_metrics
+                if metric.get("node_name")
+            }
             
             # Get pod counts per node
-            pods = await client.get_all_pods()
             pod_counts = {}
             for pod in pods:
                 node_name = pod.get("node_name")
@@ -1,28 +1,102 @@
-import httpx
-from typing import Optional, Dict, List, Any
+"""
+Container Registry Client
+
+Digest lookups against Docker Registry V2 APIs (Docker Hub, GHCR, GCR and
+generic registries), built to stay cheap when many containers share images:
+- One pooled httpx.AsyncClient per registry host
+- Bearer tokens cached per (registry, scope) until shortly before expiry;
+  the auth realm learned from the first 401 challenge is reused so later
+  lookups fetch (or reuse) a token up front
+- HEAD-only manifest requests (Docker Hub does not count them against the
+  pull rate limit), conditional on the last ETag once a cache entry is stale
+- A digest cache keyed by (registry, repository, tag) with a TTL, and a
+  single in-flight request per key shared by concurrent callers
+"""
+import asyncio
 import logging
 import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Registry names whose API is served from a different host
+REGISTRY_API_HOSTS = {
+    "docker.io": "registry-1.docker.io",
+}
+
+MANIFEST_ACCEPT = ", ".join([
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+])
+
+# Seconds a token is treated as expired before the registry says so
+TOKEN_EXPIRY_MARGIN = 10.0
+
+_CHALLENGE_PARAM_RE = re.compile(r'(\w+)="([^"]*)"')
+
+DigestKey = Tuple[str, str, str]
+
+
+@dataclass
+class DigestEntry:
+    """Cached result of a digest lookup."""
+    digest: str
+    etag: Optional[str]
+    media_type: Optional[str]
+    fetched_at: float
+
 
 class RegistryClient:
     """Client for querying container image registries"""
-    
-    def __init__(self):
+
+    def __init__(
+        self,
+        digest_ttl_seconds: float = settings.registry_digest_cache_ttl_seconds,
+        max_connections: int = settings.registry_max_connections
+    ):
+        """
+        Initialize registry client.
+
+        Args:
+            digest_ttl_seconds: How long a digest is served from cache
+                without asking the registry
+            max_connections: Connection pool size per registry host
+        """
         self.timeout = httpx.Timeout(10.0)
-    
+        self.digest_ttl_seconds = digest_ttl_seconds
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        )
+        self._http_clients: Dict[str, httpx.AsyncClient] = {}
+        self._tokens: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._auth_realms: Dict[str, Tuple[str, Optional[str]]] = {}
+        self._digests: Dict[DigestKey, DigestEntry] = {}
+        self._inflight: Dict[DigestKey, "asyncio.Task[Optional[DigestEntry]]"] = {}
+        self._stats = {
+            "cache_hits": 0, "not_modified": 0, "fetched": 0,
+            "shared_inflight": 0, "token_fetches": 0, "errors": 0,
+        }
+
     def parse_image_name(self, image: str) -> Dict[str, str]:
         """Parse an image name into registry, repository, and tag components"""
         # Default values
         registry = "docker.io"
         repository = image
         tag = "latest"
-        
-        # Split tag if present
-        if ":" in image:
+
+        # Split tag if present (a colon inside the registry host is a port)
+        if ":" in image and "/" not in image.rsplit(":", 1)[1]:
             repository, tag = image.rsplit(":", 1)
-        
+
         # Check for registry in repository
         if "/" in repository:
             parts = repository.split("/")
@@ -30,158 +104,221 @@ class RegistryClient:
             if "." in parts[0] or parts[0] == "localhost" or ":" in parts[0]:
                 registry = parts[0]
                 repository = "/".join(parts[1:])
-        
+
         # Normalize Docker Hub official images (e.g., "postgres" -> "library/postgres")
         if registry == "docker.io" and "/" not in repository:
             repository = f"library/{repository}"
-        
+
         return {
             "registry": registry,
             "repository": repository,
             "tag": tag,
             "full_name": f"{registry}/{repository}:{tag}"
         }
-    
+
     async def get_latest_digest(self, image: str, tag: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get the latest digest for an image tag from the registry"""
         parsed = self.parse_image_name(image)
         target_tag = tag if tag else parsed["tag"]
-        
+        key = (parsed["registry"], parsed["repository"], target_tag)
+
         try:
-            if parsed["registry"] == "docker.io":
-                return await self._get_dockerhub_digest(parsed["repository"], target_tag)
-            elif parsed["registry"] == "ghcr.io":
-                return await self._get_ghcr_digest(parsed["repository"], target_tag)
-            elif parsed["registry"] == "gcr.io":
-                return await self._get_gcr_digest(parsed["repository"], target_tag)
-            else:
-                # Try generic Docker Registry V2 API
-                return await self._get_generic_registry_digest(
-                    parsed["registry"], parsed["repository"], target_tag
-                )
+            entry = await self._lookup_digest(key)
         except Exception as e:
+            self._stats["errors"] += 1
             logger.error(f"Failed to get digest for {image}:{target_tag}: {e}")
             return None
-    
-    async def _get_dockerhub_digest(self, repository: str, tag: str) -> Optional[Dict[str, Any]]:
-        """Get digest from Docker Hub"""
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # First, get auth token
-                auth_url = f"https://auth.docker.io/token?service=registry.docker.io&scope=repository:{repository}:pull"
-                auth_response = await client.get(auth_url)
-                auth_response.raise_for_status()
-                token = auth_response.json()["token"]
-                
-                # Get manifest with digest
-                manifest_url = f"https://registry-1.docker.io/v2/{repository}/manifests/{tag}"
-                headers = {
-                    "Authorization": f"Bearer {token}",
-                    "Accept": "application/vnd.docker.distribution.manifest.v2+json"
-                }
-                
-                manifest_response = await client.get(manifest_url, headers=headers)
-                manifest_response.raise_for_status()
-                
-                digest = manifest_response.headers.get("Docker-Content-Digest")
-                manifest = manifest_response.json()
-                
-                return {
-                    "digest": digest,
-                    "tag": tag,
-                    "registry": "docker.io",
-                    "repository": repository,
-                    "manifest": manifest,
-                    "config_digest": manifest.get("config", {}).get("digest")
-                }
-        except Exception as e:
-            logger.error(f"Docker Hub API error for {repository}:{tag}: {e}")
+
+        if entry is None:
             return None
-    
-    async def _get_ghcr_digest(self, repository: str, tag: str) -> Optional[Dict[str, Any]]:
-        """Get digest from GitHub Container Registry"""
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                manifest_url = f"https://ghcr.io/v2/{repository}/manifests/{tag}"
-                headers = {
-                    "Accept": "application/vnd.docker.distribution.manifest.v2+json"
-                }
-                
-                manifest_response = await client.get(manifest_url, headers=headers)
-                manifest_response.raise_for_status()
-                
-                digest = manifest_response.headers.get("Docker-Content-Digest")
-                manifest = manifest_response.json()
-                
-                return {
-                    "digest": digest,
-                    "tag": tag,
-                    "registry": "ghcr.io",
-                    "repository": repository,
-                    "manifest": manifest
-                }
-        except Exception as e:
-            logger.error(f"GHCR API error for {repository}:{tag}: {e}")
+        return {
+            "digest": entry.digest,
+            "tag": target_tag,
+            "registry": parsed["registry"],
+            "repository": parsed["repository"],
+            "media_type": entry.media_type,
+        }
+
+    async def _lookup_digest(self, key: DigestKey) -> Optional[DigestEntry]:
+        """Serve a digest from cache, or share/start the registry request for it."""
+        cached = self._digests.get(key)
+        if cached is not None and time.monotonic() - cached.fetched_at < self.digest_ttl_seconds:
+            self._stats["cache_hits"] += 1
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats["shared_inflight"] += 1
+        else:
+            # A task, not a future resolved by the first caller: cancelling
+            # any one caller (the first included) never strands the others
+            task = asyncio.ensure_future(self._fetch_digest(key, cached))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._lookup_done(key, done))
+        return await asyncio.shield(task)
+
+    def _lookup_done(self, key: DigestKey, task: "asyncio.Task[Optional[DigestEntry]]"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the error so a lookup whose callers all went away does not log a warning
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch_digest(self, key: DigestKey, cached: Optional[DigestEntry]) -> Optional[DigestEntry]:
+        """HEAD the manifest, conditional on the cached ETag."""
+        registry, repository, tag = key
+        headers = {"Accept": MANIFEST_ACCEPT}
+        if cached is not None and cached.etag:
+            headers["If-None-Match"] = cached.etag
+
+        response = await self._registry_request(
+            "HEAD", registry, f"/v2/{repository}/manifests/{tag}",
+            scope=f"repository:{repository}:pull", headers=headers
+        )
+
+        if response.status_code == 304 and cached is not None:
+            self._stats["not_modified"] += 1
+            cached.fetched_at = time.monotonic()
+            return cached
+        if response.status_code == 404:
+            logger.warning(f"Manifest not found: {registry}/{repository}:{tag}")
+            self._digests.pop(key, None)
             return None
-    
-    async def _get_gcr_digest(self, repository: str, tag: str) -> Optional[Dict[str, Any]]:
-        """Get digest from Google Container Registry"""
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                manifest_url = f"https://gcr.io/v2/{repository}/manifests/{tag}"
-                headers = {
-                    "Accept": "application/vnd.docker.distribution.manifest.v2+json"
-                }
-                
-                manifest_response = await client.get(manifest_url, headers=headers)
-                manifest_response.raise_for_status()
-                
-                digest = manifest_response.headers.get("Docker-Content-Digest")
-                manifest = manifest_response.json()
-                
-                return {
-                    "digest": digest,
-                    "tag": tag,
-                    "registry": "gcr.io",
-                    "repository": repository,
-                    "manifest": manifest
-                }
-        except Exception as e:
-            logger.error(f"GCR API error for {repository}:{tag}: {e}")
+        response.raise_for_status()
+
+        digest = response.headers.get("Docker-Content-Digest")
+        if not digest:
+            logger.warning(f"Registry {registry} returned no digest for {repository}:{tag}")
             return None
-    
-    async def _get_generic_registry_digest(
-        self, registry: str, repository: str, tag: str
-    ) -> Optional[Dict[str, Any]]:
-        """Get digest from a generic Docker Registry V2 API"""
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                manifest_url = f"https://{registry}/v2/{repository}/manifests/{tag}"
-                headers = {
-                    "Accept": "application/vnd.docker.distribution.manifest.v2+json"
-                }
-                
-                manifest_response = await client.get(manifest_url, headers=headers)
-                manifest_response.raise_for_status()
-                
-                digest = manifest_response.headers.get("Docker-Content-Digest")
-                manifest = manifest_response.json()
-                
-                return {
-                    "digest": digest,
-                    "tag": tag,
-                    "registry": registry,
-                    "repository": repository,
-                    "manifest": manifest
-                }
-        except Exception as e:
-            logger.error(f"Generic registry API error for {registry}/{repository}:{tag}: {e}")
+
+        self._stats["fetched"] += 1
+        entry = DigestEntry(
+            digest=digest,
+            etag=response.headers.get("ETag") or f'"{digest}"',
+            media_type=response.headers.get("Content-Type"),
+            fetched_at=time.monotonic()
+        )
+        self._digests[key] = entry
+        return entry
+
+    async def _registry_request(
+        self,
+        method: str,
+        registry: str,
+        path: str,
+        scope: str,
+        headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """
+        Send a registry API request, authenticating with a cached bearer token.
+
+        Args:
+            method: HTTP method
+            registry: Registry name (e.g. "docker.io", "ghcr.io")
+            path: API path starting with /v2/
+            scope: Token scope, e.g. "repository:library/postgres:pull"
+            headers: Extra request headers
+
+        Returns:
+            httpx.Response (401 only if the registry rejected the token)
+        """
+        host = REGISTRY_API_HOSTS.get(registry, registry)
+        http = self._http_client(host)
+        headers = dict(headers or {})
+
+        token = await self._get_token(registry, scope) if registry in self._auth_realms else None
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        response = await http.request(method, f"https://{host}{path}", headers=headers)
+        if response.status_code != 401:
+            return response
+
+        # Learn the auth realm from the challenge and retry once with a fresh token
+        challenge = self._parse_challenge(response.headers.get("WWW-Authenticate", ""))
+        if challenge is None:
+            return response
+        realm, service, challenge_scope = challenge
+        self._auth_realms[registry] = (realm, service)
+        self._tokens.pop((registry, challenge_scope or scope), None)
+        token = await self._get_token(registry, challenge_scope or scope)
+        if not token:
+            return response
+        headers["Authorization"] = f"Bearer {token}"
+        return await http.request(method, f"https://{host}{path}", headers=headers)
+
+    async def _get_token(self, registry: str, scope: str) -> Optional[str]:
+        """Get a bearer token for a scope, reusing it until it expires."""
+        cached = self._tokens.get((registry, scope))
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+
+        realm, service = self._auth_realms[registry]
+        params = {"scope": scope}
+        if service:
+            params["service"] = service
+
+        response = await self._http_client(httpx.URL(realm).host).get(realm, params=params)
+        response.raise_for_status()
+        data = response.json()
+        token = data.get("token") or data.get("access_token")
+        if not token:
+            return None
+
+        self._stats["token_fetches"] += 1
+        expires_in = float(data.get("expires_in") or 60)
+        self._tokens[(registry, scope)] = (token, time.monotonic() + max(0.0, expires_in - TOKEN_EXPIRY_MARGIN))
+        return token
+
+    @staticmethod
+    def _parse_challenge(header: str) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+        """Parse a 'Bearer realm=...,service=...,scope=...' challenge."""
+        if not header.lower().startswith("bearer "):
             return None
-    
+        params = dict(_CHALLENGE_PARAM_RE.findall(header))
+        if "realm" not in params:
+            return None
+        return params["realm"], params.get("service"), params.get("scope")
+
+    def _http_client(self, host: str) -> httpx.AsyncClient:
+        """Get the pooled HTTP client for a host."""
+        http = self._http_clients.get(host)
+        if http is None or http.is_closed:
+            http = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+            self._http_clients[host] = http
+        return http
+
+    def invalidate(self, image: str, tag: Optional[str] = None):
+        """Drop the cached digest of an image tag (e.g. after pulling it)."""
+        parsed = self.parse_image_name(image)
+        self._digests.pop((parsed["registry"], parsed["repository"], tag or parsed["tag"]), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with hit/fetch/token counts and cache sizes
+        """
+        return {
+            **self._stats,
+            "cached_digests": len(self._digests),
+            "cached_tokens": len(self._tokens),
+            "http_clients": len(self._http_clients),
+        }
+
+    async def close(self):
+        """Cancel in-flight lookups and close the pooled HTTP clients."""
+        for task in list(self._inflight.values()):
+            task.cancel()
+        clients, self._http_clients = list(self._http_clients.values()), {}
+        for http in clients:
+            await http.aclose()
+
     async def list_tags(self, image: str, limit: int = 10) -> Optional[List[str]]:
         """List available tags for an image"""
         parsed = self.parse_image_name(image)
-        
+
         try:
             if parsed["registry"] == "docker.io":
                 return await self._list_dockerhub_tags(parsed["repository"], limit)
@@ -192,36 +329,64 @@ class RegistryClient:
         except Exception as e:
             logger.error(f"Failed to list tags for {image}: {e}")
             return None
-    
+
     async def _list_dockerhub_tags(self, repository: str, limit: int) -> Optional[List[str]]:
         """List tags from Docker Hub"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # Use Docker Hub API v2
-                url = f"https://hub.docker.com/v2/repositories/{repository}/tags?page_size={limit}"
-                response = await client.get(url)
-                response.raise_for_status()
-                
-                data = response.json()
-                tags = [result["name"] for result in data.get("results", [])]
-                return tags
+            # Use Docker Hub API v2
+            url = f"https://hub.docker.com/v2/repositories/{repository}/tags?page_size={limit}"
+            response = await self._http_client("hub.docker.com").get(url)
+            response.raise_for_status()
+
+            data = response.json()
+            tags = [result["name"] for result in data.get("results", [])]
+            return tags
         except Exception as e:
             logger.error(f"Docker Hub tags API error for {repository}: {e}")
             return None
-    
+
     async def _list_generic_registry_tags(
         self, registry: str, repository: str, limit: int
     ) -> Optional[List[str]]:
         """List tags from a generic Docker Registry V2 API"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                url = f"https://{registry}/v2/{repository}/tags/list"
-                response = await client.get(url)
-                response.raise_for_status()
-                
-                data = response.json()
-                tags = data.get("tags", [])[:limit]
-                return tags
+            response = await self._registry_request(
+                "GET", registry, f"/v2/{repository}/tags/list",
+                scope=f"repository:{repository}:pull"
+            )
+            response.raise_for_status()
+
+            data = response.json()
+            tags = data.get("tags", [])[:limit]
+            return tags
         except Exception as e:
             logger.error(f"Generic registry tags API error for {registry}/{repository}: {e}")
             return None
+
+
+# Global registry client instance
+_registry_client: Optional[RegistryClient] = None
+
+
+def get_registry_client() -> RegistryClient:
+    """
+    Get or create global registry client instance.
+
+    Returns:
+        RegistryClient instance
+    """
+    global _registry_client
+
+    if _registry_client is None:
+        _registry_client = RegistryClient()
+
+    return _registry_client
+
+
+async def close_registry_client():
+    """Close the global registry client's connections (application shutdown)."""
+    global _registry_client
+
+    if _registry_client is not None:
+        await _registry_client.close()
+        _registry_client = None
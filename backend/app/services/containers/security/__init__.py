@@ -2,5 +2,13 @@
 
 from .trivy_scanner import TrivyScanner
 from .policy_engine import SecurityPolicyEngine
+from .scan_service import ScanService, ScanJob, ScanQueueFull, get_scan_service
 
-__all__ = ["TrivyScanner", "SecurityPolicyEngine"]
+__all__ = [
+    "TrivyScanner",
+    "SecurityPolicyEngine",
+    "ScanService",
+    "ScanJob",
+    "ScanQueueFull",
+    "get_scan_service",
+]
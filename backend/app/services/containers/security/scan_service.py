@@ -0,0 +1,443 @@
+"""Vulnerability scan service.
+
+Keeps Trivy off the request path:
+- Results are cached by (image digest, Trivy DB version), in memory and via
+  completed VulnerabilityScan rows, and served at once on a hit
+- Cache misses become ScanJobs on a bounded queue drained by a fixed number
+  of workers; a scan already queued or running for the same image is joined
+  instead of started again
+- All scans share one Trivy cache/DB directory; the DB is refreshed by the
+  service on its own schedule and scans run with --skip-db-update
+- Database reads and writes run on the shared thread pool, never on the
+  event loop
+
+Callers get a ScanJob whose id can be polled (GET /security/scan-jobs/{id})
+or awaited.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.containers import Container, ScanStatus, VulnerabilityScan
+from app.plugins.executor import get_thread_pool, run_in_executor
+from app.services.containers.security.trivy_scanner import TrivyScanner
+
+logger = logging.getLogger(__name__)
+
+ResultKey = Tuple[str, str]
+
+
+class ScanQueueFull(Exception):
+    """Raised when the scan queue cannot take another job."""
+
+
+@dataclass
+class ScanJob:
+    """A requested scan, possibly shared by several containers."""
+    id: str
+    image: str
+    image_digest: Optional[str]
+    scan_type: str
+    container_ids: List[int] = field(default_factory=list)
+    status: str = "queued"  # queued, running, completed, failed
+    cached: bool = False
+    scan_ids: Dict[int, int] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    _done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    async def wait(self, timeout: Optional[float] = None) -> "ScanJob":
+        """Wait until the job has finished."""
+        await asyncio.wait_for(self._done.wait(), timeout)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        counts = (self.result or {}).get("counts") or {}
+        return {
+            "job_id": self.id,
+            "image": self.image,
+            "image_digest": self.image_digest,
+            "scan_type": self.scan_type,
+            "status": self.status,
+            "cached": self.cached,
+            "container_ids": list(self.container_ids),
+            "scan_ids": dict(self.scan_ids),
+            "security_score": (self.result or {}).get("security_score"),
+            "critical_count": counts.get("critical"),
+            "high_count": counts.get("high"),
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ScanService:
+    """Cached, queued Trivy scanning shared by the API and schedulers."""
+
+    def __init__(
+        self,
+        scanner: Optional[TrivyScanner] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        concurrency: int = settings.trivy_scan_concurrency,
+        queue_size: int = settings.trivy_scan_queue_size,
+        scan_timeout: float = settings.trivy_scan_timeout_seconds,
+        result_cache_size: int = settings.trivy_result_cache_size,
+        db_refresh_seconds: float = settings.trivy_db_refresh_hours * 3600,
+        job_retention_seconds: float = 3600
+    ):
+        """
+        Initialize scan service.
+
+        Args:
+            scanner: Scanner that runs Trivy (defaults to the binary)
+            session_factory: Callable returning a new database session
+            concurrency: Number of scans run at once
+            queue_size: Maximum number of queued jobs
+            scan_timeout: Timeout of a single scan in seconds
+            result_cache_size: Results kept in memory (LRU)
+            db_refresh_seconds: Interval between vulnerability DB refreshes
+            job_retention_seconds: How long finished jobs stay pollable
+        """
+        self.scanner = scanner or TrivyScanner()
+        self.session_factory = session_factory
+        self.concurrency = max(1, concurrency)
+        self.queue_size = queue_size
+        self.scan_timeout = scan_timeout
+        self.result_cache_size = result_cache_size
+        self.db_refresh_seconds = db_refresh_seconds
+        self.job_retention_seconds = job_retention_seconds
+        self._queue: Optional["asyncio.Queue[ScanJob]"] = None
+        self._workers: List[asyncio.Task] = []
+        self._jobs: Dict[str, ScanJob] = {}
+        self._inflight: Dict[str, ScanJob] = {}
+        self._results: "OrderedDict[ResultKey, Dict[str, Any]]" = OrderedDict()
+        self._db_lock: Optional[asyncio.Lock] = None
+        self._db_refreshed_at = 0.0
+        self._scanner_version = "unknown"
+        self._db_version: Optional[str] = None
+        self._stats = {"cache_hits": 0, "joined": 0, "scans": 0, "failed": 0, "timeouts": 0}
+
+    @property
+    def db_version(self) -> Optional[str]:
+        """UpdatedAt stamp of the vulnerability DB results are keyed on."""
+        return self._db_version
+
+    def start(self):
+        """Start the workers on the running event loop."""
+        if self._workers:
+            return
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._db_lock = asyncio.Lock()
+        self._workers = [
+            loop.create_task(self._worker(), name=f"trivy-scan-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Scan service started with {self.concurrency} workers")
+
+    async def stop(self):
+        """Cancel the workers; queued jobs are failed."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for job in list(self._inflight.values()):
+            await self._finish(job, "failed", error="Scan service stopped")
+        self._inflight.clear()
+
+    async def submit(
+        self,
+        image: str,
+        image_digest: Optional[str] = None,
+        container_id: Optional[int] = None,
+        scan_type: str = "manual"
+    ) -> ScanJob:
+        """
+        Request a scan.
+
+        Args:
+            image: Image reference to scan (pin it with @digest when known)
+            image_digest: Digest the result is cached under; without it the
+                result is not reused by later requests
+            container_id: Container the scan is recorded for
+            scan_type: 'pre-update', 'post-update', 'scheduled' or 'manual'
+
+        Returns:
+            ScanJob, already completed on a cache hit
+
+        Raises:
+            ScanQueueFull: If the queue is full
+        """
+        if not self._workers:
+            self.start()
+        self._prune_jobs()
+
+        job = ScanJob(
+            id=uuid.uuid4().hex,
+            image=image,
+            image_digest=image_digest,
+            scan_type=scan_type,
+            container_ids=[container_id] if container_id else []
+        )
+
+        cached = await self._cached_result(image_digest)
+        if cached is not None:
+            self._stats["cache_hits"] += 1
+            job.cached = True
+            self._jobs[job.id] = job
+            await self._finish(job, "completed", result=cached)
+            return job
+
+        inflight_key = image_digest or image
+        pending = self._inflight.get(inflight_key)
+        if pending is not None:
+            self._stats["joined"] += 1
+            if container_id and container_id not in pending.container_ids:
+                pending.container_ids.append(container_id)
+            return pending
+
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise ScanQueueFull(f"Scan queue is full ({self.queue_size} jobs)")
+        self._jobs[job.id] = job
+        self._inflight[inflight_key] = job
+        return job
+
+    def get_job(self, job_id: str) -> Optional[ScanJob]:
+        """Get a job by id (finished jobs are kept for job_retention_seconds)."""
+        return self._jobs.get(job_id)
+
+    def build_scan_record(self, job: ScanJob, container_id: Optional[int] = None) -> VulnerabilityScan:
+        """Build an (unsaved) VulnerabilityScan from a job's outcome."""
+        result = job.result or {}
+        counts = result.get("counts") or {}
+        return VulnerabilityScan(
+            container_id=container_id,
+            image=job.image,
+            image_digest=job.image_digest,
+            scanner="trivy",
+            scanner_version=result.get("scanner_version"),
+            scanned_at=datetime.now(timezone.utc),
+            critical_count=counts.get("critical", 0),
+            high_count=counts.get("high", 0),
+            medium_count=counts.get("medium", 0),
+            low_count=counts.get("low", 0),
+            total_count=counts.get("total", 0),
+            security_score=result.get("security_score"),
+            status=ScanStatus.COMPLETED if job.status == "completed" else ScanStatus.FAILED,
+            error_message=job.error,
+            scan_results=result
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get service counters.
+
+        Returns:
+            Dictionary with cache/scan counts, queue depth and DB version
+        """
+        return {
+            **self._stats,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "inflight": len(self._inflight),
+            "cached_results": len(self._results),
+            "db_version": self._db_version,
+        }
+
+    async def _cached_result(self, image_digest: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Result for a digest scanned with the current DB, from memory or the database."""
+        if not image_digest or not self._db_version:
+            return None
+
+        key = (image_digest, self._db_version)
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            return result
+
+        stored = await run_in_executor(get_thread_pool(), self._load_scan_results, image_digest)
+        for scan_results in stored:
+            if scan_results and scan_results.get("db_version") == key[1]:
+                self._remember(key, scan_results)
+                return scan_results
+        return None
+
+    def _load_scan_results(self, image_digest: str) -> List[Dict[str, Any]]:
+        """Results of the latest completed scans of a digest (runs on the thread pool)."""
+        db = self.session_factory()
+        try:
+            rows = db.query(VulnerabilityScan.scan_results).filter(
+                VulnerabilityScan.image_digest == image_digest,
+                VulnerabilityScan.status == ScanStatus.COMPLETED
+            ).order_by(VulnerabilityScan.scanned_at.desc()).limit(5).all()
+        finally:
+            db.close()
+        return [scan_results for (scan_results,) in rows]
+
+    def _remember(self, key: ResultKey, result: Dict[str, Any]):
+        self._results[key] = result
+        self._results.move_to_end(key)
+        while len(self._results) > self.result_cache_size:
+            self._results.popitem(last=False)
+
+    async def _refresh_db(self):
+        """Refresh the shared vulnerability DB when it is due."""
+        async with self._db_lock:
+            if self._db_version and time.monotonic() - self._db_refreshed_at < self.db_refresh_seconds:
+                return
+            try:
+                await self.scanner.download_db()
+            except Exception as e:
+                # Keep scanning against the DB already on disk
+                logger.warning(f"Trivy DB refresh failed: {e}")
+            self._scanner_version, self._db_version = await self.scanner.get_versions()
+            self._db_refreshed_at = time.monotonic()
+            logger.info(f"Trivy {self._scanner_version}, vulnerability DB {self._db_version}")
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                await self._finish(job, "failed", error="Scan cancelled")
+                raise
+            except Exception as e:
+                logger.error(f"Scan job {job.id} failed: {e}")
+                await self._finish(job, "failed", error=str(e))
+            finally:
+                self._inflight.pop(job.image_digest or job.image, None)
+                self._queue.task_done()
+
+    async def _run(self, job: ScanJob):
+        job.status = "running"
+        await self._refresh_db()
+
+        # The DB may have changed while the job was queued
+        cached = await self._cached_result(job.image_digest)
+        if cached is not None:
+            self._stats["cache_hits"] += 1
+            job.cached = True
+            await self._finish(job, "completed", result=cached)
+            return
+
+        logger.info(f"Scanning image: {job.image}")
+        started = time.monotonic()
+        self._stats["scans"] += 1
+        try:
+            raw = await self.scanner.execute_scan(job.image, self.scan_timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            await self._finish(job, "failed", error=f"Scan exceeded {self.scan_timeout:.0f}s timeout")
+            return
+        except Exception as e:
+            self._stats["failed"] += 1
+            await self._finish(job, "failed", error=str(e))
+            return
+
+        result = self.scanner.parse_scan(raw)
+        result.update({
+            "scanner_version": self._scanner_version,
+            "db_version": self._db_version,
+            "scan_duration_seconds": round(time.monotonic() - started, 2),
+        })
+        if job.image_digest and self._db_version:
+            self._remember((job.image_digest, self._db_version), result)
+
+        counts = result["counts"]
+        logger.info(f"Scan completed for {job.image}: {counts['total']} vulnerabilities found "
+                    f"(Critical: {counts['critical']}, High: {counts['high']})")
+        await self._finish(job, "completed", result=result)
+
+    async def _finish(
+        self,
+        job: ScanJob,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ):
+        """Record the outcome for every waiting container and wake waiters."""
+        if job.finished:
+            return
+        job.status = status
+        job.result = result
+        job.error = error
+        if job.container_ids:
+            try:
+                await run_in_executor(get_thread_pool(), self._record, job)
+            except Exception as e:
+                logger.error(f"Failed to record scan job {job.id}: {e}")
+        job.finished_at = time.time()
+        job._done.set()
+
+    def _record(self, job: ScanJob):
+        """Save the job's scans and update its containers (runs on the thread pool)."""
+        db = self.session_factory()
+        try:
+            scans = {}
+            for container_id in job.container_ids:
+                scan = self.build_scan_record(job, container_id)
+                db.add(scan)
+                scans[container_id] = scan
+            db.flush()
+
+            if job.status == "completed":
+                containers = db.query(Container).filter(Container.id.in_(job.container_ids)).all()
+                for container in containers:
+                    scan = scans[container.id]
+                    container.last_scan_id = scan.id
+                    container.security_score = scan.security_score
+                    container.critical_cves = scan.critical_count
+                    container.high_cves = scan.high_count
+                    container.last_scanned_at = scan.scanned_at
+            db.commit()
+            job.scan_ids = {container_id: scan.id for container_id, scan in scans.items()}
+        finally:
+            db.close()
+
+    def _prune_jobs(self):
+        cutoff = time.time() - self.job_retention_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+
+# Global scan service instance
+_scan_service: Optional[ScanService] = None
+
+
+def get_scan_service() -> ScanService:
+    """
+    Get or create global scan service instance.
+
+    Returns:
+        ScanService instance
+    """
+    global _scan_service
+
+    if _scan_service is None:
+        _scan_service = ScanService(TrivyScanner(use_docker=settings.trivy_use_docker))
+
+    return _scan_service
+
+
+async def shutdown_scan_service():
+    """Stop the global scan service's workers (application shutdown)."""
+    if _scan_service is not None:
+        await _scan_service.stop()
@@ -1,31 +1,55 @@
-"""Trivy vulnerability scanner integration."""
+"""Trivy vulnerability scanner integration.
 
+TrivyScanner runs and parses Trivy scans. Scans are not run inline by
+callers: scan_image() goes through the shared ScanService
+(scan_service.py), which serves results cached by image digest and Trivy DB
+version and queues cache misses for its background workers.
+"""
+
+import asyncio
 import json
 import logging
 import shutil
-import subprocess
-import time
-from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from sqlalchemy.orm import Session
 
-import app.models as models
+from app.core.config import settings
+from app.models.containers import VulnerabilityScan
 
 logger = logging.getLogger(__name__)
 
+TRIVY_IMAGE = "aquasec/trivy:latest"
+# Where the Trivy container keeps its cache (the shared cache dir is mounted there)
+TRIVY_CONTAINER_CACHE_DIR = "/root/.cache/trivy"
+
+
+def image_digest_of(image: str) -> Optional[str]:
+    """Digest of an image reference pinned with @sha256:..., if any."""
+    if "@" in image:
+        return image.split("@", 1)[1]
+    return None
+
 
 class TrivyScanner:
     """Wrapper for Trivy vulnerability scanner."""
     
-    def __init__(self, db: Session, use_docker: bool = False):
+    def __init__(
+        self,
+        db: Optional[Session] = None,
+        use_docker: bool = False,
+        cache_dir: Optional[str] = None
+    ):
         """Initialize Trivy scanner.
         
         Args:
-            db: Database session
+            db: Database session (needed by scan_image() only)
             use_docker: If True, use Trivy Docker image instead of binary
+            cache_dir: Trivy cache/DB directory shared by all scans
+                (defaults to settings.trivy_cache_dir)
         """
         self.db = db
         self.use_docker = use_docker
+        self.cache_dir = cache_dir or settings.trivy_cache_dir
         self._trivy_available = None
     
     def is_available(self) -> bool:
@@ -42,141 +66,125 @@ class TrivyScanner:
         
         return self._trivy_available
     
-    def scan_image(
+    async def scan_image(
         self,
         image: str,
         container_id: Optional[int] = None,
         scan_type: str = "manual",
-        timeout: int = 300
-    ) -> models.VulnerabilityScan:
-        """Scan an image for vulnerabilities.
+        timeout: Optional[int] = None
+    ) -> VulnerabilityScan:
+        """Scan an image for vulnerabilities and wait for the result.
+        
+        A cached result for the image digest is returned at once; otherwise
+        the scan is queued on the shared ScanService (joining an identical
+        scan already in flight) and awaited.
         
         Args:
-            image: Image name with tag (e.g., "nginx:latest")
+            image: Image reference (e.g., "nginx:latest" or "nginx@sha256:...")
             container_id: Optional container ID to associate scan with
             scan_type: Type of scan ('pre-update', 'post-update', 'scheduled', 'manual')
-            timeout: Scan timeout in seconds
+            timeout: Seconds to wait for the scan (defaults to the service's scan timeout)
             
         Returns:
-            VulnerabilityScan model with results
+            VulnerabilityScan with results (not persisted when no container is given)
         """
-        if not self.is_available():
-            raise RuntimeError("Trivy is not available. Install with: curl -sfL https://raw.githubusercontent.com/aquasecurity/trivy/main/contrib/install.sh | sh -s -- -b /usr/local/bin")
-        
-        logger.info(f"Scanning image: {image}")
-        start_time = time.time()
-        
-        try:
-            # Execute Trivy scan
-            scan_result = self._execute_scan(image, timeout)
-            duration = time.time() - start_time
-            
-            # Parse results
-            vulnerabilities, counts = self._parse_vulnerabilities(scan_result)
-            secrets = self._parse_secrets(scan_result)
-            misconfigs = self._parse_misconfigurations(scan_result)
-            
-            # Calculate security score
-            security_score = self._calculate_security_score(counts, len(secrets))
-            
-            # Get scanner version
-            scanner_version = self._get_trivy_version()
-            
-            # Create scan record
-            scan = models.VulnerabilityScan(
-                container_id=container_id,
-                image=image,
-                scan_type=scan_type,
-                scanner="trivy",
-                scanner_version=scanner_version,
-                critical_count=counts['critical'],
-                high_count=counts['high'],
-                medium_count=counts['medium'],
-                low_count=counts['low'],
-                unknown_count=counts['unknown'],
-                total_count=counts['total'],
-                scan_duration_seconds=duration,
-                scan_status="success",
-                vulnerabilities=vulnerabilities,
-                secrets_found=secrets,
-                misconfigurations=misconfigs,
-                scanned_at=datetime.utcnow()
-            )
-            
-            # Save to database
-            self.db.add(scan)
-            self.db.commit()
-            self.db.refresh(scan)
-            
-            # Update container if provided
-            if container_id:
-                container = self.db.query(models.Container).filter(
-                    models.Container.id == container_id
-                ).first()
-                if container:
-                    container.last_scan_id = scan.id
-                    container.security_score = security_score
-                    container.critical_cves = counts['critical']
-                    container.high_cves = counts['high']
-                    container.last_scanned_at = datetime.utcnow()
-                    self.db.commit()
-            
-            logger.info(f"Scan completed: {counts['total']} vulnerabilities found (Critical: {counts['critical']}, High: {counts['high']})")
-            return scan
-            
-        except subprocess.TimeoutExpired:
-            logger.error(f"Scan timeout after {timeout}s for image: {image}")
-            scan = models.VulnerabilityScan(
-                container_id=container_id,
-                image=image,
-                scan_type=scan_type,
-                scanner="trivy",
-                scan_duration_seconds=timeout,
-                scan_status="timeout",
-                error_message=f"Scan exceeded {timeout}s timeout"
-            )
-            self.db.add(scan)
-            self.db.commit()
-            self.db.refresh(scan)
-            return scan
-            
-        except Exception as e:
-            logger.error(f"Scan failed for image {image}: {e}")
-            scan = models.VulnerabilityScan(
-                container_id=container_id,
-                image=image,
-                scan_type=scan_type,
-                scanner="trivy",
-                scan_duration_seconds=time.time() - start_time,
-                scan_status="failed",
-                error_message=str(e)
-            )
-            self.db.add(scan)
-            self.db.commit()
-            self.db.refresh(scan)
-            return scan
+        from app.services.containers.security.scan_service import get_scan_service
+
+        service = get_scan_service()
+        job = await service.submit(
+            image,
+            image_digest=image_digest_of(image),
+            container_id=container_id,
+            scan_type=scan_type
+        )
+        await job.wait(timeout)
+
+        scan_id = job.scan_ids.get(container_id) if container_id else None
+        if scan_id is not None and self.db is not None:
+            return self.db.query(VulnerabilityScan).filter(VulnerabilityScan.id == scan_id).first()
+        return service.build_scan_record(job, container_id)
+    
+    def build_command(self, image: str, skip_db_update: bool = True) -> List[str]:
+        """Build the Trivy command line for an image scan."""
+        args = ['image', '--format', 'json', '--quiet']
+        if skip_db_update:
+            args += ['--skip-db-update', '--skip-java-db-update']
+        return self._trivy_command(args + [image])
     
-    def _execute_scan(self, image: str, timeout: int) -> Dict[str, Any]:
-        """Execute Trivy scan and return JSON results."""
+    def _trivy_command(self, args: List[str]) -> List[str]:
+        """Prefix Trivy arguments with the binary (or container) and the shared cache dir."""
         if self.use_docker:
-            cmd = [
+            return [
                 'docker', 'run', '--rm',
                 '-v', '/var/run/docker.sock:/var/run/docker.sock',
-                'aquasec/trivy:latest',
-                'image', '--format', 'json', '--quiet', image
-            ]
-        else:
-            cmd = ['trivy', 'image', '--format', 'json', '--quiet', image]
+                '-v', f'{self.cache_dir}:{TRIVY_CONTAINER_CACHE_DIR}',
+                TRIVY_IMAGE,
+                '--cache-dir', TRIVY_CONTAINER_CACHE_DIR,
+            ] + args
+        return ['trivy', '--cache-dir', self.cache_dir] + args
+    
+    async def execute_scan(self, image: str, timeout: float, skip_db_update: bool = True) -> Dict[str, Any]:
+        """Run a Trivy scan without blocking the event loop and return its JSON output.
         
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-            check=True
-        )
+        Raises:
+            asyncio.TimeoutError: If the scan exceeds timeout (the process is killed)
+            RuntimeError: If Trivy exits with an error
+        """
+        stdout, stderr, returncode = await self._run(self.build_command(image, skip_db_update), timeout)
+        if returncode != 0:
+            raise RuntimeError(f"Trivy exited with {returncode}: {stderr.strip()[:500]}")
+        return json.loads(stdout)
+    
+    async def download_db(self, timeout: float = 600) -> None:
+        """Download or refresh the vulnerability DB in the shared cache dir."""
+        command = self._trivy_command(['image', '--download-db-only', '--quiet'])
+        _, stderr, returncode = await self._run(command, timeout)
+        if returncode != 0:
+            raise RuntimeError(f"Trivy DB download failed ({returncode}): {stderr.strip()[:500]}")
+    
+    async def get_versions(self) -> Tuple[str, Optional[str]]:
+        """Get the Trivy version and the UpdatedAt stamp of its vulnerability DB."""
+        try:
+            stdout, _, returncode = await self._run(self._trivy_command(['version', '--format', 'json']), 30)
+            info = json.loads(stdout) if returncode == 0 else {}
+        except Exception as e:
+            logger.warning(f"Could not read Trivy version: {e}")
+            info = {}
+        db_info = info.get('VulnerabilityDB') or {}
+        return info.get('Version', 'unknown'), db_info.get('UpdatedAt')
+    
+    def parse_scan(self, scan_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Summarize Trivy JSON output.
         
-        return json.loads(result.stdout)
+        Returns:
+            Dict with severity counts, security score and the parsed
+            vulnerabilities, secrets and misconfigurations
+        """
+        vulnerabilities, counts = self._parse_vulnerabilities(scan_result)
+        secrets = self._parse_secrets(scan_result)
+        misconfigs = self._parse_misconfigurations(scan_result)
+        return {
+            'counts': counts,
+            'security_score': self._calculate_security_score(counts, len(secrets)),
+            'vulnerabilities': vulnerabilities,
+            'secrets': secrets,
+            'misconfigurations': misconfigs,
+        }
+    
+    @staticmethod
+    async def _run(command: List[str], timeout: float) -> Tuple[str, str, int]:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+        return stdout.decode(), stderr.decode(), process.returncode
     
     def _parse_vulnerabilities(self, scan_result: Dict[str, Any]) -> tuple[List[Dict], Dict[str, int]]:
         """Parse vulnerabilities from Trivy output."""
@@ -256,23 +264,10 @@ class TrivyScanner:
         
         return max(0, min(100, int(score)))
     
-    def _get_trivy_version(self) -> str:
-        """Get Trivy version."""
-        try:
-            if self.use_docker:
-                cmd = ['docker', 'run', '--rm', 'aquasec/trivy:latest', '--version']
-            else:
-                cmd = ['trivy', '--version']
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            return result.stdout.strip().split('\n')[0]
-        except Exception:
-            return "unknown"
-    
     def compare_scans(
         self,
-        old_scan: models.VulnerabilityScan,
-        new_scan: models.VulnerabilityScan
+        old_scan: VulnerabilityScan,
+        new_scan: VulnerabilityScan
     ) -> Dict[str, Any]:
         """Compare two scans to detect security regression.
         
@@ -1,9 +1,11 @@
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+import asyncio
 import logging
 import app.models as models
-from app.services.containers.registry_client import RegistryClient
+from app.core.config import settings
+from app.services.containers.registry_client import get_registry_client
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +15,7 @@ class UpdateChecker:
     
     def __init__(self, db: Session, enable_security_scan: bool = False):
         self.db = db
-        self.registry_client = RegistryClient()
+        self.registry_client = get_registry_client()
         self.enable_security_scan = enable_security_scan
         self._trivy_scanner = None
         self._policy_engine = None
@@ -38,6 +40,38 @@ class UpdateChecker:
             models.Container.exclude_from_updates == False
         ).all()
         
+        summary = await self._check_containers(containers)
+        
+        logger.info(f"Update check complete. Checked {summary['total_checked']} containers, "
+                   f"found {summary['updates_found']} updates available, "
+                   f"{summary['security_blocked']} blocked by security policy")
+        
+        return summary
+    
+    async def _check_containers(self, containers: List[Any]) -> Dict[str, Any]:
+        """
+        Check a set of containers, querying the registry once per unique image.
+
+        Digests of the distinct image:tag pairs are fetched concurrently
+        (bounded by settings.registry_check_concurrency); results are then
+        recorded container by container on this checker's session.
+        """
+        images: Dict[str, Any] = {}
+        for container in containers:
+            key = self.registry_client.parse_image_name(f"{container.image}:{container.current_tag}")["full_name"]
+            images.setdefault(key, (container.image, container.current_tag))
+
+        semaphore = asyncio.Semaphore(max(1, settings.registry_check_concurrency))
+
+        async def lookup(image: str, tag: str):
+            async with semaphore:
+                return await self.registry_client.get_latest_digest(image, tag)
+
+        digests = await asyncio.gather(*(lookup(image, tag) for image, tag in images.values()))
+        registry_infos = dict(zip(images, digests))
+        logger.info(f"Fetched registry digests for {len(images)} unique images "
+                    f"({len(containers)} containers)")
+
         total_checked = 0
         updates_found = 0
         security_blocked = 0
@@ -45,7 +79,9 @@ class UpdateChecker:
         
         for container in containers:
             try:
-                result = await self.check_container_update(container.id)
+                key = self.registry_client.parse_image_name(f"{container.image}:{container.current_tag}")["full_name"]
+                # An empty dict marks a failed lookup so it is not repeated per container
+                result = await self.check_container_update(container.id, registry_info=registry_infos.get(key) or {})
                 total_checked += 1
                 if result and result.get("update_available"):
                     updates_found += 1
@@ -55,10 +91,7 @@ class UpdateChecker:
                 error_msg = f"Failed to check updates for container '{container.name}': {e}"
                 logger.error(error_msg)
                 errors.append(error_msg)
-        
-        logger.info(f"Update check complete. Checked {total_checked} containers, "
-                   f"found {updates_found} updates available, {security_blocked} blocked by security policy")
-        
+
         return {
             "total_checked": total_checked,
             "updates_found": updates_found,
@@ -66,8 +99,19 @@ class UpdateChecker:
             "errors": errors
         }
     
-    async def check_container_update(self, container_id: int) -> Optional[Dict[str, Any]]:
-        """Check for updates for a specific container"""
+    async def check_container_update(
+        self,
+        container_id: int,
+        registry_info: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Check for updates for a specific container
+
+        Args:
+            container_id: Container ID
+            registry_info: Digest lookup already done for the container's
+                image (by _check_containers); queried here when omitted
+        """
         container = self.db.query(models.Container).filter(
             models.Container.id == container_id
         ).first()
@@ -86,10 +130,11 @@ class UpdateChecker:
         
         try:
             # Query registry for latest digest
-            registry_info = await self.registry_client.get_latest_digest(
-                container.image, 
-                container.current_tag
-            )
+            if registry_info is None:
+                registry_info = await self.registry_client.get_latest_digest(
+                    container.image, 
+                    container.current_tag
+                )
             
             if not registry_info:
                 logger.warning(f"Could not get registry info for {image_name}")
@@ -214,28 +259,6 @@ class UpdateChecker:
             models.Container.exclude_from_updates == False
         ).all()
         
-        total_checked = 0
-        updates_found = 0
-        security_blocked = 0
-        errors = []
-        
-        for container in containers:
-            try:
-                result = await self.check_container_update(container.id)
-                total_checked += 1
-                if result and result.get("update_available"):
-                    updates_found += 1
-                if result and result.get("security_blocked"):
-                    security_blocked += 1
-            except Exception as e:
-                error_msg = f"Failed to check updates for container '{container.name}': {e}"
-                logger.error(error_msg)
-                errors.append(error_msg)
+        summary = await self._check_containers(containers)
         
-        return {
-            "host_id": host_id,
-            "total_checked": total_checked,
-            "updates_found": updates_found,
-            "security_blocked": security_blocked,
-            "errors": errors
-        }
+        return {"host_id": host_id, **summary}
@@ -0,0 +1,246 @@
+"""
+Rate Limiting
+
+GCRA (generic cell rate algorithm) rate limiter for API operations. Each
+(key, operation) keeps a single "theoretical arrival time" instead of a list
+of request timestamps, so a check is O(1) in time and memory:
+
+- limit N per window W gives an emission interval T = W / N
+- a request is allowed if now >= TAT + T - W; the new TAT is max(TAT, now) + T
+
+This admits bursts of up to N requests and then one every T seconds.
+
+Backends:
+- memory: per-process dict, swept periodically for idle keys (a key whose
+  TAT has passed is indistinguishable from a missing one)
+- redis: one atomic Lua script per check against Redis server time, so a
+  limit holds across all uvicorn workers. When Redis is unreachable the
+  limiter falls back to the memory backend and retries Redis later.
+
+Selected with settings.rate_limit_backend. Rejections are counted per
+operation (see RateLimiter.get_stats()).
+"""
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+import redis
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# How long to stop using Redis after an error
+REDIS_RETRY_SECONDS = 30.0
+
+# Default limits per operation: (requests, window seconds)
+DEFAULT_LIMITS = {
+    "plugin_execution": (10, 60),      # 10 per minute
+    "metric_reporting": (100, 60),     # 100 per minute
+    "health_check": (30, 60),          # 30 per minute
+    "config_update": (5, 60),          # 5 per minute
+}
+
+# KEYS[1] = bucket key; ARGV[1] = emission interval (ms), ARGV[2] = window (ms)
+# Returns {allowed (0/1), retry_after_ms}
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - window
+if now < allow_at then
+    return {0, math.ceil(allow_at - now)}
+end
+redis.call('SET', KEYS[1], string.format('%.3f', new_tat), 'PX', math.ceil(new_tat - now))
+return {1, 0}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """N requests per window seconds."""
+    limit: int
+    window: float
+
+    @property
+    def interval(self) -> float:
+        return self.window / self.limit
+
+
+class MemoryRateLimitBackend:
+    """In-process GCRA buckets with periodic sweeping of idle keys."""
+
+    def __init__(
+        self,
+        sweep_interval: float = settings.rate_limit_sweep_interval_seconds,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._tat: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = clock() + sweep_interval
+
+    def hit(self, key: str, rate: RateLimit) -> Tuple[bool, float]:
+        """
+        Try to admit one request.
+
+        Returns:
+            Tuple of (allowed, retry_after_seconds)
+        """
+        with self._lock:
+            now = self._clock()
+            if now >= self._next_sweep:
+                self._sweep(now)
+
+            tat = max(self._tat.get(key, now), now)
+            new_tat = tat + rate.interval
+            allow_at = new_tat - rate.window
+            if now < allow_at:
+                return False, allow_at - now
+            self._tat[key] = new_tat
+            return True, 0.0
+
+    def _sweep(self, now: float):
+        idle = [key for key, tat in self._tat.items() if tat <= now]
+        for key in idle:
+            del self._tat[key]
+        self._next_sweep = now + self.sweep_interval
+        if idle:
+            logger.debug(f"Rate limiter swept {len(idle)} idle keys")
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+
+class RedisRateLimitBackend:
+    """GCRA buckets in Redis, updated atomically by a Lua script."""
+
+    def __init__(self, client, prefix: str = settings.rate_limit_redis_prefix):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(GCRA_SCRIPT)
+
+    def hit(self, key: str, rate: RateLimit) -> Tuple[bool, float]:
+        allowed, retry_after_ms = self._script(
+            keys=[self.prefix + key],
+            args=[rate.interval * 1000, rate.window * 1000]
+        )
+        return bool(int(allowed)), int(retry_after_ms) / 1000
+
+
+class RateLimiter:
+    """Rate limiter for plugin operations"""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[int, float]]] = None,
+        redis_backend: Optional[RedisRateLimitBackend] = None,
+        memory_backend: Optional[MemoryRateLimitBackend] = None
+    ):
+        """
+        Initialize rate limiter.
+
+        Args:
+            limits: Operation -> (requests, window seconds); defaults to DEFAULT_LIMITS
+            redis_backend: Shared backend (None = this process only)
+            memory_backend: Local backend, also used while Redis is unavailable
+        """
+        self._limits = {
+            operation: RateLimit(limit, window)
+            for operation, (limit, window) in (limits or DEFAULT_LIMITS).items()
+        }
+        self.redis = redis_backend
+        self.memory = memory_backend if memory_backend is not None else MemoryRateLimitBackend()
+        self._redis_retry_at = 0.0
+        self._stats_lock = threading.Lock()
+        self._allowed: Dict[str, int] = defaultdict(int)
+        self._rejected: Dict[str, int] = defaultdict(int)
+
+    @property
+    def shared(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_retry_at
+
+    def _hit(self, key: str, rate: RateLimit) -> Tuple[bool, float]:
+        if self.shared:
+            try:
+                return self.redis.hit(key, rate)
+            except Exception as e:
+                logger.warning(f"Rate limiter Redis unavailable, limiting per process: {e}")
+                self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        return self.memory.hit(key, rate)
+
+    def check_rate_limit(self, key: str, operation: str) -> bool:
+        """
+        Check if rate limit is exceeded.
+
+        Args:
+            key: Identifier (plugin_id or user_id)
+            operation: Operation type
+
+        Returns:
+            True if within limit
+
+        Raises:
+            HTTPException: If rate limit exceeded
+        """
+        rate = self._limits.get(operation)
+        if rate is None:
+            return True
+
+        allowed, retry_after = self._hit(f"{key}:{operation}", rate)
+
+        with self._stats_lock:
+            if allowed:
+                self._allowed[operation] += 1
+            else:
+                self._rejected[operation] += 1
+
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Rate limit exceeded for {operation}: {rate.limit} per {rate.window:g}s",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+
+        return True
+
+    def get_stats(self) -> Dict[str, object]:
+        """Allowed and rejected counts per operation."""
+        with self._stats_lock:
+            return {
+                "backend": "redis" if self.shared else "memory",
+                "tracked_keys": len(self.memory),
+                "allowed": dict(self._allowed),
+                "rejected": dict(self._rejected),
+            }
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get the process-wide rate limiter.
+
+    Uses the Redis backend when settings.rate_limit_backend is "redis".
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        redis_backend = None
+        if settings.rate_limit_backend == "redis":
+            client = redis.from_url(settings.redis_url, socket_timeout=1, socket_connect_timeout=1)
+            redis_backend = RedisRateLimitBackend(client)
+        _rate_limiter = RateLimiter(redis_backend=redis_backend)
+    return _rate_limiter
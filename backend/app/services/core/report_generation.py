@@ -1,8 +1,16 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from sqlalchemy import case, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime, time, timedelta
 from app import models
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.core import ServerDailyRollup
+from app.plugins.executor import get_thread_pool, run_in_executor
+import asyncio
 import json
+import math
 import io
 import csv
 import logging
@@ -57,279 +65,367 @@ def _aggregate_system_info(profiles_data: list[models.ServerProfile]):
         "total_servers": active_servers
     }
 
-async def generate_24_hour_report(db: Session, server_id: int, tenant_id: str = "default"):
-    try:
-        end_time = datetime.utcnow()
-        start_time = end_time - timedelta(days=1)
-
-        snapshots = db.query(models.ServerSnapshot) \
-            .filter(models.ServerSnapshot.server_id == server_id) \
-            .filter(models.ServerSnapshot.timestamp >= start_time) \
-            .filter(models.ServerSnapshot.timestamp <= end_time) \
-            .order_by(models.ServerSnapshot.timestamp.asc()) \
-            .all()
-
-        if not snapshots:
-            # No snapshots - generate report from current profile data
-            server_profile = db.query(models.ServerProfile).filter(models.ServerProfile.tenant_id == tenant_id).filter(models.ServerProfile.id == server_id).first()
-            if not server_profile:
-                return None
-            
-            # Create a basic report from current profile data
-            aggregated_data = {
-                "period_start": start_time.isoformat(),
-                "period_end": end_time.isoformat(),
-                "server_name": server_profile.name,
-                "cpu_current": server_profile.hardware_info.get("cpu", {}).get("usage_percent", 0) if server_profile.hardware_info else 0,
-                "memory_current": server_profile.hardware_info.get("memory", {}).get("percent", 0) if server_profile.hardware_info else 0,
-                "disk_current": server_profile.hardware_info.get("disk", {}).get("percent", 0) if server_profile.hardware_info else 0,
-                "snapshot_count": 0,
-                "note": "No historical snapshots available. Showing current state only."
-            }
-            
-            new_report = models.Report(
-                tenant_id=tenant_id,
-                server_id=server_id,
-                report_type="24-hour",
-                start_time=start_time,
-                end_time=end_time,
-                aggregated_data=aggregated_data
-            )
-            db.add(new_report)
-            db.commit()
-            db.refresh(new_report)
-            return new_report
-        server_profile = db.query(models.ServerProfile).filter(models.ServerProfile.tenant_id == tenant_id).filter(models.ServerProfile.id == server_id).first()
-        if not server_profile:
-            # This case should ideally not happen if snapshots exist for the server_id
-            raise HTTPException(status_code=404, detail="Server profile not found for snapshot data")
+# Report metrics are aggregated in SQL over these snapshot JSON paths, so
+# only numbers (not the full snapshot payload) leave the database
+METRIC_KEYS = {
+    "cpu": "cpu_usage_percent",
+    "memory": "memory_percent",
+    "disk": "disk_percent",
+}
+REPORT_PERCENTILE = 0.95
+
+
+def _snapshot_metric_expressions() -> dict:
+    """SQL expressions extracting each report metric from ServerSnapshot.data (NULL when absent)."""
+    data = models.ServerSnapshot.data
+    mem_used = data[("memory", "used_bytes")].as_float()
+    mem_total = data[("memory", "total_bytes")].as_float()
+    disk_used = data[("disk", "root_used_bytes")].as_float()
+    disk_total = data[("disk", "root_total_bytes")].as_float()
+    return {
+        "cpu": data[("cpu", "usage_percent")].as_float(),
+        "memory": case((mem_used > 0, 100.0 * mem_used / func.nullif(mem_total, 0))),
+        "disk": case((disk_used > 0, 100.0 * disk_used / func.nullif(disk_total, 0))),
+    }
 
-        first_snapshot_data = snapshots[0].data
-        latest_snapshot_data = snapshots[-1].data
 
-        # Initialize aggregated data structure
-        aggregated_data = {
-            "period_start": start_time.isoformat(),
-            "period_end": end_time.isoformat(),
-            "server_name": server_profile.name,
-            # Current values from latest snapshot
-            "cpu_current": 0,
-            "memory_current": 0,
-            "disk_current": 0,
-            # Averages over the period
-            "cpu_usage_percent_avg": 0,
-            "memory_percent_avg": 0,
-            "disk_percent_avg": 0,
-            "snapshot_count": len(snapshots),
-            "storage_changes": [],
-            "package_updates_available": [],
-            "package_updates_recent": [],
-            "average_temps_celsius": {},
-            "current_temps_celsius": {},
-            "syslog_summary": "Not yet implemented.",
-            "docker_log_summary": "Not yet implemented.",
-            "container_updates_available": [],
-            # Plugin data from latest snapshot
-            "plugin_data": {},
+def _percentile(values: list, q: float):
+    """Linear-interpolated percentile, matching SQL percentile_cont."""
+    if not values:
+        return None
+    values = sorted(values)
+    position = (len(values) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return values[lower]
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _iter_temperature_readings(temperatures):
+    """Yield ("sensor.sub_sensor", value) for each "*input*" reading in a snapshot's temperatures."""
+    if not isinstance(temperatures, dict):
+        return
+    for sensor_name, sensor_data in temperatures.items():
+        if isinstance(sensor_data, dict):
+            for sub_sensor, readings in sensor_data.items():
+                if isinstance(readings, dict):
+                    for key, value in readings.items():
+                        if "input" in key.lower():
+                            yield f"{sensor_name}.{sub_sensor}", value
+                            break
+
+
+def _empty_stats() -> dict:
+    stats = {"snapshot_count": 0, "temperatures": {}}
+    for metric in METRIC_KEYS:
+        stats[metric] = {"count": 0, "sum": None, "min": None, "max": None, "p95": None}
+    return stats
+
+
+def aggregate_snapshot_window(db: Session, server_id: int, start_time: datetime, end_time: datetime) -> dict:
+    """
+    Aggregate one server's snapshot metrics over [start_time, end_time) in SQL.
+
+    Counts, sums, minimums and maximums come from a single aggregate query.
+    On PostgreSQL the 95th percentile is computed in the same query with
+    percentile_cont; other databases fetch just the extracted numeric columns
+    for it. Temperatures have dynamic sensor keys, so only the temperatures
+    sub-document is fetched and folded in Python.
+
+    Returns:
+        Dictionary with snapshot_count, per-metric {count, sum, min, max, p95}
+        and temperatures {sensor: {sum, count, max}}
+    """
+    Snapshot = models.ServerSnapshot
+    window = (
+        Snapshot.server_id == server_id,
+        Snapshot.timestamp >= start_time,
+        Snapshot.timestamp < end_time,
+    )
+    expressions = _snapshot_metric_expressions()
+    postgres = db.get_bind().dialect.name == "postgresql"
+
+    columns = [func.count(Snapshot.id).label("snapshot_count")]
+    for metric, expr in expressions.items():
+        columns += [
+            func.count(expr).label(f"{metric}_count"),
+            func.sum(expr).label(f"{metric}_sum"),
+            func.min(expr).label(f"{metric}_min"),
+            func.max(expr).label(f"{metric}_max"),
+        ]
+        if postgres:
+            columns.append(func.percentile_cont(REPORT_PERCENTILE).within_group(expr).label(f"{metric}_p95"))
+
+    row = db.execute(select(*columns).where(*window)).mappings().one()
+
+    stats = _empty_stats()
+    stats["snapshot_count"] = row["snapshot_count"] or 0
+    if not stats["snapshot_count"]:
+        return stats
+
+    for metric in expressions:
+        stats[metric].update({
+            "count": row[f"{metric}_count"] or 0,
+            "sum": row[f"{metric}_sum"],
+            "min": row[f"{metric}_min"],
+            "max": row[f"{metric}_max"],
+            "p95": row.get(f"{metric}_p95"),
+        })
+
+    if not postgres:
+        values = {metric: [] for metric in expressions}
+        for numbers in db.execute(select(*expressions.values()).where(*window)):
+            for metric, value in zip(expressions, numbers):
+                if value is not None:
+                    values[metric].append(value)
+        for metric, metric_values in values.items():
+            stats[metric]["p95"] = _percentile(metric_values, REPORT_PERCENTILE)
+
+    temperatures = stats["temperatures"]
+    for (temps,) in db.execute(select(Snapshot.data["temperatures"]).where(*window)):
+        for sensor, value in _iter_temperature_readings(temps):
+            if not isinstance(value, (int, float)):
+                continue
+            entry = temperatures.setdefault(sensor, {"sum": 0.0, "count": 0, "max": value})
+            entry["sum"] += value
+            entry["count"] += 1
+            entry["max"] = max(entry["max"], value)
+
+    return stats
+
+
+def _stats_from_rollup(rollup) -> dict:
+    """Stats of a stored server_daily_rollups row."""
+    stats = {"snapshot_count": rollup.snapshot_count, "temperatures": rollup.temperatures or {}}
+    for metric in METRIC_KEYS:
+        stats[metric] = {
+            "count": getattr(rollup, f"{metric}_count") or 0,
+            "sum": getattr(rollup, f"{metric}_sum"),
+            "min": getattr(rollup, f"{metric}_min"),
+            "max": getattr(rollup, f"{metric}_max"),
+            "p95": getattr(rollup, f"{metric}_p95"),
         }
+    return stats
 
-        # Helper to calculate disk percent from bytes
-        def calc_disk_percent(disk_data):
-            total = disk_data.get("root_total_bytes", 0)
-            used = disk_data.get("root_used_bytes", 0)
-            if total > 0:
-                return round((used / total) * 100, 2)
-            return 0
-
-        # Helper to calculate memory percent from bytes
-        def calc_memory_percent(mem_data):
-            total = mem_data.get("total_bytes", 0)
-            used = mem_data.get("used_bytes", 0)
-            if total > 0 and used > 0:
-                return round((used / total) * 100, 2)
-            return 0
-
-        # Extract CURRENT values from the latest snapshot
-        # Snapshot stores keys at root level: cpu, memory, disk (not nested under hardware_info)
-        latest_cpu = latest_snapshot_data.get("cpu", {})
-        latest_memory = latest_snapshot_data.get("memory", {})
-        latest_disk = latest_snapshot_data.get("disk", {})
-        
-        # Calculate current values
-        aggregated_data["cpu_current"] = latest_cpu.get("usage_percent", 0)
-        aggregated_data["memory_current"] = calc_memory_percent(latest_memory)
-        aggregated_data["disk_current"] = calc_disk_percent(latest_disk)
-        
-        # Extract current temps from latest snapshot (key is "temperatures" not "temp_sensors")
-        latest_temps = latest_snapshot_data.get("temperatures", {})
-        for sensor_name, sensor_data in latest_temps.items():
-            if isinstance(sensor_data, dict):
-                for sub_sensor, readings in sensor_data.items():
-                    if isinstance(readings, dict):
-                        for key, value in readings.items():
-                            if "input" in key.lower():
-                                aggregated_data["current_temps_celsius"][f"{sensor_name}.{sub_sensor}"] = value
-                                break
-
-        # Calculate averages for CPU, Memory, Disk from snapshots
-        total_cpu_percent = 0
-        total_memory_percent = 0
-        total_disk_percent = 0
-        snapshot_count = len(snapshots)
-
-        temp_sums = {}
-        temp_counts = {}
-
-        for snap in snapshots:
-            # Snapshot stores keys at root level
-            cpu = snap.data.get("cpu", {})
-            memory = snap.data.get("memory", {})
-            disk = snap.data.get("disk", {})
 
-            if "usage_percent" in cpu:
-                total_cpu_percent += cpu["usage_percent"]
-            
-            mem_pct = calc_memory_percent(memory)
-            if mem_pct > 0:
-                total_memory_percent += mem_pct
-            
-            disk_pct = calc_disk_percent(disk)
-            if disk_pct > 0:
-                total_disk_percent += disk_pct
-            
-            # Aggregate temperatures (key is "temperatures")
-            temperatures = snap.data.get("temperatures", {})
-            for sensor_name, sensor_data in temperatures.items():
-                if isinstance(sensor_data, dict):
-                    for sub_sensor, readings in sensor_data.items():
-                        if isinstance(readings, dict):
-                            for key, value in readings.items():
-                                if "input" in key.lower():
-                                    temp_key = f"{sensor_name}.{sub_sensor}"
-                                    if temp_key not in temp_sums: 
-                                        temp_sums[temp_key] = 0
-                                        temp_counts[temp_key] = 0
-                                    temp_sums[temp_key] += value
-                                    temp_counts[temp_key] += 1
-                                    break
-
-        if snapshot_count > 0:
-            aggregated_data["cpu_usage_percent_avg"] = round(total_cpu_percent / snapshot_count, 2)
-            aggregated_data["memory_percent_avg"] = round(total_memory_percent / snapshot_count, 2)
-            aggregated_data["disk_percent_avg"] = round(total_disk_percent / snapshot_count, 2)
-        
-        for sensor_type, total_temp in temp_sums.items():
-            if temp_counts[sensor_type] > 0:
-                aggregated_data["average_temps_celsius"][sensor_type] = round(total_temp / temp_counts[sensor_type], 2)
-
-        # Storage Changes (from -> to)
-        first_disks = first_snapshot_data.get("disk_partitions", [])
-        latest_disks = latest_snapshot_data.get("disk_partitions", [])
-
-        for l_disk in latest_disks:
-            f_disk = next((d for d in first_disks if d["mountpoint"] == l_disk["mountpoint"]), None)
-            if f_disk and f_disk["used"] != l_disk["used"]:
-                aggregated_data["storage_changes"].append({
-                    "mountpoint": l_disk["mountpoint"],
-                    "from_used_gb": round(f_disk["used"] / (1024**3), 2),
-                    "to_used_gb": round(l_disk["used"] / (1024**3), 2),
-                    "change_gb": round((l_disk["used"] - f_disk["used"]) / (1024**3), 2)
+def _merge_stats(parts: list) -> dict:
+    """Merge window/day stats; p95 of the merge is the highest p95 of its parts."""
+    merged = _empty_stats()
+    for part in parts:
+        merged["snapshot_count"] += part["snapshot_count"]
+        for metric in METRIC_KEYS:
+            target, source = merged[metric], part[metric]
+            if not source["count"]:
+                continue
+            target["count"] += source["count"]
+            target["sum"] = (target["sum"] or 0) + (source["sum"] or 0)
+            for key, pick in (("min", min), ("max", max), ("p95", max)):
+                if source[key] is not None:
+                    target[key] = source[key] if target[key] is None else pick(target[key], source[key])
+        for sensor, entry in part["temperatures"].items():
+            total = merged["temperatures"].setdefault(sensor, {"sum": 0.0, "count": 0, "max": entry["max"]})
+            total["sum"] += entry["sum"]
+            total["count"] += entry["count"]
+            total["max"] = max(total["max"], entry["max"])
+    return merged
+
+
+def _summarize_stats(stats: dict, p95_suffix: str = "p95") -> dict:
+    """Turn aggregated stats into report fields (averages, min/max, percentile, temperatures)."""
+    summary = {"snapshot_count": stats["snapshot_count"]}
+    for metric, key in METRIC_KEYS.items():
+        metric_stats = stats[metric]
+        count = metric_stats["count"]
+        summary[f"{key}_avg"] = round(metric_stats["sum"] / count, 2) if count else 0
+        for field in ("min", "max"):
+            value = metric_stats[field]
+            summary[f"{key}_{field}"] = round(value, 2) if value is not None else None
+        p95 = metric_stats["p95"]
+        summary[f"{key}_{p95_suffix}"] = round(p95, 2) if p95 is not None else None
+    summary["average_temps_celsius"] = {
+        sensor: round(entry["sum"] / entry["count"], 2)
+        for sensor, entry in stats["temperatures"].items() if entry["count"]
+    }
+    summary["max_temps_celsius"] = {
+        sensor: entry["max"] for sensor, entry in stats["temperatures"].items() if entry["count"]
+    }
+    return summary
+
+
+def _day_bounds(day: date) -> tuple:
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def _insert_rollups(db: Session, rows: list):
+    """Insert rollup rows, skipping days another report job stored first."""
+    table = ServerDailyRollup.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        db.execute(insert(table).on_conflict_do_nothing(index_elements=["server_id", "day"]), rows)
+        return
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(table.insert(), row)
+        except IntegrityError:
+            pass
+
+
+def ensure_daily_rollups(db: Session, server_id: int, first_day: date, last_day: date, tenant_id: str = "default") -> list:
+    """
+    Return the stats of each day in [first_day, last_day], computing only the missing days.
+
+    Only complete days belong in the rollup table; callers aggregate the
+    current day from raw snapshots. Days without snapshots are not stored, so
+    snapshots that reach them later are still picked up. The 7-day and
+    monthly jobs may compute the same day at once; whichever stores it second
+    skips it.
+
+    Returns:
+        List of (day, stats) tuples ordered by day
+    """
+    if last_day < first_day:
+        return []
+
+    table = ServerDailyRollup.__table__
+    stored = {
+        row.day: _stats_from_rollup(row)
+        for row in db.execute(select(table).where(
+            table.c.server_id == server_id,
+            table.c.day >= first_day,
+            table.c.day <= last_day
+        ))
+    }
+
+    daily = []
+    created = []
+    day = first_day
+    while day <= last_day:
+        stats = stored.get(day)
+        if stats is None:
+            stats = aggregate_snapshot_window(db, server_id, *_day_bounds(day))
+            if stats["snapshot_count"]:
+                created.append({
+                    "server_id": server_id,
+                    "day": day,
+                    "tenant_id": tenant_id,
+                    "snapshot_count": stats["snapshot_count"],
+                    "temperatures": stats["temperatures"],
+                    **{
+                        f"{metric}_{field}": stats[metric][field]
+                        for metric in METRIC_KEYS
+                        for field in ("count", "sum", "min", "max", "p95")
+                    }
                 })
+        daily.append((day, stats))
+        day += timedelta(days=1)
 
-        # Package Updates (available and recent)
-        # This assumes `packages` in snapshot.data is a list of strings like "package_name version"
-        first_packages = {p.split(" ")[0]: p.split(" ")[1] for p in first_snapshot_data.get("packages", []) if " " in p}
-        latest_packages = {p.split(" ")[0]: p.split(" ")[1] for p in latest_snapshot_data.get("packages", []) if " " in p}
-
-        for pkg_name, latest_version in latest_packages.items():
-            if pkg_name in first_packages:
-                if first_packages[pkg_name] != latest_version: # Package was updated
-                    aggregated_data["package_updates_recent"].append({
-                        "package": pkg_name,
-                        "from_version": first_packages[pkg_name],
-                        "to_version": latest_version
-                    })
-            # Logic for 'available' updates would typically involve checking a package manager API or a different snapshot
-            # For now, we'll assume packages not in the first snapshot but in the latest are 'newly available' or installed
-            elif pkg_name not in first_packages:
-                aggregated_data["package_updates_available"].append({"package": pkg_name, "version": latest_version})
-
-        # Extract plugin data from latest snapshot
-        latest_plugins = latest_snapshot_data.get("plugins", {})
-        for plugin_id, plugin_output in latest_plugins.items():
-            if isinstance(plugin_output, dict) and plugin_output.get("error"):
-                # Skip plugins that had errors
-                continue
-            
-            # Parse nvidia-smi CSV data into structured format
-            if plugin_id == "nvidia-smi" and isinstance(plugin_output, list):
-                gpus = []
-                for gpu_row in plugin_output:
-                    if isinstance(gpu_row, list) and len(gpu_row) >= 7:
-                        gpus.append({
-                            "index": gpu_row[0].strip() if gpu_row[0] else "0",
-                            "name": gpu_row[1].strip() if gpu_row[1] else "Unknown",
-                            "temp_c": int(gpu_row[2].strip()) if gpu_row[2] and gpu_row[2].strip().isdigit() else 0,
-                            "utilization_pct": int(gpu_row[3].strip()) if gpu_row[3] and gpu_row[3].strip().isdigit() else 0,
-                            "memory_used_mb": int(gpu_row[4].strip()) if gpu_row[4] and gpu_row[4].strip().isdigit() else 0,
-                            "memory_total_mb": int(gpu_row[5].strip()) if gpu_row[5] and gpu_row[5].strip().isdigit() else 0,
-                            "power_draw_w": float(gpu_row[6].strip()) if gpu_row[6] and gpu_row[6].strip().replace('.', '').isdigit() else 0
-                        })
-                aggregated_data["plugin_data"]["nvidia-smi"] = {"gpus": gpus}
-            
-            # docker-stats is already parsed as JSONL
-            elif plugin_id == "docker-stats" and isinstance(plugin_output, list):
-                containers = []
-                for container in plugin_output:
-                    if isinstance(container, dict):
-                        containers.append({
-                            "name": container.get("Name", "unknown"),
-                            "cpu_pct": container.get("CPUPerc", "0%"),
-                            "mem_pct": container.get("MemPerc", "0%"),
-                            "mem_usage": container.get("MemUsage", "0B / 0B"),
-                            "net_io": container.get("NetIO", "0B / 0B"),
-                            "block_io": container.get("BlockIO", "0B / 0B")
-                        })
-                aggregated_data["plugin_data"]["docker-stats"] = {"containers": containers}
-            
-            # For other plugins, just include the raw data
-            else:
-                aggregated_data["plugin_data"][plugin_id] = plugin_output
-
-        report = models.Report(
-            server_id=server_id,
-            report_type="24-hour",
-            start_time=start_time,
-            end_time=end_time,
-            aggregated_data=aggregated_data,
-            generated_at=datetime.utcnow()
-        )
-        db.add(report)
+    if created:
+        _insert_rollups(db, created)
         db.commit()
-        db.refresh(report)
-        return report
-    except Exception as e:
-        logging.exception(f"Error generating 24-hour report for server {server_id}")
-        raise HTTPException(status_code=500, detail="Failed to generate report")
 
-async def generate_7_day_report(db: Session, server_id: int, tenant_id: str = "default"):
-    end_time = datetime.utcnow()
-    start_time = end_time - timedelta(days=7)
-
-    # Aggregate from 24-hour reports
-    # In a fully hierarchical system, this would query the `Report` table
-    # for "24-hour" reports within the last 7 days and aggregate their `aggregated_data`.
-    # For now, we'll fetch the latest server profile for simplification,
-    # but the structure is here for future expansion.
-    server_profile = db.query(models.ServerProfile).filter(models.ServerProfile.tenant_id == tenant_id).filter(models.ServerProfile.id == server_id).first()
-    if not server_profile:
-        return None
+    return daily
+
+
+def _add_snapshot_changes(aggregated_data: dict, first_snapshot_data: dict, latest_snapshot_data: dict):
+    """Add storage/package changes and latest plugin data between the first and latest snapshot."""
+    # Storage Changes (from -> to)
+    first_disks = first_snapshot_data.get("disk_partitions", [])
+    latest_disks = latest_snapshot_data.get("disk_partitions", [])
+
+    for l_disk in latest_disks:
+        f_disk = next((d for d in first_disks if d["mountpoint"] == l_disk["mountpoint"]), None)
+        if f_disk and f_disk["used"] != l_disk["used"]:
+            aggregated_data["storage_changes"].append({
+                "mountpoint": l_disk["mountpoint"],
+                "from_used_gb": round(f_disk["used"] / (1024**3), 2),
+                "to_used_gb": round(l_disk["used"] / (1024**3), 2),
+                "change_gb": round((l_disk["used"] - f_disk["used"]) / (1024**3), 2)
+            })
+
+    # Package Updates (available and recent)
+    # This assumes `packages` in snapshot.data is a list of strings like "package_name version"
+    first_packages = {p.split(" ")[0]: p.split(" ")[1] for p in first_snapshot_data.get("packages", []) if " " in p}
+    latest_packages = {p.split(" ")[0]: p.split(" ")[1] for p in latest_snapshot_data.get("packages", []) if " " in p}
+
+    for pkg_name, latest_version in latest_packages.items():
+        if pkg_name in first_packages:
+            if first_packages[pkg_name] != latest_version: # Package was updated
+                aggregated_data["package_updates_recent"].append({
+                    "package": pkg_name,
+                    "from_version": first_packages[pkg_name],
+                    "to_version": latest_version
+                })
+        # Logic for 'available' updates would typically involve checking a package manager API or a different snapshot
+        # For now, we'll assume packages not in the first snapshot but in the latest are 'newly available' or installed
+        elif pkg_name not in first_packages:
+            aggregated_data["package_updates_available"].append({"package": pkg_name, "version": latest_version})
+
+    # Extract plugin data from latest snapshot
+    latest_plugins = latest_snapshot_data.get("plugins", {})
+    for plugin_id, plugin_output in latest_plugins.items():
+        if isinstance(plugin_output, dict) and plugin_output.get("error"):
+            # Skip plugins that had errors
+            continue
+        
+        # Parse nvidia-smi CSV data into structured format
+        if plugin_id == "nvidia-smi" and isinstance(plugin_output, list):
+            gpus = []
+            for gpu_row in plugin_output:
+                if isinstance(gpu_row, list) and len(gpu_row) >= 7:
+                    gpus.append({
+                        "index": gpu_row[0].strip() if gpu_row[0] else "0",
+                        "name": gpu_row[1].strip() if gpu_row[1] else "Unknown",
+                        "temp_c": int(gpu_row[2].strip()) if gpu_row[2] and gpu_row[2].strip().isdigit() else 0,
+                        "utilization_pct": int(gpu_row[3].strip()) if gpu_row[3] and gpu_row[3].strip().isdigit() else 0,
+                        "memory_used_mb": int(gpu_row[4].strip()) if gpu_row[4] and gpu_row[4].strip().isdigit() else 0,
+                        "memory_total_mb": int(gpu_row[5].strip()) if gpu_row[5] and gpu_row[5].strip().isdigit() else 0,
+                        "power_draw_w": float(gpu_row[6].strip()) if gpu_row[6] and gpu_row[6].strip().replace('.', '').isdigit() else 0
+                    })
+            aggregated_data["plugin_data"]["nvidia-smi"] = {"gpus": gpus}
+        
+        # docker-stats is already parsed as JSONL
+        elif plugin_id == "docker-stats" and isinstance(plugin_output, list):
+            containers = []
+            for container in plugin_output:
+                if isinstance(container, dict):
+                    containers.append({
+                        "name": container.get("Name", "unknown"),
+                        "cpu_pct": container.get("CPUPerc", "0%"),
+                        "mem_pct": container.get("MemPerc", "0%"),
+                        "mem_usage": container.get("MemUsage", "0B / 0B"),
+                        "net_io": container.get("NetIO", "0B / 0B"),
+                        "block_io": container.get("BlockIO", "0B / 0B")
+                    })
+            aggregated_data["plugin_data"]["docker-stats"] = {"containers": containers}
+        
+        # For other plugins, just include the raw data
+        else:
+            aggregated_data["plugin_data"][plugin_id] = plugin_output
+
 
-    aggregated_data = _aggregate_system_info([server_profile]) # Aggregate for this single server
+def _get_server_profile(db: Session, server_id: int, tenant_id: str):
+    return db.query(models.ServerProfile).filter(models.ServerProfile.tenant_id == tenant_id).filter(models.ServerProfile.id == server_id).first()
 
+
+def _current_profile_data(server_profile) -> dict:
+    hardware = server_profile.hardware_info or {}
+    return {
+        "cpu_current": hardware.get("cpu", {}).get("usage_percent", 0),
+        "memory_current": hardware.get("memory", {}).get("percent", 0),
+        "disk_current": hardware.get("disk", {}).get("percent", 0),
+    }
+
+
+def _save_report(db: Session, server_id: int, tenant_id: str, report_type: str,
+                 start_time: datetime, end_time: datetime, aggregated_data: dict):
     report = models.Report(
+        tenant_id=tenant_id,
         server_id=server_id,
-        report_type="7-day",
+        report_type=report_type,
         start_time=start_time,
         end_time=end_time,
         aggregated_data=aggregated_data,
@@ -340,30 +436,195 @@ async def generate_7_day_report(db: Session, server_id: int, tenant_id: str = "d
     db.refresh(report)
     return report
 
-async def generate_monthly_report(db: Session, server_id: int, tenant_id: str = "default"):
+
+def build_24_hour_report(db: Session, server_id: int, tenant_id: str = "default"):
+    """Build and store a rolling 24-hour report from SQL-side snapshot aggregates."""
+    end_time = datetime.utcnow()
+    start_time = end_time - timedelta(days=1)
+
+    server_profile = _get_server_profile(db, server_id, tenant_id)
+    stats = aggregate_snapshot_window(db, server_id, start_time, end_time + timedelta(microseconds=1))
+
+    if not stats["snapshot_count"]:
+        # No snapshots - generate report from current profile data
+        if not server_profile:
+            return None
+
+        aggregated_data = {
+            "period_start": start_time.isoformat(),
+            "period_end": end_time.isoformat(),
+            "server_name": server_profile.name,
+            **_current_profile_data(server_profile),
+            "snapshot_count": 0,
+            "note": "No historical snapshots available. Showing current state only."
+        }
+        return _save_report(db, server_id, tenant_id, "24-hour", start_time, end_time, aggregated_data)
+
+    if not server_profile:
+        # This case should ideally not happen if snapshots exist for the server_id
+        raise HTTPException(status_code=404, detail="Server profile not found for snapshot data")
+
+    # Only the first and latest snapshot payloads are needed in full
+    window = db.query(models.ServerSnapshot) \
+        .filter(models.ServerSnapshot.server_id == server_id) \
+        .filter(models.ServerSnapshot.timestamp >= start_time) \
+        .filter(models.ServerSnapshot.timestamp <= end_time)
+    first_snapshot_data = window.order_by(models.ServerSnapshot.timestamp.asc()).first().data or {}
+    latest_snapshot_data = window.order_by(models.ServerSnapshot.timestamp.desc()).first().data or {}
+
+    aggregated_data = {
+        "period_start": start_time.isoformat(),
+        "period_end": end_time.isoformat(),
+        "server_name": server_profile.name,
+        # Current values from latest snapshot
+        "cpu_current": 0,
+        "memory_current": 0,
+        "disk_current": 0,
+        # Averages, extremes and percentiles over the period
+        **_summarize_stats(stats),
+        "storage_changes": [],
+        "package_updates_available": [],
+        "package_updates_recent": [],
+        "current_temps_celsius": {},
+        "syslog_summary": "Not yet implemented.",
+        "docker_log_summary": "Not yet implemented.",
+        "container_updates_available": [],
+        # Plugin data from latest snapshot
+        "plugin_data": {},
+    }
+
+    # Extract CURRENT values from the latest snapshot
+    # Snapshot stores keys at root level: cpu, memory, disk (not nested under hardware_info)
+    latest_cpu = latest_snapshot_data.get("cpu", {})
+    latest_memory = latest_snapshot_data.get("memory", {})
+    latest_disk = latest_snapshot_data.get("disk", {})
+
+    aggregated_data["cpu_current"] = latest_cpu.get("usage_percent", 0)
+    mem_total, mem_used = latest_memory.get("total_bytes", 0), latest_memory.get("used_bytes", 0)
+    aggregated_data["memory_current"] = round((mem_used / mem_total) * 100, 2) if mem_total > 0 and mem_used > 0 else 0
+    disk_total, disk_used = latest_disk.get("root_total_bytes", 0), latest_disk.get("root_used_bytes", 0)
+    aggregated_data["disk_current"] = round((disk_used / disk_total) * 100, 2) if disk_total > 0 else 0
+
+    for sensor, value in _iter_temperature_readings(latest_snapshot_data.get("temperatures", {})):
+        aggregated_data["current_temps_celsius"][sensor] = value
+
+    _add_snapshot_changes(aggregated_data, first_snapshot_data, latest_snapshot_data)
+
+    return _save_report(db, server_id, tenant_id, "24-hour", start_time, end_time, aggregated_data)
+
+
+def build_period_report(db: Session, server_id: int, report_type: str, first_day: date, tenant_id: str = "default"):
+    """
+    Build and store a multi-day report by merging daily rollups.
+
+    Complete days come from (and are lazily added to) the rollup table; only
+    the current, still-open day is aggregated from raw snapshots.
+    """
     end_time = datetime.utcnow()
-    # Calculate start of the current month
-    start_time = datetime(end_time.year, end_time.month, 1)
+    today = end_time.date()
+    start_time = datetime.combine(first_day, time.min)
 
-    # Aggregate from 7-day reports (or directly from profiles for now)
-    server_profile = db.query(models.ServerProfile).filter(models.ServerProfile.tenant_id == tenant_id).filter(models.ServerProfile.id == server_id).first()
+    server_profile = _get_server_profile(db, server_id, tenant_id)
     if not server_profile:
         return None
 
-    aggregated_data = _aggregate_system_info([server_profile]) # Aggregate for this single server
+    today_stats = aggregate_snapshot_window(db, server_id, _day_bounds(today)[0], end_time + timedelta(microseconds=1))
+    daily = ensure_daily_rollups(db, server_id, first_day, today - timedelta(days=1), tenant_id) + [(today, today_stats)]
+    merged = _merge_stats([stats for _, stats in daily])
 
-    report = models.Report(
-        server_id=server_id,
-        report_type="monthly",
-        start_time=start_time,
-        end_time=end_time,
-        aggregated_data=aggregated_data,
-        generated_at=datetime.utcnow()
-    )
-    db.add(report)
-    db.commit()
-    db.refresh(report)
-    return report
+    aggregated_data = {
+        "period_start": start_time.isoformat(),
+        "period_end": end_time.isoformat(),
+        "server_name": server_profile.name,
+        "total_servers": 1,
+    }
+    if merged["snapshot_count"]:
+        # Per-day p95s only bound the period's p95 from above
+        aggregated_data.update(_summarize_stats(merged, p95_suffix="p95_daily_max"))
+        aggregated_data["daily"] = [
+            {"day": day.isoformat(), **_summarize_stats(stats)}
+            for day, stats in daily if stats["snapshot_count"]
+        ]
+    else:
+        aggregated_data.update(_aggregate_system_info([server_profile])) # Aggregate for this single server
+        aggregated_data.update({
+            "snapshot_count": 0,
+            "note": "No historical snapshots available. Showing current state only."
+        })
+
+    return _save_report(db, server_id, tenant_id, report_type, start_time, end_time, aggregated_data)
+
+
+def build_report(db: Session, server_id: int, report_type: str, tenant_id: str = "default"):
+    """Build a report of the given type ("24-hour", "7-day" or "monthly")."""
+    if report_type == "24-hour":
+        return build_24_hour_report(db, server_id, tenant_id)
+    today = datetime.utcnow().date()
+    if report_type == "7-day":
+        return build_period_report(db, server_id, report_type, today - timedelta(days=6), tenant_id)
+    if report_type == "monthly":
+        return build_period_report(db, server_id, report_type, today.replace(day=1), tenant_id)
+    raise ValueError(f"Unknown report type: {report_type}")
+
+
+async def generate_24_hour_report(db: Session, server_id: int, tenant_id: str = "default"):
+    try:
+        return build_24_hour_report(db, server_id, tenant_id)
+    except Exception as e:
+        logging.exception(f"Error generating 24-hour report for server {server_id}")
+        raise HTTPException(status_code=500, detail="Failed to generate report")
+
+async def generate_7_day_report(db: Session, server_id: int, tenant_id: str = "default"):
+    return build_report(db, server_id, "7-day", tenant_id)
+
+async def generate_monthly_report(db: Session, server_id: int, tenant_id: str = "default"):
+    return build_report(db, server_id, "monthly", tenant_id)
+
+
+def _build_report_in_session(server_id: int, report_type: str, tenant_id: str):
+    db = SessionLocal()
+    try:
+        report = build_report(db, server_id, report_type, tenant_id)
+        return report.id if report else None
+    except Exception:
+        db.rollback()
+        logging.exception(f"Error generating {report_type} report for server {server_id}")
+        raise
+    finally:
+        db.close()
+
+
+async def generate_reports_for_servers(
+    report_type: str,
+    server_ids: list,
+    tenant_id: str = "default",
+    max_concurrency: int = settings.report_max_concurrency
+) -> dict:
+    """
+    Generate one report type for many servers concurrently.
+
+    Each server is built on the shared I/O thread pool with its own session,
+    at most max_concurrency at a time.
+
+    Returns:
+        Dictionary with generated report IDs and failed server IDs
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def generate(server_id: int):
+        async with semaphore:
+            return await run_in_executor(get_thread_pool(), _build_report_in_session, server_id, report_type, tenant_id)
+
+    results = await asyncio.gather(*(generate(server_id) for server_id in server_ids), return_exceptions=True)
+
+    summary = {"generated": [], "failed": []}
+    for server_id, result in zip(server_ids, results):
+        if isinstance(result, Exception):
+            # Already logged with its traceback by _build_report_in_session
+            summary["failed"].append(server_id)
+        elif result is not None:
+            summary["generated"].append(result)
+    return summary
 
 def export_report_to_csv(report_data: dict) -> str:
     output = io.StringIO()
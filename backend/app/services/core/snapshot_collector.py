@@ -0,0 +1,328 @@
+"""
+Batched Remote Snapshot Collector
+
+Gathers everything a server snapshot needs in a single SSH round trip: one
+composite shell script is piped to `sh -s` and prints each probe as a
+delimited section with its exit status. Most values are read straight from
+/proc, and CPU usage is derived from two /proc/stat samples taken a fixed
+CPU_SAMPLE_SECONDS apart (instead of a blocking `vmstat 1 2`), before the
+other probes run so their own load does not skew the sample.
+
+The backend parses the payload once with parse_sections() and
+build_snapshot_data().
+"""
+import json
+import logging
+import re
+import shlex
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SECTION_START = "@@unity-section"
+SECTION_END = "@@unity-status"
+
+_START_RE = re.compile(r"^@@unity-section (\S+)@@$")
+_END_RE = re.compile(r"^@@unity-status (\S+) (\d+)@@$")
+
+# Length of the CPU usage sample window
+CPU_SAMPLE_SECONDS = 0.5
+
+# Built-in probes in script order. The two /proc/stat reads come first and
+# back to back, separated only by the sleep, so the sample window is fixed
+# and does not include the collector's own work. `sleep 1` is the fallback
+# for shells whose sleep takes whole seconds only.
+SNAPSHOT_PROBES: List[Tuple[str, str]] = [
+    ("cpu_stat_start", "head -n 1 /proc/stat"),
+    ("cpu_stat_end", f"sleep {CPU_SAMPLE_SECONDS} 2>/dev/null || sleep 1; head -n 1 /proc/stat"),
+    ("uname", "uname -s; uname -r; uname -m"),
+    ("hostname", "hostname"),
+    ("cpu_model", "grep -m 1 'model name' /proc/cpuinfo || lscpu | grep 'Model name'"),
+    ("nproc", "nproc --all"),
+    ("meminfo", "cat /proc/meminfo"),
+    ("loadavg", "cat /proc/loadavg"),
+    ("process_count", "ls -d /proc/[0-9]* | wc -l"),
+    ("file_nr", "cat /proc/sys/fs/file-nr"),
+    ("uptime", "cat /proc/uptime"),
+    ("disk_root", "df -P -B1 / | tail -n 1"),
+    ("network", "ip -j addr"),
+    ("packages", "dpkg -l | awk '/^ii/ {print $2 \" \" $3}'"),
+    ("sensors", "sensors -j"),
+]
+
+# Prints a section header, evaluates the probe and reports its exit status.
+# Probes run in a subshell with stdin closed so an `exit` or a command that
+# reads stdin cannot cut the script (which sh -s reads from stdin) short.
+# The leading newline on the status marker keeps it on its own line even
+# when a probe's output does not end with one.
+_SCRIPT_PRELUDE = f"""\
+probe() {{
+    printf '{SECTION_START} %s@@\\n' "$1"
+    (eval "$2") </dev/null 2>/dev/null
+    rc=$?
+    printf '\\n{SECTION_END} %s %s@@\\n' "$1" "$rc"
+}}
+"""
+
+PLUGIN_SECTION_PREFIX = "plugin:"
+
+
+@dataclass
+class Section:
+    """Output of one probe."""
+    output: str
+    exit_code: int
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == 0 and bool(self.output.strip())
+
+
+def build_snapshot_script(plugin_commands: Optional[Dict[str, str]] = None) -> str:
+    """
+    Build the composite snapshot script.
+
+    Args:
+        plugin_commands: Mapping of plugin_id to collect command, run as
+            extra 'plugin:<id>' sections
+
+    Returns:
+        Shell script to pipe into `sh -s`
+    """
+    probes = list(SNAPSHOT_PROBES)
+    for plugin_id, command in (plugin_commands or {}).items():
+        probes.append((f"{PLUGIN_SECTION_PREFIX}{plugin_id}", command))
+
+    lines = [_SCRIPT_PRELUDE]
+    for name, command in probes:
+        lines.append(f"probe {shlex.quote(name)} {shlex.quote(command)}")
+    return "\n".join(lines) + "\n"
+
+
+def parse_sections(payload: str) -> Dict[str, Section]:
+    """
+    Split script output into sections.
+
+    Args:
+        payload: stdout of the snapshot script
+
+    Returns:
+        Mapping of section name to Section
+    """
+    sections: Dict[str, Section] = {}
+    current: Optional[str] = None
+    buffer: List[str] = []
+
+    for line in payload.splitlines():
+        if current is None:
+            match = _START_RE.match(line)
+            if match:
+                current = match.group(1)
+                buffer = []
+            continue
+
+        match = _END_RE.match(line)
+        if match and match.group(1) == current:
+            # Drop the newline the status marker adds before itself
+            if buffer and buffer[-1] == "":
+                buffer.pop()
+            sections[current] = Section(output="\n".join(buffer), exit_code=int(match.group(2)))
+            current = None
+        else:
+            buffer.append(line)
+
+    return sections
+
+
+def _int(value: str, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _cpu_usage_percent(start: Optional[Section], end: Optional[Section]) -> float:
+    """CPU busy percentage between two 'cpu ...' lines of /proc/stat."""
+    if not start or not end or not start.ok or not end.ok:
+        return 0
+    before = [_int(v) for v in start.output.split()[1:]]
+    after = [_int(v) for v in end.output.split()[1:]]
+    if len(before) < 4 or len(after) != len(before):
+        return 0
+
+    # idle + iowait count as idle time
+    idle_delta = sum(after[3:5]) - sum(before[3:5])
+    total_delta = sum(after) - sum(before)
+    if total_delta <= 0:
+        return 0
+    return round(100.0 * (total_delta - idle_delta) / total_delta, 1)
+
+
+def _parse_meminfo(output: str) -> Dict[str, int]:
+    """Parse /proc/meminfo into bytes keyed by field name."""
+    values = {}
+    for line in output.splitlines():
+        key, _, rest = line.partition(":")
+        parts = rest.split()
+        if parts:
+            multiplier = 1024 if len(parts) > 1 and parts[1] == "kB" else 1
+            values[key.strip()] = _int(parts[0]) * multiplier
+    return values
+
+
+def parse_plugin_output(output: str, parser: str) -> Any:
+    """
+    Parse a plugin's collect_cmd output according to its registry parser.
+
+    Args:
+        output: Raw command output
+        parser: One of json, csv, jsonl or text
+
+    Returns:
+        Parsed plugin data
+    """
+    output = output.strip()
+
+    if parser == "json":
+        try:
+            return json.loads(output)
+        except json.JSONDecodeError:
+            return {"raw": output, "parse_error": True}
+    elif parser == "csv":
+        return [line.split(',') for line in output.split('\n') if line.strip()]
+    elif parser == "jsonl":
+        parsed_lines = []
+        for line in output.split('\n'):
+            if line.strip():
+                try:
+                    parsed_lines.append(json.loads(line.strip()))
+                except json.JSONDecodeError:
+                    parsed_lines.append({"raw": line.strip()})
+        return parsed_lines
+    return {"raw": output}
+
+
+def build_snapshot_data(
+    sections: Dict[str, Section],
+    plugin_parsers: Optional[Dict[str, str]] = None,
+    server_name: str = ""
+) -> Dict[str, Any]:
+    """
+    Turn parsed sections into the ServerSnapshot.data document.
+
+    Args:
+        sections: Output of parse_sections()
+        plugin_parsers: Mapping of plugin_id to registry parser name
+        server_name: Name used in log messages
+
+    Returns:
+        Snapshot data dictionary
+    """
+    def text(name: str) -> str:
+        section = sections.get(name)
+        return section.output.strip() if section and section.exit_code == 0 else ""
+
+    uname = text("uname").splitlines()
+    uname += [""] * (3 - len(uname))
+
+    cpu_model = text("cpu_model").split(':', 1)[-1].strip() or "N/A"
+
+    mem = _parse_meminfo(text("meminfo"))
+    total_mem = mem.get("MemTotal", 0)
+    buff_cache = mem.get("Buffers", 0) + mem.get("Cached", 0) + mem.get("SReclaimable", 0)
+    used_mem = max(total_mem - mem.get("MemFree", 0) - buff_cache, 0) if total_mem else 0
+    total_swap = mem.get("SwapTotal", 0)
+    used_swap = max(total_swap - mem.get("SwapFree", 0), 0)
+
+    load = text("loadavg").split()
+    load_avg = [0.0, 0.0, 0.0]
+    try:
+        load_avg = [float(v) for v in load[:3]] if len(load) >= 3 else load_avg
+    except ValueError:
+        logger.warning(f"Could not parse load average for {server_name}: {text('loadavg')}")
+
+    file_nr = text("file_nr").split()
+    uptime = text("uptime").split()
+    try:
+        uptime_seconds = int(float(uptime[0])) if uptime else 0
+    except ValueError:
+        uptime_seconds = 0
+
+    disk = text("disk_root").split()
+    total_disk = _int(disk[1]) if len(disk) > 2 else 0
+    used_disk = _int(disk[2]) if len(disk) > 2 else 0
+
+    network_interfaces = []
+    if text("network"):
+        try:
+            network_interfaces = json.loads(text("network"))
+        except json.JSONDecodeError:
+            logger.warning(f"Could not parse 'ip -j addr' output for {server_name}")
+
+    temperatures = {}
+    sensors = sections.get("sensors")
+    if sensors and sensors.ok:
+        try:
+            temperatures = json.loads(sensors.output)
+        except json.JSONDecodeError:
+            logger.warning(f"Could not parse sensors -j output for {server_name}")
+    elif sensors and sensors.exit_code == 127:
+        logger.info(f"'sensors' command not found on {server_name}. Skipping temperature collection.")
+
+    plugins: Dict[str, Any] = {}
+    for plugin_id, parser in (plugin_parsers or {}).items():
+        section = sections.get(f"{PLUGIN_SECTION_PREFIX}{plugin_id}")
+        if section is None:
+            plugins[plugin_id] = {"error": "No output received"}
+        elif section.ok:
+            plugins[plugin_id] = parse_plugin_output(section.output, parser)
+        else:
+            plugins[plugin_id] = {"error": f"Command failed with exit code {section.exit_code}"}
+
+    packages = text("packages")
+
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "os": {
+            "system": uname[0],
+            "release": uname[1],
+            "hostname": text("hostname"),
+            "machine": uname[2],
+        },
+        "cpu": {
+            "model": cpu_model,
+            "cores": _int(text("nproc")),
+            "usage_percent": _cpu_usage_percent(sections.get("cpu_stat_start"), sections.get("cpu_stat_end")),
+        },
+        "memory": {
+            "total_bytes": total_mem,
+            "used_bytes": used_mem,
+            "available_bytes": mem.get("MemAvailable", 0),
+            "swap_total_bytes": total_swap,
+            "swap_used_bytes": used_swap,
+            "swap_percent": (used_swap / total_swap) * 100 if total_swap > 0 else 0,
+        },
+        "disk": {
+            "root_total_bytes": total_disk,
+            "root_used_bytes": used_disk,
+        },
+        "load_average": {
+            "1min": load_avg[0],
+            "5min": load_avg[1],
+            "15min": load_avg[2],
+        },
+        "processes": {
+            "count": _int(text("process_count")),
+        },
+        "file_descriptors": {
+            "open": _int(file_nr[0]) if len(file_nr) >= 3 else 0,
+            "max": _int(file_nr[2]) if len(file_nr) >= 3 else 0,
+        },
+        "uptime_seconds": uptime_seconds,
+        "network_interfaces": network_interfaces,
+        "packages": packages.split('\n') if packages else [],
+        "temperatures": temperatures,
+        "plugins": plugins,
+    }
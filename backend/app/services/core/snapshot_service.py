@@ -1,11 +1,13 @@
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from datetime import datetime
 from app import models
 from app.services.core.system_info import SystemInfoService
 from app.services.core.ssh import SSHService # Assuming an existing SSH service
-import json
+from app.services.core.snapshot_collector import build_snapshot_data, build_snapshot_script, parse_sections
+from app.core.config import settings
+from typing import Any, Dict, Iterable, List, Optional
 import asyncio
-import platform
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,227 +28,59 @@ class SnapshotService:
         return new_snapshot
 
     @staticmethod
-    async def take_remote_snapshot(db: Session, server_profile: models.ServerProfile, tenant_id: str = "default"):
-        # This method will connect to a remote server via SSH and gather information
-        # using commands. This is a more realistic scenario for Homelab Intelligence.
-        
-        ssh_service = SSHService(server_profile)
-        try:
-            # Gather OS info
-            os_name, _, _ = await ssh_service.execute_command("uname -s")
-            os_name = os_name.strip()
-            os_release, _, _ = await ssh_service.execute_command("uname -r")
-            os_release = os_release.strip()
-            hostname, _, _ = await ssh_service.execute_command("hostname")
-            hostname = hostname.strip()
-            arch, _, _ = await ssh_service.execute_command("uname -m")
-            arch = arch.strip()
-
-            # Gather CPU info (simplified)
-            cpu_info_raw, _, _ = await ssh_service.execute_command("lscpu | grep 'Model name'")
-            cpu_model = cpu_info_raw.split(':')[-1].strip() if cpu_info_raw else "N/A"
-            cpu_cores_raw, _, _ = await ssh_service.execute_command("nproc --all")
-            cpu_cores = int(cpu_cores_raw.strip()) if cpu_cores_raw.strip().isdigit() else 0
-            
-            # Get CPU usage via vmstat (last column is idle%, so usage = 100 - idle)
-            cpu_usage_percent = 0
-            cpu_usage_raw, _, cpu_usage_code = await ssh_service.execute_command("vmstat 1 2 | tail -1 | awk '{print $15}'")
-            if cpu_usage_code == 0 and cpu_usage_raw.strip().isdigit():
-                idle_percent = int(cpu_usage_raw.strip())
-                cpu_usage_percent = 100 - idle_percent
-
-            # Gather Memory info (parse full output from 'free')
-            mem_info_raw, _, _ = await ssh_service.execute_command("free -b | grep Mem:")
-            total_mem = 0
-            used_mem = 0
-            available_mem = 0
-            if mem_info_raw:
-                parts = mem_info_raw.split()
-                # Output: Mem: total used free shared buff/cache available
-                if len(parts) >= 7:
-                    total_mem = int(parts[1]) if parts[1].isdigit() else 0
-                    used_mem = int(parts[2]) if parts[2].isdigit() else 0
-                    available_mem = int(parts[6]) if parts[6].isdigit() else 0
+    async def collect_remote_snapshot(server_profile: models.ServerProfile) -> Optional[Dict[str, Any]]:
+        """
+        Collect snapshot data from a remote server in a single SSH round trip.
 
-            # Gather Swap info
-            swap_info_raw, _, _ = await ssh_service.execute_command("free -b | grep Swap:")
-            total_swap = 0
-            used_swap = 0
-            swap_percent = 0
-            if swap_info_raw:
-                parts = swap_info_raw.split()
-                if len(parts) >= 4:
-                    total_swap = int(parts[1]) if parts[1].isdigit() else 0
-                    used_swap = int(parts[2]) if parts[2].isdigit() else 0
-                    if total_swap > 0: # Avoid division by zero
-                        swap_percent = (used_swap / total_swap) * 100
+        Builds one composite script (system probes plus the collect commands
+        of the profile's enabled plugins), runs it over the pooled SSH
+        connection and parses the sectioned output.
 
-            # Gather Load Average (1, 5, 15 min)
-            load_avg_raw, _, _ = await ssh_service.execute_command("cat /proc/loadavg")
-            load_avg_1min = 0.0
-            load_avg_5min = 0.0
-            load_avg_15min = 0.0
-            if load_avg_raw:
-                parts = load_avg_raw.split()
-                if len(parts) >= 3:
-                    try:
-                        load_avg_1min = float(parts[0])
-                        load_avg_5min = float(parts[1])
-                        load_avg_15min = float(parts[2])
-                    except ValueError:
-                        logger.warning(f"Could not parse load average for {server_profile.name}: {load_avg_raw.strip()}")
+        Args:
+            server_profile: Server to collect from
 
-            # Gather Process Count
-            process_count_raw, _, process_count_code = await ssh_service.execute_command("ps -e --no-headers | wc -l")
-            process_count = 0
-            if process_count_code == 0 and process_count_raw.strip().isdigit():
-                process_count = int(process_count_raw.strip())
+        Returns:
+            Snapshot data dictionary, or None if the server could not be reached
+        """
+        plugin_commands = {}
+        plugin_parsers = {}
+        enabled_plugins = server_profile.enabled_plugins or []
+        if enabled_plugins:
+            from app.services.plugins.plugin_registry import get_plugin
 
-            # Gather Open File Descriptors
-            # Output is typically: 1024\t0\t102400 (used, free, max)
-            file_nr_raw, _, file_nr_code = await ssh_service.execute_command("cat /proc/sys/fs/file-nr")
-            open_file_descriptors = 0
-            max_file_descriptors = 0
-            if file_nr_code == 0 and file_nr_raw.strip():
-                parts = file_nr_raw.strip().split() # Split by whitespace
-                if len(parts) >= 3 and parts[0].isdigit() and parts[2].isdigit():
-                    open_file_descriptors = int(parts[0])
-                    max_file_descriptors = int(parts[2])
+            for plugin_id in enabled_plugins:
+                plugin = get_plugin(plugin_id)
+                if plugin and plugin.get("collect_cmd"):
+                    plugin_commands[plugin_id] = plugin["collect_cmd"]
+                    plugin_parsers[plugin_id] = plugin.get("parser", "text")
 
-            # Gather Uptime
-            # Output is typically: 3600.00 123.45 (total_uptime_seconds, idle_time_seconds)
-            uptime_raw, _, uptime_code = await ssh_service.execute_command("cat /proc/uptime")
-            total_uptime_seconds = 0
-            if uptime_code == 0 and uptime_raw.strip():
-                parts = uptime_raw.strip().split()
-                if len(parts) >= 1:
-                    try:
-                        total_uptime_seconds = int(float(parts[0]))
-                    except ValueError:
-                        logger.warning(f"Could not parse uptime for {server_profile.name}: {uptime_raw.strip()}")
+        ssh_service = SSHService(server_profile)
+        stdout, stderr, exit_code = await ssh_service.execute_command(
+            "sh -s",
+            input=build_snapshot_script(plugin_commands),
+            timeout=settings.snapshot_command_timeout_seconds
+        )
 
-            # Gather Disk info (simplified, for root fs)
-            disk_info_raw, _, _ = await ssh_service.execute_command("df -P -B1 / | tail -n 1")
-            total_disk = 0
-            used_disk = 0
-            if disk_info_raw:
-                parts = disk_info_raw.split()
-                if len(parts) > 2 and parts[1].isdigit() and parts[2].isdigit():
-                    total_disk = int(parts[1])
-                    used_disk = int(parts[2])
+        sections = parse_sections(stdout or "")
+        if not sections:
+            logger.error(
+                f"Snapshot collection failed for {server_profile.name} "
+                f"(exit code {exit_code}): {stderr.strip()}"
+            )
+            return None
 
-            # Gather Network info (simplified)
-            network_info_raw, _, _ = await ssh_service.execute_command("ip -j addr")
-            network_interfaces = json.loads(network_info_raw.strip())
+        return build_snapshot_data(sections, plugin_parsers, server_name=server_profile.name)
 
-            # Gather packages (example for apt-based systems)
-            packages_raw, _, _ = await ssh_service.execute_command("dpkg -l | awk '/^ii/ {print $2 " " $3}'")
-            
-            # Gather temperatures (requires 'sensors' package and parsing)
-            temp_raw, _, temp_code = await ssh_service.execute_command("sensors -j")
-            temperatures_data = {}
-            if temp_code == 0 and temp_raw.strip():
-                try:
-                    temperatures_data = json.loads(temp_raw.strip())
-                except json.JSONDecodeError:
-                    logger.warning(f"Could not parse sensors -j output for {server_profile.name}: {temp_raw.strip()}")
-            elif temp_code == 127:
-                logger.info(f"'sensors' command not found on {server_profile.name}. Skipping temperature collection.")
-            else:
-                logger.warning(f"sensors -j command failed on {server_profile.name} with exit code {temp_code}: {temp_raw.strip()}")
+    @staticmethod
+    async def take_remote_snapshot(db: Session, server_profile: models.ServerProfile, tenant_id: str = "default"):
+        # Connects to the remote server via SSH and gathers information with
+        # one batched script (see snapshot_collector).
+        try:
+            snapshot_data = await SnapshotService.collect_remote_snapshot(server_profile)
+            if snapshot_data is None:
+                return None
 
-            snapshot_data = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "os": {
-                    "system": os_name,
-                    "release": os_release,
-                    "hostname": hostname,
-                    "machine": arch,
-                },
-                "cpu": {
-                    "model": cpu_model,
-                    "cores": cpu_cores,
-                    "usage_percent": cpu_usage_percent,
-                },
-                "memory": {
-                    "total_bytes": total_mem,
-                    "used_bytes": used_mem,
-                    "available_bytes": available_mem,
-                    "swap_total_bytes": total_swap,
-                    "swap_used_bytes": used_swap,
-                    "swap_percent": swap_percent,
-                },
-                "disk": {
-                    "root_total_bytes": total_disk,
-                    "root_used_bytes": used_disk,
-                },
-                "load_average": {
-                    "1min": load_avg_1min,
-                    "5min": load_avg_5min,
-                    "15min": load_avg_15min,
-                },
-                "processes": {
-                    "count": process_count,
-                },
-                "file_descriptors": {
-                    "open": open_file_descriptors,
-                    "max": max_file_descriptors,
-                },
-                "uptime_seconds": total_uptime_seconds,
-                "network_interfaces": network_interfaces,
-                "packages": packages_raw.split('\n') if packages_raw else [],
-                "temperatures": temperatures_data,
-                "plugins": {},  # Plugin data will be added below
-            }
-            
-            # Collect data from enabled plugins
-            enabled_plugins = server_profile.enabled_plugins or []
-            if enabled_plugins:
-                from app.services.plugins.plugin_registry import get_plugin
-                plugin_data = {}
-                
-                for plugin_id in enabled_plugins:
-                    plugin = get_plugin(plugin_id)
-                    if plugin:
-                        try:
-                            collect_cmd = plugin.get("collect_cmd", "")
-                            if collect_cmd:
-                                output, stderr, exit_code = await ssh_service.execute_command(collect_cmd)
-                                if exit_code == 0 and output.strip():
-                                    parser = plugin.get("parser", "text")
-                                    
-                                    if parser == "json":
-                                        try:
-                                            plugin_data[plugin_id] = json.loads(output.strip())
-                                        except json.JSONDecodeError:
-                                            plugin_data[plugin_id] = {"raw": output.strip(), "parse_error": True}
-                                    elif parser == "csv":
-                                        # Parse CSV into list of dicts or list of lists
-                                        lines = output.strip().split('\n')
-                                        plugin_data[plugin_id] = [line.split(',') for line in lines if line.strip()]
-                                    elif parser == "jsonl":
-                                        # JSON lines (one JSON object per line)
-                                        lines = output.strip().split('\n')
-                                        parsed_lines = []
-                                        for line in lines:
-                                            if line.strip():
-                                                try:
-                                                    parsed_lines.append(json.loads(line.strip()))
-                                                except json.JSONDecodeError:
-                                                    parsed_lines.append({"raw": line.strip()})
-                                        plugin_data[plugin_id] = parsed_lines
-                                    else:
-                                        # Plain text
-                                        plugin_data[plugin_id] = {"raw": output.strip()}
-                                else:
-                                    plugin_data[plugin_id] = {"error": f"Command failed with exit code {exit_code}", "stderr": stderr}
-                        except Exception as plugin_error:
-                            logger.warning(f"Error collecting plugin data for {plugin_id} on {server_profile.name}: {plugin_error}")
-                            plugin_data[plugin_id] = {"error": str(plugin_error)}
-                
-                snapshot_data["plugins"] = plugin_data
-            
-            new_snapshot = models.ServerSnapshot(tenant_id=tenant_id, 
+            new_snapshot = models.ServerSnapshot(
                 server_id=server_profile.id,
                 timestamp=datetime.utcnow(),
                 data=snapshot_data
@@ -258,4 +92,102 @@ class SnapshotService:
 
         except Exception as e:
             logger.exception(f"Error taking remote snapshot for {server_profile.name}")
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    async def take_all_remote_snapshots(
+        db: Session,
+        server_profiles: List[models.ServerProfile],
+        max_concurrency: int = settings.snapshot_max_concurrency
+    ) -> List[models.ServerSnapshot]:
+        """
+        Snapshot many servers concurrently.
+
+        Collection runs for up to max_concurrency servers at a time; the
+        resulting snapshots are written in a single commit.
+
+        Args:
+            db: Database session
+            server_profiles: Servers to snapshot
+            max_concurrency: Maximum servers collected at the same time
+
+        Returns:
+            List of created ServerSnapshot objects (failed servers are skipped)
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def collect(profile: models.ServerProfile):
+            async with semaphore:
+                try:
+                    return await SnapshotService.collect_remote_snapshot(profile)
+                except Exception:
+                    logger.exception(f"Error taking remote snapshot for {profile.name}")
+                    return None
+
+        results = await asyncio.gather(*(collect(profile) for profile in server_profiles))
+
+        snapshots = [
+            models.ServerSnapshot(
+                server_id=profile.id,
+                timestamp=datetime.utcnow(),
+                data=data
+            )
+            for profile, data in zip(server_profiles, results)
+            if data is not None
+        ]
+        if snapshots:
+            db.add_all(snapshots)
+            db.commit()
+
+        failed = len(server_profiles) - len(snapshots)
+        if failed:
+            logger.warning(f"Snapshot failed for {failed} of {len(server_profiles)} servers")
+        return snapshots
+
+    @staticmethod
+    def get_latest_snapshots(
+        db: Session,
+        server_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, Any]:
+        """
+        Fetch the most recent snapshot of every server in a single query.
+
+        PostgreSQL uses ``DISTINCT ON (server_id)``; other databases rank rows
+        with a ``row_number()`` window partitioned by server. Snapshots carry
+        no tenant of their own, so callers scope the read with the ids of
+        their tenant's servers.
+
+        Args:
+            db: Database session
+            server_ids: Restrict to these servers (None = all servers)
+
+        Returns:
+            Dictionary mapping server_id to its latest snapshot row
+            (id, server_id, timestamp, data)
+        """
+        snapshots = models.ServerSnapshot.__table__
+        if server_ids is not None:
+            server_ids = list(server_ids)
+            if not server_ids:
+                return {}
+
+        if db.get_bind().dialect.name == "postgresql":
+            query = select(snapshots).distinct(snapshots.c.server_id).order_by(
+                snapshots.c.server_id, snapshots.c.timestamp.desc(), snapshots.c.id.desc()
+            )
+            if server_ids is not None:
+                query = query.where(snapshots.c.server_id.in_(server_ids))
+        else:
+            ranked = select(
+                snapshots,
+                func.row_number().over(
+                    partition_by=snapshots.c.server_id,
+                    order_by=(snapshots.c.timestamp.desc(), snapshots.c.id.desc())
+                ).label("rank")
+            )
+            if server_ids is not None:
+                ranked = ranked.where(snapshots.c.server_id.in_(server_ids))
+            ranked = ranked.subquery()
+            query = select(*(ranked.c[column.name] for column in snapshots.columns)).where(ranked.c.rank == 1)
+
+        return {snapshot.server_id: snapshot for snapshot in db.execute(query)}
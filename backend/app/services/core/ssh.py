@@ -3,8 +3,9 @@ import json
 import os
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Optional, Tuple
 from app import models
+from app.services.core.ssh_pool import SSHTarget, get_ssh_pool
 
 class SSHService:
     def __init__(self, profile: models.ServerProfile):
@@ -66,26 +67,45 @@ class SSHService:
                 
         return str(private_key_path.absolute())
 
-    async def _get_connection(self):
-        """Establish valid SSH connection"""
+    def _connect_kwargs(self) -> Dict[str, Any]:
+        """Connection options for this profile"""
         if not self.host:
             raise Exception("No IP address defined for this profile")
-            
-        return await asyncssh.connect(
-            self.host, 
-            port=self.port, 
+
+        return {
+            "host": self.host,
+            "port": self.port,
+            "username": self.username,
+            "client_keys": self.client_keys,
+            "agent_path": None if not self.profile.use_local_agent else asyncssh.SSH_AGENT_PATH,
+            "known_hosts": None,  # For lab environment simplicity; use strict checking in prod
+        }
+
+    def _target(self) -> SSHTarget:
+        key_id = ",".join(self.client_keys or [])
+        return SSHTarget(
+            host=self.host,
+            port=self.port,
             username=self.username,
-            client_keys=self.client_keys,
-            agent_path=None if not self.profile.use_local_agent else asyncssh.SSH_AGENT_PATH,
-            known_hosts=None # For lab environment simplicity; use strict checking in prod
+            auth_id=f"profile:keys={key_id};agent={bool(self.profile.use_local_agent)}"
         )
 
-    async def execute_command(self, command: str) -> Tuple[str, str, int]:
-        """Execute a raw command and return (stdout, stderr, exit_code)"""
+    async def _get_connection(self):
+        """Establish valid SSH connection"""
+        return await asyncssh.connect(**self._connect_kwargs())
+
+    async def execute_command(
+        self,
+        command: str,
+        input: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Tuple[str, str, int]:
+        """Execute a raw command over the shared connection pool and return (stdout, stderr, exit_code)"""
         try:
-            async with await self._get_connection() as conn:
-                result = await conn.run(command)
-                return result.stdout, result.stderr, result.exit_status
+            result = await get_ssh_pool().run(
+                self._target(), self._connect_kwargs(), command, timeout=timeout, input=input
+            )
+            return result.stdout, result.stderr, result.exit_status
         except Exception as e:
              return "", str(e), -1
 
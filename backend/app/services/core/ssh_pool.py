@@ -0,0 +1,559 @@
+"""
+SSH Connection Pool for Unity
+
+Keeps authenticated SSH connections open per target and multiplexes
+commands over them as separate channels, instead of paying a TCP + SSH
+handshake for every command:
+- At most max_connections_per_host connections per target
+- At most max_sessions_per_connection concurrent channels per connection
+- Idle connections are closed after idle_timeout seconds
+- Connections idle longer than health_check_interval are probed before reuse
+- A command that fails because the connection dropped is retried once on a
+  fresh connection
+
+Also provides a small TTL cache for decrypted credentials so the database is
+not queried and keys are not decrypted on every command.
+"""
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+import asyncssh
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the connection itself is unusable (as opposed to the command failing)
+CONNECTION_ERRORS = (
+    asyncssh.ConnectionLost,
+    asyncssh.DisconnectError,
+    asyncssh.ChannelOpenError,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+HEALTH_CHECK_TIMEOUT_SECONDS = 10.0
+
+
+@dataclass(frozen=True)
+class SSHTarget:
+    """
+    Pool key for an SSH endpoint.
+
+    auth_id identifies the credentials used, so connections authenticated
+    with different keys or users are never shared.
+    """
+    host: str
+    port: int
+    username: str
+    auth_id: str = ""
+
+    def __str__(self) -> str:
+        return f"{self.username}@{self.host}:{self.port}"
+
+
+class PooledConnection:
+    """An open SSH connection and its usage bookkeeping."""
+
+    def __init__(self, conn: asyncssh.SSHClientConnection):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.last_checked = self.created_at
+        self.active = 0
+        self.broken = False
+
+    @property
+    def closed(self) -> bool:
+        return self.broken or self.conn.is_closed()
+
+    def idle_for(self, now: float) -> float:
+        return now - self.last_used if self.active == 0 else 0.0
+
+
+class SSHConnectionPool:
+    """
+    Keyed pool of multiplexed SSH connections.
+
+    All state belongs to the event loop that opened the connections; use
+    get_ssh_pool() to get the pool for the running loop. If a pool is used
+    from a different loop anyway, connections from the old loop are
+    dropped and reopened.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = settings.ssh_pool_max_connections_per_host,
+        max_sessions_per_connection: int = settings.ssh_pool_max_sessions_per_connection,
+        idle_timeout: float = settings.ssh_pool_idle_timeout_seconds,
+        health_check_interval: float = settings.ssh_pool_health_check_interval_seconds,
+        connect_timeout: float = settings.ssh_connect_timeout_seconds,
+        connect: Optional[Callable[..., Any]] = None
+    ):
+        """
+        Initialize pool.
+
+        Args:
+            max_connections_per_host: Maximum open connections per target
+            max_sessions_per_connection: Maximum concurrent channels per connection
+            idle_timeout: Seconds an unused connection is kept open
+            health_check_interval: Idle seconds after which a connection is probed before reuse
+            connect_timeout: Default SSH connect timeout in seconds
+            connect: Connection factory (defaults to asyncssh.connect)
+        """
+        self.max_connections_per_host = max(1, max_connections_per_host)
+        self.max_sessions_per_connection = max(1, max_sessions_per_connection)
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.connect_timeout = connect_timeout
+        self._connect = connect or asyncssh.connect
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connections: Dict[SSHTarget, List[PooledConnection]] = {}
+        self._opening: Dict[SSHTarget, int] = {}
+        self._waiters: Dict[SSHTarget, Deque[asyncio.Future]] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self._stats = {
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "commands": 0,
+            "reused": 0,
+            "waits": 0,
+            "reconnects": 0,
+            "health_check_failures": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def run(
+        self,
+        target: SSHTarget,
+        connect_kwargs: Dict[str, Any],
+        command: str,
+        timeout: Optional[float] = None,
+        check: bool = False,
+        input: Optional[str] = None
+    ) -> asyncssh.SSHCompletedProcess:
+        """
+        Run a command on a pooled connection.
+
+        If the connection turns out to be dead, it is discarded and the
+        command is retried once on a new connection. Commands sent through
+        the pool should therefore be safe to repeat.
+
+        Args:
+            target: Pool key
+            connect_kwargs: Arguments for asyncssh.connect if a new connection is needed
+            command: Command to run
+            timeout: Command timeout in seconds
+            check: Raise ProcessError on non-zero exit status
+            input: Data written to the command's stdin
+
+        Returns:
+            asyncssh.SSHCompletedProcess
+        """
+        for attempt in (1, 2):
+            pooled = await self._acquire(target, connect_kwargs)
+            try:
+                result = await pooled.conn.run(command, input=input, timeout=timeout, check=check)
+                self._stats["commands"] += 1
+                return result
+            except CONNECTION_ERRORS as e:
+                pooled.broken = True
+                if attempt == 2:
+                    raise
+                self._stats["reconnects"] += 1
+                logger.info(f"SSH connection to {target} lost ({e}), reconnecting")
+            finally:
+                self._release(target, pooled)
+
+    def connection(self, target: SSHTarget, connect_kwargs: Dict[str, Any]) -> "_PooledConnectionContext":
+        """
+        Borrow a pooled connection for several operations.
+
+        Usage:
+            async with pool.connection(target, kwargs) as conn:
+                await conn.run(...)
+
+        The borrowed connection counts as one session against the
+        per-connection limit until the block exits.
+        """
+        return _PooledConnectionContext(self, target, connect_kwargs)
+
+    async def invalidate(self, target: SSHTarget):
+        """Close every connection to a target (e.g. after a credential change)."""
+        self._check_loop()
+        for pooled in self._connections.pop(target, []):
+            pooled.broken = True
+            if pooled.active == 0:
+                await self._close(pooled)
+
+    async def evict_idle(self) -> int:
+        """
+        Close connections that have been idle longer than idle_timeout.
+
+        Returns:
+            Number of connections closed
+        """
+        self._check_loop()
+        evicted = 0
+        for target in list(self._connections):
+            for pooled in self._prune(target):
+                await self._close(pooled)
+                evicted += 1
+        return evicted
+
+    async def close_all(self):
+        """Close every pooled connection. Should be called on application shutdown."""
+        if self._sweeper and not self._sweeper.done():
+            self._sweeper.cancel()
+        self._sweeper = None
+
+        try:
+            same_loop = self._loop is asyncio.get_running_loop()
+        except RuntimeError:
+            same_loop = False
+
+        connections = [pc for conns in self._connections.values() for pc in conns]
+        self._connections.clear()
+        for pooled in connections:
+            if same_loop:
+                await self._close(pooled)
+            else:
+                self._abort(pooled)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool counters.
+
+        Returns:
+            Dictionary with limits, per-target connection usage and counters
+        """
+        now = time.monotonic()
+        return {
+            "max_connections_per_host": self.max_connections_per_host,
+            "max_sessions_per_connection": self.max_sessions_per_connection,
+            "idle_timeout_seconds": self.idle_timeout,
+            "targets": {
+                str(target): [
+                    {
+                        "active_sessions": pc.active,
+                        "age_seconds": round(now - pc.created_at, 1),
+                        "idle_seconds": round(pc.idle_for(now), 1),
+                    }
+                    for pc in conns
+                ]
+                for target, conns in self._connections.items()
+            },
+            "open_connections": sum(len(conns) for conns in self._connections.values()),
+            **self._stats,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _check_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None:
+            # Connections are bound to the loop that created them and cannot be used here
+            for conns in self._connections.values():
+                for pooled in conns:
+                    self._abort(pooled)
+            self._connections.clear()
+            self._opening.clear()
+            self._waiters.clear()
+            self._sweeper = None
+        self._loop = loop
+
+    async def _acquire(self, target: SSHTarget, connect_kwargs: Dict[str, Any]) -> PooledConnection:
+        self._check_loop()
+        self._ensure_sweeper()
+
+        while True:
+            for stale in self._prune(target):
+                await self._close(stale)
+
+            conns = self._connections.setdefault(target, [])
+            usable = [pc for pc in conns if pc.active < self.max_sessions_per_connection]
+            if usable:
+                pooled = min(usable, key=lambda pc: pc.active)
+                pooled.active += 1
+                if await self._healthy(pooled):
+                    self._stats["reused"] += 1
+                    return pooled
+                pooled.broken = True
+                self._release(target, pooled)
+                continue
+
+            if len(conns) + self._opening.get(target, 0) < self.max_connections_per_host:
+                return await self._open(target, connect_kwargs)
+
+            self._stats["waits"] += 1
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.setdefault(target, deque()).append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass on a wake-up we received but can no longer use
+                if waiter.done() and not waiter.cancelled():
+                    self._wake(target)
+                raise
+
+    async def _open(self, target: SSHTarget, connect_kwargs: Dict[str, Any]) -> PooledConnection:
+        self._opening[target] = self._opening.get(target, 0) + 1
+        try:
+            conn = await self._connect(**{"connect_timeout": self.connect_timeout, **connect_kwargs})
+        except BaseException:
+            self._wake(target)
+            raise
+        finally:
+            self._opening[target] -= 1
+
+        pooled = PooledConnection(conn)
+        pooled.active = 1
+        self._connections.setdefault(target, []).append(pooled)
+        self._stats["connections_opened"] += 1
+        logger.debug(f"Opened SSH connection to {target}")
+        return pooled
+
+    async def _healthy(self, pooled: PooledConnection) -> bool:
+        now = time.monotonic()
+        if now - pooled.last_checked < self.health_check_interval:
+            return True
+        try:
+            result = await asyncio.wait_for(
+                pooled.conn.run("true", check=False),
+                timeout=HEALTH_CHECK_TIMEOUT_SECONDS
+            )
+            healthy = result.exit_status == 0
+        except (asyncio.TimeoutError, asyncssh.Error, OSError):
+            healthy = False
+        if healthy:
+            pooled.last_checked = now
+        else:
+            self._stats["health_check_failures"] += 1
+        return healthy
+
+    def _release(self, target: SSHTarget, pooled: PooledConnection):
+        pooled.active -= 1
+        pooled.last_used = time.monotonic()
+        if pooled.closed and pooled.active == 0:
+            conns = self._connections.get(target, [])
+            if pooled in conns:
+                conns.remove(pooled)
+            self._abort(pooled)
+        self._wake(target)
+
+    def _prune(self, target: SSHTarget) -> List[PooledConnection]:
+        """Remove closed and idle-expired connections for a target and return them."""
+        conns = self._connections.get(target)
+        if not conns:
+            return []
+        now = time.monotonic()
+        stale = [
+            pc for pc in conns
+            if pc.active == 0 and (pc.closed or pc.idle_for(now) > self.idle_timeout)
+        ]
+        for pc in stale:
+            conns.remove(pc)
+        if not conns and not self._opening.get(target):
+            del self._connections[target]
+        return stale
+
+    def _wake(self, target: SSHTarget):
+        waiters = self._waiters.get(target)
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    async def _close(self, pooled: PooledConnection):
+        self._stats["connections_closed"] += 1
+        try:
+            pooled.conn.close()
+            await asyncio.wait_for(pooled.conn.wait_closed(), timeout=5)
+        except Exception as e:
+            logger.debug(f"Error closing SSH connection: {e}")
+
+    def _abort(self, pooled: PooledConnection):
+        self._stats["connections_closed"] += 1
+        try:
+            pooled.conn.abort()
+        except Exception:
+            # The owning loop may already be closed
+            pass
+
+    def _ensure_sweeper(self):
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def _sweep_loop(self):
+        interval = max(1.0, min(self.idle_timeout / 2, 60.0))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                evicted = await self.evict_idle()
+                if evicted:
+                    logger.debug(f"Closed {evicted} idle SSH connections")
+            except Exception as e:
+                logger.error(f"SSH pool sweep failed: {e}")
+            if not self._connections:
+                return
+
+
+class _PooledConnectionContext:
+    def __init__(self, pool: SSHConnectionPool, target: SSHTarget, connect_kwargs: Dict[str, Any]):
+        self._pool = pool
+        self._target = target
+        self._connect_kwargs = connect_kwargs
+        self._pooled: Optional[PooledConnection] = None
+
+    async def __aenter__(self) -> asyncssh.SSHClientConnection:
+        self._pooled = await self._pool._acquire(self._target, self._connect_kwargs)
+        return self._pooled.conn
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None and issubclass(exc_type, CONNECTION_ERRORS):
+            self._pooled.broken = True
+        self._pool._release(self._target, self._pooled)
+        return False
+
+
+class CredentialCache:
+    """
+    Thread-safe TTL cache for decrypted connection credentials.
+
+    Values only live in process memory and expire after ttl seconds.
+    """
+
+    def __init__(self, ttl: float = settings.ssh_credential_cache_ttl_seconds):
+        self.ttl = ttl
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, calling loader() on a miss.
+
+        None results are not cached.
+        """
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or every entry when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# One pool per event loop (connections cannot cross loops), plus a
+# process-wide credential cache
+_ssh_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SSHConnectionPool]" = weakref.WeakKeyDictionary()
+_ssh_pools_lock = threading.Lock()
+_credential_cache: Optional[CredentialCache] = None
+
+
+def get_ssh_pool() -> SSHConnectionPool:
+    """
+    Get or create the SSH connection pool for the running event loop.
+
+    Services on the application loop share one pool; jobs that run their
+    own loop in a worker thread get a separate one.
+
+    Returns:
+        SSHConnectionPool instance
+    """
+    loop = asyncio.get_running_loop()
+
+    with _ssh_pools_lock:
+        pool = _ssh_pools.get(loop)
+        if pool is None:
+            pool = SSHConnectionPool()
+            _ssh_pools[loop] = pool
+
+    return pool
+
+
+def get_credential_cache() -> CredentialCache:
+    """
+    Get or create the process-wide decrypted credential cache.
+
+    Returns:
+        CredentialCache instance
+    """
+    global _credential_cache
+
+    if _credential_cache is None:
+        _credential_cache = CredentialCache()
+
+    return _credential_cache
+
+
+def invalidate_ssh_credentials():
+    """Forget all cached credentials. Call after SSH keys or credentials change."""
+    if _credential_cache is not None:
+        _credential_cache.invalidate()
+
+
+async def close_ssh_pool():
+    """
+    Close the running loop's pooled SSH connections.
+
+    Should be called on application shutdown and before a job closes its
+    own event loop.
+    """
+    loop = asyncio.get_running_loop()
+
+    with _ssh_pools_lock:
+        pool = _ssh_pools.pop(loop, None)
+
+    if pool is not None:
+        await pool.close_all()
@@ -11,6 +11,7 @@ from typing import List, Optional
 from datetime import datetime
 
 from app.models import ServerCredential, ServerProfile, User
+from app.services.core.ssh_pool import invalidate_ssh_credentials
 from .encryption import EncryptionService
 
 
@@ -150,6 +151,7 @@ class ServerCredentialService:
         
         db.commit()
         db.refresh(credential)
+        invalidate_ssh_credentials()
         
         return credential
     
@@ -176,6 +178,7 @@ class ServerCredentialService:
         if credential:
             db.delete(credential)
             db.commit()
+            invalidate_ssh_credentials()
             return True
         
         return False
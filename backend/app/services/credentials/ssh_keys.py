@@ -13,6 +13,7 @@ import tempfile
 import os
 
 from app.models import SSHKey, User
+from app.services.core.ssh_pool import invalidate_ssh_credentials
 from .encryption import EncryptionService
 
 
@@ -196,6 +197,7 @@ class SSHKeyService:
         if ssh_key:
             db.delete(ssh_key)
             db.commit()
+            invalidate_ssh_credentials()
             return True
         
         return False
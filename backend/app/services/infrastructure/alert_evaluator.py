@@ -1,209 +1,271 @@
-"""Alert evaluation engine."""
+"""Alert evaluation engine.
+
+Rules are evaluated as a set rather than one (rule, resource) pair at a time:
+each cycle loads the enabled rules once, loads every resource type they target
+with a single SELECT whose columns carry one SQL comparison per rule, looks up
+all active and cooling-down alerts with one query, and writes the resulting
+triggers and resolutions in bulk. The number of queries per cycle is bounded
+by the number of resource types, not by the number of rules or resources.
+"""
 import logging
-from datetime import datetime, timedelta
-from typing import List, Tuple
+import operator
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert, or_, select, update
 from sqlalchemy.orm import Session
 
-from app.models import Alert, AlertRule, AlertCondition, AlertStatus, ResourceType
-from app.models import StorageDevice, StoragePool
-from app.models import DatabaseInstance
-from app.models import MonitoredServer
+from app.models.alert_rules import AlertRule, AlertCondition, AlertStatus, ResourceType
+from app.models.infrastructure import StorageDevice, StoragePool
+from app.models.infrastructure import DatabaseInstance
+from app.models.infrastructure import MonitoredServer
+from app.models.monitoring import Alert
+from app.services.response_cache import TAG_ALERTS, invalidate_cache_tags
 
 logger = logging.getLogger(__name__)
 
 
+# Resource model and display-name column per resource type
+RESOURCE_MODELS = {
+    ResourceType.DEVICE: (StorageDevice, "device_name"),
+    ResourceType.POOL: (StoragePool, "pool_name"),
+    ResourceType.DATABASE: (DatabaseInstance, "db_name"),
+    ResourceType.SERVER: (MonitoredServer, "hostname"),
+}
+
+CONDITION_OPERATORS = {
+    AlertCondition.GT: operator.gt,
+    AlertCondition.LT: operator.lt,
+    AlertCondition.GTE: operator.ge,
+    AlertCondition.LTE: operator.le,
+    AlertCondition.EQ: operator.eq,
+    AlertCondition.NE: operator.ne,
+}
+
+CONDITION_SYMBOLS = {
+    AlertCondition.GT: ">",
+    AlertCondition.LT: "<",
+    AlertCondition.GTE: ">=",
+    AlertCondition.LTE: "<=",
+    AlertCondition.EQ: "==",
+    AlertCondition.NE: "!=",
+}
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Treat naive timestamps (e.g. from SQLite) as UTC."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class AlertIndex:
+    """In-memory view of open and recent alerts keyed by (rule_id, resource_id)."""
+
+    def __init__(self):
+        self.active: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self.last_triggered: Dict[Tuple[int, int], datetime] = {}
+
+    def add(self, alert_id: int, rule_id: int, resource_id: int, status: str, triggered_at: Optional[datetime]):
+        key = (rule_id, resource_id)
+        if status == AlertStatus.ACTIVE.value:
+            self.active[key].append(alert_id)
+        triggered_at = _as_utc(triggered_at)
+        if triggered_at is not None:
+            previous = self.last_triggered.get(key)
+            if previous is None or triggered_at > previous:
+                self.last_triggered[key] = triggered_at
+
+    def in_cooldown(self, rule: AlertRule, resource_id: int, now: datetime) -> bool:
+        """Check whether the rule fired for this resource within its cooldown window."""
+        if not rule.cooldown_minutes or rule.cooldown_minutes <= 0:
+            return False
+        last = self.last_triggered.get((rule.id, resource_id))
+        return last is not None and last > now - timedelta(minutes=rule.cooldown_minutes)
+
+
 class AlertEvaluator:
     """Evaluates alert rules against current metrics."""
-    
+
     def __init__(self, db: Session):
         self.db = db
-    
+
     def evaluate_all_rules(self) -> Tuple[int, int]:
         """
-        Evaluate all enabled alert rules.
-        
+        Evaluate all enabled alert rules in one pass.
+
         Returns:
             Tuple of (alerts_triggered, alerts_resolved)
         """
         rules = self.db.query(AlertRule).filter(AlertRule.enabled == True).all()
-        
-        triggered_count = 0
-        resolved_count = 0
-        
-        for rule in rules:
-            try:
-                triggered, resolved = self.evaluate_rule(rule)
-                triggered_count += triggered
-                resolved_count += resolved
-            except Exception as e:
-                logger.error(f"Error evaluating rule {rule.id} ({rule.name}): {e}")
-        
-        return triggered_count, resolved_count
-    
+        return self.evaluate_rules(rules)
+
     def evaluate_rule(self, rule: AlertRule) -> Tuple[int, int]:
         """
         Evaluate a single rule against all applicable resources.
-        
+
         Returns:
             Tuple of (alerts_triggered, alerts_resolved)
         """
-        triggered = 0
-        resolved = 0
-        
-        # Get resources to check based on resource type
-        resources = self._get_resources(rule.resource_type)
-        
-        for resource in resources:
-            # Get metric value
-            metric_value = self._get_metric_value(resource, rule.metric_name)
-            
-            if metric_value is None:
-                continue
-            
-            # Check if condition is met
-            condition_met = self._check_condition(
-                metric_value,
-                rule.condition,
-                rule.threshold
-            )
-            
-            if condition_met:
-                # Check if we should trigger an alert
-                if self._should_trigger_alert(rule, resource):
-                    self._trigger_alert(rule, resource, metric_value)
-                    triggered += 1
-            else:
-                # Auto-resolve if condition no longer met
-                if self._auto_resolve_alert(rule, resource):
-                    resolved += 1
-        
-        return triggered, resolved
-    
-    def _get_resources(self, resource_type: ResourceType) -> List:
-        """Get all resources of a given type."""
-        if resource_type == ResourceType.DEVICE:
-            return self.db.query(StorageDevice).all()
-        elif resource_type == ResourceType.POOL:
-            return self.db.query(StoragePool).all()
-        elif resource_type == ResourceType.DATABASE:
-            return self.db.query(DatabaseInstance).all()
-        elif resource_type == ResourceType.SERVER:
-            return self.db.query(MonitoredServer).all()
-        else:
-            return []
-    
-    def _get_metric_value(self, resource, metric_name: str):
-        """Extract metric value from resource."""
-        try:
-            return getattr(resource, metric_name, None)
-        except Exception as e:
-            logger.warning(f"Could not get metric {metric_name} from {resource}: {e}")
-            return None
-    
-    def _check_condition(self, value: float, condition: AlertCondition, threshold: float) -> bool:
-        """Check if value meets condition against threshold."""
-        if condition == AlertCondition.GT:
-            return value > threshold
-        elif condition == AlertCondition.LT:
-            return value < threshold
-        elif condition == AlertCondition.GTE:
-            return value >= threshold
-        elif condition == AlertCondition.LTE:
-            return value <= threshold
-        elif condition == AlertCondition.EQ:
-            return value == threshold
-        elif condition == AlertCondition.NE:
-            return value != threshold
-        else:
-            return False
-    
-    def _should_trigger_alert(self, rule: AlertRule, resource) -> bool:
+        return self.evaluate_rules([rule])
+
+    def evaluate_rules(self, rules: Iterable[AlertRule]) -> Tuple[int, int]:
         """
-        Check if an alert should be triggered (respects cooldown).
+        Evaluate a set of rules with a constant number of queries.
+
+        Args:
+            rules: Rules to evaluate
+
+        Returns:
+            Tuple of (alerts_triggered, alerts_resolved)
         """
-        # Check for existing active alert
-        existing_alert = self.db.query(Alert).filter(
-            Alert.alert_rule_id == rule.id,
-            Alert.resource_id == resource.id,
-            Alert.status == AlertStatus.ACTIVE
-        ).first()
-        
-        if existing_alert:
-            return False  # Already have an active alert
-        
-        # Check cooldown - has enough time passed since last alert?
-        if rule.cooldown_minutes > 0:
-            cooldown_time = datetime.now() - timedelta(minutes=rule.cooldown_minutes)
-            recent_alert = self.db.query(Alert).filter(
-                Alert.alert_rule_id == rule.id,
-                Alert.resource_id == resource.id,
-                Alert.triggered_at > cooldown_time
-            ).first()
-            
-            if recent_alert:
-                return False  # Still in cooldown period
-        
-        return True
-    
-    def _trigger_alert(self, rule: AlertRule, resource, metric_value: float):
-        """Create a new alert."""
-        message = self._format_alert_message(rule, resource, metric_value)
-        
-        alert = Alert(
-            alert_rule_id=rule.id,
-            resource_type=rule.resource_type,
-            resource_id=resource.id,
-            metric_name=rule.metric_name,
-            metric_value=metric_value,
-            threshold=rule.threshold,
-            severity=rule.severity,
-            message=message,
-            status=AlertStatus.ACTIVE
-        )
-        
-        self.db.add(alert)
-        self.db.commit()
-        
-        logger.warning(f"Alert triggered: {message}")
-    
-    def _auto_resolve_alert(self, rule: AlertRule, resource) -> bool:
+        rules_by_type: Dict[ResourceType, List[AlertRule]] = defaultdict(list)
+        for rule in rules:
+            rules_by_type[ResourceType(rule.resource_type)].append(rule)
+
+        if not rules_by_type:
+            return 0, 0
+
+        # Condition results per rule: resource_id -> (met, metric_value, resource_name)
+        results: Dict[int, Dict[int, Tuple[bool, float, str]]] = {}
+        evaluated: List[AlertRule] = []
+        for resource_type, type_rules in rules_by_type.items():
+            try:
+                type_results = self._evaluate_resource_type(resource_type, type_rules)
+            except Exception as e:
+                logger.error(f"Error evaluating {resource_type.value} rules: {e}")
+                continue
+            for rule in type_rules:
+                if rule.id in type_results:
+                    results[rule.id] = type_results[rule.id]
+                    evaluated.append(rule)
+
+        if not evaluated:
+            return 0, 0
+
+        now = datetime.now(timezone.utc)
+        index = self._load_alert_index(evaluated, now)
+
+        new_alerts = []
+        resolve_ids: List[int] = []
+        for rule in evaluated:
+            for resource_id, (met, metric_value, resource_name) in results[rule.id].items():
+                key = (rule.id, resource_id)
+                if met:
+                    if index.active.get(key) or index.in_cooldown(rule, resource_id, now):
+                        continue
+                    message = self._format_alert_message(rule, resource_name, metric_value)
+                    new_alerts.append({
+                        "alert_rule_id": rule.id,
+                        "resource_type": ResourceType(rule.resource_type).value,
+                        "resource_id": resource_id,
+                        "metric_value": metric_value,
+                        "threshold": rule.threshold,
+                        "severity": getattr(rule.severity, "value", rule.severity),
+                        "message": message,
+                        "status": AlertStatus.ACTIVE.value,
+                        "triggered_at": now,
+                        "acknowledged": False,
+                        "resolved": False,
+                    })
+                    logger.warning(f"Alert triggered: {message}")
+                else:
+                    resolve_ids.extend(index.active.get(key, ()))
+
+        if new_alerts:
+            self.db.execute(insert(Alert), new_alerts)
+        if resolve_ids:
+            self.db.execute(
+                update(Alert)
+                .where(Alert.id.in_(resolve_ids))
+                .values(status=AlertStatus.RESOLVED.value, resolved=True, resolved_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            logger.info(f"Auto-resolved {len(resolve_ids)} alerts: condition no longer met")
+
+        if new_alerts or resolve_ids:
+            self.db.commit()
+            invalidate_cache_tags(TAG_ALERTS)
+
+        return len(new_alerts), len(resolve_ids)
+
+    def _evaluate_resource_type(
+        self,
+        resource_type: ResourceType,
+        rules: List[AlertRule]
+    ) -> Dict[int, Dict[int, Tuple[bool, float, str]]]:
         """
-        Auto-resolve alert if condition is no longer met.
-        
+        Load one resource type and evaluate all of its rules in a single SELECT.
+
+        Each rule contributes one boolean column (``metric <op> threshold``) so the
+        database does the comparisons; NULL metrics yield NULL and are skipped.
+
         Returns:
-            True if an alert was resolved
+            Mapping of rule_id -> {resource_id: (condition_met, metric_value, resource_name)}
         """
-        active_alert = self.db.query(Alert).filter(
-            Alert.alert_rule_id == rule.id,
-            Alert.resource_id == resource.id,
-            Alert.status == AlertStatus.ACTIVE
-        ).first()
-        
-        if active_alert:
-            active_alert.status = AlertStatus.RESOLVED
-            active_alert.resolved_at = datetime.now()
-            active_alert.resolution_notes = "Auto-resolved: condition no longer met"
-            self.db.commit()
-            
-            logger.info(f"Alert {active_alert.id} auto-resolved")
-            return True
-        
-        return False
-    
-    def _format_alert_message(self, rule: AlertRule, resource, metric_value: float) -> str:
+        if resource_type not in RESOURCE_MODELS:
+            return {}
+        model, name_attr = RESOURCE_MODELS[resource_type]
+        columns = model.__table__.columns
+
+        metric_columns = {}
+        condition_columns = []
+        for rule in rules:
+            op = CONDITION_OPERATORS.get(AlertCondition(rule.condition))
+            if rule.metric_name not in columns or op is None:
+                logger.warning(
+                    f"Skipping rule {rule.id} ({rule.name}): "
+                    f"{resource_type.value} has no metric '{rule.metric_name}'"
+                )
+                continue
+            column = columns[rule.metric_name]
+            metric_columns.setdefault(rule.metric_name, column.label(f"m_{rule.metric_name}"))
+            condition_columns.append((rule, op(column, rule.threshold).label(f"r_{rule.id}")))
+
+        if not condition_columns:
+            return {}
+
+        stmt = select(
+            columns["id"],
+            columns[name_attr].label("resource_name"),
+            *metric_columns.values(),
+            *(expr for _, expr in condition_columns)
+        )
+        rows = self.db.execute(stmt).mappings().all()
+
+        results: Dict[int, Dict[int, Tuple[bool, float, str]]] = {rule.id: {} for rule, _ in condition_columns}
+        for row in rows:
+            resource_name = row["resource_name"] or f"ID {row['id']}"
+            for rule, _ in condition_columns:
+                met = row[f"r_{rule.id}"]
+                if met is None:
+                    continue
+                results[rule.id][row["id"]] = (bool(met), row[f"m_{rule.metric_name}"], resource_name)
+        return results
+
+    def _load_alert_index(self, rules: List[AlertRule], now: datetime) -> AlertIndex:
+        """Fetch every active or cooling-down alert for the given rules in one query."""
+        max_cooldown = max((rule.cooldown_minutes or 0) for rule in rules)
+        cutoff = now - timedelta(minutes=max_cooldown)
+
+        stmt = select(
+            Alert.id, Alert.alert_rule_id, Alert.resource_id, Alert.status, Alert.triggered_at
+        ).where(
+            Alert.alert_rule_id.in_([rule.id for rule in rules]),
+            or_(Alert.status == AlertStatus.ACTIVE.value, Alert.triggered_at > cutoff)
+        )
+
+        index = AlertIndex()
+        for row in self.db.execute(stmt):
+            index.add(row.id, row.alert_rule_id, row.resource_id, row.status, row.triggered_at)
+        return index
+
+    def _format_alert_message(self, rule: AlertRule, resource_name: str, metric_value: float) -> str:
         """Format a human-readable alert message."""
-        resource_name = getattr(resource, 'name', None) or getattr(resource, 'hostname', None) or f"ID {resource.id}"
-        
-        condition_str = {
-            AlertCondition.GT: ">",
-            AlertCondition.LT: "<",
-            AlertCondition.GTE: ">=",
-            AlertCondition.LTE: "<=",
-            AlertCondition.EQ: "==",
-            AlertCondition.NE: "!="
-        }.get(rule.condition, str(rule.condition))
-        
+        condition = AlertCondition(rule.condition)
+        condition_str = CONDITION_SYMBOLS.get(condition, str(rule.condition))
+
         return (
-            f"{rule.name}: {rule.resource_type.value} '{resource_name}' "
-            f"{rule.metric_name}={metric_value:.2f} {condition_str} {rule.threshold:.2f}"
+            f"{rule.name}: {ResourceType(rule.resource_type).value} '{resource_name}' "
+            f"{rule.metric_name}={float(metric_value):.2f} {condition_str} {rule.threshold:.2f}"
         )
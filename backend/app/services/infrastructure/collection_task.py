@@ -1,254 +1,416 @@
-"""Infrastructure data collection task for Phase 3.5: Complete BD-Store Integration."""
+"""Infrastructure data collection task for Phase 3.5: Complete BD-Store Integration.
+
+Collection runs as one async sweep per call: servers are collected
+concurrently (bounded by settings.infrastructure_collection_concurrency) and
+the storage, pool and database discovery phases of each server run in
+parallel. A Session must not be shared by concurrent tasks, so every phase
+writes through its own session and commits what it found once. Alert rules
+are evaluated once per sweep, after every server has been collected.
+"""
 import asyncio
 import logging
+from collections import defaultdict
 from datetime import datetime, timezone
-from typing import Tuple
-from sqlalchemy.orm import Session
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
-from app import models
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models.alert_rules import AlertRule, ResourceType
+from app.models.infrastructure import DatabaseType, MonitoredServer, ServerStatus
+from app.models.monitoring import Alert, AlertChannel
+from app.plugins.executor import get_thread_pool, run_in_executor
+from app.services.core.ssh_pool import close_ssh_pool
 from app.services.infrastructure.ssh_service import ssh_service, SSHConnectionError
 from app.services.infrastructure import storage_discovery, pool_discovery, database_discovery
-from app.services.infrastructure.alert_evaluator import AlertEvaluator
+from app.services.infrastructure.alert_evaluator import RESOURCE_MODELS, AlertEvaluator
 from app.services.infrastructure.mysql_metrics import MySQLMetricsService
 from app.services.infrastructure.postgres_metrics import PostgreSQLMetricsService
-from app.services.monitoring.notification_service import NotificationService
+from app.services.monitoring.notification_dispatcher import NotificationDispatcher
 
 logger = logging.getLogger(__name__)
 
 
-def collect_server_data(server_id: int) -> Tuple[bool, str]:
+async def _run_phase(discover: Callable[[MonitoredServer, Any], Awaitable[Any]], server: MonitoredServer) -> Any:
+    """Run one discovery phase through its own session and commit what it found."""
+    db = SessionLocal()
+    try:
+        result = await discover(server, db)
+        db.commit()
+        return result
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def _run_phases(server: MonitoredServer, phases) -> List[Any]:
+    """Run discovery phases in parallel; a phase that failed yields its exception."""
+    if engine.dialect.name == "sqlite":
+        # SQLite locks the whole file for a writer, and a phase may hold that
+        # lock across an await; parallel phases would block the loop on it
+        results = []
+        for discover in phases:
+            try:
+                results.append(await _run_phase(discover, server))
+            except Exception as e:
+                results.append(e)
+        return results
+    return await asyncio.gather(*(_run_phase(discover, server) for discover in phases), return_exceptions=True)
+
+
+async def _discover_devices(server: MonitoredServer, db) -> Tuple[int, List[str]]:
+    devices, errors = await storage_discovery.StorageDiscoveryService(ssh_service).discover_all_devices(server, db)
+    return len(devices), errors
+
+
+async def _discover_pools(server: MonitoredServer, db) -> Tuple[int, List[str]]:
+    pools, errors = await pool_discovery.PoolDiscoveryService(ssh_service).discover_all_pools(server, db)
+    return len(pools), errors
+
+
+async def _discover_databases(server: MonitoredServer, db) -> Tuple[int, List[str], int]:
+    """Discover database instances and collect their metrics concurrently."""
+    db_result = await database_discovery.DatabaseDiscoveryService(db).discover_databases(
+        server.id,
+        db_types=[DatabaseType.POSTGRESQL, DatabaseType.MYSQL],
+        test_connection=True
+    )
+    databases = db_result.get("databases", [])
+    errors = list(db_result.get("errors") or [])
+
+    collectors = {
+        DatabaseType.MYSQL: MySQLMetricsService(),
+        DatabaseType.POSTGRESQL: PostgreSQLMetricsService(),
+    }
+    targets = [db_instance for db_instance in databases if db_instance.db_type in collectors]
+
+    # Metrics clients are blocking drivers; run them on the shared I/O pool
+    results = await asyncio.gather(
+        *(
+            run_in_executor(
+                get_thread_pool(),
+                collectors[db_instance.db_type].collect_metrics,
+                db_instance.host,
+                db_instance.port,
+                db_instance.db_name,
+                db_instance.username,
+                db_instance.password_encrypted
+            )
+            for db_instance in targets
+        ),
+        return_exceptions=True
+    )
+
+    metrics_collected = 0
+    for db_instance, metrics in zip(targets, results):
+        if isinstance(metrics, Exception):
+            logger.error(f"Error collecting metrics for database {db_instance.db_name}: {metrics}")
+            errors.append(f"DB metrics exception: {str(metrics)}")
+            continue
+
+        if metrics.get("success"):
+            # Update database instance with metrics
+            db_instance.size_bytes = metrics.get("size_bytes")
+            db_instance.connection_count = metrics.get("connection_count")
+            db_instance.active_queries = metrics.get("active_queries")
+            db_instance.idle_connections = metrics.get("idle_connections")
+            db_instance.max_connections = metrics.get("max_connections")
+            db_instance.slow_queries = metrics.get("slow_queries")
+            db_instance.cache_hit_ratio = metrics.get("cache_hit_ratio")
+            db_instance.uptime_seconds = metrics.get("uptime_seconds")
+            db_instance.version = metrics.get("version")
+            db_instance.last_metrics_collection = datetime.now(timezone.utc)
+            db_instance.metrics_error = None
+            metrics_collected += 1
+        else:
+            db_instance.metrics_error = metrics.get("error")
+            errors.append(f"DB metrics error for {db_instance.db_name}: {metrics.get('error')}")
+
+    return len(databases), errors, metrics_collected
+
+
+async def collect_server(server_id: int) -> Tuple[bool, str]:
     """
-    Collect infrastructure data for a monitored server.
-    
+    Collect infrastructure data for one monitored server.
+
+    The three discovery phases run in parallel (serially on SQLite), each
+    through its own session; the server's status is written through a
+    separate one once they have finished. Alert rules are not evaluated here (see
+    collect_fleet).
+
     Args:
         server_id: ID of the MonitoredServer
-        
+
     Returns:
         Tuple of (success, message)
     """
-    db = next(get_db())
-    
+    db = SessionLocal()
+
     try:
-        # Load server
-        server = db.query(models.MonitoredServer).filter(
-            models.MonitoredServer.id == server_id
-        ).first()
-        
+        server = db.query(MonitoredServer).filter(MonitoredServer.id == server_id).first()
+
         if not server:
             return False, f"Server {server_id} not found"
-        
+
         if not server.monitoring_enabled:
             return False, f"Monitoring disabled for {server.hostname}"
-        
+
         logger.info(f"Collecting data for server: {server.hostname}")
-        
-        # Create event loop for async operations
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            # Discover storage devices
-            device_count = 0
-            pool_count = 0
-            db_count = 0
-            metrics_collected = 0
-            errors = []
-            
-            try:
-                devices, device_errors = loop.run_until_complete(
-                    storage_discovery.StorageDiscoveryService(db).discover_all_devices(server, db)
-                )
-                device_count = len(devices)
-                if device_errors:
-                    errors.extend(device_errors)
-            except Exception as e:
-                logger.error(f"Storage discovery failed: {e}")
-                errors.append(f"Storage discovery error: {str(e)}")
-            
-            try:
-                pools, pool_errors = loop.run_until_complete(
-                    pool_discovery.PoolDiscoveryService(db).discover_all_pools(server, db)
-                )
-                pool_count = len(pools)
-                if pool_errors:
-                    errors.extend(pool_errors)
-            except Exception as e:
-                logger.error(f"Pool discovery failed: {e}")
-                errors.append(f"Pool discovery error: {str(e)}")
-            
-            try:
-                db_result = loop.run_until_complete(
-                    database_discovery.DatabaseDiscoveryService(db).discover_databases(
-                        server_id,
-                        db_types=[
-                            models.DatabaseType.POSTGRESQL,
-                            models.DatabaseType.MYSQL
-                        ],
-                        test_connection=True
-                    )
-                )
-                db_count = len(db_result.get("databases", []))
-                
-                # Collect metrics for each database
-                mysql_service = MySQLMetricsService()
-                postgres_service = PostgreSQLMetricsService()
-                
-                for db_instance in db_result.get("databases", []):
-                    try:
-                        if db_instance.db_type == models.DatabaseType.MYSQL:
-                            metrics = mysql_service.collect_metrics(
-                                db_instance.host,
-                                db_instance.port,
-                                db_instance.db_name,
-                                db_instance.username,
-                                db_instance.password_encrypted
-                            )
-                        elif db_instance.db_type == models.DatabaseType.POSTGRESQL:
-                            metrics = postgres_service.collect_metrics(
-                                db_instance.host,
-                                db_instance.port,
-                                db_instance.db_name,
-                                db_instance.username,
-                                db_instance.password_encrypted
-                            )
-                        else:
-                            continue
-                        
-                        if metrics.get("success"):
-                            # Update database instance with metrics
-                            db_instance.size_bytes = metrics.get("size_bytes")
-                            db_instance.connection_count = metrics.get("connection_count")
-                            db_instance.active_queries = metrics.get("active_queries")
-                            db_instance.idle_connections = metrics.get("idle_connections")
-                            db_instance.max_connections = metrics.get("max_connections")
-                            db_instance.slow_queries = metrics.get("slow_queries")
-                            db_instance.cache_hit_ratio = metrics.get("cache_hit_ratio")
-                            db_instance.uptime_seconds = metrics.get("uptime_seconds")
-                            db_instance.version = metrics.get("version")
-                            db_instance.last_metrics_collection = datetime.now(timezone.utc)
-                            db_instance.metrics_error = None
-                            metrics_collected += 1
-                        else:
-                            db_instance.metrics_error = metrics.get("error")
-                            errors.append(f"DB metrics error for {db_instance.db_name}: {metrics.get('error')}")
-                    
-                    except Exception as e:
-                        logger.error(f"Error collecting metrics for database {db_instance.db_name}: {e}")
-                        errors.append(f"DB metrics exception: {str(e)}")
-                
-                if db_result.get("errors"):
-                    errors.extend(db_result["errors"])
-                    
-            except Exception as e:
-                logger.error(f"Database discovery failed: {e}")
-                errors.append(f"Database discovery error: {str(e)}")
-            
-            # Update server status
-            server.status = models.ServerStatus.ONLINE
-            server.last_seen = datetime.now(timezone.utc)
-            if errors:
-                server.last_error = "; ".join(errors[:3])  # Keep last 3 errors
-            else:
-                server.last_error = None
-            
-            db.commit()
-            
-            # Evaluate alert rules
-            triggered_alerts = 0
-            resolved_alerts = 0
-            try:
-                evaluator = AlertEvaluator(db)
-                triggered_alerts, resolved_alerts = evaluator.evaluate_all_rules()
-                
-                # Send notifications for new active alerts
-                if triggered_alerts > 0:
-                    new_alerts = db.query(models.Alert).filter(
-                        models.Alert.status == "active",
-                        models.Alert.acknowledged == False
-                    ).all()
-                    
-                    for alert in new_alerts:
-                        try:
-                            # Use Unity's notification service
-                            NotificationService.send_notification(
-                                title=f"Alert: {alert.message}",
-                                message=f"Severity: {alert.severity}\nTriggered at: {alert.triggered_at}",
-                                severity=alert.severity
-                            )
-                        except Exception as e:
-                            logger.error(f"Failed to send alert notification: {e}")
-                
-            except Exception as e:
-                logger.error(f"Alert evaluation failed: {e}")
-                errors.append(f"Alert evaluation error: {str(e)}")
-            
-            # Build result message
-            message = f"Collected: {device_count} devices, {pool_count} pools, {db_count} databases, {metrics_collected} metrics"
-            if triggered_alerts > 0 or resolved_alerts > 0:
-                message += f"; Alerts: {triggered_alerts} triggered, {resolved_alerts} resolved"
-            if errors:
-                message += f" ({len(errors)} errors)"
-            
-            logger.info(f"Collection completed for {server.hostname}: {message}")
-            return True, message
-            
-        finally:
-            loop.close()
-            
-    except SSHConnectionError as e:
-        logger.error(f"SSH connection failed for server {server_id}: {e}")
-        server = db.query(models.MonitoredServer).filter(
-            models.MonitoredServer.id == server_id
-        ).first()
-        if server:
-            server.status = models.ServerStatus.OFFLINE
-            server.last_error = f"SSH connection failed: {str(e)}"
+
+        devices, pools, databases = await _run_phases(
+            server, (_discover_devices, _discover_pools, _discover_databases)
+        )
+
+        device_count = pool_count = db_count = metrics_collected = 0
+        errors: List[str] = []
+        ssh_error: Optional[SSHConnectionError] = None
+
+        for phase, result in (("Storage", devices), ("Pool", pools), ("Database", databases)):
+            if isinstance(result, SSHConnectionError):
+                ssh_error = result
+            elif isinstance(result, Exception):
+                logger.error(f"{phase} discovery failed for {server.hostname}: {result}")
+                errors.append(f"{phase} discovery error: {str(result)}")
+
+        if ssh_error is not None:
+            server.status = ServerStatus.OFFLINE
+            server.last_error = f"SSH connection failed: {str(ssh_error)}"
             db.commit()
-        return False, f"SSH connection failed: {str(e)}"
-    
+            logger.error(f"SSH connection failed for server {server_id}: {ssh_error}")
+            return False, f"SSH connection failed: {str(ssh_error)}"
+
+        if not isinstance(devices, Exception):
+            device_count, phase_errors = devices
+            errors.extend(phase_errors)
+        if not isinstance(pools, Exception):
+            pool_count, phase_errors = pools
+            errors.extend(phase_errors)
+        if not isinstance(databases, Exception):
+            db_count, phase_errors, metrics_collected = databases
+            errors.extend(phase_errors)
+
+        # Update server status
+        server.status = ServerStatus.ONLINE
+        server.last_seen = datetime.now(timezone.utc)
+        server.last_error = "; ".join(errors[:3]) if errors else None  # Keep last 3 errors
+
+        db.commit()
+
+        message = f"Collected: {device_count} devices, {pool_count} pools, {db_count} databases, {metrics_collected} metrics"
+        if errors:
+            message += f" ({len(errors)} errors)"
+
+        logger.info(f"Collection completed for {server.hostname}: {message}")
+        return True, message
+
     except Exception as e:
+        db.rollback()
         logger.exception(f"Unexpected error collecting data for server {server_id}")
         return False, f"Collection failed: {str(e)}"
-    
+
     finally:
         db.close()
 
 
-def collect_all_servers() -> dict:
+def _alert_payload(
+    alert: Alert,
+    rule_name: Optional[str],
+    server_id: Optional[int],
+    server_name: Optional[str]
+) -> Dict[str, Any]:
+    return {
+        'alert_id': alert.id,
+        'severity': alert.severity,
+        'message': alert.message,
+        'metric_value': alert.metric_value,
+        'server_name': server_name or 'Unknown',
+        'server_id': server_id,
+        'rule_name': rule_name or f"rule {alert.alert_rule_id}",
+        'resource_type': alert.resource_type,
+        'resource_id': alert.resource_id,
+        'triggered_at': alert.triggered_at.isoformat() if alert.triggered_at else None,
+        'timestamp': int(alert.triggered_at.timestamp()) if alert.triggered_at else None
+    }
+
+
+def _alert_payloads(db, alerts: List[Alert]) -> List[Dict[str, Any]]:
     """
-    Collect data for all monitored servers with monitoring enabled.
-    
+    Notification payloads for alerts raised by AlertEvaluator.
+
+    Those alerts name their rule and resource (alert_rule_id, resource_type,
+    resource_id), not a server; the owning server of every resource is looked
+    up with one query per resource type.
+    """
+    rule_names = dict(db.query(AlertRule.id, AlertRule.name).filter(
+        AlertRule.id.in_({alert.alert_rule_id for alert in alerts})
+    ).all())
+
+    resource_ids: Dict[str, set] = defaultdict(set)
+    for alert in alerts:
+        resource_ids[alert.resource_type].add(alert.resource_id)
+
+    # (resource_type, resource_id) -> id of the server the resource lives on
+    owners: Dict[Tuple[str, int], int] = {}
+    for resource_type, ids in resource_ids.items():
+        model, _ = RESOURCE_MODELS[ResourceType(resource_type)]
+        server_column = model.id if model is MonitoredServer else model.server_id
+        rows = db.query(model.id, server_column).filter(model.id.in_(ids)).all()
+        owners.update({(resource_type, resource_id): server_id for resource_id, server_id in rows})
+
+    hostnames = dict(db.query(MonitoredServer.id, MonitoredServer.hostname).filter(
+        MonitoredServer.id.in_(set(owners.values()))
+    ).all())
+
+    payloads = []
+    for alert in alerts:
+        server_id = owners.get((alert.resource_type, alert.resource_id))
+        payloads.append(_alert_payload(alert, rule_names.get(alert.alert_rule_id), server_id, hostnames.get(server_id)))
+    return payloads
+
+
+def evaluate_alerts() -> Tuple[int, int, List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+    """
+    Evaluate all alert rules once and prepare notifications for alerts raised by this pass.
+
     Returns:
-        Dictionary with collection results
+        Tuple of (alerts_triggered, alerts_resolved, [(channel, alert_data), ...])
     """
-    db = next(get_db())
-    
+    db = SessionLocal()
     try:
-        servers = db.query(models.MonitoredServer).filter(
-            models.MonitoredServer.monitoring_enabled == True
-        ).all()
-        
-        results = {
-            "total": len(servers),
-            "successful": 0,
-            "failed": 0,
-            "errors": []
-        }
-        
-        for server in servers:
-            success, message = collect_server_data(server.id)
-            if success:
-                results["successful"] += 1
-            else:
-                results["failed"] += 1
-                results["errors"].append(f"{server.hostname}: {message}")
-        
-        logger.info(
-            f"Bulk collection completed: {results['successful']}/{results['total']} successful"
-        )
-        
-        return results
-        
+        started_at = datetime.now(timezone.utc)
+        triggered_alerts, resolved_alerts = AlertEvaluator(db).evaluate_all_rules()
+
+        notifications = []
+        if triggered_alerts > 0:
+            new_alerts = db.query(Alert).filter(
+                Alert.alert_rule_id.isnot(None),
+                Alert.status == "active",
+                Alert.acknowledged == False,
+                Alert.triggered_at >= started_at
+            ).all()
+            channels = db.query(AlertChannel).filter(AlertChannel.enabled == True).all()
+
+            if new_alerts and channels:
+                channel_dicts = [
+                    {
+                        'id': channel.id,
+                        'name': channel.name,
+                        'channel_type': channel.channel_type,
+                        'config': channel.config,
+                        'template': channel.template
+                    }
+                    for channel in channels
+                ]
+                for alert_data in _alert_payloads(db, new_alerts):
+                    notifications.extend((channel, alert_data) for channel in channel_dicts)
+
+        return triggered_alerts, resolved_alerts, notifications
     finally:
         db.close()
+
+
+async def collect_fleet(server_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Collect data for many servers concurrently, then evaluate alerts once.
+
+    Args:
+        server_ids: Servers to collect (None = every server with monitoring enabled)
+
+    Returns:
+        Dictionary with collection results
+    """
+    if server_ids is None:
+        db = SessionLocal()
+        try:
+            servers = db.query(MonitoredServer.id, MonitoredServer.hostname).filter(
+                MonitoredServer.monitoring_enabled == True
+            ).all()
+        finally:
+            db.close()
+    else:
+        servers = [(server_id, str(server_id)) for server_id in server_ids]
+
+    semaphore = asyncio.Semaphore(max(1, settings.infrastructure_collection_concurrency))
+
+    async def collect(server_id: int) -> Tuple[bool, str]:
+        async with semaphore:
+            return await collect_server(server_id)
+
+    try:
+        outcomes = await asyncio.gather(*(collect(server_id) for server_id, _ in servers))
+    finally:
+        await close_ssh_pool()
+
+    results = {
+        "total": len(servers),
+        "successful": 0,
+        "failed": 0,
+        "errors": [],
+        "messages": {}
+    }
+    for (server_id, hostname), (success, message) in zip(servers, outcomes):
+        results["messages"][server_id] = message
+        if success:
+            results["successful"] += 1
+        else:
+            results["failed"] += 1
+            results["errors"].append(f"{hostname}: {message}")
+
+    # Alert rules cover the whole fleet: evaluate once per sweep
+    results["alerts_triggered"] = 0
+    results["alerts_resolved"] = 0
+    if results["successful"]:
+        try:
+            triggered, resolved, notifications = await run_in_executor(get_thread_pool(), evaluate_alerts)
+            results["alerts_triggered"] = triggered
+            results["alerts_resolved"] = resolved
+            if notifications:
+                # Scoped to this sweep's event loop (sync callers use asyncio.run);
+                # closing it sends one digest per channel and waits for delivery
+                async with NotificationDispatcher() as dispatcher:
+                    for channel, alert_data in notifications:
+                        dispatcher.submit(channel, alert_data)
+        except Exception as e:
+            logger.error(f"Alert evaluation failed: {e}")
+            results["errors"].append(f"Alert evaluation error: {str(e)}")
+
+    logger.info(
+        f"Bulk collection completed: {results['successful']}/{results['total']} successful"
+    )
+    return results
+
+
+def collect_server_data(server_id: int) -> Tuple[bool, str]:
+    """
+    Collect infrastructure data for a monitored server.
+
+    Runs a one-server sweep on its own event loop (callers are sync endpoints
+    and scheduler worker threads).
+
+    Args:
+        server_id: ID of the MonitoredServer
+
+    Returns:
+        Tuple of (success, message)
+    """
+    results = asyncio.run(collect_fleet([server_id]))
+    message = results["messages"][server_id]
+    success = results["successful"] == 1
+
+    triggered, resolved = results["alerts_triggered"], results["alerts_resolved"]
+    if triggered > 0 or resolved > 0:
+        message += f"; Alerts: {triggered} triggered, {resolved} resolved"
+    return success, message
+
+
+def collect_all_servers() -> dict:
+    """
+    Collect data for all monitored servers with monitoring enabled.
+
+    Returns:
+        Dictionary with collection results
+    """
+    results = asyncio.run(collect_fleet())
+    results.pop("messages", None)
+    return results
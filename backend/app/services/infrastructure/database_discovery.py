@@ -5,9 +5,9 @@ from typing import Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
 
-from app.models import DatabaseInstance, DatabaseType, DatabaseStatus
-from app.models import MonitoredServer
-from app.services.infrastructure.ssh_service import InfrastructureSSHService
+from app.models.infrastructure import DatabaseInstance, DatabaseType, DatabaseStatus
+from app.models.infrastructure import MonitoredServer
+from app.services.infrastructure.ssh_service import ssh_service
 from app.services.core.encryption import EncryptionService
 
 logger = logging.getLogger(__name__)
@@ -18,7 +18,7 @@ class DatabaseDiscoveryService:
     
     def __init__(self, db: Session):
         self.db = db
-        self.ssh_service = InfrastructureSSHService()
+        self.ssh_service = ssh_service
         self.encryption_service = EncryptionService()
     
     async def discover_databases(
@@ -35,6 +35,8 @@ class DatabaseDiscoveryService:
             db_types: List of database types to discover
             test_connection: Whether to test connections
             
+        Changes are flushed, not committed; the caller owns the transaction.
+            
         Returns:
             Dictionary with discovery results
         """
@@ -185,8 +187,6 @@ class DatabaseDiscoveryService:
                 existing.db_name = data.get("db_name", existing.db_name)
                 existing.username = data.get("username", existing.username)
                 existing.updated_at = datetime.now()
-                self.db.commit()
-                self.db.refresh(existing)
                 return existing
             else:
                 # Create new
@@ -200,13 +200,11 @@ class DatabaseDiscoveryService:
                     status=DatabaseStatus.UNKNOWN
                 )
                 self.db.add(db_instance)
-                self.db.commit()
-                self.db.refresh(db_instance)
+                self.db.flush()
                 return db_instance
                 
         except Exception as e:
             logger.error(f"Error upserting database instance: {e}")
-            self.db.rollback()
             return None
     
     async def _test_connection(self, server: MonitoredServer, db_instance: DatabaseInstance):
@@ -221,7 +219,6 @@ class DatabaseDiscoveryService:
             db_instance.status = DatabaseStatus.ERROR
             db_instance.last_error = str(e)
             db_instance.last_checked = datetime.now()
-            self.db.commit()
     
     async def _test_postgresql(self, server: MonitoredServer, db_instance: DatabaseInstance):
         """Test PostgreSQL connection."""
@@ -243,7 +240,6 @@ class DatabaseDiscoveryService:
             db_instance.last_error = "Cannot connect (may need credentials)"
         
         db_instance.last_checked = datetime.now()
-        self.db.commit()
     
     async def _test_mysql(self, server: MonitoredServer, db_instance: DatabaseInstance):
         """Test MySQL connection."""
@@ -265,7 +261,6 @@ class DatabaseDiscoveryService:
             db_instance.last_error = "Cannot connect (may need credentials)"
         
         db_instance.last_checked = datetime.now()
-        self.db.commit()
 
     async def collect_metrics_for_database(self, db_instance_id: int) -> dict:
         """
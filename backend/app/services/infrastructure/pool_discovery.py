@@ -5,8 +5,8 @@ import logging
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
-from app.models import MonitoredServer
-from app.models import StoragePool, PoolType, HealthStatus
+from app.models.infrastructure import MonitoredServer
+from app.models.infrastructure import StoragePool, PoolType, HealthStatus
 from app.services.infrastructure.ssh_service import InfrastructureSSHService, SSHConnectionError, SSHCommandError
 from app.utils import ZpoolParser, LvmParser
 
@@ -206,7 +206,7 @@ class PoolDiscoveryService:
         Args:
             server_id: MonitoredServer ID
             pool_data: Pool data dictionary
-            db_session: Database session
+            db_session: Database session (changes are flushed, not committed)
             
         Returns:
             StoragePool instance
@@ -272,7 +272,7 @@ class PoolDiscoveryService:
         Args:
             server_id: MonitoredServer ID
             vg_data: Volume group data dictionary
-            db_session: Database session
+            db_session: Database session (changes are flushed, not committed)
             
         Returns:
             StoragePool instance
@@ -342,7 +342,7 @@ class PoolDiscoveryService:
         
         Args:
             server: MonitoredServer instance
-            db_session: Database session
+            db_session: Database session (changes are flushed, not committed)
             
         Returns:
             Tuple of (list of StoragePool instances, list of error messages)
@@ -381,12 +381,8 @@ class PoolDiscoveryService:
                     logger.error(error_msg)
                     errors.append(error_msg)
             
-            # Commit all changes
-            db_session.commit()
-            
-            # Refresh all pools to get updated values
-            for pool in discovered_pools:
-                db_session.refresh(pool)
+            # Flush only: the caller commits the server's results once
+            db_session.flush()
             
             logger.info(f"Pool discovery complete: {zfs_count} ZFS, {lvm_count} LVM, {len(errors)} errors")
             
@@ -394,6 +390,5 @@ class PoolDiscoveryService:
             error_msg = f"Pool discovery failed: {str(e)}"
             logger.error(error_msg)
             errors.append(error_msg)
-            db_session.rollback()
         
         return discovered_pools, errors
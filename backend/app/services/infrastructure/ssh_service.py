@@ -6,6 +6,8 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 
 from app import models
+from app.core.database import SessionLocal
+from app.services.core.ssh_pool import SSHTarget, get_credential_cache, get_ssh_pool
 from app.services.credentials.encryption import decrypt
 
 logger = logging.getLogger(__name__)
@@ -22,17 +24,70 @@ class SSHCommandError(Exception):
 
 
 class InfrastructureSSHService:
-    """SSH service for infrastructure monitoring using Unity's credential system."""
+    """SSH service for infrastructure monitoring using Unity's credential system.
+
+    Commands run over the shared SSH connection pool, so every service
+    talking to the same server reuses one multiplexed connection.
+    Decrypted credentials are cached for a short TTL.
+    """
     
     def __init__(self):
         """Initialize SSH service."""
         self._connection_timeout = 30  # 30 seconds
     
+    def _load_auth(self, server: models.MonitoredServer, db: Session) -> Optional[Dict]:
+        """Load and decrypt the credentials for a server."""
+        ssh_key = None
+        password = None
+        
+        if server.ssh_key_id:
+            ssh_key_obj = db.query(models.SSHKey).filter(
+                models.SSHKey.id == server.ssh_key_id
+            ).first()
+            if ssh_key_obj and ssh_key_obj.private_key:
+                ssh_key = asyncssh.import_private_key(decrypt(ssh_key_obj.private_key))
+        
+        if server.credential_id:
+            cred = db.query(models.ServerCredential).filter(
+                models.ServerCredential.id == server.credential_id
+            ).first()
+            if cred and cred.password:
+                password = decrypt(cred.password)
+        
+        # Fallback to legacy encrypted credentials if Unity creds not available
+        if not ssh_key and not password:
+            if server.ssh_private_key_encrypted:
+                ssh_key = asyncssh.import_private_key(
+                    decrypt(server.ssh_private_key_encrypted)
+                )
+            elif server.ssh_password_encrypted:
+                password = decrypt(server.ssh_password_encrypted)
+        
+        if ssh_key:
+            return {'client_keys': [ssh_key]}
+        if password:
+            return {'password': password}
+        return None
+    
+    def _get_auth(self, server: models.MonitoredServer, db: Optional[Session]) -> Optional[Dict]:
+        """Get credentials for a server from the cache, loading them on a miss."""
+        def load():
+            if db is not None:
+                return self._load_auth(server, db)
+            session = SessionLocal()
+            try:
+                return self._load_auth(server, session)
+            finally:
+                session.close()
+        
+        cache_key = ("monitored_server", server.id, server.ssh_key_id, server.credential_id)
+        return get_credential_cache().get_or_load(cache_key, load)
+    
     async def execute_command(
         self,
         server: models.MonitoredServer,
         command: str,
-        db: Session,
+        db: Optional[Session] = None,
         timeout: int = 30
     ) -> tuple[str, str, int]:
         """
@@ -41,7 +96,8 @@ class InfrastructureSSHService:
         Args:
             server: MonitoredServer model instance
             command: Command to execute
-            db: Database session for loading credentials
+            db: Database session for loading credentials (a new session is
+                opened on a credential cache miss if omitted)
             timeout: Command timeout in seconds
             
         Returns:
@@ -53,33 +109,11 @@ class InfrastructureSSHService:
         """
         try:
             # Get credentials from Unity's KC-Booth system
-            ssh_key = None
-            password = None
-            
-            if server.ssh_key_id:
-                ssh_key_obj = db.query(models.SSHKey).filter(
-                    models.SSHKey.id == server.ssh_key_id
-                ).first()
-                if ssh_key_obj and ssh_key_obj.private_key_encrypted:
-                    ssh_key = asyncssh.import_private_key(
-                        decrypt(ssh_key_obj.private_key_encrypted)
-                    )
-            
-            if server.credential_id:
-                cred = db.query(models.ServerCredential).filter(
-                    models.ServerCredential.id == server.credential_id
-                ).first()
-                if cred and cred.credential_value_encrypted:
-                    password = decrypt(cred.credential_value_encrypted)
-            
-            # Fallback to legacy encrypted credentials if Unity creds not available
-            if not ssh_key and not password:
-                if server.ssh_private_key_encrypted:
-                    ssh_key = asyncssh.import_private_key(
-                        decrypt(server.ssh_private_key_encrypted)
-                    )
-                elif server.ssh_password_encrypted:
-                    password = decrypt(server.ssh_password_encrypted)
+            auth = self._get_auth(server, db)
+            if not auth:
+                raise SSHConnectionError(
+                    f"No credentials available for server {server.hostname}"
+                )
             
             # Connection options
             connect_kwargs = {
@@ -88,28 +122,26 @@ class InfrastructureSSHService:
                 'username': server.username,
                 'known_hosts': None,  # Disable host key checking for lab environments
                 'connect_timeout': self._connection_timeout,
+                **auth,
             }
-            
-            # Add authentication method
-            if ssh_key:
-                connect_kwargs['client_keys'] = [ssh_key]
-            elif password:
-                connect_kwargs['password'] = password
-            else:
-                raise SSHConnectionError(
-                    f"No credentials available for server {server.hostname}"
-                )
+            target = SSHTarget(
+                host=server.ip_address,
+                port=server.ssh_port,
+                username=server.username,
+                auth_id=f"monitored_server:{server.id}:{server.ssh_key_id}:{server.credential_id}"
+            )
             
             # Execute command
-            async with await asyncssh.connect(**connect_kwargs) as conn:
-                result = await conn.run(command, timeout=timeout, check=False)
-                
-                return (
-                    result.stdout or "",
-                    result.stderr or "",
-                    result.exit_status or 0
-                )
+            result = await get_ssh_pool().run(target, connect_kwargs, command, timeout=timeout)
+            
+            return (
+                result.stdout or "",
+                result.stderr or "",
+                result.exit_status or 0
+            )
                 
+        except SSHConnectionError:
+            raise
         except asyncssh.Error as e:
             logger.error(f"SSH error for server {server.hostname}: {str(e)}")
             raise SSHConnectionError(f"SSH connection failed: {str(e)}")
@@ -5,8 +5,8 @@ import logging
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
-from app.models import MonitoredServer
-from app.models import StorageDevice, DeviceType, HealthStatus
+from app.models.infrastructure import MonitoredServer
+from app.models.infrastructure import StorageDevice, DeviceType, HealthStatus
 from app.services.infrastructure.ssh_service import InfrastructureSSHService, SSHConnectionError, SSHCommandError
 from app.utils import LsblkParser, SmartctlParser, NvmeParser
 
@@ -265,7 +265,7 @@ class StorageDiscoveryService:
         
         Args:
             server: MonitoredServer instance
-            db_session: Database session
+            db_session: Database session (changes are flushed, not committed)
             
         Returns:
             Tuple of (list of StorageDevice instances, list of error messages)
@@ -334,12 +334,8 @@ class StorageDiscoveryService:
                     errors.append(error_msg)
                     continue
             
-            # Commit all changes
-            db_session.commit()
-            
-            # Refresh all devices to get updated values
-            for device in discovered_devices:
-                db_session.refresh(device)
+            # Flush only: the caller commits the server's results once
+            db_session.flush()
             
             logger.info(f"Discovery complete: {len(discovered_devices)} devices, {len(errors)} errors")
             
@@ -347,6 +343,5 @@ class StorageDiscoveryService:
             error_msg = f"Discovery failed: {str(e)}"
             logger.error(error_msg)
             errors.append(error_msg)
-            db_session.rollback()
         
         return discovered_devices, errors
@@ -6,6 +6,8 @@ A thin wrapper around the official Kubernetes Python client library that provide
 - Async-compatible methods where possible
 - Proper error handling and connection testing
 - Logging for debugging and monitoring
+- Node, pod and event reads served from watch-backed informer stores
+  (see app.services.k8s_informer) once they have synced
 
 This service is designed to be used by other services that need to interact
 with Kubernetes clusters (e.g., orchestration, deployment management).
@@ -13,6 +15,7 @@ with Kubernetes clusters (e.g., orchestration, deployment management).
 
 import os
 import logging
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional, Dict, Any, List, TYPE_CHECKING
 from contextlib import asynccontextmanager
@@ -30,6 +33,9 @@ except ImportError:
     else:
         client = None
 
+from app.core.config import settings
+from app.services.k8s_informer import cluster_key, get_informer_manager
+
 logger = logging.getLogger(__name__)
 
 
@@ -69,7 +75,8 @@ class KubernetesClient:
         self,
         kubeconfig_path: Optional[str] = None,
         context: Optional[str] = None,
-        in_cluster: bool = False
+        in_cluster: bool = False,
+        use_informers: Optional[bool] = None
     ):
         """
         Initialize Kubernetes client.
@@ -78,6 +85,8 @@ class KubernetesClient:
             kubeconfig_path: Path to kubeconfig file. If None, uses default locations.
             context: Specific context to use from kubeconfig. If None, uses current context.
             in_cluster: If True, use in-cluster authentication (ignores kubeconfig_path).
+            use_informers: Serve node/pod/event reads from informer stores
+                (defaults to settings.k8s_informers_enabled)
 
         Raises:
             KubernetesClientError: If kubernetes library is not available
@@ -90,6 +99,8 @@ class KubernetesClient:
         self.kubeconfig_path = kubeconfig_path
         self.context = context
         self.in_cluster = in_cluster
+        self.use_informers = settings.k8s_informers_enabled if use_informers is None else use_informers
+        self.cluster_key = cluster_key(kubeconfig_path, context, in_cluster)
         self._api_client: Optional[client.ApiClient] = None
         self._loaded = False
 
@@ -414,6 +425,12 @@ class KubernetesClient:
         Raises:
             KubernetesClientError: If request fails
         """
+        # Field selectors are evaluated by the API server only
+        if field_selector is None:
+            cached = self._cached_list("Pod", namespace=namespace, label_selector=label_selector)
+            if cached is not None:
+                return [self._pod_detail(pod) for pod in cached]
+
         try:
             api = self.get_core_v1_api()
 
@@ -428,38 +445,7 @@ class KubernetesClient:
                 )
             )
 
-            result = []
-            for pod in pods.items:
-                # Extract container statuses
-                container_statuses = []
-                if pod.status.container_statuses:
-                    for cs in pod.status.container_statuses:
-                        container_statuses.append({
-                            "name": cs.name,
-                            "ready": cs.ready,
-                            "restart_count": cs.restart_count,
-                            "image": cs.image,
-                            "state": self._get_container_state(cs.state)
-                        })
-
-                result.append({
-                    "name": pod.metadata.name,
-                    "namespace": pod.metadata.namespace,
-                    "labels": pod.metadata.labels or {},
-                    "annotations": pod.metadata.annotations or {},
-                    "created_at": pod.metadata.creation_timestamp.isoformat() if pod.metadata.creation_timestamp else None,
-                    "status": {
-                        "phase": pod.status.phase,
-                        "conditions": [
-                            {"type": c.type, "status": c.status, "reason": c.reason}
-                            for c in (pod.status.conditions or [])
-                        ],
-                        "container_statuses": container_statuses,
-                        "host_ip": pod.status.host_ip,
-                        "pod_ip": pod.status.pod_ip
-                    },
-                    "uid": pod.metadata.uid
-                })
+            result = [self._pod_detail(pod) for pod in pods.items]
 
             logger.info(f"Listed {len(result)} pods in namespace {namespace}")
             return result
@@ -474,79 +460,6 @@ class KubernetesClient:
             logger.error(f"Unexpected error listing pods in {namespace}: {e}")
             raise KubernetesClientError(f"Failed to list pods in {namespace}: {e}") from e
 
-    def _get_container_state(self, state) -> str:
-        """Extract container state as string"""
-        if state.running:
-            return "running"
-        elif state.waiting:
-            return f"waiting ({state.waiting.reason})"
-        elif state.terminated:
-            return f"terminated ({state.terminated.reason})"
-        return "unknown"
-
-    async def close(self) -> None:
-        """
-        Close the API client and clean up resources.
-        """
-        if self._api_client:
-            try:
-                # The Python kubernetes client doesn't have an explicit close method
-                # but we can clean up our reference
-                self._api_client = None
-                self._loaded = False
-                logger.info("Kubernetes client closed")
-            except Exception as e:
-                logger.error(f"Error closing Kubernetes client: {e}")
-
-    def __enter__(self):
-        """Context manager entry"""
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit - note: this is sync, use async context manager for proper cleanup"""
-        # Synchronous cleanup - limited
-        self._api_client = None
-        self._loaded = False
-        return False
-
-    async def __aenter__(self):
-        """Async context manager entry"""
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        await self.close()
-        return False
-
-
-# Convenience function for quick client creation
-def create_k8s_client(
-    kubeconfig_path: Optional[str] = None,
-    context: Optional[str] = None,
-    in_cluster: bool = False
-) -> KubernetesClient:
-    """
-    Factory function to create a KubernetesClient instance.
-
-    Args:
-        kubeconfig_path: Path to kubeconfig file. If None, uses default locations.
-        context: Specific context to use from kubeconfig. If None, uses current context.
-        in_cluster: If True, use in-cluster authentication.
-
-    Returns:
-        Configured KubernetesClient instance
-
-    Example:
-        client = create_k8s_client(kubeconfig_path="~/.kube/config")
-        if await client.test_connection():
-            namespaces = await client.list_namespaces()
-    """
-    return KubernetesClient(
-        kubeconfig_path=kubeconfig_path,
-        context=context,
-        in_cluster=in_cluster
-    )
-
     async def get_cluster_version(self) -> str:
         """
         Get Kubernetes cluster version string.
@@ -570,6 +483,10 @@ def create_k8s_client(
         Raises:
             KubernetesClientError: If request fails
         """
+        cached = self._cached_list("Node")
+        if cached is not None:
+            return [self._node_to_dict(node) for node in cached]
+
         try:
             api = self.get_core_v1_api()
 
@@ -580,77 +497,7 @@ def create_k8s_client(
                 api.list_node
             )
 
-            result = []
-            for node in nodes.items:
-                # Extract node conditions
-                conditions = []
-                if node.status.conditions:
-                    for cond in node.status.conditions:
-                        conditions.append({
-                            "type": cond.type,
-                            "status": cond.status,
-                            "reason": cond.reason or "",
-                            "message": cond.message or ""
-                        })
-
-                # Determine node status (Ready/NotReady)
-                node_status = "Unknown"
-                for cond in conditions:
-                    if cond["type"] == "Ready":
-                        node_status = "Ready" if cond["status"] == "True" else "NotReady"
-                        break
-
-                # Extract node roles
-                roles = []
-                if node.metadata.labels:
-                    for label_key in node.metadata.labels:
-                        if label_key.startswith("node-role.kubernetes.io/"):
-                            role = label_key.split("/", 1)[1]
-                            if role:
-                                roles.append(role)
-
-                # Extract capacity and allocatable
-                capacity = {}
-                allocatable = {}
-                if node.status.capacity:
-                    capacity = {
-                        "cpu": node.status.capacity.get("cpu", "0"),
-                        "memory": node.status.capacity.get("memory", "0"),
-                        "pods": node.status.capacity.get("pods", "0"),
-                        "ephemeral_storage": node.status.capacity.get("ephemeral-storage", "0")
-                    }
-                if node.status.allocatable:
-                    allocatable = {
-                        "cpu": node.status.allocatable.get("cpu", "0"),
-                        "memory": node.status.allocatable.get("memory", "0"),
-                        "pods": node.status.allocatable.get("pods", "0"),
-                        "ephemeral_storage": node.status.allocatable.get("ephemeral-storage", "0")
-                    }
-
-                result.append({
-                    "name": node.metadata.name,
-                    "status": node_status,
-                    "roles": roles if roles else ["worker"],
-                    "labels": node.metadata.labels or {},
-                    "annotations": node.metadata.annotations or {},
-                    "created_at": node.metadata.creation_timestamp.isoformat() if node.metadata.creation_timestamp else None,
-                    "conditions": conditions,
-                    "capacity": capacity,
-                    "allocatable": allocatable,
-                    "node_info": {
-                        "kubelet_version": node.status.node_info.kubelet_version if node.status.node_info else None,
-                        "os_image": node.status.node_info.os_image if node.status.node_info else None,
-                        "kernel_version": node.status.node_info.kernel_version if node.status.node_info else None,
-                        "container_runtime": node.status.node_info.container_runtime_version if node.status.node_info else None,
-                        "architecture": node.status.node_info.architecture if node.status.node_info else None,
-                        "operating_system": node.status.node_info.operating_system if node.status.node_info else None,
-                    },
-                    "addresses": [
-                        {"type": addr.type, "address": addr.address}
-                        for addr in (node.status.addresses or [])
-                    ],
-                    "uid": node.metadata.uid
-                })
+            result = [self._node_to_dict(node) for node in nodes.items]
 
             logger.info(f"Listed {len(result)} nodes")
             return result
@@ -678,6 +525,10 @@ def create_k8s_client(
         Raises:
             KubernetesClientError: If request fails
         """
+        cached = self._cached_list("Pod", label_selector=label_selector)
+        if cached is not None:
+            return [self._pod_summary(pod) for pod in cached]
+
         try:
             api = self.get_core_v1_api()
 
@@ -688,32 +539,7 @@ def create_k8s_client(
                 lambda: api.list_pod_for_all_namespaces(label_selector=label_selector)
             )
 
-            result = []
-            for pod in pods.items:
-                # Extract container statuses
-                container_statuses = []
-                if pod.status.container_statuses:
-                    for cs in pod.status.container_statuses:
-                        container_statuses.append({
-                            "name": cs.name,
-                            "ready": cs.ready,
-                            "restart_count": cs.restart_count,
-                            "image": cs.image,
-                            "state": self._get_container_state(cs.state)
-                        })
-
-                result.append({
-                    "name": pod.metadata.name,
-                    "namespace": pod.metadata.namespace,
-                    "labels": pod.metadata.labels or {},
-                    "created_at": pod.metadata.creation_timestamp.isoformat() if pod.metadata.creation_timestamp else None,
-                    "phase": pod.status.phase,
-                    "host_ip": pod.status.host_ip,
-                    "pod_ip": pod.status.pod_ip,
-                    "node_name": pod.spec.node_name if pod.spec else None,
-                    "container_statuses": container_statuses,
-                    "uid": pod.metadata.uid
-                })
+            result = [self._pod_summary(pod) for pod in pods.items]
 
             logger.info(f"Listed {len(result)} pods across all namespaces")
             return result
@@ -796,6 +622,10 @@ def create_k8s_client(
         Raises:
             KubernetesClientError: If request fails
         """
+        cached = self._cached_list("Event", namespace=namespace)
+        if cached is not None:
+            return self._recent_events(cached, minutes)
+
         try:
             api = self.get_core_v1_api()
             loop = asyncio.get_event_loop()
@@ -811,28 +641,7 @@ def create_k8s_client(
                     api.list_event_for_all_namespaces
                 )
 
-            from datetime import datetime, timedelta, timezone
-            cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=minutes)
-
-            result = []
-            for event in events.items:
-                event_time = event.last_timestamp or event.event_time or event.metadata.creation_timestamp
-                if event_time and event_time.replace(tzinfo=timezone.utc) > cutoff_time:
-                    result.append({
-                        "name": event.metadata.name,
-                        "namespace": event.metadata.namespace,
-                        "type": event.type,  # Normal, Warning, Error
-                        "reason": event.reason,
-                        "message": event.message,
-                        "count": event.count,
-                        "first_timestamp": event.first_timestamp.isoformat() if event.first_timestamp else None,
-                        "last_timestamp": event.last_timestamp.isoformat() if event.last_timestamp else None,
-                        "involved_object": {
-                            "kind": event.involved_object.kind if event.involved_object else None,
-                            "name": event.involved_object.name if event.involved_object else None,
-                            "namespace": event.involved_object.namespace if event.involved_object else None,
-                        }
-                    })
+            result = self._recent_events(events.items, minutes)
 
             logger.info(f"Retrieved {len(result)} events from last {minutes} minutes")
             return result
@@ -860,3 +669,248 @@ def create_k8s_client(
         except Exception as e:
             logger.warning(f"Connectivity check failed: {e}")
             return False
+
+    def _cached_list(
+        self,
+        kind: str,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None
+    ) -> Optional[List[Any]]:
+        """
+        List objects from the cluster's informer store.
+
+        Starts the kind's informer on first use. Returns None (query the API
+        instead) until it has synced, when informers are disabled, or for
+        selectors the store cannot evaluate.
+        """
+        if not self.use_informers:
+            return None
+        try:
+            manager = get_informer_manager()
+            manager.ensure(self.cluster_key, self.get_client, [kind])
+            store = manager.synced_store(self.cluster_key, kind)
+            if store is None:
+                return None
+            return store.list(namespace=namespace, label_selector=label_selector)
+        except Exception as e:
+            logger.debug(f"Informer store unavailable for {kind}, using API: {e}")
+            return None
+
+    def _node_to_dict(self, node) -> Dict[str, Any]:
+        """Convert a V1Node to the dictionary returned by get_nodes()"""
+        # Extract node conditions
+        conditions = []
+        if node.status.conditions:
+            for cond in node.status.conditions:
+                conditions.append({
+                    "type": cond.type,
+                    "status": cond.status,
+                    "reason": cond.reason or "",
+                    "message": cond.message or ""
+                })
+
+        # Determine node status (Ready/NotReady)
+        node_status = "Unknown"
+        for cond in conditions:
+            if cond["type"] == "Ready":
+                node_status = "Ready" if cond["status"] == "True" else "NotReady"
+                break
+
+        # Extract node roles
+        roles = []
+        if node.metadata.labels:
+            for label_key in node.metadata.labels:
+                if label_key.startswith("node-role.kubernetes.io/"):
+                    role = label_key.split("/", 1)[1]
+                    if role:
+                        roles.append(role)
+
+        # Extract capacity and allocatable
+        capacity = {}
+        allocatable = {}
+        if node.status.capacity:
+            capacity = {
+                "cpu": node.status.capacity.get("cpu", "0"),
+                "memory": node.status.capacity.get("memory", "0"),
+                "pods": node.status.capacity.get("pods", "0"),
+                "ephemeral_storage": node.status.capacity.get("ephemeral-storage", "0")
+            }
+        if node.status.allocatable:
+            allocatable = {
+                "cpu": node.status.allocatable.get("cpu", "0"),
+                "memory": node.status.allocatable.get("memory", "0"),
+                "pods": node.status.allocatable.get("pods", "0"),
+                "ephemeral_storage": node.status.allocatable.get("ephemeral-storage", "0")
+            }
+
+        return {
+            "name": node.metadata.name,
+            "status": node_status,
+            "roles": roles if roles else ["worker"],
+            "labels": node.metadata.labels or {},
+            "annotations": node.metadata.annotations or {},
+            "created_at": node.metadata.creation_timestamp.isoformat() if node.metadata.creation_timestamp else None,
+            "conditions": conditions,
+            "capacity": capacity,
+            "allocatable": allocatable,
+            "node_info": {
+                "kubelet_version": node.status.node_info.kubelet_version if node.status.node_info else None,
+                "os_image": node.status.node_info.os_image if node.status.node_info else None,
+                "kernel_version": node.status.node_info.kernel_version if node.status.node_info else None,
+                "container_runtime": node.status.node_info.container_runtime_version if node.status.node_info else None,
+                "architecture": node.status.node_info.architecture if node.status.node_info else None,
+                "operating_system": node.status.node_info.operating_system if node.status.node_info else None,
+            },
+            "addresses": [
+                {"type": addr.type, "address": addr.address}
+                for addr in (node.status.addresses or [])
+            ],
+            "uid": node.metadata.uid
+        }
+
+    def _container_statuses(self, pod) -> List[Dict[str, Any]]:
+        """Extract container statuses of a V1Pod"""
+        return [
+            {
+                "name": cs.name,
+                "ready": cs.ready,
+                "restart_count": cs.restart_count,
+                "image": cs.image,
+                "state": self._get_container_state(cs.state)
+            }
+            for cs in (pod.status.container_statuses or [])
+        ]
+
+    def _pod_detail(self, pod) -> Dict[str, Any]:
+        """Convert a V1Pod to the dictionary returned by list_pods()"""
+        return {
+            "name": pod.metadata.name,
+            "namespace": pod.metadata.namespace,
+            "labels": pod.metadata.labels or {},
+            "annotations": pod.metadata.annotations or {},
+            "created_at": pod.metadata.creation_timestamp.isoformat() if pod.metadata.creation_timestamp else None,
+            "status": {
+                "phase": pod.status.phase,
+                "conditions": [
+                    {"type": c.type, "status": c.status, "reason": c.reason}
+                    for c in (pod.status.conditions or [])
+                ],
+                "container_statuses": self._container_statuses(pod),
+                "host_ip": pod.status.host_ip,
+                "pod_ip": pod.status.pod_ip
+            },
+            "uid": pod.metadata.uid
+        }
+
+    def _pod_summary(self, pod) -> Dict[str, Any]:
+        """Convert a V1Pod to the dictionary returned by get_all_pods()"""
+        return {
+            "name": pod.metadata.name,
+            "namespace": pod.metadata.namespace,
+            "labels": pod.metadata.labels or {},
+            "created_at": pod.metadata.creation_timestamp.isoformat() if pod.metadata.creation_timestamp else None,
+            "phase": pod.status.phase,
+            "host_ip": pod.status.host_ip,
+            "pod_ip": pod.status.pod_ip,
+            "node_name": pod.spec.node_name if pod.spec else None,
+            "container_statuses": self._container_statuses(pod),
+            "uid": pod.metadata.uid
+        }
+
+    def _recent_events(self, events, minutes: int) -> List[Dict[str, Any]]:
+        """Convert CoreV1Events newer than `minutes` to dictionaries"""
+        cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+
+        result = []
+        for event in events:
+            event_time = event.last_timestamp or event.event_time or event.metadata.creation_timestamp
+            if event_time and event_time.replace(tzinfo=timezone.utc) > cutoff_time:
+                result.append({
+                    "name": event.metadata.name,
+                    "namespace": event.metadata.namespace,
+                    "type": event.type,  # Normal, Warning, Error
+                    "reason": event.reason,
+                    "message": event.message,
+                    "count": event.count,
+                    "first_timestamp": event.first_timestamp.isoformat() if event.first_timestamp else None,
+                    "last_timestamp": event.last_timestamp.isoformat() if event.last_timestamp else None,
+                    "involved_object": {
+                        "kind": event.involved_object.kind if event.involved_object else None,
+                        "name": event.involved_object.name if event.involved_object else None,
+                        "namespace": event.involved_object.namespace if event.involved_object else None,
+                    }
+                })
+        return result
+
+    def _get_container_state(self, state) -> str:
+        """Extract container state as string"""
+        if state.running:
+            return "running"
+        elif state.waiting:
+            return f"waiting ({state.waiting.reason})"
+        elif state.terminated:
+            return f"terminated ({state.terminated.reason})"
+        return "unknown"
+
+    async def close(self) -> None:
+        """
+        Close the API client and clean up resources.
+        """
+        if self._api_client:
+            try:
+                # The Python kubernetes client doesn't have an explicit close method
+                # but we can clean up our reference
+                self._api_client = None
+                self._loaded = False
+                logger.info("Kubernetes client closed")
+            except Exception as e:
+                logger.error(f"Error closing Kubernetes client: {e}")
+
+    def __enter__(self):
+        """Context manager entry"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit - note: this is sync, use async context manager for proper cleanup"""
+        # Synchronous cleanup - limited
+        self._api_client = None
+        self._loaded = False
+        return False
+
+    async def __aenter__(self):
+        """Async context manager entry"""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit"""
+        await self.close()
+        return False
+
+
+# Convenience function for quick client creation
+def create_k8s_client(
+    kubeconfig_path: Optional[str] = None,
+    context: Optional[str] = None,
+    in_cluster: bool = False
+) -> KubernetesClient:
+    """
+    Factory function to create a KubernetesClient instance.
+
+    Args:
+        kubeconfig_path: Path to kubeconfig file. If None, uses default locations.
+        context: Specific context to use from kubeconfig. If None, uses current context.
+        in_cluster: If True, use in-cluster authentication.
+
+    Returns:
+        Configured KubernetesClient instance
+
+    Example:
+        client = create_k8s_client(kubeconfig_path="~/.kube/config")
+        if await client.test_connection():
+            namespaces = await client.list_namespaces()
+    """
+    return KubernetesClient(
+        kubeconfig_path=kubeconfig_path,
+        context=context,
+        in_cluster=in_cluster
+    )
@@ -0,0 +1,596 @@
+"""
+Kubernetes Informers
+
+Watch-backed local cache of cluster state, one set of informers per cluster.
+
+Each informer lists a resource kind once, then follows it with a watch from
+the list's resourceVersion and applies ADDED/MODIFIED/DELETED events to an
+in-memory ResourceStore indexed by namespace, label and node. When the watch
+reports 410 Gone (the resourceVersion was compacted away) the informer
+relists; it also relists every resync interval as a safety net against
+missed events.
+
+Readers (KubernetesClient, ClusterMetricsService, KubernetesReconciler) use
+a store only once its informer has synced and fall back to a direct API call
+otherwise, so the apiserver carries incremental watch traffic instead of a
+full list per poll.
+"""
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+try:
+    from kubernetes import client, watch
+    from kubernetes.client.rest import ApiException
+    KUBERNETES_AVAILABLE = True
+except ImportError:
+    KUBERNETES_AVAILABLE = False
+    client = None
+    watch = None
+
+    class ApiException(Exception):
+        status = None
+
+logger = logging.getLogger(__name__)
+
+HTTP_GONE = 410
+
+# Kind -> (API class in kubernetes.client, cluster-wide list method)
+RESOURCE_KINDS: Dict[str, Tuple[str, str]] = {
+    "Node": ("CoreV1Api", "list_node"),
+    "Pod": ("CoreV1Api", "list_pod_for_all_namespaces"),
+    "Event": ("CoreV1Api", "list_event_for_all_namespaces"),
+    "Service": ("CoreV1Api", "list_service_for_all_namespaces"),
+    "ConfigMap": ("CoreV1Api", "list_config_map_for_all_namespaces"),
+    "Secret": ("CoreV1Api", "list_secret_for_all_namespaces"),
+    "PersistentVolumeClaim": ("CoreV1Api", "list_persistent_volume_claim_for_all_namespaces"),
+    "Deployment": ("AppsV1Api", "list_deployment_for_all_namespaces"),
+    "StatefulSet": ("AppsV1Api", "list_stateful_set_for_all_namespaces"),
+    "DaemonSet": ("AppsV1Api", "list_daemon_set_for_all_namespaces"),
+    "Job": ("BatchV1Api", "list_job_for_all_namespaces"),
+    "Ingress": ("NetworkingV1Api", "list_ingress_for_all_namespaces"),
+}
+
+ObjectKey = Tuple[str, str]
+EventHandler = Callable[[str, Any], None]
+# (key, operator, value) with operator one of "=", "!=", "exists", "!exists"
+LabelRequirement = Tuple[str, str, Optional[str]]
+
+
+def cluster_key(
+    kubeconfig_path: Optional[str] = None,
+    context: Optional[str] = None,
+    in_cluster: bool = False
+) -> str:
+    """
+    Build the key informers for one cluster are registered under.
+
+    Args:
+        kubeconfig_path: Path to kubeconfig file
+        context: Context within the kubeconfig
+        in_cluster: Whether in-cluster authentication is used
+
+    Returns:
+        Cluster key string
+    """
+    if in_cluster:
+        return "in-cluster"
+    return f"{kubeconfig_path or '~default'}#{context or ''}"
+
+
+def parse_label_selector(selector: Optional[str]) -> Optional[List[LabelRequirement]]:
+    """
+    Parse an equality-based label selector.
+
+    Args:
+        selector: Selector such as "app=nginx,tier!=cache,release,!canary"
+
+    Returns:
+        List of requirements, or None for set-based selectors ("in", "notin")
+        the store does not evaluate
+    """
+    requirements: List[LabelRequirement] = []
+    if not selector:
+        return requirements
+
+    for term in (t.strip() for t in selector.split(",")):
+        if not term:
+            continue
+        if "(" in term or " " in term:
+            return None
+        if "!=" in term:
+            key, value = term.split("!=", 1)
+            requirements.append((key.strip(), "!=", value.strip()))
+        elif "=" in term:
+            key, value = term.replace("==", "=", 1).split("=", 1)
+            requirements.append((key.strip(), "=", value.strip()))
+        elif term.startswith("!"):
+            requirements.append((term[1:].strip(), "!exists", None))
+        else:
+            requirements.append((term, "exists", None))
+    return requirements
+
+
+def _object_key(obj: Any) -> ObjectKey:
+    return (obj.metadata.namespace or "", obj.metadata.name)
+
+
+def _node_name(obj: Any) -> Optional[str]:
+    spec = getattr(obj, "spec", None)
+    return getattr(spec, "node_name", None) if spec is not None else None
+
+
+class ResourceStore:
+    """Thread-safe object cache for one kind, indexed by namespace, label and node."""
+
+    def __init__(self):
+        self._objects: Dict[ObjectKey, Any] = {}
+        self._by_namespace: Dict[str, Set[ObjectKey]] = defaultdict(set)
+        self._by_label: Dict[Tuple[str, str], Set[ObjectKey]] = defaultdict(set)
+        self._by_node: Dict[str, Set[ObjectKey]] = defaultdict(set)
+        self._lock = threading.RLock()
+        self.resource_version: Optional[str] = None
+
+    def replace(self, objects: Iterable[Any], resource_version: Optional[str] = None):
+        """
+        Replace the whole contents, as after a list call.
+
+        Args:
+            objects: Listed objects
+            resource_version: resourceVersion of the list
+        """
+        with self._lock:
+            self._objects.clear()
+            self._by_namespace.clear()
+            self._by_label.clear()
+            self._by_node.clear()
+            for obj in objects:
+                self._add(obj)
+            self.resource_version = resource_version
+
+    def upsert(self, obj: Any):
+        """Add or replace an object."""
+        with self._lock:
+            key = _object_key(obj)
+            if key in self._objects:
+                self._remove(key)
+            self._add(obj)
+
+    def delete(self, obj: Any):
+        """Remove an object if present."""
+        with self._lock:
+            key = _object_key(obj)
+            if key in self._objects:
+                self._remove(key)
+
+    def get(self, namespace: Optional[str], name: str) -> Optional[Any]:
+        """
+        Get one object.
+
+        Args:
+            namespace: Namespace (None or "" for cluster-scoped kinds)
+            name: Object name
+
+        Returns:
+            The cached object or None
+        """
+        return self._objects.get((namespace or "", name))
+
+    def list(
+        self,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        node_name: Optional[str] = None
+    ) -> List[Any]:
+        """
+        List cached objects.
+
+        Equality requirements and the namespace/node filters are answered
+        from the indexes; only "!=" and "!label" are checked per object.
+
+        Args:
+            namespace: Only objects in this namespace
+            label_selector: Equality-based label selector
+            node_name: Only objects scheduled on this node (pods)
+
+        Returns:
+            Matching objects
+
+        Raises:
+            ValueError: If the label selector is set-based
+        """
+        requirements = parse_label_selector(label_selector)
+        if requirements is None:
+            raise ValueError(f"Unsupported label selector: {label_selector}")
+
+        with self._lock:
+            candidates: Optional[Set[ObjectKey]] = None
+
+            def narrow(keys: Set[ObjectKey]):
+                nonlocal candidates
+                candidates = set(keys) if candidates is None else candidates & keys
+
+            if namespace:
+                narrow(self._by_namespace.get(namespace, set()))
+            if node_name:
+                narrow(self._by_node.get(node_name, set()))
+            for key, op, value in requirements:
+                if op == "=":
+                    narrow(self._by_label.get((key, value), set()))
+
+            objects = (
+                list(self._objects.values()) if candidates is None
+                else [self._objects[k] for k in candidates]
+            )
+
+        post_filters = [r for r in requirements if r[1] != "="]
+        if not post_filters:
+            return objects
+        return [obj for obj in objects if self._matches(obj, post_filters)]
+
+    @staticmethod
+    def _matches(obj: Any, requirements: List[LabelRequirement]) -> bool:
+        labels = obj.metadata.labels or {}
+        for key, op, value in requirements:
+            if op == "!=" and labels.get(key) == value:
+                return False
+            if op == "exists" and key not in labels:
+                return False
+            if op == "!exists" and key in labels:
+                return False
+        return True
+
+    def _add(self, obj: Any):
+        key = _object_key(obj)
+        self._objects[key] = obj
+        self._by_namespace[key[0]].add(key)
+        for label in (obj.metadata.labels or {}).items():
+            self._by_label[label].add(key)
+        node = _node_name(obj)
+        if node:
+            self._by_node[node].add(key)
+
+    def _remove(self, key: ObjectKey):
+        obj = self._objects.pop(key)
+        self._discard(self._by_namespace, key[0], key)
+        for label in (obj.metadata.labels or {}).items():
+            self._discard(self._by_label, label, key)
+        node = _node_name(obj)
+        if node:
+            self._discard(self._by_node, node, key)
+
+    @staticmethod
+    def _discard(index: Dict, index_key, key: ObjectKey):
+        keys = index.get(index_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[index_key]
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+
+class Informer:
+    """List+watch loop keeping a ResourceStore in sync with one resource kind."""
+
+    def __init__(
+        self,
+        kind: str,
+        list_func: Callable[..., Any],
+        resync_seconds: float = settings.k8s_informer_resync_seconds,
+        watch_timeout_seconds: int = settings.k8s_informer_watch_timeout_seconds,
+        backoff_max_seconds: float = settings.k8s_informer_backoff_max_seconds,
+        watch_factory: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Initialize informer.
+
+        Args:
+            kind: Resource kind (for logging)
+            list_func: Cluster-wide list method, e.g. CoreV1Api.list_node
+            resync_seconds: Interval between full relists
+            watch_timeout_seconds: Server-side timeout of each watch request
+            backoff_max_seconds: Upper bound of the retry delay after errors
+            watch_factory: Creates watch objects (defaults to kubernetes.watch.Watch)
+        """
+        self.kind = kind
+        self.list_func = list_func
+        self.resync_seconds = resync_seconds
+        self.watch_timeout_seconds = watch_timeout_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.watch_factory = watch_factory or (watch.Watch if watch else None)
+        self.store = ResourceStore()
+        self._handlers: List[EventHandler] = []
+        self._synced = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._watch = None
+        self._last_list = 0.0
+        self._stats = {"lists": 0, "watches": 0, "events": 0, "relists_410": 0, "errors": 0}
+
+    @property
+    def synced(self) -> bool:
+        return self._synced.is_set()
+
+    def wait_for_sync(self, timeout: Optional[float] = None) -> bool:
+        """Block until the first list completed; returns whether it did."""
+        return self._synced.wait(timeout)
+
+    def add_handler(self, handler: EventHandler):
+        """
+        Register a callback for store changes.
+
+        Handlers run on the informer thread with (event_type, object), where
+        event_type is ADDED, MODIFIED or DELETED; a relist reports every
+        listed object as MODIFIED. They must not block.
+
+        Args:
+            handler: Callback
+        """
+        self._handlers.append(handler)
+
+    def start(self):
+        """Start the list+watch loop on a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run, name=f"k8s-informer-{self.kind}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the loop and the running watch."""
+        self._stop.set()
+        if self._watch is not None:
+            self._watch.stop()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def run(self):
+        """Loop until stopped: list when needed, then watch from the store's resourceVersion."""
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                if self.store.resource_version is None or self._resync_due():
+                    self.relist()
+                self.watch()
+                failures = 0
+            except ApiException as e:
+                if e.status == HTTP_GONE:
+                    logger.info(f"{self.kind} informer: resourceVersion expired, relisting")
+                    self._stats["relists_410"] += 1
+                    self.store.resource_version = None
+                    continue
+                failures += 1
+                self._failed(e, failures)
+            except Exception as e:
+                failures += 1
+                self._failed(e, failures)
+
+    def relist(self):
+        """List every object and replace the store contents."""
+        try:
+            result = self.list_func()
+        except Exception:
+            # Stale data must not be served while the cluster is unreachable
+            self._synced.clear()
+            raise
+        items = list(result.items or [])
+        self.store.replace(items, result.metadata.resource_version)
+        self._last_list = time.monotonic()
+        self._stats["lists"] += 1
+        self._synced.set()
+        for obj in items:
+            self._notify("MODIFIED", obj)
+        logger.debug(f"{self.kind} informer listed {len(items)} objects "
+                     f"at resourceVersion {self.store.resource_version}")
+
+    def watch(self):
+        """Follow changes from the store's resourceVersion until the watch times out."""
+        w = self.watch_factory()
+        self._watch = w
+        self._stats["watches"] += 1
+        try:
+            for event in w.stream(
+                self.list_func,
+                resource_version=self.store.resource_version,
+                timeout_seconds=self.watch_timeout_seconds,
+                allow_watch_bookmarks=True,
+                _request_timeout=self.watch_timeout_seconds + 30
+            ):
+                self.apply_event(event)
+                if self._stop.is_set() or self._resync_due():
+                    w.stop()
+                    break
+        finally:
+            self._watch = None
+
+    def apply_event(self, event: Dict[str, Any]):
+        """
+        Apply one watch event to the store.
+
+        Args:
+            event: Event from kubernetes.watch.Watch.stream()
+        """
+        event_type = event["type"]
+        obj = event["object"]
+
+        if event_type == "BOOKMARK":
+            raw = event.get("raw_object") or {}
+            version = (raw.get("metadata") or {}).get("resourceVersion")
+            if version:
+                self.store.resource_version = version
+            return
+        if event_type == "ERROR":
+            raw = event.get("raw_object") or {}
+            raise ApiException(status=raw.get("code"), reason=raw.get("message"))
+
+        self._stats["events"] += 1
+        if event_type == "DELETED":
+            self.store.delete(obj)
+        else:
+            self.store.upsert(obj)
+        self.store.resource_version = obj.metadata.resource_version or self.store.resource_version
+        self._notify(event_type, obj)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get informer counters.
+
+        Returns:
+            Dictionary with list/watch/event counts, store size and sync state
+        """
+        return {
+            **self._stats,
+            "objects": len(self.store),
+            "synced": self.synced,
+            "resource_version": self.store.resource_version,
+        }
+
+    def _resync_due(self) -> bool:
+        return bool(self.resync_seconds) and time.monotonic() - self._last_list >= self.resync_seconds
+
+    def _notify(self, event_type: str, obj: Any):
+        for handler in self._handlers:
+            try:
+                handler(event_type, obj)
+            except Exception as e:
+                logger.error(f"{self.kind} informer handler failed: {e}")
+
+    def _failed(self, error: Exception, failures: int):
+        self._stats["errors"] += 1
+        delay = min(self.backoff_max_seconds, 2 ** min(failures, 10)) * random.uniform(0.5, 1.0)
+        logger.warning(f"{self.kind} informer error (retry in {delay:.1f}s): {error}")
+        self._stop.wait(delay)
+
+
+class InformerManager:
+    """Registry of running informers, keyed by cluster and kind."""
+
+    def __init__(self):
+        self._informers: Dict[str, Dict[str, Informer]] = {}
+        self._lock = threading.Lock()
+
+    def ensure(
+        self,
+        cluster: str,
+        api_client_factory: Callable[[], Any],
+        kinds: Iterable[str]
+    ) -> Dict[str, Informer]:
+        """
+        Start informers for the kinds that are not running yet.
+
+        Args:
+            cluster: Cluster key (see cluster_key())
+            api_client_factory: Returns a kubernetes ApiClient for the
+                cluster; only called when an informer has to be created
+            kinds: Resource kinds from RESOURCE_KINDS
+
+        Returns:
+            Informers of the requested kinds
+        """
+        kinds = [k for k in kinds if k in RESOURCE_KINDS]
+        with self._lock:
+            informers = self._informers.setdefault(cluster, {})
+            missing = [k for k in kinds if k not in informers]
+            if missing:
+                api_client = api_client_factory()
+                for kind in missing:
+                    api_class, method = RESOURCE_KINDS[kind]
+                    api = getattr(client, api_class)(api_client)
+                    informer = Informer(kind, getattr(api, method))
+                    informers[kind] = informer
+                    informer.start()
+                    logger.info(f"Started {kind} informer for cluster {cluster}")
+            return {k: informers[k] for k in kinds}
+
+    def register(self, cluster: str, informer: Informer, start: bool = True) -> Informer:
+        """
+        Register a prebuilt informer (replacing any for the same kind).
+
+        Args:
+            cluster: Cluster key
+            informer: Informer to register
+            start: Whether to start its loop
+
+        Returns:
+            The informer
+        """
+        with self._lock:
+            previous = self._informers.setdefault(cluster, {}).get(informer.kind)
+            self._informers[cluster][informer.kind] = informer
+        if previous is not None:
+            previous.stop()
+        if start:
+            informer.start()
+        return informer
+
+    def get(self, cluster: str, kind: str) -> Optional[Informer]:
+        """Get the informer for a kind, if one is registered."""
+        return self._informers.get(cluster, {}).get(kind)
+
+    def synced_store(self, cluster: str, kind: str) -> Optional[ResourceStore]:
+        """
+        Get the store for a kind if its informer has synced.
+
+        Args:
+            cluster: Cluster key
+            kind: Resource kind
+
+        Returns:
+            ResourceStore, or None when the caller should query the API
+        """
+        informer = self.get(cluster, kind)
+        if informer is None or not informer.synced:
+            return None
+        return informer.store
+
+    def stop_cluster(self, cluster: str):
+        """Stop and forget every informer of a cluster."""
+        with self._lock:
+            informers = self._informers.pop(cluster, {})
+        for informer in informers.values():
+            informer.stop()
+
+    def stop_all(self):
+        """Stop every informer."""
+        for cluster in list(self._informers):
+            self.stop_cluster(cluster)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-cluster informer stats.
+
+        Returns:
+            {cluster: {kind: stats}}
+        """
+        return {
+            cluster: {kind: informer.get_stats() for kind, informer in informers.items()}
+            for cluster, informers in list(self._informers.items())
+        }
+
+
+# Global informer manager instance
+_informer_manager: Optional[InformerManager] = None
+
+
+def get_informer_manager() -> InformerManager:
+    """
+    Get or create global informer manager instance.
+
+    Returns:
+        InformerManager instance
+    """
+    global _informer_manager
+
+    if _informer_manager is None:
+        _informer_manager = InformerManager()
+
+    return _informer_manager
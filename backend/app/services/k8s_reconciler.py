@@ -3,12 +3,36 @@ Kubernetes Reconciler Service
 
 Implements the reconciliation loop for Kubernetes resources managed by Unity.
 Compares desired state with actual cluster state and applies changes when drift is detected.
+
+Drift is judged only on the fields the desired manifest sets, so values the
+API server defaults are not drift, and changes are written with server-side
+apply under Unity's field manager. The normalized manifest hash and the live
+resourceVersion of the last clean reconcile are stored on KubernetesResource;
+while both are unchanged the resource is skipped without an API call.
+
+Current state is read from the cluster's informer store (one watch per managed
+kind) when it has synced; drift seen in the cache is confirmed with a direct
+read before anything is applied.
+
+ReconciliationEngine runs the loop in the background: a bounded worker pool
+drains a rate-limited queue of resource ids fed by the periodic resync and
+by informer watch events, using one long-lived API client per cluster.
 """
 
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
 import json
 import logging
+import re
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, List, Optional, Any, Set, Tuple
 import traceback
 
 from sqlalchemy.orm import Session
@@ -17,15 +41,220 @@ from sqlalchemy import and_
 try:
     from kubernetes import client, config
     from kubernetes.client.rest import ApiException
+    from kubernetes.dynamic import DynamicClient
+    from kubernetes.dynamic.exceptions import NotFoundError
     KUBERNETES_AVAILABLE = True
 except ImportError:
     KUBERNETES_AVAILABLE = False
     logging.warning("kubernetes client library not installed. K8s reconciliation will be disabled.")
 
 from app import models
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.k8s_informer import cluster_key, get_informer_manager
+from app.services.k8s_work_queue import RateLimitedQueue
 
 logger = logging.getLogger(__name__)
 
+# Field manager Unity's server-side applies are recorded under
+FIELD_MANAGER = "unity"
+
+# Metadata the API server sets; never part of a desired manifest
+SERVER_METADATA_FIELDS = (
+    "uid", "resourceVersion", "generation", "creationTimestamp", "managedFields",
+    "selfLink", "deletionTimestamp", "deletionGracePeriodSeconds",
+)
+
+_QUANTITY_RE = re.compile(r"^([+-]?[0-9.]+)(m|k|M|G|T|P|E|Ki|Mi|Gi|Ti|Pi|Ei)?$")
+_QUANTITY_SUFFIXES = {
+    None: Decimal(1), "m": Decimal("0.001"),
+    "k": Decimal(10) ** 3, "M": Decimal(10) ** 6, "G": Decimal(10) ** 9,
+    "T": Decimal(10) ** 12, "P": Decimal(10) ** 15, "E": Decimal(10) ** 18,
+    "Ki": Decimal(2) ** 10, "Mi": Decimal(2) ** 20, "Gi": Decimal(2) ** 30,
+    "Ti": Decimal(2) ** 40, "Pi": Decimal(2) ** 50, "Ei": Decimal(2) ** 60,
+}
+
+# Long-lived API clients per cluster id, with the settings they were built from
+_cluster_clients: Dict[int, Tuple[Tuple[Optional[str], Optional[str]], "client.ApiClient"]] = {}
+_cluster_clients_lock = threading.Lock()
+
+
+def get_cluster_api_client(cluster: models.KubernetesCluster) -> "client.ApiClient":
+    """
+    Get the shared API client for a cluster, building it on first use.
+
+    Each client carries its own Configuration, so clusters never share the
+    process-wide default that config.load_kube_config() overwrites. A client
+    is rebuilt when the cluster's kubeconfig path or context changes.
+
+    Args:
+        cluster: KubernetesCluster model instance
+
+    Returns:
+        Kubernetes ApiClient
+    """
+    fingerprint = (cluster.kubeconfig_path, cluster.context_name)
+    with _cluster_clients_lock:
+        cached = _cluster_clients.get(cluster.id)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        if cluster.kubeconfig_path:
+            api_client = config.new_client_from_config(
+                config_file=cluster.kubeconfig_path,
+                context=cluster.context_name,
+                persist_config=False
+            )
+        else:
+            configuration = client.Configuration()
+            config.load_incluster_config(client_configuration=configuration)
+            api_client = client.ApiClient(configuration)
+
+        _cluster_clients[cluster.id] = (fingerprint, api_client)
+        return api_client
+
+
+def discard_cluster_api_client(cluster_id: int):
+    """Drop a cached cluster client (e.g. after its credentials changed)."""
+    with _cluster_clients_lock:
+        _cluster_clients.pop(cluster_id, None)
+
+
+# Dynamic clients (with their discovery cache) per ApiClient
+_dynamic_clients: "weakref.WeakKeyDictionary[client.ApiClient, DynamicClient]" = weakref.WeakKeyDictionary()
+_dynamic_clients_lock = threading.Lock()
+
+
+def get_dynamic_client(api_client: "client.ApiClient") -> "DynamicClient":
+    """
+    Get the dynamic client for an API client, running discovery on first use.
+
+    Args:
+        api_client: Kubernetes ApiClient
+
+    Returns:
+        DynamicClient covering every kind the cluster serves
+    """
+    with _dynamic_clients_lock:
+        dynamic = _dynamic_clients.get(api_client)
+        if dynamic is None:
+            dynamic = DynamicClient(api_client)
+            _dynamic_clients[api_client] = dynamic
+        return dynamic
+
+
+def normalize_manifest(desired_state: Dict[str, Any], resource: models.KubernetesResource) -> Dict[str, Any]:
+    """
+    Build the manifest Unity applies for a resource.
+
+    Identity comes from the resource row; status, server-set metadata and
+    null values are dropped so the manifest (and its hash) only changes
+    when the user's intent does.
+
+    Args:
+        desired_state: Stored desired manifest
+        resource: KubernetesResource model
+
+    Returns:
+        Normalized manifest
+    """
+    manifest = _drop_nulls(copy.deepcopy(desired_state or {}))
+    manifest.pop("status", None)
+    manifest["apiVersion"] = manifest.get("apiVersion") or resource.api_version or "v1"
+    manifest["kind"] = resource.kind
+
+    metadata = manifest.setdefault("metadata", {})
+    for field in SERVER_METADATA_FIELDS:
+        metadata.pop(field, None)
+    metadata["name"] = resource.name
+    if resource.namespace:
+        metadata["namespace"] = resource.namespace
+    return manifest
+
+
+def desired_state_hash(desired_state: Dict[str, Any]) -> str:
+    """Stable hash of a desired manifest."""
+    canonical = json.dumps(desired_state, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def managed_fields_diff(desired: Any, live: Any, path: str = "") -> Dict[str, Dict[str, Any]]:
+    """
+    Compare the fields a manifest sets with their live values.
+
+    Fields only present on the live object (server defaults, fields owned by
+    other managers) are ignored. Lists of named objects (containers, ports,
+    env, volumes) are matched by name; other lists must match element-wise.
+    Scalars compare equal across int/str and resource quantity spellings
+    ("0.5" == "500m", "1Gi" == "1073741824").
+
+    Args:
+        desired: Desired value
+        live: Live value
+        path: Field path of desired (for the result keys)
+
+    Returns:
+        {field path: {"desired": ..., "current": ...}} for every mismatch
+    """
+    if isinstance(desired, dict):
+        if not isinstance(live, dict):
+            return {path or ".": {"desired": desired, "current": live}}
+        differences = {}
+        for key, value in desired.items():
+            differences.update(managed_fields_diff(value, live.get(key), f"{path}.{key}" if path else key))
+        return differences
+
+    if isinstance(desired, list):
+        if not isinstance(live, list):
+            return {path: {"desired": desired, "current": live}}
+        if desired and all(isinstance(item, dict) and "name" in item for item in desired):
+            live_by_name = {item.get("name"): item for item in live if isinstance(item, dict)}
+            differences = {}
+            for item in desired:
+                differences.update(managed_fields_diff(
+                    item, live_by_name.get(item["name"]), f"{path}[{item['name']}]"
+                ))
+            return differences
+        if len(desired) != len(live):
+            return {path: {"desired": desired, "current": live}}
+        differences = {}
+        for index, (item, live_item) in enumerate(zip(desired, live)):
+            differences.update(managed_fields_diff(item, live_item, f"{path}[{index}]"))
+        return differences
+
+    if _scalars_equal(desired, live):
+        return {}
+    return {path: {"desired": desired, "current": live}}
+
+
+def _scalars_equal(desired: Any, live: Any) -> bool:
+    if desired == live:
+        return True
+    if desired is None or live is None or isinstance(desired, bool) or isinstance(live, bool):
+        return False
+    if str(desired) == str(live):
+        return True
+    desired_quantity, live_quantity = _parse_quantity(desired), _parse_quantity(live)
+    return desired_quantity is not None and desired_quantity == live_quantity
+
+
+def _parse_quantity(value: Any) -> Optional[Decimal]:
+    match = _QUANTITY_RE.match(str(value))
+    if not match:
+        return None
+    try:
+        return Decimal(match.group(1)) * _QUANTITY_SUFFIXES[match.group(2)]
+    except InvalidOperation:
+        return None
+
+
+def _drop_nulls(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _drop_nulls(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_drop_nulls(v) for v in value]
+    return value
+
 
 class KubernetesReconciler:
     """
@@ -35,7 +264,6 @@ class KubernetesReconciler:
 
     def __init__(self, db: Session, tenant_id: str = "default"):
         self.db = db
-        self._api_clients = {}  # Cache of API clients per cluster
 
         if not KUBERNETES_AVAILABLE:
             logger.warning("Kubernetes client not available. Reconciliation will be skipped.")
@@ -53,27 +281,8 @@ class KubernetesReconciler:
         if not KUBERNETES_AVAILABLE:
             return None
 
-        # Check cache
-        if cluster.id in self._api_clients:
-            return self._api_clients[cluster.id]
-
         try:
-            # Load kubeconfig
-            if cluster.kubeconfig_path:
-                # Load from file path
-                config.load_kube_config(
-                    config_file=cluster.kubeconfig_path,
-                    context=cluster.context_name
-                )
-            else:
-                # Try in-cluster config
-                config.load_incluster_config()
-
-            api_client = client.ApiClient()
-            self._api_clients[cluster.id] = api_client
-
-            logger.info(f"Connected to cluster: {cluster.name}")
-            return api_client
+            return get_cluster_api_client(cluster)
 
         except Exception as e:
             logger.error(f"Failed to connect to cluster {cluster.name}: {e}")
@@ -84,9 +293,9 @@ class KubernetesReconciler:
             self.db.commit()
             return None
 
-    def _get_dynamic_client(self, api_client: client.ApiClient, api_version: str, kind: str):
+    def _get_dynamic_resource(self, api_client: client.ApiClient, api_version: str, kind: str):
         """
-        Get the appropriate Kubernetes API client for a resource type.
+        Get the dynamic API resource for a kind.
 
         Args:
             api_client: Base ApiClient
@@ -94,45 +303,15 @@ class KubernetesReconciler:
             kind: Resource kind (e.g., "Deployment", "Service")
 
         Returns:
-            Appropriate API client class instance
+            kubernetes.dynamic Resource (from the client's cached discovery)
         """
-        # Map common resource types to their API clients
-        api_map = {
-            # Core v1
-            ("v1", "Pod"): client.CoreV1Api,
-            ("v1", "Service"): client.CoreV1Api,
-            ("v1", "ConfigMap"): client.CoreV1Api,
-            ("v1", "Secret"): client.CoreV1Api,
-            ("v1", "PersistentVolumeClaim"): client.CoreV1Api,
-            ("v1", "Namespace"): client.CoreV1Api,
-
-            # Apps v1
-            ("apps/v1", "Deployment"): client.AppsV1Api,
-            ("apps/v1", "StatefulSet"): client.AppsV1Api,
-            ("apps/v1", "DaemonSet"): client.AppsV1Api,
-            ("apps/v1", "ReplicaSet"): client.AppsV1Api,
-
-            # Batch
-            ("batch/v1", "Job"): client.BatchV1Api,
-            ("batch/v1", "CronJob"): client.BatchV1Api,
-
-            # Networking
-            ("networking.k8s.io/v1", "Ingress"): client.NetworkingV1Api,
-        }
-
-        key = (api_version, kind)
-        api_class = api_map.get(key)
-
-        if not api_class:
-            logger.warning(f"No API client mapping for {api_version}/{kind}, using CoreV1Api as fallback")
-            api_class = client.CoreV1Api
-
-        return api_class(api_client)
+        return get_dynamic_client(api_client).resources.get(api_version=api_version, kind=kind)
 
     def _get_resource_from_cluster(
         self,
         api_client: client.ApiClient,
-        resource: models.KubernetesResource
+        resource: models.KubernetesResource,
+        manifest: Dict[str, Any]
     ) -> Optional[Dict]:
         """
         Fetch current state of a resource from the cluster.
@@ -140,77 +319,91 @@ class KubernetesReconciler:
         Args:
             api_client: Kubernetes ApiClient
             resource: KubernetesResource model
+            manifest: Normalized desired manifest (see normalize_manifest())
 
         Returns:
             Resource as dict or None if not found
         """
         try:
-            api = self._get_dynamic_client(api_client, resource.api_version, resource.kind)
-
-            # Map resource kinds to their read methods
-            if resource.kind == "Deployment":
-                result = api.read_namespaced_deployment(
-                    name=resource.name,
-                    namespace=resource.namespace
-                )
-            elif resource.kind == "Service":
-                result = api.read_namespaced_service(
-                    name=resource.name,
-                    namespace=resource.namespace
-                )
-            elif resource.kind == "ConfigMap":
-                result = api.read_namespaced_config_map(
-                    name=resource.name,
-                    namespace=resource.namespace
-                )
-            elif resource.kind == "Secret":
-                result = api.read_namespaced_secret(
-                    name=resource.name,
-                    namespace=resource.namespace
-                )
-            elif resource.kind == "StatefulSet":
-                result = api.read_namespaced_stateful_set(
-                    name=resource.name,
-                    namespace=resource.namespace
-                )
-            elif resource.kind == "DaemonSet":
-                result = api.read_namespaced_daemon_set(
-                    name=resource.name,
-                    namespace=resource.namespace
-                )
-            elif resource.kind == "Ingress":
-                result = api.read_namespaced_ingress(
-                    name=resource.name,
-                    namespace=resource.namespace
-                )
-            elif resource.kind == "Job":
-                result = api.read_namespaced_job(
-                    name=resource.name,
-                    namespace=resource.namespace
-                )
-            elif resource.kind == "PersistentVolumeClaim":
-                result = api.read_namespaced_persistent_volume_claim(
-                    name=resource.name,
-                    namespace=resource.namespace
-                )
-            else:
-                logger.warning(f"Unsupported resource kind: {resource.kind}")
-                return None
-
-            # Convert to dict
-            return api_client.sanitize_for_serialization(result)
+            api = self._get_dynamic_resource(api_client, manifest["apiVersion"], resource.kind)
+            result = api.get(
+                name=resource.name,
+                namespace=resource.namespace if api.namespaced else None
+            )
+            return result.to_dict()
 
+        except NotFoundError:
+            logger.info(f"Resource {resource.namespace}/{resource.name} not found in cluster")
+            return None
         except ApiException as e:
-            if e.status == 404:
-                logger.info(f"Resource {resource.namespace}/{resource.name} not found in cluster")
-                return None
-            else:
-                logger.error(f"Error fetching resource {resource.namespace}/{resource.name}: {e}")
-                raise
+            logger.error(f"Error fetching resource {resource.namespace}/{resource.name}: {e}")
+            raise
         except Exception as e:
             logger.error(f"Unexpected error fetching resource: {e}")
             raise
 
+    def _get_cached_resource(
+        self,
+        cluster: models.KubernetesCluster,
+        api_client: client.ApiClient,
+        resource: models.KubernetesResource
+    ):
+        """
+        Look a resource up in the cluster's informer store.
+
+        Args:
+            cluster: KubernetesCluster model instance
+            api_client: Kubernetes ApiClient (used to start the informer)
+            resource: KubernetesResource model
+
+        Returns:
+            Tuple of (found, state): found is False when the store cannot
+            answer yet and the API has to be queried
+        """
+        found, obj = self._get_cached_object(cluster, api_client, resource)
+        if not found or obj is None:
+            return found, None
+        return True, api_client.sanitize_for_serialization(obj)
+
+    def _get_cached_object(
+        self,
+        cluster: models.KubernetesCluster,
+        api_client: client.ApiClient,
+        resource: models.KubernetesResource
+    ):
+        """Like _get_cached_resource(), returning the raw model object."""
+        if not settings.k8s_informers_enabled:
+            return False, None
+
+        try:
+            key = self._cluster_key(cluster)
+            manager = get_informer_manager()
+            manager.ensure(key, lambda: api_client, [resource.kind])
+            store = manager.synced_store(key, resource.kind)
+        except Exception as e:
+            logger.debug(f"Informer store unavailable for {resource.kind}: {e}")
+            return False, None
+
+        if store is None:
+            return False, None
+        return True, store.get(resource.namespace, resource.name)
+
+    def _cached_resource_version(
+        self,
+        cluster: models.KubernetesCluster,
+        resource: models.KubernetesResource
+    ) -> Optional[str]:
+        """resourceVersion of the live object in a synced informer store, if any."""
+        if not settings.k8s_informers_enabled:
+            return None
+        store = get_informer_manager().synced_store(self._cluster_key(cluster), resource.kind)
+        obj = store.get(resource.namespace, resource.name) if store is not None else None
+        return obj.metadata.resource_version if obj is not None else None
+
+    @staticmethod
+    def _cluster_key(cluster: models.KubernetesCluster) -> str:
+        return cluster_key(cluster.kubeconfig_path, cluster.context_name, in_cluster=not cluster.kubeconfig_path)
+
     def _detect_drift(
         self,
         desired_state: Dict,
@@ -219,56 +412,22 @@ class KubernetesReconciler:
         """
         Compare desired state with current state to detect drift.
 
+        Only fields present in the desired manifest are compared, so values
+        the API server defaults or other controllers own are not drift.
+
         Args:
-            desired_state: Desired resource manifest
+            desired_state: Normalized desired manifest
             current_state: Current resource state from cluster
 
         Returns:
-            Tuple of (drift_detected: bool, differences: dict)
+            Tuple of (drift_detected: bool, differences: dict keyed by field path)
         """
         if current_state is None:
             # Resource doesn't exist - that's drift
             return True, {"reason": "resource_not_found", "action": "create"}
 
-        # Compare key fields (ignoring runtime/status fields)
-        differences = {}
-
-        # Compare spec
-        desired_spec = desired_state.get("spec", {})
-        current_spec = current_state.get("spec", {})
-
-        if desired_spec != current_spec:
-            differences["spec"] = {
-                "desired": desired_spec,
-                "current": current_spec
-            }
-
-        # Compare metadata (labels, annotations)
-        desired_metadata = desired_state.get("metadata", {})
-        current_metadata = current_state.get("metadata", {})
-
-        # Check labels
-        desired_labels = desired_metadata.get("labels", {})
-        current_labels = current_metadata.get("labels", {})
-        if desired_labels != current_labels:
-            differences["labels"] = {
-                "desired": desired_labels,
-                "current": current_labels
-            }
-
-        # Check annotations (filter out system annotations)
-        desired_annotations = desired_metadata.get("annotations", {})
-        current_annotations = current_metadata.get("annotations", {})
-        # Filter out kubectl annotations
-        current_annotations = {
-            k: v for k, v in current_annotations.items()
-            if not k.startswith("kubectl.kubernetes.io/")
-        }
-        if desired_annotations != current_annotations:
-            differences["annotations"] = {
-                "desired": desired_annotations,
-                "current": current_annotations
-            }
+        managed = {k: v for k, v in desired_state.items() if k not in ("apiVersion", "kind")}
+        differences = managed_fields_diff(managed, current_state)
 
         drift_detected = len(differences) > 0
         return drift_detected, differences if drift_detected else None
@@ -281,163 +440,38 @@ class KubernetesReconciler:
         current_state: Optional[Dict]
     ) -> Dict:
         """
-        Apply desired state to the cluster.
+        Apply desired state to the cluster with server-side apply.
+
+        The same request creates or updates the object; Unity's field manager
+        takes ownership of the fields in the manifest and leaves the rest alone.
 
         Args:
             api_client: Kubernetes ApiClient
             resource: KubernetesResource model
-            desired_state: Desired manifest to apply
+            desired_state: Normalized desired manifest to apply
             current_state: Current state (None if resource doesn't exist)
 
         Returns:
             Dict with result information
         """
         try:
-            api = self._get_dynamic_client(api_client, resource.api_version, resource.kind)
-
-            # Prepare body from desired state
-            body = desired_state.copy()
-
-            # Ensure metadata is set
-            if "metadata" not in body:
-                body["metadata"] = {}
-            body["metadata"]["name"] = resource.name
-            body["metadata"]["namespace"] = resource.namespace
-
-            # Apply the resource
-            if current_state is None:
-                # Create new resource
-                logger.info(f"Creating {resource.kind} {resource.namespace}/{resource.name}")
-
-                if resource.kind == "Deployment":
-                    result = api.create_namespaced_deployment(
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "Service":
-                    result = api.create_namespaced_service(
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "ConfigMap":
-                    result = api.create_namespaced_config_map(
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "Secret":
-                    result = api.create_namespaced_secret(
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "StatefulSet":
-                    result = api.create_namespaced_stateful_set(
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "DaemonSet":
-                    result = api.create_namespaced_daemon_set(
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "Ingress":
-                    result = api.create_namespaced_ingress(
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "Job":
-                    result = api.create_namespaced_job(
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "PersistentVolumeClaim":
-                    result = api.create_namespaced_persistent_volume_claim(
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                else:
-                    return {
-                        "success": False,
-                        "error": f"Unsupported resource kind for creation: {resource.kind}"
-                    }
-
-                action = "created"
-            else:
-                # Update existing resource
-                logger.info(f"Updating {resource.kind} {resource.namespace}/{resource.name}")
-
-                # Preserve resourceVersion for updates
-                if "resourceVersion" in current_state.get("metadata", {}):
-                    body["metadata"]["resourceVersion"] = current_state["metadata"]["resourceVersion"]
-
-                if resource.kind == "Deployment":
-                    result = api.patch_namespaced_deployment(
-                        name=resource.name,
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "Service":
-                    result = api.patch_namespaced_service(
-                        name=resource.name,
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "ConfigMap":
-                    result = api.patch_namespaced_config_map(
-                        name=resource.name,
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "Secret":
-                    result = api.patch_namespaced_secret(
-                        name=resource.name,
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "StatefulSet":
-                    result = api.patch_namespaced_stateful_set(
-                        name=resource.name,
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "DaemonSet":
-                    result = api.patch_namespaced_daemon_set(
-                        name=resource.name,
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "Ingress":
-                    result = api.patch_namespaced_ingress(
-                        name=resource.name,
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "Job":
-                    result = api.patch_namespaced_job(
-                        name=resource.name,
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                elif resource.kind == "PersistentVolumeClaim":
-                    result = api.patch_namespaced_persistent_volume_claim(
-                        name=resource.name,
-                        namespace=resource.namespace,
-                        body=body
-                    )
-                else:
-                    return {
-                        "success": False,
-                        "error": f"Unsupported resource kind for update: {resource.kind}"
-                    }
+            api = self._get_dynamic_resource(api_client, desired_state["apiVersion"], resource.kind)
 
-                action = "updated"
+            action = "created" if current_state is None else "updated"
+            logger.info(f"Applying {resource.kind} {resource.namespace}/{resource.name} ({action})")
 
-            # Convert result to dict
-            result_dict = api_client.sanitize_for_serialization(result)
+            result = api.server_side_apply(
+                body=desired_state,
+                name=resource.name,
+                namespace=resource.namespace if api.namespaced else None,
+                field_manager=FIELD_MANAGER,
+                force_conflicts=True
+            )
 
             return {
                 "success": True,
                 "action": action,
-                "state": result_dict
+                "state": result.to_dict()
             }
 
         except ApiException as e:
@@ -462,6 +496,19 @@ class KubernetesReconciler:
         Args:
             resource_id: ID of the KubernetesResource to reconcile
 
+        Returns:
+            Dict with reconciliation result
+        """
+        return self.reconcile_resource_sync(resource_id)
+
+    def reconcile_resource_sync(self, resource_id: int, triggered_by: str = 'scheduler') -> Dict[str, Any]:
+        """
+        Blocking implementation of reconcile_resource(), for worker threads.
+
+        Args:
+            resource_id: ID of the KubernetesResource to reconcile
+            triggered_by: Recorded on the ResourceReconciliation row
+
         Returns:
             Dict with reconciliation result
         """
@@ -492,12 +539,20 @@ class KubernetesReconciler:
                 logger.warning(f"Cluster for resource {resource_id} is not active")
                 return {"success": False, "error": "Cluster not active"}
 
+            # Nothing to do if neither side changed since the last clean reconcile
+            manifest = normalize_manifest(resource.desired_state, resource)
+            desired_hash = desired_state_hash(manifest)
+            if resource.desired_hash == desired_hash and resource.observed_resource_version:
+                live_version = self._cached_resource_version(cluster, resource)
+                if live_version == resource.observed_resource_version:
+                    return {"success": True, "skipped": True, "reason": "unchanged"}
+
             # Create reconciliation record
             reconciliation = models.ResourceReconciliation(
                 resource_id=resource.id,
                 started_at=start_time,
                 status='in_progress',
-                triggered_by='scheduler'
+                triggered_by=triggered_by
             )
             self.db.add(reconciliation)
             self.db.commit()
@@ -518,14 +573,18 @@ class KubernetesReconciler:
                 self.db.commit()
                 return {"success": False, "error": error_msg}
 
-            # Fetch current state from cluster
-            current_state = self._get_resource_from_cluster(api_client, resource)
+            # Fetch current state, from the informer cache when possible
+            cached, current_state = self._get_cached_resource(cluster, api_client, resource)
+            if not cached:
+                current_state = self._get_resource_from_cluster(api_client, resource, manifest)
 
             # Detect drift
-            drift_detected, differences = self._detect_drift(
-                resource.desired_state,
-                current_state
-            )
+            drift_detected, differences = self._detect_drift(manifest, current_state)
+
+            if drift_detected and cached:
+                # The cache may trail the cluster slightly; confirm before applying
+                current_state = self._get_resource_from_cluster(api_client, resource, manifest)
+                drift_detected, differences = self._detect_drift(manifest, current_state)
 
             resource.drift_detected = drift_detected
             reconciliation.previous_state = current_state
@@ -545,15 +604,16 @@ class KubernetesReconciler:
                 apply_result = self._apply_resource(
                     api_client,
                     resource,
-                    resource.desired_state,
+                    manifest,
                     current_state
                 )
 
                 if apply_result["success"]:
-                    # Fetch updated state
-                    new_state = self._get_resource_from_cluster(api_client, resource)
+                    # Server-side apply returns the updated object
+                    new_state = apply_result["state"]
 
                     resource.current_state = new_state
+                    self._mark_observed(resource, desired_hash, new_state)
                     resource.reconciliation_status = 'success'
                     resource.last_error = None
                     reconciliation.status = 'success'
@@ -564,6 +624,7 @@ class KubernetesReconciler:
                     result["changes_applied"] = True
                 else:
                     # Failed to apply
+                    self._mark_observed(resource, None, None)
                     resource.reconciliation_status = 'failed'
                     resource.last_error = apply_result.get("error", "Unknown error")
                     reconciliation.status = 'failed'
@@ -582,6 +643,8 @@ class KubernetesReconciler:
 
                 result["action"] = "no_change"
 
+                self._mark_observed(resource, desired_hash, current_state)
+
             # Update timestamps
             resource.last_reconciled = datetime.now(timezone.utc)
             reconciliation.completed_at = datetime.now(timezone.utc)
@@ -601,6 +664,7 @@ class KubernetesReconciler:
 
             # Update failure state
             if 'resource' in locals():
+                self._mark_observed(resource, None, None)
                 resource.reconciliation_status = 'failed'
                 resource.last_error = str(e)
 
@@ -616,6 +680,57 @@ class KubernetesReconciler:
                 "error": str(e)
             }
 
+    @staticmethod
+    def _mark_observed(
+        resource: models.KubernetesResource,
+        desired_hash: Optional[str],
+        live_state: Optional[Dict]
+    ):
+        """Record the manifest hash and live resourceVersion of a clean reconcile (None clears them)."""
+        resource.desired_hash = desired_hash
+        resource.observed_resource_version = ((live_state or {}).get("metadata") or {}).get("resourceVersion")
+
+    def get_active_clusters(self) -> List[models.KubernetesCluster]:
+        """
+        Get the clusters to reconcile.
+
+        Returns:
+            Active default cluster(s), or every active cluster if none is default
+        """
+        clusters = self.db.query(models.KubernetesCluster).filter(
+            and_(
+                models.KubernetesCluster.is_active == True,
+                models.KubernetesCluster.is_default == True
+            )
+        ).all()
+
+        # If no default cluster, use all active clusters
+        if not clusters:
+            clusters = self.db.query(models.KubernetesCluster).filter(
+                models.KubernetesCluster.is_active == True
+            ).all()
+        return clusters
+
+    def get_active_resources(self) -> List[models.KubernetesResource]:
+        """
+        Get the active resources of every cluster from get_active_clusters().
+
+        Returns:
+            List of KubernetesResource with their cluster loaded
+        """
+        clusters = {cluster.id: cluster for cluster in self.get_active_clusters()}
+        if not clusters:
+            return []
+        resources = self.db.query(models.KubernetesResource).filter(
+            and_(
+                models.KubernetesResource.cluster_id.in_(list(clusters)),
+                models.KubernetesResource.is_active == True
+            )
+        ).all()
+        for resource in resources:
+            resource.cluster = clusters[resource.cluster_id]
+        return resources
+
     async def reconcile_all(self) -> Dict[str, Any]:
         """
         Reconcile all active Kubernetes resources across all enabled clusters.
@@ -637,19 +752,7 @@ class KubernetesReconciler:
         }
 
         try:
-            # Get all active clusters (default cluster or all active clusters)
-            clusters = self.db.query(models.KubernetesCluster).filter(
-                and_(
-                    models.KubernetesCluster.is_active == True,
-                    models.KubernetesCluster.is_default == True
-                )
-            ).all()
-
-            # If no default cluster, use all active clusters
-            if not clusters:
-                clusters = self.db.query(models.KubernetesCluster).filter(
-                    models.KubernetesCluster.is_active == True
-                ).all()
+            clusters = self.get_active_clusters()
 
             logger.info(f"Found {len(clusters)} active cluster(s)")
 
@@ -703,3 +806,238 @@ class KubernetesReconciler:
             logger.error(traceback.format_exc())
             results["error"] = str(e)
             return results
+
+
+class ReconciliationEngine:
+    """
+    Long-lived reconciliation loop shared by all clusters.
+
+    Resource ids go through a RateLimitedQueue drained by a bounded pool of
+    workers, each reconciling one resource on its own database session. The
+    periodic resync() queues every active resource; informer watch events
+    queue just the resource whose live object changed. Resources whose
+    desired-state hash and live resourceVersion match their last clean
+    reconcile (stored on KubernetesResource) are skipped without an API
+    call, and failing resources are retried with exponential backoff
+    instead of on every tick.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.k8s_reconcile_workers,
+        session_factory: Callable[[], Session] = SessionLocal,
+        retry_base_seconds: float = settings.k8s_reconcile_retry_base_seconds,
+        retry_max_seconds: float = settings.k8s_reconcile_retry_max_seconds
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            workers: Number of resources reconciled concurrently
+            session_factory: Callable returning a new database session
+            retry_base_seconds: Delay before the first retry of a failing resource
+            retry_max_seconds: Upper bound of the retry delay
+        """
+        self.workers = max(1, workers)
+        self.session_factory = session_factory
+        self.queue = RateLimitedQueue(retry_base_seconds, retry_max_seconds)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # (cluster key, kind) -> {(namespace, name): resource id}, swapped whole on resync
+        self._watched: Dict[Tuple[str, str], Dict[Tuple[str, str], int]] = {}
+        self._handled_informers: Dict[Tuple[str, str], Any] = {}
+        self._resource_ids: Set[int] = set()
+        self._triggers: Dict[int, str] = {}
+        self._stats = {
+            "reconciled": 0, "skipped": 0, "failed": 0, "retried": 0,
+            "drift_detected": 0, "changes_applied": 0, "watch_triggers": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        """Start the workers on the running event loop."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self.queue.bind(self._loop)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="k8s-reconcile"
+        )
+        self._tasks = [
+            self._loop.create_task(self._worker(), name=f"k8s-reconcile-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Kubernetes reconciliation engine started with {self.workers} workers")
+
+    async def stop(self):
+        """Stop the workers; reconciles already running finish in the background."""
+        self.queue.shutdown()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def resync(self) -> int:
+        """
+        Queue every active resource and refresh the watch index.
+
+        Returns:
+            Number of resources queued
+        """
+        if not self.running:
+            self.start()
+        resource_ids = await self._loop.run_in_executor(self._executor, self._load_resources)
+        for resource_id in resource_ids:
+            self._triggers.setdefault(resource_id, "scheduler")
+            self.queue.add(resource_id)
+        return len(resource_ids)
+
+    def enqueue(self, resource_id: int, triggered_by: str = "manual"):
+        """Queue one resource from the event loop."""
+        self._triggers.setdefault(resource_id, triggered_by)
+        self.queue.add(resource_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get engine counters.
+
+        Returns:
+            Dictionary with reconcile outcomes, queue state and index size
+        """
+        return {
+            **self._stats,
+            **self.queue.get_stats(),
+            "workers": self.workers,
+            "resources": len(self._resource_ids),
+        }
+
+    def _load_resources(self) -> List[int]:
+        """Read active resources, start their informers and rebuild the watch index."""
+        db = self.session_factory()
+        try:
+            reconciler = KubernetesReconciler(db)
+            resources = reconciler.get_active_resources()
+            watched: Dict[Tuple[str, str], Dict[Tuple[str, str], int]] = {}
+            clusters: Dict[str, models.KubernetesCluster] = {}
+            for resource in resources:
+                key = KubernetesReconciler._cluster_key(resource.cluster)
+                clusters[key] = resource.cluster
+                watched.setdefault((key, resource.kind), {})[
+                    (resource.namespace or "", resource.name)
+                ] = resource.id
+            resource_ids = [resource.id for resource in resources]
+        finally:
+            db.close()
+
+        self._watched = watched
+        self._resource_ids = set(resource_ids)
+
+        if settings.k8s_informers_enabled and KUBERNETES_AVAILABLE:
+            self._watch_clusters(clusters, watched)
+        return resource_ids
+
+    def _watch_clusters(
+        self,
+        clusters: Dict[str, models.KubernetesCluster],
+        watched: Dict[Tuple[str, str], Dict[Tuple[str, str], int]]
+    ):
+        manager = get_informer_manager()
+        for key, cluster in clusters.items():
+            kinds = [kind for (cluster_key_, kind) in watched if cluster_key_ == key]
+            try:
+                informers = manager.ensure(key, lambda c=cluster: get_cluster_api_client(c), kinds)
+            except Exception as e:
+                logger.warning(f"Could not watch cluster {cluster.name}: {e}")
+                continue
+            for kind, informer in informers.items():
+                if self._handled_informers.get((key, kind)) is informer:
+                    continue
+                informer.add_handler(self._watch_handler(key, kind))
+                self._handled_informers[(key, kind)] = informer
+
+    def _watch_handler(self, key: str, kind: str):
+        def handle(event_type: str, obj: Any):
+            resource_id = self._watched.get((key, kind), {}).get(
+                (obj.metadata.namespace or "", obj.metadata.name)
+            )
+            if resource_id is not None and self._loop is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self._watch_triggered, resource_id)
+        return handle
+
+    def _watch_triggered(self, resource_id: int):
+        self._stats["watch_triggers"] += 1
+        self.enqueue(resource_id, "drift_detection")
+
+    async def _worker(self):
+        while True:
+            resource_id = await self.queue.get()
+            triggered_by = self._triggers.pop(resource_id, "scheduler")
+            try:
+                result = await self._loop.run_in_executor(
+                    self._executor, self._reconcile, resource_id, triggered_by
+                )
+            except asyncio.CancelledError:
+                self.queue.done(resource_id)
+                raise
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            self._record(resource_id, result)
+            self.queue.done(resource_id)
+
+    def _reconcile(self, resource_id: int, triggered_by: str) -> Dict[str, Any]:
+        db = self.session_factory()
+        try:
+            reconciler = KubernetesReconciler(db)
+            return reconciler.reconcile_resource_sync(resource_id, triggered_by=triggered_by)
+        finally:
+            db.close()
+
+    def _record(self, resource_id: int, result: Dict[str, Any]):
+        if result.get("success"):
+            self.queue.forget(resource_id)
+            if result.get("skipped"):
+                self._stats["skipped"] += 1
+                return
+            self._stats["reconciled"] += 1
+            if result.get("drift_detected"):
+                self._stats["drift_detected"] += 1
+            if result.get("changes_applied"):
+                self._stats["changes_applied"] += 1
+            return
+
+        self._stats["failed"] += 1
+        if resource_id not in self._resource_ids:
+            self.queue.forget(resource_id)
+            return
+        delay = self.queue.add_rate_limited(resource_id)
+        self._stats["retried"] += 1
+        logger.warning(
+            f"Reconciliation of resource {resource_id} failed "
+            f"(retry in {delay:.0f}s): {result.get('error')}"
+        )
+
+
+# Global reconciliation engine instance
+_reconciliation_engine: Optional[ReconciliationEngine] = None
+
+
+def get_reconciliation_engine() -> ReconciliationEngine:
+    """
+    Get or create global reconciliation engine instance.
+
+    Returns:
+        ReconciliationEngine instance
+    """
+    global _reconciliation_engine
+
+    if _reconciliation_engine is None:
+        _reconciliation_engine = ReconciliationEngine()
+
+    return _reconciliation_engine
@@ -0,0 +1,148 @@
+"""
+Rate-Limited Work Queue
+
+Asyncio work queue for reconciliation, modelled on client-go's workqueue:
+- An item is queued at most once; adding it again while queued is a no-op
+- An item added while a worker processes it is re-queued when the worker
+  calls done(), so one item is never processed by two workers at once
+- add_rate_limited() re-queues a failing item after an exponential backoff
+  that forget() resets once it succeeds
+
+add_threadsafe() may be called from other threads (e.g. informer watch
+handlers); everything else must run on the queue's event loop.
+"""
+import asyncio
+import logging
+from typing import Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitedQueue:
+    """Deduplicating asyncio work queue with per-item exponential backoff."""
+
+    def __init__(self, base_delay: float = 5.0, max_delay: float = 300.0):
+        """
+        Initialize work queue.
+
+        Args:
+            base_delay: Delay before the first retry of a failing item
+            max_delay: Upper bound of the retry delay
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._queue: "asyncio.Queue[Hashable]" = asyncio.Queue()
+        self._queued: Set[Hashable] = set()
+        self._processing: Set[Hashable] = set()
+        self._dirty: Set[Hashable] = set()
+        self._failures: Dict[Hashable, int] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._shutting_down = False
+
+    def add(self, item: Hashable):
+        """Queue an item unless it is already waiting."""
+        if self._shutting_down or item in self._queued:
+            return
+        if item in self._processing:
+            self._dirty.add(item)
+            return
+        self._queued.add(item)
+        self._queue.put_nowait(item)
+
+    def add_threadsafe(self, item: Hashable):
+        """Queue an item from any thread."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.add, item)
+
+    def add_after(self, item: Hashable, delay: float):
+        """
+        Queue an item after a delay.
+
+        A pending delayed add of the same item is kept if it fires sooner.
+
+        Args:
+            item: Item to queue
+            delay: Delay in seconds
+        """
+        if delay <= 0:
+            self.add(item)
+            return
+        loop = self._bind_loop()
+        when = loop.time() + delay
+        pending = self._timers.get(item)
+        if pending is not None:
+            if pending.when() <= when:
+                return
+            pending.cancel()
+        self._timers[item] = loop.call_at(when, self._fire_timer, item)
+
+    def add_rate_limited(self, item: Hashable) -> float:
+        """
+        Re-queue a failing item after its backoff.
+
+        Args:
+            item: Item to retry
+
+        Returns:
+            The delay used
+        """
+        failures = self._failures.get(item, 0)
+        self._failures[item] = failures + 1
+        delay = min(self.max_delay, self.base_delay * (2 ** failures))
+        self.add_after(item, delay)
+        return delay
+
+    def forget(self, item: Hashable):
+        """Reset an item's backoff after it succeeded."""
+        self._failures.pop(item, None)
+
+    def failures(self, item: Hashable) -> int:
+        """Number of consecutive failures recorded for an item."""
+        return self._failures.get(item, 0)
+
+    async def get(self) -> Hashable:
+        """Wait for the next item and mark it as processing."""
+        self._bind_loop()
+        item = await self._queue.get()
+        self._queued.discard(item)
+        self._processing.add(item)
+        return item
+
+    def done(self, item: Hashable):
+        """Mark an item as processed, re-queueing it if it was added meanwhile."""
+        self._processing.discard(item)
+        if item in self._dirty:
+            self._dirty.discard(item)
+            self.add(item)
+
+    def shutdown(self):
+        """Drop pending delayed adds and refuse new items."""
+        self._shutting_down = True
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Set the loop add_threadsafe() schedules onto."""
+        self._loop = loop
+
+    def get_stats(self):
+        return {
+            "queued": len(self._queued),
+            "processing": len(self._processing),
+            "delayed": len(self._timers),
+            "backing_off": len(self._failures),
+        }
+
+    def __len__(self) -> int:
+        return len(self._queued)
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    def _fire_timer(self, item: Hashable):
+        self._timers.pop(item, None)
+        self.add(item)
@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from app.models.monitoring import Alert, AlertChannel
 from app.models.alert_rules import AlertRule, AlertStatus
 from app.services.notifications import NotificationService
+from app.services.response_cache import TAG_ALERTS, invalidate_cache_tags
 
 logger = logging.getLogger(__name__)
 
@@ -83,6 +84,7 @@ class AlertLifecycleService:
         self.db.add(alert)
         self.db.commit()
         self.db.refresh(alert)
+        invalidate_cache_tags(TAG_ALERTS)
         
         logger.info(f"Alert triggered: {alert.id} for rule {rule.name}")
         
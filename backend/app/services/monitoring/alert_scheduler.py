@@ -85,21 +85,8 @@ class AlertScheduler:
                 logger.debug("No enabled alert rules to evaluate")
                 return
             
-            triggered_count = 0
-            resolved_count = 0
-            error_count = 0
-            
-            # Evaluate each rule
-            for rule in rules:
-                try:
-                    # Use the evaluator's evaluate_rule method
-                    triggered, resolved = evaluator.evaluate_rule(rule)
-                    triggered_count += triggered
-                    resolved_count += resolved
-                    
-                except Exception as e:
-                    error_count += 1
-                    logger.error(f"Error evaluating rule {rule.id} ({rule.name}): {e}", exc_info=True)
+            # All rules are evaluated in one set-based pass (constant query count)
+            triggered_count, resolved_count = evaluator.evaluate_rules(rules)
             
             # Log summary
             duration = (datetime.utcnow() - start_time).total_seconds()
@@ -107,8 +94,7 @@ class AlertScheduler:
                 f"Alert evaluation complete: "
                 f"{len(rules)} rules evaluated, "
                 f"{triggered_count} triggered, "
-                f"{resolved_count} auto-resolved, "
-                f"{error_count} errors "
+                f"{resolved_count} auto-resolved "
                 f"(duration: {duration:.2f}s)"
             )
             
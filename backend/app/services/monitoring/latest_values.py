@@ -0,0 +1,385 @@
+"""
+Latest Value Index
+
+Process-local index of the most recent value of every plugin metric, keyed by
+(plugin_id, metric_name), and of the most recent execution of every plugin.
+
+- The ingestion pipeline and execution engine update it as they write
+- At startup it is seeded from plugin_metrics / plugin_executions with one
+  windowed DISTINCT ON query each (ROW_NUMBER() on non-PostgreSQL databases)
+- Optionally every update is mirrored to Redis hashes so several API workers
+  serve the same current values; reads then go to Redis and fall back to the
+  local copy when Redis is unreachable
+
+Dashboard "current value" endpoints read from here instead of running an
+ORDER BY ... LIMIT 1 query per metric.
+"""
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+REDIS_METRICS_KEY = "unity:latest:metrics"
+REDIS_EXECUTIONS_KEY = "unity:latest:executions"
+
+# How long to stop using the Redis mirror after an error
+REDIS_RETRY_SECONDS = 30.0
+
+MetricKey = Tuple[str, str]
+
+
+def _epoch(value: datetime) -> float:
+    # Naive timestamps are local time, as produced by datetime.now()
+    return value.timestamp()
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+@dataclass
+class LatestValue:
+    """Most recent sample of one metric."""
+    plugin_id: str
+    metric_name: str
+    value: Any
+    timestamp: datetime
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"value": self.value, "timestamp": self.timestamp.isoformat()}
+
+
+@dataclass
+class LatestExecution:
+    """Most recent execution of one plugin."""
+    plugin_id: str
+    status: str
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+    duration_ms: Optional[int] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "plugin_id": self.plugin_id,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+        }
+
+
+class LatestValueIndex:
+    """Latest metric values and plugin executions, optionally shared via Redis."""
+
+    def __init__(self, redis_client=None):
+        """
+        Initialize index.
+
+        Args:
+            redis_client: Synchronous Redis client to mirror updates to
+                (None keeps the index process-local)
+        """
+        self.redis = redis_client
+        self._values: Dict[MetricKey, LatestValue] = {}
+        self._executions: Dict[str, LatestExecution] = {}
+        self._lock = threading.Lock()
+        self._redis_retry_at = 0.0
+        self.seeded = False
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def update_metrics(self, rows: Iterable[Any]) -> int:
+        """
+        Record metric samples, keeping only the newest per series.
+
+        Args:
+            rows: Objects with plugin_id, metric_name, value and timestamp
+                attributes (e.g. MetricRow)
+
+        Returns:
+            Number of series whose latest value changed
+        """
+        changed: List[LatestValue] = []
+        with self._lock:
+            for row in rows:
+                key = (row.plugin_id, row.metric_name)
+                current = self._values.get(key)
+                if current is not None and _epoch(current.timestamp) > _epoch(row.timestamp):
+                    continue
+                latest = LatestValue(row.plugin_id, row.metric_name, row.value, row.timestamp)
+                self._values[key] = latest
+                changed.append(latest)
+
+        if changed:
+            self._mirror(REDIS_METRICS_KEY, {
+                f"{v.plugin_id}|{v.metric_name}": json.dumps(
+                    {"value": v.value, "timestamp": v.timestamp.isoformat()}, default=str
+                )
+                for v in changed
+            })
+        return len(changed)
+
+    def update_execution(self, execution: LatestExecution) -> bool:
+        """
+        Record a plugin execution if it is newer than the known one.
+
+        Args:
+            execution: Finished execution
+
+        Returns:
+            True if the index changed
+        """
+        with self._lock:
+            current = self._executions.get(execution.plugin_id)
+            if current is not None and _epoch(current.started_at) > _epoch(execution.started_at):
+                return False
+            self._executions[execution.plugin_id] = execution
+
+        self._mirror(REDIS_EXECUTIONS_KEY, {
+            execution.plugin_id: json.dumps(execution.to_dict())
+        })
+        return True
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, plugin_id: str, metric_name: str) -> Optional[LatestValue]:
+        """Latest value of one metric, or None if never seen."""
+        return self.get_many([(plugin_id, metric_name)]).get((plugin_id, metric_name))
+
+    def get_many(self, keys: Iterable[MetricKey]) -> Dict[MetricKey, LatestValue]:
+        """
+        Latest values of several metrics.
+
+        Args:
+            keys: (plugin_id, metric_name) pairs
+
+        Returns:
+            Mapping of key to LatestValue for every key that has a value
+        """
+        keys = list(keys)
+        with self._lock:
+            result = {key: self._values[key] for key in keys if key in self._values}
+
+        shared = self._read_mirror(REDIS_METRICS_KEY, [f"{p}|{m}" for p, m in keys])
+        for (plugin_id, metric_name), raw in zip(keys, shared or []):
+            if raw is None:
+                continue
+            data = json.loads(raw)
+            remote = LatestValue(plugin_id, metric_name, data["value"], _parse_datetime(data["timestamp"]))
+            local = result.get((plugin_id, metric_name))
+            if local is None or _epoch(remote.timestamp) > _epoch(local.timestamp):
+                result[(plugin_id, metric_name)] = remote
+        return result
+
+    def get_executions(self, plugin_ids: Iterable[str]) -> Dict[str, LatestExecution]:
+        """
+        Latest executions of several plugins.
+
+        Args:
+            plugin_ids: Plugin identifiers
+
+        Returns:
+            Mapping of plugin_id to LatestExecution for plugins that have run
+        """
+        plugin_ids = list(plugin_ids)
+        with self._lock:
+            result = {pid: self._executions[pid] for pid in plugin_ids if pid in self._executions}
+
+        shared = self._read_mirror(REDIS_EXECUTIONS_KEY, plugin_ids)
+        for plugin_id, raw in zip(plugin_ids, shared or []):
+            if raw is None:
+                continue
+            data = json.loads(raw)
+            remote = LatestExecution(
+                plugin_id=plugin_id,
+                status=data["status"],
+                started_at=_parse_datetime(data["started_at"]),
+                completed_at=_parse_datetime(data.get("completed_at")),
+                duration_ms=data.get("duration_ms"),
+                error=data.get("error"),
+            )
+            local = result.get(plugin_id)
+            if local is None or _epoch(remote.started_at) > _epoch(local.started_at):
+                result[plugin_id] = remote
+        return result
+
+    # ------------------------------------------------------------------
+    # Seeding
+    # ------------------------------------------------------------------
+
+    def seed(self, db: Session, window: Optional[timedelta] = None) -> Dict[str, int]:
+        """
+        Load the latest metric values and executions from the database.
+
+        Args:
+            db: Database session
+            window: Only consider metric samples this recent (defaults to
+                settings.latest_index_seed_window_hours)
+
+        Returns:
+            Counts of loaded series and executions
+        """
+        if window is None:
+            window = timedelta(hours=settings.latest_index_seed_window_hours)
+        since = datetime.now(timezone.utc) - window
+
+        postgres = db.get_bind().dialect.name == "postgresql"
+        if postgres:
+            metrics_sql = """
+                SELECT DISTINCT ON (plugin_id, metric_name)
+                       plugin_id, metric_name, value, "timestamp"
+                FROM plugin_metrics
+                WHERE "timestamp" >= :since
+                ORDER BY plugin_id, metric_name, "timestamp" DESC
+            """
+            executions_sql = """
+                SELECT DISTINCT ON (plugin_id)
+                       plugin_id, status, started_at, completed_at, duration_ms, error_message
+                FROM plugin_executions
+                ORDER BY plugin_id, started_at DESC
+            """
+        else:
+            metrics_sql = """
+                SELECT plugin_id, metric_name, value, "timestamp" FROM (
+                    SELECT plugin_id, metric_name, value, "timestamp",
+                           row_number() OVER (
+                               PARTITION BY plugin_id, metric_name ORDER BY "timestamp" DESC
+                           ) AS rn
+                    FROM plugin_metrics
+                    WHERE "timestamp" >= :since
+                ) ranked WHERE rn = 1
+            """
+            executions_sql = """
+                SELECT plugin_id, status, started_at, completed_at, duration_ms, error_message FROM (
+                    SELECT plugin_id, status, started_at, completed_at, duration_ms, error_message,
+                           row_number() OVER (PARTITION BY plugin_id ORDER BY started_at DESC) AS rn
+                    FROM plugin_executions
+                ) ranked WHERE rn = 1
+            """
+            # SQLite compares the stored text form
+            since = since.replace(tzinfo=None)
+
+        metrics = [
+            LatestValue(
+                plugin_id=row.plugin_id,
+                metric_name=row.metric_name,
+                # psycopg2 decodes JSONB; SQLite returns JSON text (or a number,
+                # through column affinity)
+                value=json.loads(row.value) if isinstance(row.value, str) and not postgres else row.value,
+                timestamp=_parse_datetime(row.timestamp),
+            )
+            for row in db.execute(text(metrics_sql), {"since": since})
+        ]
+        executions = [
+            LatestExecution(
+                plugin_id=row.plugin_id,
+                status=row.status,
+                started_at=_parse_datetime(row.started_at),
+                completed_at=_parse_datetime(row.completed_at),
+                duration_ms=row.duration_ms,
+                error=row.error_message,
+            )
+            for row in db.execute(text(executions_sql))
+            if row.started_at is not None
+        ]
+
+        self.update_metrics(metrics)
+        for execution in executions:
+            self.update_execution(execution)
+        self.seeded = True
+
+        logger.info(f"Seeded latest-value index: {len(metrics)} series, {len(executions)} executions")
+        return {"metrics": len(metrics), "executions": len(executions)}
+
+    # ------------------------------------------------------------------
+    # Redis mirror
+    # ------------------------------------------------------------------
+
+    def _redis_usable(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, e: Exception):
+        logger.warning(f"Latest-value Redis mirror unavailable, using local index: {e}")
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _mirror(self, key: str, mapping: Dict[str, str]):
+        if not self._redis_usable():
+            return
+        try:
+            self.redis.hset(key, mapping=mapping)
+        except Exception as e:
+            self._redis_failed(e)
+
+    def _read_mirror(self, key: str, fields: List[str]) -> Optional[List[Optional[str]]]:
+        if not fields or not self._redis_usable():
+            return None
+        try:
+            return self.redis.hmget(key, fields)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+
+    def clear(self):
+        """Drop all local entries (the Redis mirror is left untouched)."""
+        with self._lock:
+            self._values.clear()
+            self._executions.clear()
+        self.seeded = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get index statistics.
+
+        Returns:
+            Dictionary with entry counts and mirror state
+        """
+        with self._lock:
+            series, executions = len(self._values), len(self._executions)
+        return {
+            "series": series,
+            "executions": executions,
+            "seeded": self.seeded,
+            "redis_mirror": self.redis is not None,
+            "redis_available": self._redis_usable(),
+        }
+
+
+# Global index shared by ingestion and the dashboard
+_latest_index: Optional[LatestValueIndex] = None
+
+
+def get_latest_index() -> LatestValueIndex:
+    """
+    Get or create the process-wide latest-value index.
+
+    Returns:
+        LatestValueIndex instance
+    """
+    global _latest_index
+
+    if _latest_index is None:
+        redis_client = None
+        if settings.latest_index_redis_mirror:
+            from app.core.redis import get_redis
+            redis_client = get_redis()
+        _latest_index = LatestValueIndex(redis_client=redis_client)
+
+    return _latest_index
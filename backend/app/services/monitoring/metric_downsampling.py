@@ -0,0 +1,388 @@
+"""
+Downsampled metric history queries.
+
+Aggregates plugin metrics into fixed-width time buckets in the database so
+history endpoints return a bounded number of points per series instead of
+every raw sample. Each query reads from the coarsest source that still
+provides the requested resolution:
+- Rollup tiers (1m, 1h, 1d): TimescaleDB continuous aggregates, or the
+  plugin_metric_rollups table maintained by the rollup job elsewhere
+- Raw plugin_metrics: time_bucket() on TimescaleDB, a portable GROUP BY
+  over an epoch bucket otherwise
+
+Only numeric metric values are aggregated. All requested series are fetched
+with a single query.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, bindparam, inspect, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.timescaledb import TimescaleDBManager
+
+logger = logging.getLogger(__name__)
+
+# Bucket widths (seconds) snapped to human-friendly intervals
+BUCKET_WIDTHS = (
+    10, 15, 30, 60, 120, 300, 600, 900, 1800,
+    3600, 7200, 10800, 21600, 43200, 86400,
+)
+
+# Time ranges accepted by the history endpoints
+TIME_RANGES = {
+    "1h": timedelta(hours=1),
+    "6h": timedelta(hours=6),
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+}
+
+ROLLUP_TABLE = "plugin_metric_rollups"
+
+
+@dataclass(frozen=True)
+class RollupTier:
+    """A pre-aggregated resolution of plugin_metrics."""
+    name: str
+    bucket_seconds: int
+    interval: str  # PostgreSQL interval literal for bucket_seconds
+    retention_days: int
+
+    @property
+    def view(self) -> str:
+        """Name of the TimescaleDB continuous aggregate for this tier."""
+        return f"plugin_metrics_{self.name}"
+
+
+ROLLUP_TIERS: Tuple[RollupTier, ...] = (
+    RollupTier("1m", 60, "1 minute", settings.metric_rollup_1m_retention_days),
+    RollupTier("1h", 3600, "1 hour", settings.metric_rollup_1h_retention_days),
+    RollupTier("1d", 86400, "1 day", settings.metric_rollup_1d_retention_days),
+)
+
+# (dialect, database url) -> capability flags
+_timescale_available: Dict[Tuple[str, str], bool] = {}
+_rollups_available: Dict[Tuple[str, str], bool] = {}
+
+
+@dataclass
+class MetricBucket:
+    """Aggregate of one series over one time bucket."""
+    bucket: datetime
+    avg: Optional[float]
+    min: Optional[float]
+    max: Optional[float]
+    last: Optional[float]
+    count: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "timestamp": self.bucket.isoformat(),
+            "value": self.avg,
+            "avg": self.avg,
+            "min": self.min,
+            "max": self.max,
+            "last": self.last,
+            "count": self.count,
+        }
+
+
+def choose_bucket_seconds(window: timedelta, points: int) -> int:
+    """
+    Pick the smallest friendly bucket width that yields at most `points` buckets.
+
+    Args:
+        window: Length of the queried time range
+        points: Desired maximum number of points per series
+
+    Returns:
+        Bucket width in seconds
+    """
+    target = window.total_seconds() / max(points, 1)
+    for width in BUCKET_WIDTHS:
+        if width >= target:
+            return width
+    return BUCKET_WIDTHS[-1] * int(-(-target // BUCKET_WIDTHS[-1]))
+
+
+def select_tier(bucket_seconds: int) -> Optional[RollupTier]:
+    """
+    Pick the coarsest rollup tier that can still produce bucket_seconds buckets.
+
+    Args:
+        bucket_seconds: Requested bucket width
+
+    Returns:
+        RollupTier, or None when only raw data is fine enough
+    """
+    candidates = [
+        tier for tier in ROLLUP_TIERS
+        if tier.bucket_seconds <= bucket_seconds and bucket_seconds % tier.bucket_seconds == 0
+    ]
+    return max(candidates, key=lambda t: t.bucket_seconds) if candidates else None
+
+
+def series_key(plugin_id: str, metric_name: str) -> str:
+    """Key used for a series in multi-metric results."""
+    return f"{plugin_id}.{metric_name}"
+
+
+def _capability_key(db: Session) -> Tuple[str, str]:
+    bind = db.get_bind()
+    return bind.dialect.name, str(bind.url)
+
+
+def use_timescale(db: Session) -> bool:
+    """Whether the session's database has the TimescaleDB extension (cached)."""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    key = _capability_key(db)
+    if key not in _timescale_available:
+        _timescale_available[key] = TimescaleDBManager(db).is_available()
+    return _timescale_available[key]
+
+
+def rollups_available(db: Session) -> bool:
+    """Whether rollup tiers exist for the session's database (cached)."""
+    if not settings.metric_rollups_enabled:
+        return False
+    key = _capability_key(db)
+    if key not in _rollups_available:
+        try:
+            inspector = inspect(db.get_bind())
+            if use_timescale(db):
+                views = set(inspector.get_view_names()) | set(inspector.get_materialized_view_names())
+                available = all(tier.view in views for tier in ROLLUP_TIERS)
+            else:
+                available = inspector.has_table(ROLLUP_TABLE)
+        except Exception as e:
+            logger.debug(f"Rollup availability check failed: {e}")
+            available = False
+        _rollups_available[key] = available
+    return _rollups_available[key]
+
+
+def reset_capability_cache():
+    """Forget cached TimescaleDB / rollup detection (e.g. after setup)."""
+    _timescale_available.clear()
+    _rollups_available.clear()
+
+
+def numeric_value_sql(dialect: str) -> str:
+    """SQL expression extracting a numeric metric value (NULL otherwise)."""
+    if dialect == "postgresql":
+        return (
+            "CASE WHEN jsonb_typeof(value::jsonb) = 'number' "
+            "THEN (value::jsonb #>> '{}')::double precision END"
+        )
+    return (
+        "CASE WHEN json_type(value) IN ('integer', 'real') "
+        "THEN CAST(json_extract(value, '$') AS REAL) END"
+    )
+
+
+def epoch_bucket_sql(dialect: str, column: str) -> str:
+    """SQL expression flooring a timestamp column to :bucket_seconds, as epoch seconds."""
+    if dialect == "postgresql":
+        return f'floor(extract(epoch FROM "{column}") / :bucket_seconds) * :bucket_seconds'
+    return f"""(CAST(strftime('%s', "{column}") AS INTEGER) / :bucket_seconds) * :bucket_seconds"""
+
+
+def _series_filter(series: Optional[Sequence[Tuple[str, str]]]) -> Tuple[str, Dict[str, Any]]:
+    if series is None:
+        return "1 = 1", {}
+    clauses = []
+    params: Dict[str, Any] = {}
+    for i, (plugin_id, metric_name) in enumerate(series):
+        clauses.append(f"(plugin_id = :plugin_{i} AND metric_name = :metric_{i})")
+        params[f"plugin_{i}"] = plugin_id
+        params[f"metric_{i}"] = metric_name
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def _raw_query(dialect: str, timescale: bool, series_sql: str) -> str:
+    numeric = numeric_value_sql(dialect)
+
+    if timescale:
+        return f"""
+            SELECT plugin_id, metric_name,
+                   extract(epoch FROM time_bucket(make_interval(secs => :bucket_seconds), "timestamp")) AS bucket,
+                   avg(num) AS avg_value, min(num) AS min_value, max(num) AS max_value,
+                   last(num, "timestamp") AS last_value, count(num) AS sample_count
+            FROM (
+                SELECT plugin_id, metric_name, "timestamp", {numeric} AS num
+                FROM plugin_metrics
+                WHERE {series_sql} AND "timestamp" >= :start AND "timestamp" < :end
+            ) samples
+            WHERE num IS NOT NULL
+            GROUP BY plugin_id, metric_name, bucket
+            ORDER BY plugin_id, metric_name, bucket
+        """
+
+    bucket = epoch_bucket_sql(dialect, "timestamp")
+    return f"""
+        SELECT plugin_id, metric_name, bucket,
+               avg(num) AS avg_value, min(num) AS min_value, max(num) AS max_value,
+               max(last_num) AS last_value, count(num) AS sample_count
+        FROM (
+            SELECT plugin_id, metric_name, bucket, num,
+                   first_value(num) OVER (
+                       PARTITION BY plugin_id, metric_name, bucket ORDER BY "timestamp" DESC
+                   ) AS last_num
+            FROM (
+                SELECT plugin_id, metric_name, "timestamp", {bucket} AS bucket, {numeric} AS num
+                FROM plugin_metrics
+                WHERE {series_sql} AND "timestamp" >= :start AND "timestamp" < :end
+            ) raw_samples
+            WHERE num IS NOT NULL
+        ) samples
+        GROUP BY plugin_id, metric_name, bucket
+        ORDER BY plugin_id, metric_name, bucket
+    """
+
+
+def _rollup_query(dialect: str, source: str, tier_filter: str, series_sql: str) -> str:
+    # Re-bucket tier rows; averages are weighted by sample count
+    slot = epoch_bucket_sql(dialect, "bucket")
+    return f"""
+        SELECT plugin_id, metric_name, slot AS bucket,
+               sum(avg_value * sample_count) / sum(sample_count) AS avg_value,
+               min(min_value) AS min_value, max(max_value) AS max_value,
+               max(last_num) AS last_value, sum(sample_count) AS sample_count
+        FROM (
+            SELECT plugin_id, metric_name, slot, avg_value, min_value, max_value, sample_count,
+                   first_value(last_value) OVER (
+                       PARTITION BY plugin_id, metric_name, slot ORDER BY "bucket" DESC
+                   ) AS last_num
+            FROM (
+                SELECT plugin_id, metric_name, "bucket", {slot} AS slot,
+                       avg_value, min_value, max_value, last_value, sample_count
+                FROM {source}
+                WHERE {tier_filter} AND {series_sql} AND "bucket" >= :start AND "bucket" < :end
+            ) tier_rows
+            WHERE sample_count > 0
+        ) samples
+        GROUP BY plugin_id, metric_name, slot
+        ORDER BY plugin_id, metric_name, slot
+    """
+
+
+def _execute(db: Session, sql: str, params: Dict[str, Any]) -> List[Tuple[str, str, MetricBucket]]:
+    stmt = text(sql).bindparams(
+        bindparam("start", type_=DateTime(timezone=True)),
+        bindparam("end", type_=DateTime(timezone=True)),
+    )
+    return [
+        (row.plugin_id, row.metric_name, MetricBucket(
+            bucket=datetime.fromtimestamp(float(row.bucket), tz=timezone.utc),
+            avg=float(row.avg_value) if row.avg_value is not None else None,
+            min=float(row.min_value) if row.min_value is not None else None,
+            max=float(row.max_value) if row.max_value is not None else None,
+            last=float(row.last_value) if row.last_value is not None else None,
+            count=int(row.sample_count),
+        ))
+        for row in db.execute(stmt, params)
+    ]
+
+
+def aggregate_raw(
+    db: Session,
+    series: Optional[Sequence[Tuple[str, str]]],
+    start: datetime,
+    end: datetime,
+    bucket_seconds: int
+) -> List[Tuple[str, str, MetricBucket]]:
+    """
+    Aggregate raw plugin_metrics rows into buckets.
+
+    Args:
+        db: Database session
+        series: (plugin_id, metric_name) pairs, or None for every series
+        start: Inclusive window start
+        end: Exclusive window end
+        bucket_seconds: Bucket width in seconds
+
+    Returns:
+        List of (plugin_id, metric_name, MetricBucket) ordered by series and time
+    """
+    dialect = db.get_bind().dialect.name
+    series_sql, params = _series_filter(series)
+    sql = _raw_query(dialect, use_timescale(db), series_sql)
+    return _execute(db, sql, {**params, "start": start, "end": end, "bucket_seconds": bucket_seconds})
+
+
+def aggregate_tier(
+    db: Session,
+    tier: RollupTier,
+    series: Optional[Sequence[Tuple[str, str]]],
+    start: datetime,
+    end: datetime,
+    bucket_seconds: int
+) -> List[Tuple[str, str, MetricBucket]]:
+    """
+    Aggregate rows of a rollup tier into buckets of the same or a coarser width.
+
+    Args:
+        db: Database session
+        tier: Rollup tier to read
+        series: (plugin_id, metric_name) pairs, or None for every series
+        start: Inclusive window start
+        end: Exclusive window end
+        bucket_seconds: Bucket width in seconds (a multiple of the tier width)
+
+    Returns:
+        List of (plugin_id, metric_name, MetricBucket) ordered by series and time
+    """
+    dialect = db.get_bind().dialect.name
+    series_sql, params = _series_filter(series)
+    if use_timescale(db):
+        source, tier_filter = tier.view, "1 = 1"
+    else:
+        source, tier_filter = ROLLUP_TABLE, "tier = :tier"
+        params["tier"] = tier.name
+    sql = _rollup_query(dialect, source, tier_filter, series_sql)
+    return _execute(db, sql, {**params, "start": start, "end": end, "bucket_seconds": bucket_seconds})
+
+
+def query_downsampled(
+    db: Session,
+    series: Iterable[Tuple[str, str]],
+    start: datetime,
+    end: datetime,
+    bucket_seconds: int
+) -> Dict[str, List[MetricBucket]]:
+    """
+    Aggregate one or more series into fixed-width buckets with a single query.
+
+    Reads from the coarsest available rollup tier whose resolution divides
+    bucket_seconds, falling back to raw samples.
+
+    Args:
+        db: Database session
+        series: (plugin_id, metric_name) pairs
+        start: Inclusive window start
+        end: Exclusive window end
+        bucket_seconds: Bucket width in seconds
+
+    Returns:
+        Dict mapping "plugin_id.metric_name" to buckets in chronological
+        order (every requested series is present, possibly empty)
+    """
+    series = list(dict.fromkeys(series))
+    result: Dict[str, List[MetricBucket]] = {series_key(p, m): [] for p, m in series}
+    if not series:
+        return result
+
+    tier = select_tier(bucket_seconds) if rollups_available(db) else None
+    if tier is not None:
+        rows = aggregate_tier(db, tier, series, start, end, bucket_seconds)
+    else:
+        rows = aggregate_raw(db, series, start, end, bucket_seconds)
+
+    for plugin_id, metric_name, bucket in rows:
+        result[series_key(plugin_id, metric_name)].append(bucket)
+
+    return result
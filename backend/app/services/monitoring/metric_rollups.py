@@ -0,0 +1,232 @@
+"""
+Metric Rollup Tiers
+
+Maintains pre-aggregated 1m / 1h / 1d resolutions of plugin_metrics so
+dashboard history over long ranges reads a few thousand rollup rows instead
+of scanning raw samples.
+
+- TimescaleDB: each tier is a continuous aggregate with its own refresh and
+  retention policy; TimescaleDB keeps them current, refresh() is a no-op.
+- Other databases: refresh() recomputes the tail of each tier into the
+  plugin_metric_rollups table. Tiers are built hierarchically (raw -> 1m ->
+  1h -> 1d), so each pass only reads the finer tier's recent rows.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.timescaledb import TimescaleDBManager
+from app.models.plugin import PluginMetric, PluginMetricRollup
+from app.services.monitoring.metric_downsampling import (
+    ROLLUP_TIERS,
+    RollupTier,
+    aggregate_raw,
+    aggregate_tier,
+    reset_capability_cache,
+    use_timescale,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes; everything stored here is UTC
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+
+def _floor(value: datetime, seconds: int) -> datetime:
+    epoch = int(value.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=timezone.utc)
+
+
+class MetricRollupManager:
+    """Creates and refreshes the plugin_metrics rollup tiers."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        """
+        Initialize rollup manager.
+
+        Args:
+            session_factory: Callable returning a new database session
+        """
+        self.session_factory = session_factory
+        self.last_refresh: Dict[str, int] = {}
+
+    def setup(self) -> bool:
+        """
+        Prepare rollup storage for the configured database.
+
+        On TimescaleDB this creates the continuous aggregates and their
+        policies. Elsewhere the plugin_metric_rollups table comes from the
+        migrations and nothing needs to be created.
+
+        Returns:
+            True if rollups can be used
+        """
+        if not settings.metric_rollups_enabled:
+            return False
+
+        db = self.session_factory()
+        try:
+            reset_capability_cache()
+            if use_timescale(db):
+                manager = TimescaleDBManager(db)
+                ok = manager.setup_plugin_metrics()
+                ok &= manager.setup_metric_rollups(ROLLUP_TIERS)
+                reset_capability_cache()
+                return ok
+            return True
+        finally:
+            db.close()
+
+    def refresh(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Bring every rollup tier up to date and apply tier retention.
+
+        Args:
+            now: Reference time (defaults to the current UTC time)
+
+        Returns:
+            Mapping of tier name to the number of rollup rows written
+        """
+        if not settings.metric_rollups_enabled:
+            return {}
+
+        now = _as_utc(now) or datetime.now(timezone.utc)
+        written: Dict[str, int] = {}
+
+        db = self.session_factory()
+        try:
+            if use_timescale(db):
+                return written
+
+            source: Optional[RollupTier] = None
+            for tier in ROLLUP_TIERS:
+                written[tier.name] = self._refresh_tier(db, tier, source, now)
+                source = tier
+
+            self.apply_retention(db, now)
+            self.last_refresh = written
+            return written
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _window_start(
+        self,
+        db: Session,
+        tier: RollupTier,
+        source: Optional[RollupTier],
+        now: datetime
+    ) -> Optional[datetime]:
+        table = PluginMetricRollup.__table__
+
+        # Resume from the newest bucket, which may have been partial
+        start = _as_utc(db.execute(
+            select(func.max(table.c.bucket)).where(table.c.tier == tier.name)
+        ).scalar())
+
+        if start is None:
+            if source is None:
+                column = PluginMetric.__table__.c.timestamp
+                start = db.execute(select(func.min(column))).scalar()
+            else:
+                start = db.execute(
+                    select(func.min(table.c.bucket)).where(table.c.tier == source.name)
+                ).scalar()
+            start = _as_utc(start)
+            if start is None:
+                return None
+
+        start = max(start, now - timedelta(days=tier.retention_days))
+        return _floor(start, tier.bucket_seconds)
+
+    def _refresh_tier(
+        self,
+        db: Session,
+        tier: RollupTier,
+        source: Optional[RollupTier],
+        now: datetime
+    ) -> int:
+        start = self._window_start(db, tier, source, now)
+        if start is None:
+            return 0
+
+        if source is None:
+            rows = aggregate_raw(db, None, start, now, tier.bucket_seconds)
+        else:
+            rows = aggregate_tier(db, source, None, start, now, tier.bucket_seconds)
+
+        table = PluginMetricRollup.__table__
+        db.execute(delete(table).where(table.c.tier == tier.name, table.c.bucket >= start))
+        if rows:
+            db.execute(insert(table), [
+                {
+                    "tier": tier.name,
+                    "bucket": bucket.bucket,
+                    "plugin_id": plugin_id,
+                    "metric_name": metric_name,
+                    "avg_value": bucket.avg,
+                    "min_value": bucket.min,
+                    "max_value": bucket.max,
+                    "last_value": bucket.last,
+                    "sample_count": bucket.count,
+                }
+                for plugin_id, metric_name, bucket in rows
+            ])
+        db.commit()
+
+        logger.debug(f"Refreshed {tier.name} rollups from {start.isoformat()}: {len(rows)} rows")
+        return len(rows)
+
+    def apply_retention(self, db: Session, now: Optional[datetime] = None) -> int:
+        """
+        Delete rollup rows older than each tier's retention.
+
+        Args:
+            db: Database session
+            now: Reference time (defaults to the current UTC time)
+
+        Returns:
+            Number of rows deleted
+        """
+        now = _as_utc(now) or datetime.now(timezone.utc)
+        table = PluginMetricRollup.__table__
+
+        deleted = 0
+        for tier in ROLLUP_TIERS:
+            cutoff = now - timedelta(days=tier.retention_days)
+            result = db.execute(
+                delete(table).where(table.c.tier == tier.name, table.c.bucket < cutoff)
+            )
+            deleted += result.rowcount or 0
+        db.commit()
+        return deleted
+
+
+# Global rollup manager instance
+_rollup_manager: Optional[MetricRollupManager] = None
+
+
+def get_rollup_manager() -> MetricRollupManager:
+    """
+    Get or create global rollup manager instance.
+
+    Returns:
+        MetricRollupManager instance
+    """
+    global _rollup_manager
+
+    if _rollup_manager is None:
+        _rollup_manager = MetricRollupManager()
+
+    return _rollup_manager
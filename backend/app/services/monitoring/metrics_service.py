@@ -2,25 +2,58 @@
 Metrics aggregation service for dashboard.
 
 Provides unified access to metrics from plugins, alerts, and infrastructure.
+Queries run on an AsyncSession (app.core.async_database) so dashboard
+requests do not block the event loop.
 """
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func, desc
 from app.models.plugin import Plugin, PluginMetric, PluginExecution
 from app.models.monitoring import Alert
 from app.models.alert_rules import AlertRule, AlertSeverity, AlertStatus
 from app.models.infrastructure import MonitoredServer, StorageDevice, DatabaseInstance
+from app.core.config import settings
+from app.services.monitoring.metric_downsampling import TIME_RANGES, choose_bucket_seconds, query_downsampled, series_key
+from app.services.monitoring.latest_values import get_latest_index
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-async def get_dashboard_metrics(db: Session) -> Dict[str, Any]:
+# Dashboard overview cards and the metric each one shows
+DASHBOARD_METRICS = {
+    "cpu": ("system_info", "cpu_percent"),
+    "memory": ("system_info", "memory_percent"),
+    "disk": ("disk_monitor", "disk_usage_percent"),
+    "network": ("network_monitor", "network_bytes_sent"),
+}
+
+# Plugins without an execution this recent are reported as stale
+STALE_AFTER = timedelta(minutes=10)
+
+
+def _age(timestamp: datetime) -> timedelta:
+    now = datetime.now(timezone.utc) if timestamp.tzinfo else datetime.now()
+    return now - timestamp
+
+
+def _value(value: Any) -> Any:
+    """Enum members as their value, so enum and string columns compare alike."""
+    return getattr(value, "value", value)
+
+
+async def _count_by(db: AsyncSession, column) -> Dict[Any, int]:
+    rows = await db.execute(select(column, func.count()).group_by(column))
+    return {_value(key): count for key, count in rows}
+
+
+async def get_dashboard_metrics(db: AsyncSession) -> Dict[str, Any]:
     """
     Aggregate key system metrics from plugins for dashboard overview.
     
-    Returns latest metrics for: CPU, Memory, Disk, Network
+    Returns latest metrics for: CPU, Memory, Disk, Network. Values come from
+    the in-memory latest-value index, so no database query is made.
     """
     metrics = {
         "cpu": None,
@@ -31,73 +64,10 @@ async def get_dashboard_metrics(db: Session) -> Dict[str, Any]:
     }
     
     try:
-        # Get latest CPU metric from system_info plugin
-        cpu_metric = db.execute(
-            select(PluginMetric)
-            .where(and_(
-                PluginMetric.plugin_id == "system_info",
-                PluginMetric.metric_name == "cpu_percent"
-            ))
-            .order_by(PluginMetric.time.desc())
-            .limit(1)
-        ).scalar_one_or_none()
-        
-        if cpu_metric:
-            metrics["cpu"] = {
-                "value": cpu_metric.value,
-                "timestamp": cpu_metric.time.isoformat()
-            }
-        
-        # Get latest Memory metric
-        mem_metric = db.execute(
-            select(PluginMetric)
-            .where(and_(
-                PluginMetric.plugin_id == "system_info",
-                PluginMetric.metric_name == "memory_percent"
-            ))
-            .order_by(PluginMetric.time.desc())
-            .limit(1)
-        ).scalar_one_or_none()
-        
-        if mem_metric:
-            metrics["memory"] = {
-                "value": mem_metric.value,
-                "timestamp": mem_metric.time.isoformat()
-            }
-        
-        # Get latest Disk metric
-        disk_metric = db.execute(
-            select(PluginMetric)
-            .where(and_(
-                PluginMetric.plugin_id == "disk_monitor",
-                PluginMetric.metric_name == "disk_usage_percent"
-            ))
-            .order_by(PluginMetric.time.desc())
-            .limit(1)
-        ).scalar_one_or_none()
-        
-        if disk_metric:
-            metrics["disk"] = {
-                "value": disk_metric.value,
-                "timestamp": disk_metric.time.isoformat()
-            }
-        
-        # Get latest Network metric
-        net_metric = db.execute(
-            select(PluginMetric)
-            .where(and_(
-                PluginMetric.plugin_id == "network_monitor",
-                PluginMetric.metric_name == "network_bytes_sent"
-            ))
-            .order_by(PluginMetric.time.desc())
-            .limit(1)
-        ).scalar_one_or_none()
-        
-        if net_metric:
-            metrics["network"] = {
-                "value": net_metric.value,
-                "timestamp": net_metric.time.isoformat()
-            }
+        latest = get_latest_index().get_many(DASHBOARD_METRICS.values())
+        for card, key in DASHBOARD_METRICS.items():
+            if key in latest:
+                metrics[card] = latest[key].to_dict()
             
     except Exception as e:
         logger.error(f"Error fetching dashboard metrics: {e}")
@@ -105,30 +75,27 @@ async def get_dashboard_metrics(db: Session) -> Dict[str, Any]:
     return metrics
 
 
-async def get_plugin_metrics_summary(db: Session) -> List[Dict[str, Any]]:
+async def get_plugin_metrics_summary(db: AsyncSession) -> List[Dict[str, Any]]:
     """
     Get summary of all enabled plugins with their latest execution status.
     
-    Returns plugin metadata + last execution time and status.
+    Returns plugin metadata + last execution time and status. Execution
+    status comes from the latest-value index; only the plugin list is read
+    from the database.
     """
     plugins = []
     
     try:
         # Get all enabled plugins
         stmt = select(Plugin).where(Plugin.enabled == True)
-        enabled_plugins = db.execute(stmt).scalars().all()
+        enabled_plugins = (await db.execute(stmt)).scalars().all()
+        executions = get_latest_index().get_executions(plugin.id for plugin in enabled_plugins)
         
         for plugin in enabled_plugins:
-            # Get latest execution
-            last_exec = db.execute(
-                select(PluginExecution)
-                .where(PluginExecution.plugin_id == plugin.plugin_id)
-                .order_by(PluginExecution.timestamp.desc())
-                .limit(1)
-            ).scalar_one_or_none()
+            last_exec = executions.get(plugin.id)
             
             plugin_data = {
-                "plugin_id": plugin.plugin_id,
+                "plugin_id": plugin.id,
                 "name": plugin.name,
                 "category": plugin.category,
                 "enabled": plugin.enabled,
@@ -138,12 +105,9 @@ async def get_plugin_metrics_summary(db: Session) -> List[Dict[str, Any]]:
             }
             
             if last_exec:
-                plugin_data["last_execution"] = last_exec.timestamp.isoformat()
+                plugin_data["last_execution"] = last_exec.started_at.isoformat()
                 plugin_data["status"] = last_exec.status
-                
-                # Consider stale if no execution in last 10 minutes
-                if datetime.utcnow() - last_exec.timestamp > timedelta(minutes=10):
-                    plugin_data["is_stale"] = True
+                plugin_data["is_stale"] = _age(last_exec.started_at) > STALE_AFTER
             else:
                 plugin_data["is_stale"] = True
                 plugin_data["status"] = "never_run"
@@ -156,7 +120,7 @@ async def get_plugin_metrics_summary(db: Session) -> List[Dict[str, Any]]:
     return plugins
 
 
-async def get_alert_summary(db: Session) -> Dict[str, Any]:
+async def get_alert_summary(db: AsyncSession) -> Dict[str, Any]:
     """
     Get alert statistics and recent alerts for dashboard.
     
@@ -175,27 +139,26 @@ async def get_alert_summary(db: Session) -> Dict[str, Any]:
     
     try:
         # Total alerts
-        summary["total"] = db.query(Alert).count()
+        summary["total"] = await db.scalar(select(func.count()).select_from(Alert))
         
-        # Unresolved alerts
-        summary["unresolved"] = db.query(Alert).filter(
-            Alert.status != AlertStatus.RESOLVED
-        ).count()
-        
-        # Count by severity (unresolved only)
+        # Unresolved alerts, counted by severity in one query
+        rows = await db.execute(
+            select(Alert.severity, func.count())
+            .where(Alert.status != AlertStatus.RESOLVED)
+            .group_by(Alert.severity)
+        )
+        unresolved = {_value(severity): count for severity, count in rows}
+        summary["unresolved"] = sum(unresolved.values())
         for severity in [AlertSeverity.CRITICAL, AlertSeverity.WARNING, AlertSeverity.INFO]:
-            count = db.query(Alert).filter(
-                and_(
-                    Alert.severity == severity,
-                    Alert.status != AlertStatus.RESOLVED
-                )
-            ).count()
-            summary["by_severity"][severity.value] = count
+            summary["by_severity"][severity.value] = unresolved.get(severity.value, 0)
         
         # Recent unresolved alerts (last 5)
-        recent = db.query(Alert).filter(
-            Alert.status != AlertStatus.RESOLVED
-        ).order_by(Alert.triggered_at.desc()).limit(5).all()
+        recent = (await db.execute(
+            select(Alert)
+            .where(Alert.status != AlertStatus.RESOLVED)
+            .order_by(Alert.triggered_at.desc())
+            .limit(5)
+        )).scalars().all()
         
         summary["recent_alerts"] = [
             {
@@ -216,7 +179,7 @@ async def get_alert_summary(db: Session) -> Dict[str, Any]:
     return summary
 
 
-async def get_infrastructure_health(db: Session) -> Dict[str, Any]:
+async def get_infrastructure_health(db: AsyncSession) -> Dict[str, Any]:
     """
     Get health summary of infrastructure resources.
     
@@ -241,22 +204,22 @@ async def get_infrastructure_health(db: Session) -> Dict[str, Any]:
     }
     
     try:
-        # Servers
-        all_servers = db.query(MonitoredServer).all()
-        health["servers"]["total"] = len(all_servers)
-        health["servers"]["healthy"] = sum(1 for s in all_servers if s.status == "healthy")
-        health["servers"]["unhealthy"] = sum(1 for s in all_servers if s.status != "healthy")
+        # Counts per status only; no rows are loaded
+        servers = await _count_by(db, MonitoredServer.status)
+        health["servers"]["total"] = sum(servers.values())
+        health["servers"]["healthy"] = servers.get("healthy", 0)
+        health["servers"]["unhealthy"] = health["servers"]["total"] - health["servers"]["healthy"]
         
         # Storage devices
-        all_storage = db.query(StorageDevice).all()
-        health["storage"]["total"] = len(all_storage)
-        health["storage"]["devices"] = len(all_storage)
+        storage_count = await db.scalar(select(func.count()).select_from(StorageDevice))
+        health["storage"]["total"] = storage_count
+        health["storage"]["devices"] = storage_count
         
         # Databases
-        all_databases = db.query(DatabaseInstance).all()
-        health["databases"]["total"] = len(all_databases)
-        health["databases"]["online"] = sum(1 for d in all_databases if d.status == "online")
-        health["databases"]["offline"] = sum(1 for d in all_databases if d.status != "online")
+        databases = await _count_by(db, DatabaseInstance.status)
+        health["databases"]["total"] = sum(databases.values())
+        health["databases"]["online"] = databases.get("online", 0)
+        health["databases"]["offline"] = health["databases"]["total"] - health["databases"]["online"]
         
     except Exception as e:
         logger.error(f"Error fetching infrastructure health: {e}")
@@ -265,84 +228,65 @@ async def get_infrastructure_health(db: Session) -> Dict[str, Any]:
 
 
 async def get_metric_history(
-    db: Session,
+    db: AsyncSession,
     plugin_id: str,
     metric_name: str,
-    time_range: str = "1h"
+    time_range: str = "1h",
+    points: int = settings.metric_history_default_points
 ) -> List[Dict[str, Any]]:
     """
-    Get historical time-series data for a specific metric.
+    Get downsampled time-series data for a specific metric.
     
     Args:
         plugin_id: Plugin identifier
         metric_name: Name of the metric
         time_range: Time range (1h, 6h, 24h, 7d)
+        points: Maximum number of buckets to return
     
     Returns:
-        List of {timestamp, value} points in chronological order
+        List of {timestamp, value, avg, min, max, last, count} buckets in
+        chronological order
     """
-    # Parse time range
-    range_map = {
-        "1h": timedelta(hours=1),
-        "6h": timedelta(hours=6),
-        "24h": timedelta(hours=24),
-        "7d": timedelta(days=7)
-    }
-    
-    delta = range_map.get(time_range, timedelta(hours=1))
-    start_time = datetime.utcnow() - delta
-    
-    history = []
-    
-    try:
-        # Query metrics within time range
-        metrics = db.execute(
-            select(PluginMetric)
-            .where(and_(
-                PluginMetric.plugin_id == plugin_id,
-                PluginMetric.metric_name == metric_name,
-                PluginMetric.time >= start_time
-            ))
-            .order_by(PluginMetric.time.asc())
-        ).scalars().all()
-        
-        history = [
-            {
-                "timestamp": m.time.isoformat(),
-                "value": m.value
-            }
-            for m in metrics
-        ]
-        
-    except Exception as e:
-        logger.error(f"Error fetching metric history: {e}")
-    
-    return history
+    history = await get_multi_metric_history(
+        db,
+        [{"plugin_id": plugin_id, "metric_name": metric_name}],
+        time_range,
+        points
+    )
+    return history[series_key(plugin_id, metric_name)]
 
 
 async def get_multi_metric_history(
-    db: Session,
+    db: AsyncSession,
     metrics: List[Dict[str, str]],
-    time_range: str = "1h"
+    time_range: str = "1h",
+    points: int = settings.metric_history_default_points
 ) -> Dict[str, List[Dict[str, Any]]]:
     """
-    Get historical data for multiple metrics at once.
+    Get downsampled history for multiple metrics with a single query.
     
     Args:
         metrics: List of {plugin_id, metric_name} dicts
         time_range: Time range (1h, 6h, 24h, 7d)
+        points: Maximum number of buckets per metric
     
     Returns:
         Dict mapping metric keys to history arrays
     """
-    result = {}
+    series = [(m.get("plugin_id"), m.get("metric_name")) for m in metrics]
+    result = {series_key(plugin_id, metric_name): [] for plugin_id, metric_name in series}
     
-    for metric_spec in metrics:
-        plugin_id = metric_spec.get("plugin_id")
-        metric_name = metric_spec.get("metric_name")
-        key = f"{plugin_id}.{metric_name}"
-        
-        history = await get_metric_history(db, plugin_id, metric_name, time_range)
-        result[key] = history
+    delta = TIME_RANGES.get(time_range, timedelta(hours=1))
+    end_time = datetime.utcnow()
+    start_time = end_time - delta
+    bucket_seconds = choose_bucket_seconds(delta, points)
+    
+    try:
+        # The downsampling queries are written for a sync Session
+        buckets = await db.run_sync(query_downsampled, series, start_time, end_time, bucket_seconds)
+        for key, series_buckets in buckets.items():
+            result[key] = [b.to_dict() for b in series_buckets]
+    except Exception as e:
+        logger.error(f"Error fetching metric history: {e}")
     
     return result
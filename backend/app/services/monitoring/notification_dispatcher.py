@@ -0,0 +1,521 @@
+"""
+Notification Dispatcher
+
+Pooled, coalescing delivery of alert notifications. Sending alerts one by
+one (a new HTTP client or SMTP session per message, every alert x channel in
+series) turns an alert storm into hundreds of sequential handshakes. The
+dispatcher instead:
+
+- keeps one pooled httpx.AsyncClient per channel and one reused SMTP session
+  per mail server, reconnecting when the server drops it
+- retries transport errors and 429/5xx responses with exponential backoff
+- coalesces alerts submitted to the same channel within a short window into
+  a single digest message
+- bounds the number of deliveries in flight with a semaphore
+- records every alert's outcome and delivery latency in notification_logs,
+  written in one bulk insert per delivery
+
+Tuned with the notification_* settings.
+"""
+import asyncio
+import logging
+import smtplib
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from email.message import Message
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import httpx
+from sqlalchemy import Boolean, DateTime, Float, String, Text, Uuid, column, insert, table
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.plugins.executor import get_thread_pool, run_in_executor
+from app.services.monitoring.notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: rate limited or upstream temporarily unavailable
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+# Upper bound on a server-requested Retry-After delay
+MAX_RETRY_AFTER_SECONDS = 30.0
+
+SEVERITY_RANK = {"info": 0, "warning": 1, "critical": 2}
+
+# notification_logs as the migrations create it (70974ae864ff, tenant support,
+# latency). Neither NotificationLog model matches that table, so log rows are
+# written through these columns only. Its channel_id references
+# notification_channels, not alert channels, and is left empty.
+NOTIFICATION_LOGS = table(
+    "notification_logs",
+    column("id", Uuid),
+    column("title", String),
+    column("body", Text),
+    column("success", Boolean),
+    column("error_message", Text),
+    column("trigger_type", String),
+    column("trigger_id", String),
+    column("sent_at", DateTime(timezone=True)),
+    column("latency_ms", Float),
+    column("tenant_id", String),
+)
+
+
+def _backoff_delay(base: float, attempt: int) -> float:
+    return base * (2 ** attempt)
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """
+    Transport wrapper retrying transport errors and retryable status codes.
+
+    Delays grow exponentially from backoff seconds; a numeric Retry-After
+    header on a 429/503 response is honoured up to MAX_RETRY_AFTER_SECONDS.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        max_retries: int = settings.notification_max_retries,
+        backoff: float = settings.notification_retry_backoff_seconds,
+        sleep: Callable[[float], Any] = asyncio.sleep
+    ):
+        self.transport = transport
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._sleep = sleep
+        self.retries = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                delay = _backoff_delay(self.backoff, attempt)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                delay = self._retry_after(response) or _backoff_delay(self.backoff, attempt)
+                await response.aclose()
+
+            attempt += 1
+            self.retries += 1
+            logger.debug(f"Retrying notification request to {request.url.host} in {delay:.2f}s")
+            await self._sleep(delay)
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        try:
+            return min(float(response.headers["Retry-After"]), MAX_RETRY_AFTER_SECONDS)
+        except (KeyError, ValueError):
+            return None
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class SMTPConnection:
+    """
+    An SMTP session reused across messages.
+
+    Sends run on the shared thread pool, one at a time per connection. A
+    session the server has dropped (idle timeout, restart) is reopened and
+    the message retried with exponential backoff; SMTP protocol errors such
+    as refused recipients or failed logins are raised immediately.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        use_tls: bool = True,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        timeout: float = settings.notification_http_timeout_seconds,
+        max_retries: int = settings.notification_max_retries,
+        backoff: float = settings.notification_retry_backoff_seconds
+    ):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._lock = threading.Lock()
+        self.connects = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs) -> "SMTPConnection":
+        """Connection for an smtp channel's config (kwargs: timeout/retry tuning)."""
+        return cls(
+            host=config.get('smtp_host'),
+            port=int(config.get('smtp_port')),
+            use_tls=config.get('use_tls', True),
+            username=config.get('smtp_username'),
+            password=config.get('smtp_password'),
+            **kwargs
+        )
+
+    @staticmethod
+    def key(config: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Channels sharing a server and login share a connection."""
+        return (
+            config.get('smtp_host'),
+            config.get('smtp_port'),
+            config.get('use_tls', True),
+            config.get('smtp_username'),
+        )
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.connects += 1
+        return server
+
+    def _discard(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.close()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def send_blocking(self, msg: Message):
+        with self._lock:
+            attempt = 0
+            while True:
+                try:
+                    if self._smtp is None:
+                        self._smtp = self._connect()
+                    self._smtp.send_message(msg)
+                    return
+                except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError) as e:
+                    error = e
+                except smtplib.SMTPException:
+                    raise
+                except OSError as e:
+                    error = e
+
+                self._discard()
+                if attempt >= self.max_retries:
+                    raise error
+                time.sleep(_backoff_delay(self.backoff, attempt))
+                attempt += 1
+
+    async def send(self, msg: Message):
+        """Send a message over the shared session (reconnecting if needed)."""
+        await run_in_executor(get_thread_pool(), self.send_blocking, msg)
+
+    def close(self):
+        with self._lock:
+            if self._smtp is not None:
+                try:
+                    self._smtp.quit()
+                except Exception:
+                    pass
+            self._discard()
+
+
+def build_digest(alerts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge alerts for one channel into a single alert payload.
+
+    The digest carries every key of the most severe alert (so channel
+    templates still render), with the message listing all alerts, the
+    earliest trigger time and the ids of the merged alerts.
+    """
+    if len(alerts) == 1:
+        return alerts[0]
+
+    worst = max(alerts, key=lambda a: SEVERITY_RANK.get(a.get('severity'), -1))
+    servers = list(dict.fromkeys(a.get('server_name') or 'Unknown' for a in alerts))
+    lines = [
+        f"• {str(a.get('severity', '')).upper()} {a.get('server_name') or 'Unknown'}: "
+        f"{a.get('message')} ({a.get('metric_value')})"
+        for a in alerts
+    ]
+
+    digest = dict(worst)
+    digest.update(
+        alert_id=None,
+        alert_ids=[a.get('alert_id') for a in alerts],
+        alert_count=len(alerts),
+        message=f"{len(alerts)} alerts\n" + "\n".join(lines),
+        server_name=", ".join(servers),
+        triggered_at=min(
+            (a['triggered_at'] for a in alerts if a.get('triggered_at')),
+            default=worst.get('triggered_at')
+        ),
+    )
+    if worst.get('timestamp') is not None:
+        digest['timestamp'] = min(a['timestamp'] for a in alerts if a.get('timestamp') is not None)
+    return digest
+
+
+def _channel_key(channel: Dict[str, Any]) -> Any:
+    return channel.get('id') if channel.get('id') is not None else channel.get('name')
+
+
+class NotificationDispatcher:
+    """Coalescing, concurrency-bounded notification delivery over pooled connections."""
+
+    def __init__(
+        self,
+        coalesce_window: float = settings.notification_coalesce_seconds,
+        max_concurrency: int = settings.notification_max_concurrency,
+        session_factory: Callable[[], Any] = SessionLocal,
+        transport_factory: Optional[Callable[[], httpx.AsyncBaseTransport]] = None,
+        max_retries: int = settings.notification_max_retries,
+        retry_backoff: float = settings.notification_retry_backoff_seconds,
+        timeout: float = settings.notification_http_timeout_seconds,
+        max_connections_per_channel: int = settings.notification_max_connections_per_channel
+    ):
+        """
+        Initialize dispatcher.
+
+        Args:
+            coalesce_window: Seconds to collect alerts per channel before sending (0 = send at once)
+            max_concurrency: Deliveries in flight at once across all channels
+            session_factory: Creates DB sessions for notification_logs writes
+            transport_factory: Builds the inner HTTP transport per channel (defaults to a pooled httpx transport)
+            max_retries: Retries per message after the first attempt
+            retry_backoff: Delay before the first retry, doubled per retry
+            timeout: HTTP and SMTP timeout in seconds
+            max_connections_per_channel: HTTP connection pool size per channel
+        """
+        self.coalesce_window = coalesce_window
+        self.max_concurrency = max_concurrency
+        self.session_factory = session_factory
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self._transport_factory = transport_factory or (
+            lambda: httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=max_connections_per_channel,
+                    max_keepalive_connections=max_connections_per_channel
+                )
+            )
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending: Dict[Any, Tuple[Dict[str, Any], List[Dict[str, Any]]]] = {}
+        self._timers: Dict[Any, asyncio.TimerHandle] = {}
+        self._in_flight: Set[asyncio.Task] = set()
+        self._http_clients: Dict[Any, httpx.AsyncClient] = {}
+        self._smtp_connections: Dict[Tuple[Any, ...], SMTPConnection] = {}
+        self._stats = {
+            "alerts_submitted": 0,
+            "deliveries": 0,
+            "failed": 0,
+            "log_write_errors": 0,
+            "total_latency_ms": 0.0,
+            "max_latency_ms": 0.0,
+        }
+
+    async def __aenter__(self) -> "NotificationDispatcher":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def submit(self, channel: Dict[str, Any], alert_data: Dict[str, Any]):
+        """
+        Queue an alert for a channel. Must be called from the event loop.
+
+        The first alert for a channel starts its coalescing window; alerts
+        arriving before it closes are sent with it as one digest.
+        """
+        key = _channel_key(channel)
+        self._stats["alerts_submitted"] += 1
+
+        entry = self._pending.get(key)
+        if entry is None:
+            self._pending[key] = (channel, [alert_data])
+        else:
+            entry[1].append(alert_data)
+
+        if self.coalesce_window <= 0:
+            self._flush_channel(key)
+        elif key not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[key] = loop.call_later(self.coalesce_window, self._flush_channel, key)
+
+    def _flush_channel(self, key: Any):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return
+        task = asyncio.get_running_loop().create_task(self._deliver(*entry))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def flush(self):
+        """Send all pending alerts now and wait for every delivery to finish."""
+        for key in list(self._pending):
+            self._flush_channel(key)
+        if self._in_flight:
+            await asyncio.gather(*list(self._in_flight), return_exceptions=True)
+
+    async def _deliver(self, channel: Dict[str, Any], alerts: List[Dict[str, Any]]):
+        digest = build_digest(alerts)
+        is_smtp = channel.get('channel_type') == 'smtp'
+
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                success, message = await NotificationService.deliver(
+                    channel,
+                    digest,
+                    client=None if is_smtp else self._client_for(channel),
+                    smtp=self._smtp_for(channel) if is_smtp else None
+                )
+            except Exception as e:
+                success, message = False, str(e)
+            latency_ms = (time.perf_counter() - started) * 1000
+
+        self._stats["deliveries"] += 1
+        self._stats["total_latency_ms"] += latency_ms
+        self._stats["max_latency_ms"] = max(self._stats["max_latency_ms"], latency_ms)
+        if success:
+            logger.info(f"Notification sent via {channel.get('name')} ({len(alerts)} alerts, {latency_ms:.0f} ms)")
+        else:
+            self._stats["failed"] += 1
+            logger.warning(f"Failed to send notification via {channel.get('name')}: {message}")
+
+        await self._write_logs(channel, alerts, success, message, latency_ms)
+
+    def _client_for(self, channel: Dict[str, Any]) -> httpx.AsyncClient:
+        key = _channel_key(channel)
+        client = self._http_clients.get(key)
+        if client is None:
+            transport = RetryTransport(
+                self._transport_factory(),
+                max_retries=self.max_retries,
+                backoff=self.retry_backoff
+            )
+            client = httpx.AsyncClient(transport=transport, timeout=self.timeout)
+            self._http_clients[key] = client
+        return client
+
+    def _smtp_for(self, channel: Dict[str, Any]) -> Optional[SMTPConnection]:
+        config = channel.get('config') or {}
+        if not config.get('smtp_host') or not config.get('smtp_port'):
+            return None  # _send_smtp reports the missing setting
+        key = SMTPConnection.key(config)
+        connection = self._smtp_connections.get(key)
+        if connection is None:
+            connection = SMTPConnection.from_config(
+                config,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                backoff=self.retry_backoff
+            )
+            self._smtp_connections[key] = connection
+        return connection
+
+    async def _write_logs(
+        self,
+        channel: Dict[str, Any],
+        alerts: List[Dict[str, Any]],
+        success: bool,
+        message: str,
+        latency_ms: float
+    ):
+        now = datetime.now(timezone.utc)
+        title = f"{channel.get('name')}: {str(alerts[0].get('severity', '')).upper()} alert"
+        if len(alerts) > 1:
+            title = f"{title} (digest of {len(alerts)} alerts)"
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "title": title,
+                "body": str(alert.get('message') or ''),
+                "success": success,
+                "error_message": None if success else message,
+                "trigger_type": "alert",
+                "trigger_id": str(alert.get('alert_id')),
+                "sent_at": now,
+                "latency_ms": latency_ms,
+                "tenant_id": alert.get('tenant_id') or "default",
+            }
+            for alert in alerts
+        ]
+        try:
+            await run_in_executor(get_thread_pool(), self._insert_logs, rows)
+        except Exception as e:
+            self._stats["log_write_errors"] += 1
+            logger.error(f"Failed to record {len(rows)} notification log entries: {e}")
+
+    def _insert_logs(self, rows: List[Dict[str, Any]]):
+        db = self.session_factory()
+        try:
+            db.execute(insert(NOTIFICATION_LOGS), rows)
+            db.commit()
+        finally:
+            db.close()
+
+    async def close(self):
+        """Deliver pending alerts, then close pooled HTTP clients and SMTP sessions."""
+        await self.flush()
+        clients, self._http_clients = list(self._http_clients.values()), {}
+        for client in clients:
+            await client.aclose()
+        connections, self._smtp_connections = list(self._smtp_connections.values()), {}
+        for connection in connections:
+            await run_in_executor(get_thread_pool(), connection.close)
+
+    def get_stats(self) -> Dict[str, Any]:
+        deliveries = self._stats["deliveries"]
+        return {
+            "alerts_submitted": self._stats["alerts_submitted"],
+            "deliveries": deliveries,
+            "failed": self._stats["failed"],
+            "log_write_errors": self._stats["log_write_errors"],
+            "pending_alerts": sum(len(alerts) for _, alerts in self._pending.values()),
+            "in_flight": len(self._in_flight),
+            "avg_latency_ms": round(self._stats["total_latency_ms"] / deliveries, 2) if deliveries else 0.0,
+            "max_latency_ms": round(self._stats["max_latency_ms"], 2),
+            "http_clients": len(self._http_clients),
+            "smtp_connections": len(self._smtp_connections),
+        }
+
+
+_dispatcher: Optional[NotificationDispatcher] = None
+
+
+def get_notification_dispatcher() -> NotificationDispatcher:
+    """Get the process-wide notification dispatcher (bound to the app event loop)."""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = NotificationDispatcher()
+    return _dispatcher
+
+
+async def shutdown_notification_dispatcher():
+    """
+    Deliver pending alerts and close pooled connections.
+
+    Should be called on application shutdown.
+    """
+    global _dispatcher
+    if _dispatcher is not None:
+        await _dispatcher.close()
+        _dispatcher = None
@@ -1,20 +1,36 @@
 """
 Notification Service
 Handles sending alerts through various channels (SMTP, Telegram, ntfy, etc.)
+
+Each sender accepts an optional pooled httpx client (or SMTP connection);
+without one it opens a temporary connection for the single message. The
+pooled, coalescing delivery path lives in notification_dispatcher.
 """
 import smtplib
+import time
+from contextlib import asynccontextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import httpx
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import logging
 from sqlalchemy.orm import Session # Import Session
-from app.core.database import get_db # Import get_db
-from app import models # Import models
+from app.models.monitoring import NotificationLog
 
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def _http_client(client: Optional[httpx.AsyncClient] = None):
+    """Yield the given pooled client, or a temporary one closed on exit."""
+    if client is not None:
+        yield client
+        return
+    async with httpx.AsyncClient() as temporary:
+        yield temporary
+
+
 class NotificationService:
     """Service for sending notifications through configured channels"""
 
@@ -31,18 +47,10 @@ class NotificationService:
         Returns:
             tuple[bool, str]: True and success message if sent successfully, False and error message otherwise
         """
-        channel_type = channel.get('channel_type')
-        config = channel.get('config', {})
-        channel_id = channel.get('id')
-        alert_id = alert_data.get('alert_id')
-
-        success = False
-        message = ""
-
         # Create a notification log entry before attempting to send
-        log_entry = models.NotificationLog(
-            alert_id=alert_id,
-            channel_id=channel_id,
+        log_entry = NotificationLog(
+            alert_id=alert_data.get('alert_id'),
+            channel_id=channel.get('id'),
             success=False, # Assume failure initially
             message="Attempting to send..."
         )
@@ -50,44 +58,55 @@ class NotificationService:
         db.commit()
         db.refresh(log_entry)
 
+        started = time.perf_counter()
+        success, message = await NotificationService.deliver(channel, alert_data)
+
+        # Update the log entry with the final status
+        log_entry.success = success
+        log_entry.message = message
+        log_entry.latency_ms = (time.perf_counter() - started) * 1000
+        db.add(log_entry) # Re-add for update
+        db.commit()
+
+        return success, message
+
+    @staticmethod
+    async def deliver(
+        channel: Dict[str, Any],
+        alert_data: Dict[str, Any],
+        client: Optional[httpx.AsyncClient] = None,
+        smtp=None
+    ) -> tuple[bool, str]:
+        """
+        Send one message through a channel without logging it.
+
+        Args:
+            channel: AlertChannel dict with type and config
+            alert_data: Alert information to send
+            client: Pooled HTTP client for HTTP channels (None = temporary client)
+            smtp: Reusable SMTP connection for smtp channels (None = one-shot connection)
+
+        Returns:
+            tuple[bool, str]: Success flag and status message
+        """
+        channel_type = channel.get('channel_type')
+        config = channel.get('config') or {}
+
         try:
             if channel_type == 'smtp':
-                success, message = await NotificationService._send_smtp(channel, config, alert_data) # Pass channel to _send_smtp
-            elif channel_type == 'telegram':
-                success, message = await NotificationService._send_telegram(channel, config, alert_data) # Pass channel
-            elif channel_type == 'ntfy':
-                success, message = await NotificationService._send_ntfy(channel, config, alert_data) # Pass channel
-            elif channel_type == 'discord':
-                success, message = await NotificationService._send_discord(channel, config, alert_data) # Pass channel
-            elif channel_type == 'slack':
-                success, message = await NotificationService._send_slack(channel, config, alert_data) # Pass channel
-            elif channel_type == 'pushover':
-                success, message = await NotificationService._send_pushover(channel, config, alert_data) # Pass channel
-            elif channel_type == 'gotify':
-                success, message = await NotificationService._send_gotify(channel, config, alert_data) # Pass channel
-            elif channel_type == 'webhook':
-                success, message = await NotificationService._send_webhook(channel, config, alert_data) # Pass channel
-            else:
+                return await NotificationService._send_smtp(channel, config, alert_data, connection=smtp)
+            sender = _HTTP_SENDERS.get(channel_type)
+            if sender is None:
                 logger.warning(f"Unknown channel type: {channel_type}")
-                success = False
-                message = f"Unknown channel type: {channel_type}"
+                return False, f"Unknown channel type: {channel_type}"
+            return await sender(channel, config, alert_data, client=client)
         except Exception as e:
             logger.error(f"Failed to send notification via {channel_type}: {e}")
-            success = False
-            message = str(e)
-        finally:
-            # Update the log entry with the final status
-            log_entry.success = success
-            log_entry.message = message
-            db.add(log_entry) # Re-add for update
-            db.commit()
-            db.refresh(log_entry)
-
-            return success, message
+            return False, str(e)
 
     @staticmethod
-    async def _send_smtp(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any]) -> tuple[bool, str]:
-        """Send email via SMTP"""
+    async def _send_smtp(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any], connection=None) -> tuple[bool, str]:
+        """Send email via SMTP (over connection when given, else a one-shot session)"""
         try:
             from_email = config.get('from_email')
             to_emails = config.get('to_emails')
@@ -133,15 +152,18 @@ Homelab Intelligence Hub
 
             msg.attach(MIMEText(body, 'plain'))
 
-            server = smtplib.SMTP(smtp_host, int(smtp_port))
-            if use_tls:
-                server.starttls()
+            if connection is not None:
+                await connection.send(msg)
+            else:
+                server = smtplib.SMTP(smtp_host, int(smtp_port))
+                if use_tls:
+                    server.starttls()
 
-            if smtp_username and smtp_password:
-                server.login(smtp_username, smtp_password)
+                if smtp_username and smtp_password:
+                    server.login(smtp_username, smtp_password)
 
-            server.send_message(msg)
-            server.quit()
+                server.send_message(msg)
+                server.quit()
 
             logger.info(f"SMTP notification sent successfully")
             return True, "Notification sent successfully via SMTP."
@@ -158,7 +180,7 @@ Homelab Intelligence Hub
             return False, str(e)
 
     @staticmethod
-    async def _send_telegram(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any]) -> tuple[bool, str]:
+    async def _send_telegram(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any], client: Optional[httpx.AsyncClient] = None) -> tuple[bool, str]:
         """Send message via Telegram Bot API"""
         try:
             bot_token = config.get('bot_token')
@@ -193,7 +215,7 @@ _Triggered at {alert_data['triggered_at']}_
                 """
 
             url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-            async with httpx.AsyncClient() as client:
+            async with _http_client(client) as client:
                 response = await client.post(url, json={
                     'chat_id': chat_id,
                     'text': message,
@@ -216,7 +238,7 @@ _Triggered at {alert_data['triggered_at']}_
             return False, str(e)
 
     @staticmethod
-    async def _send_ntfy(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any]) -> tuple[bool, str]:
+    async def _send_ntfy(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any], client: Optional[httpx.AsyncClient] = None) -> tuple[bool, str]:
         """Send push notification via ntfy"""
         try:
             server_url = config.get('server_url', 'https://ntfy.sh')
@@ -248,7 +270,7 @@ _Triggered at {alert_data['triggered_at']}_
             else:
                 message_body = f"{alert_data['message']}\nValue: {alert_data['metric_value']}"
 
-            async with httpx.AsyncClient() as client:
+            async with _http_client(client) as client:
                 response = await client.post(
                     url,
                     content=message_body,
@@ -271,7 +293,7 @@ _Triggered at {alert_data['triggered_at']}_
             return False, str(e)
 
     @staticmethod
-    async def _send_discord(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any]) -> tuple[bool, str]:
+    async def _send_discord(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any], client: Optional[httpx.AsyncClient] = None) -> tuple[bool, str]:
         """Send message via Discord webhook"""
         try:
             webhook_url = config.get('webhook_url')
@@ -309,7 +331,7 @@ _Triggered at {alert_data['triggered_at']}_
                 }]
             }
 
-            async with httpx.AsyncClient() as client:
+            async with _http_client(client) as client:
                 response = await client.post(webhook_url, json=payload)
 
                 if response.status_code in [200, 204]:
@@ -328,7 +350,7 @@ _Triggered at {alert_data['triggered_at']}_
             return False, str(e)
 
     @staticmethod
-    async def _send_slack(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any]) -> tuple[bool, str]:
+    async def _send_slack(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any], client: Optional[httpx.AsyncClient] = None) -> tuple[bool, str]:
         """Send message via Slack webhook"""
         try:
             webhook_url = config.get('webhook_url')
@@ -366,7 +388,7 @@ _Triggered at {alert_data['triggered_at']}_
                 }]
             }
 
-            async with httpx.AsyncClient() as client:
+            async with _http_client(client) as client:
                 response = await client.post(webhook_url, json=payload)
 
                 if response.status_code == 200:
@@ -384,7 +406,7 @@ _Triggered at {alert_data['triggered_at']}_
             return False, str(e)
 
     @staticmethod
-    async def _send_pushover(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any]) -> tuple[bool, str]:
+    async def _send_pushover(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any], client: Optional[httpx.AsyncClient] = None) -> tuple[bool, str]:
         """Send push notification via Pushover"""
         try:
             user_key = config.get('user_key')
@@ -414,7 +436,7 @@ _Triggered at {alert_data['triggered_at']}_
                 'priority': priority
             }
 
-            async with httpx.AsyncClient() as client:
+            async with _http_client(client) as client:
                 response = await client.post('https://api.pushover.net/1/messages.json', data=payload)
 
                 if response.status_code == 200:
@@ -433,7 +455,7 @@ _Triggered at {alert_data['triggered_at']}_
             return False, str(e)
 
     @staticmethod
-    async def _send_gotify(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any]) -> tuple[bool, str]:
+    async def _send_gotify(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any], client: Optional[httpx.AsyncClient] = None) -> tuple[bool, str]:
         """Send push notification via Gotify"""
         try:
             server_url = config.get('server_url')
@@ -463,7 +485,7 @@ _Triggered at {alert_data['triggered_at']}_
 
             url = f"{server_url.rstrip('/')}/message?token={app_token}"
 
-            async with httpx.AsyncClient() as client:
+            async with _http_client(client) as client:
                 response = await client.post(url, json=payload)
 
                 if response.status_code == 200:
@@ -482,7 +504,7 @@ _Triggered at {alert_data['triggered_at']}_
             return False, str(e)
 
     @staticmethod
-    async def _send_webhook(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any]) -> tuple[bool, str]:
+    async def _send_webhook(channel: Dict[str, Any], config: Dict[str, Any], alert_data: Dict[str, Any], client: Optional[httpx.AsyncClient] = None) -> tuple[bool, str]:
         """Send notification via generic webhook"""
         try:
             url = config.get('url')
@@ -510,7 +532,7 @@ _Triggered at {alert_data['triggered_at']}_
             else:
                 templated_alert_data = alert_data
 
-            async with httpx.AsyncClient() as client:
+            async with _http_client(client) as client:
                 if method == 'POST':
                     response = await client.post(url, json=templated_alert_data, headers=headers)
                 else:
@@ -529,3 +551,15 @@ _Triggered at {alert_data['triggered_at']}_
         except Exception as e:
             logger.error(f"Webhook error: {e}")
             return False, str(e)
+
+
+# HTTP channel types -> sender(channel, config, alert_data, client=None)
+_HTTP_SENDERS = {
+    'telegram': NotificationService._send_telegram,
+    'ntfy': NotificationService._send_ntfy,
+    'discord': NotificationService._send_discord,
+    'slack': NotificationService._send_slack,
+    'pushover': NotificationService._send_pushover,
+    'gotify': NotificationService._send_gotify,
+    'webhook': NotificationService._send_webhook,
+}
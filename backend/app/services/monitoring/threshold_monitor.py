@@ -3,13 +3,16 @@ Threshold Monitoring Service
 Checks server metrics against threshold rules and triggers alerts
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, or_
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, List, Set, Tuple
+import json
 import logging
 from app import models
-from app.services.monitoring.notification_service import NotificationService
+from app.services.core.snapshot_service import SnapshotService
+from app.services.monitoring.notification_dispatcher import get_notification_dispatcher
 from app.services.monitoring.push_notifications import send_push_notification
+from app.services.response_cache import TAG_ALERTS, invalidate_cache_tags
 
 logger = logging.getLogger(__name__)
 
@@ -19,10 +22,15 @@ class ThresholdMonitor:
     def __init__(self, db: Session, tenant_id: str = "default"):
         self.db = db
         self.tenant_id = tenant_id
-        self.notification_service = NotificationService()
 
     async def check_all_thresholds(self):
-        """Check all enabled threshold rules against current server metrics"""
+        """Check all enabled threshold rules against current server metrics
+
+        The cost of a check does not grow with rules x servers: servers, their
+        latest snapshots and recent alerts are each loaded with one query, all
+        referenced metrics are extracted into a (server_id, metric) table in a
+        single pass, and every rule is evaluated against that table in memory.
+        """
         logger.info("Starting threshold monitoring check...")
 
         # Check for maintenance mode
@@ -38,84 +46,110 @@ class ThresholdMonitor:
 
         logger.info(f"Found {len(rules)} enabled threshold rules")
 
+        now = datetime.now()
+        active_rules = []
         for rule in rules:
+            if rule.muted_until and rule.muted_until > now:
+                logger.info(f"Rule {rule.id} ({rule.name}) is muted until {rule.muted_until}, skipping.")
+                continue
+            active_rules.append(rule)
+
+        if not active_rules:
+            logger.info("Threshold monitoring check completed")
+            return
+
+        servers = self._load_servers(active_rules)
+        snapshots = SnapshotService.get_latest_snapshots(self.db, servers.keys())
+        metric_table = self._build_metric_table(snapshots, {rule.metric for rule in active_rules})
+        recent_alerts = self._load_recent_alert_keys([rule.id for rule in active_rules], now)
+
+        pending = []
+        for rule in active_rules:
             try:
-                await self._check_rule(rule)
+                pending.extend(self._check_rule(rule, servers, metric_table, recent_alerts))
             except Exception as e:
                 logger.error(f"Error checking rule {rule.id} ({rule.name}): {e}")
 
+        if pending:
+            await self._create_alerts(pending)
+
         logger.info("Threshold monitoring check completed")
 
-    async def _check_rule(self, rule: models.ThresholdRule):
-        """Check a single threshold rule"""
-        if rule.muted_until and rule.muted_until > datetime.now():
-            logger.info(f"Rule {rule.id} ({rule.name}) is muted until {rule.muted_until}, skipping.")
-            return
-        # Get servers to check (specific server or all servers)
+    def _check_rule(
+        self,
+        rule,
+        servers: Dict[int, Any],
+        metric_table: Dict[Tuple[int, str], float],
+        recent_alerts: Set[Tuple[int, int]]
+    ) -> List[Tuple[Any, Any, float]]:
+        """Evaluate one rule against the metric table; returns (rule, server, value) per new alert"""
         if rule.server_id:
-            servers = [self.db.query(models.ServerProfile).filter(models.ServerProfile.tenant_id == self.tenant_id).filter(
-                models.ServerProfile.id == rule.server_id
-            ).first()]
-            if not servers[0]:
+            if rule.server_id not in servers:
                 logger.warning(f"Server {rule.server_id} not found for rule {rule.id}")
-                return
+                return []
+            server_ids = [rule.server_id]
         else:
-            servers = self.db.query(models.ServerProfile).filter(models.ServerProfile.tenant_id == self.tenant_id).all()
+            server_ids = servers.keys()
+
+        triggered = []
+        for server_id in server_ids:
+            metric_value = metric_table.get((server_id, rule.metric))
+            if metric_value is None:
+                continue
 
-        for server in servers:
             try:
-                await self._check_server_metric(rule, server)
+                threshold_exceeded = self._evaluate_condition(metric_value, rule.condition, rule.threshold_value)
             except Exception as e:
-                logger.error(f"Error checking server {server.id} for rule {rule.id}: {e}")
-
-    async def _check_server_metric(self, rule: models.ThresholdRule, server: models.ServerProfile):
-        """Check if a server's metric exceeds the threshold"""
-        # Get latest snapshot for the server
-        latest_snapshot = self.db.query(models.ServerSnapshot).filter(models.ServerSnapshot.tenant_id == self.tenant_id).filter(
-            models.ServerSnapshot.server_id == server.id
-        ).order_by(models.ServerSnapshot.timestamp.desc()).first()
-
-        if not latest_snapshot:
-            logger.debug(f"No snapshot found for server {server.id}")
-            return
-
-        # Extract metric value from snapshot data
-        metric_value = self._extract_metric_value(rule.metric, latest_snapshot.data)
-
-        if metric_value is None:
-            logger.debug(f"Metric {rule.metric} not found in snapshot for server {server.id}")
-            return
-
-        # Check if threshold is exceeded
-        threshold_exceeded = self._evaluate_condition(
-            metric_value,
-            rule.condition,
-            rule.threshold_value
-        )
-
-        if threshold_exceeded:
-            # Check if we already have a recent unresolved alert for this rule+server
-            # (avoid alert spam - don't create duplicate alerts within 5 minutes)
-            recent_alert = self.db.query(models.Alert).filter(models.Alert.tenant_id == self.tenant_id).filter(
-                and_(
-                    models.Alert.rule_id == rule.id,
-                    models.Alert.server_id == server.id,
-                    models.Alert.resolved == False,
-                    # Only consider non-snoozed alerts for duplication check, or if snooze has expired
-                    and_(
-                        models.Alert.snoozed_until == None,
-                        models.Alert.snoozed_until < datetime.now()
-                    ),
-                    models.Alert.triggered_at >= datetime.now() - timedelta(minutes=5)
-                )
-            ).first()
-
-            if recent_alert:
-                logger.debug(f"Recent alert exists for rule {rule.id} on server {server.id}, skipping")
-                return
-
-            # Create alert
-            await self._create_alert(rule, server, metric_value)
+                logger.error(f"Error checking server {server_id} for rule {rule.id}: {e}")
+                continue
+
+            if not threshold_exceeded:
+                continue
+
+            # Avoid alert spam - don't create duplicate alerts within 5 minutes
+            if (rule.id, server_id) in recent_alerts:
+                logger.debug(f"Recent alert exists for rule {rule.id} on server {server_id}, skipping")
+                continue
+
+            recent_alerts.add((rule.id, server_id))
+            triggered.append((rule, servers[server_id], metric_value))
+        return triggered
+
+    def _load_servers(self, rules) -> Dict[int, Any]:
+        """Load every server referenced by the rules in one query"""
+        query = self.db.query(models.ServerProfile).filter(models.ServerProfile.tenant_id == self.tenant_id)
+        if all(rule.server_id for rule in rules):
+            query = query.filter(models.ServerProfile.id.in_({rule.server_id for rule in rules}))
+        return {server.id: server for server in query.all()}
+
+    def _build_metric_table(self, snapshots: Dict[int, Any], metrics: Set[str]) -> Dict[Tuple[int, str], float]:
+        """Extract every referenced metric from each latest snapshot into a (server_id, metric) table"""
+        table = {}
+        for server_id, snapshot in snapshots.items():
+            data = snapshot.data or {}
+            for metric in metrics:
+                value = self._extract_metric_value(metric, data)
+                if value is not None:
+                    table[(server_id, metric)] = value
+        return table
+
+    def _load_recent_alert_keys(self, rule_ids: List[int], now: datetime) -> Set[Tuple[int, int]]:
+        """Load (rule_id, server_id) pairs with a recent unresolved, non-snoozed alert in one query"""
+        rows = self.db.query(models.Alert.rule_id, models.Alert.server_id).filter(
+            models.Alert.tenant_id == self.tenant_id
+        ).filter(
+            and_(
+                models.Alert.rule_id.in_(rule_ids),
+                models.Alert.resolved == False,
+                # Only consider non-snoozed alerts for duplication check, or if snooze has expired
+                or_(
+                    models.Alert.snoozed_until == None,
+                    models.Alert.snoozed_until < now
+                ),
+                models.Alert.triggered_at >= now - timedelta(minutes=5)
+            )
+        ).distinct().all()
+        return {(rule_id, server_id) for rule_id, server_id in rows}
 
     def _extract_metric_value(self, metric: str, snapshot_data: Dict[str, Any]) -> float | None:
         """Extract metric value from snapshot data"""
@@ -175,9 +209,8 @@ class ThresholdMonitor:
             logger.warning(f"Unknown condition: {condition}")
             return False
 
-    async def _create_alert(self, rule: models.ThresholdRule, server: models.ServerProfile, metric_value: float):
-        """Create a new alert and send notifications"""
-        # Generate alert message
+    def _format_alert_message(self, rule: models.ThresholdRule, server: models.ServerProfile, metric_value: float) -> str:
+        """Generate a human-readable alert message"""
         metric_labels = {
             'cpu_percent': 'CPU Usage',
             'memory_percent': 'Memory Usage',
@@ -200,39 +233,64 @@ class ThresholdMonitor:
             message += '°C'
 
         message += f" (threshold: {rule.threshold_value})"
+        return message
+
+    async def _create_alerts(self, pending: List[Tuple[models.ThresholdRule, models.ServerProfile, float]]):
+        """Create all triggered alerts in one commit and send notifications"""
+        triggered_at = datetime.now()
+        alerts = [
+            (
+                models.Alert(
+                    tenant_id=self.tenant_id,
+                    rule_id=rule.id,
+                    server_id=server.id,
+                    severity=rule.severity,
+                    message=self._format_alert_message(rule, server, metric_value),
+                    metric_value=int(metric_value),
+                    triggered_at=triggered_at
+                ),
+                server,
+                rule
+            )
+            for rule, server, metric_value in pending
+        ]
 
-        # Create alert record
-        alert = models.Alert(
-            rule_id=rule.id,
-            server_id=server.id,
-            severity=rule.severity,
-            message=message,
-            metric_value=int(metric_value),
-            triggered_at=datetime.now()
-        )
-
-        self.db.add(alert)
-        self.db.commit()
-        self.db.refresh(alert)
+        try:
+            payloads = self._save_alerts(alerts)
+        except Exception as e:
+            # Fall back to one commit per alert so a bad rule does not cost the others
+            self.db.rollback()
+            logger.error(f"Error creating {len(alerts)} alerts in one batch, retrying one by one: {e}")
+            payloads = []
+            for alert, server, rule in alerts:
+                try:
+                    payloads.extend(self._save_alerts([(alert, server, rule)]))
+                except Exception as e:
+                    self.db.rollback()
+                    logger.error(f"Error creating alert for rule {rule.id} ({rule.name}) on server {server.id}: {e}")
+        if not payloads:
+            return
+        invalidate_cache_tags(TAG_ALERTS)
 
-        logger.info(f"Alert created: {message} (Alert ID: {alert.id})")
+        for payload in payloads:
+            logger.info(f"Alert created: {payload['message']} (Alert ID: {payload['alert_id']})")
 
-        # Send notifications through all enabled channels
-        await self._send_notifications(alert, server, rule)
+        await self._send_notifications(payloads)
 
-    async def _send_notifications(self, alert: models.Alert, server: models.ServerProfile, rule: models.ThresholdRule):
-        """Send alert notifications through all enabled channels"""
-        # Get all enabled alert channels
-        channels = self.db.query(models.AlertChannel).filter(
-            models.AlertChannel.enabled == True
-        ).all()
+    def _save_alerts(self, alerts) -> List[Dict[str, Any]]:
+        """Insert (alert, server, rule) triples in one commit and return their payloads"""
+        self.db.add_all([alert for alert, _, _ in alerts])
+        self.db.flush()
 
-        if not channels:
-            logger.info("No enabled notification channels found")
-            return
+        # Capture payloads before commit expires the instances
+        payloads = [self._alert_payload(alert, server, rule) for alert, server, rule in alerts]
 
-        # Prepare alert data for notification
-        alert_data = {
+        self.db.commit()
+        return payloads
+
+    def _alert_payload(self, alert: models.Alert, server: models.ServerProfile, rule: models.ThresholdRule) -> Dict[str, Any]:
+        """Prepare alert data for notification"""
+        return {
             'alert_id': alert.id,
             'severity': alert.severity,
             'message': alert.message,
@@ -240,47 +298,58 @@ class ThresholdMonitor:
             'server_name': server.name,
             'server_id': server.id,
             'rule_name': rule.name,
+            'tenant_id': self.tenant_id,
             'triggered_at': alert.triggered_at.isoformat(),
             'timestamp': int(alert.triggered_at.timestamp())
         }
 
-        # Send through each channel
-        for channel in channels:
-            try:
-                channel_dict = {
+    async def _send_notifications(self, payloads: List[Dict[str, Any]]):
+        """Send alert notifications through all enabled channels"""
+        # Get all enabled alert channels (once per batch of alerts)
+        channels = self.db.query(models.AlertChannel).filter(
+            models.AlertChannel.enabled == True
+        ).all()
+
+        if not channels:
+            logger.info("No enabled notification channels found")
+        else:
+            channel_dicts = [
+                {
                     'id': channel.id,
                     'name': channel.name,
                     'channel_type': channel.channel_type,
                     'config': channel.config,
                     'template': channel.template # Pass the template field
                 }
+                for channel in channels
+            ]
 
-                success, message = await self.notification_service.send_notification(self.db, channel_dict, alert_data)
-
-                if success:
-                    logger.info(f"Notification sent via {channel.name} (ID: {channel.id}): {message}")
-                else:
-                    logger.warning(f"Failed to send notification via {channel.name} (ID: {channel.id}): {message}")
+            # Coalesced per channel and delivered in the background, so an
+            # alert storm becomes one digest per channel
+            dispatcher = get_notification_dispatcher()
+            for alert_data in payloads:
+                for channel_dict in channel_dicts:
+                    dispatcher.submit(channel_dict, alert_data)
 
-            except Exception as e:
-                logger.error(f"Error sending notification via {channel.name}: {e}")
-        
         # Send browser push notifications for critical alerts
-        if alert.severity == 'critical':
-            push_subscriptions = self.db.query(models.PushSubscription).all()
-            if push_subscriptions:
-                message_title = f"CRITICAL Alert: {server.name}"
-                message_body = alert.message
-                for sub in push_subscriptions:
-                    try:
-                        subscription_info = {
-                            "endpoint": sub.endpoint,
-                            "keys": {
-                                "p256dh": sub.p256dh,
-                                "auth": sub.auth,
-                            }
+        critical = [alert_data for alert_data in payloads if alert_data['severity'] == 'critical']
+        if not critical:
+            return
+
+        push_subscriptions = self.db.query(models.PushSubscription).all()
+        for alert_data in critical:
+            message_title = f"CRITICAL Alert: {alert_data['server_name']}"
+            message_body = alert_data['message']
+            for sub in push_subscriptions:
+                try:
+                    subscription_info = {
+                        "endpoint": sub.endpoint,
+                        "keys": {
+                            "p256dh": sub.p256dh,
+                            "auth": sub.auth,
                         }
-                        await send_push_notification(subscription_info, json.dumps({"title": message_title, "body": message_body}))
-                        logger.info(f"Browser push notification sent to {sub.endpoint}")
-                    except Exception as e:
-                        logger.error(f"Error sending browser push notification to {sub.endpoint}: {e}")
+                    }
+                    await send_push_notification(subscription_info, json.dumps({"title": message_title, "body": message_body}))
+                    logger.info(f"Browser push notification sent to {sub.endpoint}")
+                except Exception as e:
+                    logger.error(f"Error sending browser push notification to {sub.endpoint}: {e}")
@@ -14,10 +14,16 @@ from sqlalchemy.orm import Session
 from sqlalchemy import select
 import inspect
 
-from app.models import Plugin, PluginExecution, PluginMetric
+from app.models import Plugin
 from app.plugins.loader import PluginLoader
 from app.plugins.base import PluginBase
 from app.core.database import SessionLocal
+from app.services.plugins.execution_engine import (
+    PluginExecutionEngine,
+    PluginRunResult,
+    get_execution_engine,
+)
+from app.services.response_cache import TAG_PLUGINS, invalidate_cache_tags
 
 logger = logging.getLogger(__name__)
 
@@ -46,15 +52,19 @@ class PluginScheduler:
     - Load enabled plugins from database
     - Schedule periodic collection (default: 60s)
     - Spread execution to avoid thundering herd
+    - Run collections through the bounded PluginExecutionEngine
     - Track execution status
     """
     
-    def __init__(self, db_session_factory=SessionLocal):
+    def __init__(self, db_session_factory=SessionLocal,
+                 engine: Optional[PluginExecutionEngine] = None):
         """Initialize scheduler."""
         self.scheduler = AsyncIOScheduler()
         self.db_session_factory = db_session_factory
+        self.engine = engine or get_execution_engine()
         self.loader = PluginLoader()
         self.plugin_instances: Dict[str, PluginBase] = {}
+        self._consecutive_errors: Dict[str, int] = {}
         self._running = False
         
     async def initialize(self):
@@ -154,7 +164,11 @@ class PluginScheduler:
             start_time = datetime.now() + start_offset
             
             # Schedule the plugin
-            trigger = IntervalTrigger(seconds=interval_seconds, start_date=start_time)
+            trigger = IntervalTrigger(
+                seconds=interval_seconds,
+                start_date=start_time,
+                jitter=self.engine.jitter_seconds
+            )
             self.scheduler.add_job(
                 self._execute_plugin,
                 trigger=trigger,
@@ -168,7 +182,10 @@ class PluginScheduler:
     
     async def _execute_plugin(self, plugin_id: str):
         """
-        Execute a single plugin and store results.
+        Execute a single plugin through the shared execution engine.
+        
+        The engine enforces the concurrency limit and per-plugin timeout,
+        queues metrics for ingestion and records the PluginExecution row.
         
         Args:
             plugin_id: Plugin identifier
@@ -178,99 +195,26 @@ class PluginScheduler:
             logger.error(f"Plugin instance not found: {plugin_id}")
             return
         
-        db = self.db_session_factory()
-        execution_record = None
+        logger.debug(f"Collecting data from {plugin_id}...")
+        result = await self.engine.run(plugin_id, plugin_instance)
         
+        if result.status == "skipped":
+            return
+        
+        db = self.db_session_factory()
         try:
-            # Create execution record
-            execution_record = PluginExecution(
-                plugin_id=plugin_id,
-                started_at=datetime.now(),
-                status='running'
-            )
-            db.add(execution_record)
-            db.commit()
-            db.refresh(execution_record)
-            
-            logger.debug(f"Collecting data from {plugin_id}...")
-            
-            # Collect data from plugin
-            data = await plugin_instance.collect_data()
-            
-            if not data:
-                raise ValueError("Plugin returned no data")
-            
-            # Store metrics
-            metrics_count = await self._store_metrics(db, plugin_id, data)
-            
-            # Update execution record
-            execution_record.completed_at = datetime.now()
-            execution_record.status = 'success'
-            execution_record.metrics_count = metrics_count
-            db.commit()
-            
-            # Update plugin status
-            await self._update_plugin_status(db, plugin_id, success=True)
-            
-            # Broadcast WebSocket events
-            await self._broadcast_events(plugin_id, data, execution_record)
-            
-            logger.info(f"✅ {plugin_id}: collected {metrics_count} metrics")
-            
-        except Exception as e:
-            logger.error(f"❌ {plugin_id}: {e}")
-            
-            # Update execution record
-            if execution_record:
-                execution_record.completed_at = datetime.now()
-                execution_record.status = 'failed'
-                execution_record.error_message = str(e)
-                db.commit()
-            
-            # Update plugin status
-            await self._update_plugin_status(db, plugin_id, success=False, error=str(e))
-            
+            await self._update_plugin_status(db, plugin_id, success=result.success, error=result.error)
         finally:
             db.close()
-    
-    async def _store_metrics(self, db: Session, plugin_id: str, data: dict) -> int:
-        """
-        Store plugin metrics in database.
-        
-        Args:
-            db: Database session
-            plugin_id: Plugin identifier
-            data: Plugin data
-            
-        Returns:
-            Number of metrics stored
-        """
-        metrics_count = 0
-        timestamp = datetime.now()
-        
-        # Extract metrics from plugin data
-        # Each top-level key becomes a metric
-        for metric_name, metric_value in data.items():
-            if metric_name == 'timestamp':
-                continue
-            
-            metric = PluginMetric(
-                timestamp=timestamp,
-                plugin_id=plugin_id,
-                metric_name=metric_name,
-                value=metric_value,
-                tags={'source': 'unity'}
-            )
-            db.add(metric)
-            metrics_count += 1
         
-        db.commit()
-        return metrics_count
+        if result.success:
+            # Broadcast WebSocket events
+            await self._broadcast_events(plugin_id, result.data, result)
     
     async def _update_plugin_status(self, db: Session, plugin_id: str, 
                                    success: bool, error: Optional[str] = None):
         """
-        Update plugin status tracking.
+        Update plugin health tracking.
         
         Args:
             db: Database session
@@ -278,44 +222,51 @@ class PluginScheduler:
             success: Whether execution was successful
             error: Error message if failed
         """
-        # Get or create status record
-        status = db.query(PluginStatus).filter_by(plugin_id=plugin_id).first()
-        
-        if not status:
-            status = PluginStatus(plugin_id=plugin_id)
-            db.add(status)
-        
-        # Update status fields
-        status.last_run = datetime.now()
-        
         if success:
-            status.last_success = datetime.now()
-            status.consecutive_errors = 0
-            status.health_status = 'healthy'
+            self._consecutive_errors[plugin_id] = 0
+            health_status = 'healthy'
         else:
-            status.error_count += 1
-            status.consecutive_errors += 1
-            status.last_error = error
+            self._consecutive_errors[plugin_id] = self._consecutive_errors.get(plugin_id, 0) + 1
+            consecutive = self._consecutive_errors[plugin_id]
             
             # Determine health status based on consecutive errors
-            if status.consecutive_errors >= 5:
-                status.health_status = 'failing'
-            elif status.consecutive_errors >= 2:
-                status.health_status = 'degraded'
+            if consecutive >= 5:
+                health_status = 'failing'
+            elif consecutive >= 2:
+                health_status = 'degraded'
             else:
-                status.health_status = 'unhealthy'
+                health_status = 'unhealthy'
         
-        db.commit()
+        try:
+            plugin_record = db.execute(
+                select(Plugin).where(Plugin.id == plugin_id)
+            ).scalar_one_or_none()
+            if not plugin_record:
+                return
+            
+            changed = plugin_record.health_status != health_status or not success
+            plugin_record.health_status = health_status
+            if not success:
+                plugin_record.last_error = error
+                plugin_record.health_message = (
+                    f"{self._consecutive_errors[plugin_id]} consecutive failed execution(s)"
+                )
+            db.commit()
+            # Only a status change makes cached plugin listings stale
+            if changed:
+                invalidate_cache_tags(TAG_PLUGINS)
+        except Exception as e:
+            logger.error(f"Failed to update status for {plugin_id}: {e}")
+            db.rollback()
     
-
-    async def _broadcast_events(self, plugin_id: str, data: dict, execution: PluginExecution):
+    async def _broadcast_events(self, plugin_id: str, data: dict, execution: PluginRunResult):
         """
         Broadcast WebSocket events for plugin execution.
         
         Args:
             plugin_id: Plugin identifier
             data: Collected metrics data
-            execution: Execution record
+            execution: Result of the engine run
         """
         ws = get_websocket_module()
         if not ws:
@@ -326,13 +277,7 @@ class PluginScheduler:
             await ws.broadcast_metrics_update(plugin_id, data)
             
             # Broadcast execution complete
-            await ws.broadcast_execution_complete(plugin_id, {
-                "id": execution.id,
-                "started_at": execution.started_at.isoformat(),
-                "completed_at": execution.completed_at.isoformat() if execution.completed_at else None,
-                "status": execution.status,
-                "metrics_count": execution.metrics_count
-            })
+            await ws.broadcast_execution_complete(plugin_id, execution.to_dict())
         except Exception as e:
             logger.debug(f"WebSocket broadcast skipped: {e}")
 
@@ -353,6 +298,11 @@ class PluginScheduler:
             return
         
         self.scheduler.shutdown()
+        
+        # Cancel collections that are still in flight
+        for plugin_id in self.plugin_instances:
+            self.engine.cancel(plugin_id)
+        
         self._running = False
         logger.info("🛑 Plugin scheduler stopped")
     
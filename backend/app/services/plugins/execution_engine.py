@@ -0,0 +1,354 @@
+"""
+Plugin Execution Engine
+
+Runs plugin collection concurrently with a bounded number of slots:
+- Per-plugin asyncio timeouts (config > metadata > global default)
+- Cancellation of individual or all in-flight runs
+- Jittered start times so a full cycle does not hit every target at once
+- Overlap protection: a plugin still running is not started again
+
+Every run is recorded in PluginExecution with its queue wait and wall time.
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import PluginExecution
+from app.plugins.base import PluginBase
+from app.services.monitoring.latest_values import LatestExecution, get_latest_index
+from app.services.plugins.metric_ingestion import get_metric_pipeline
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PluginRunResult:
+    """Outcome of a single plugin run."""
+    plugin_id: str
+    status: str  # success, failed, timeout, cancelled, skipped
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    queue_wait_ms: int = 0
+    duration_ms: int = 0
+    loop_blocked_ms: int = 0
+    metrics_count: int = 0
+    execution_id: Optional[int] = None
+    error: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+
+    @property
+    def success(self) -> bool:
+        return self.status == "success"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.execution_id,
+            "plugin_id": self.plugin_id,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "status": self.status,
+            "metrics_count": self.metrics_count,
+            "queue_wait_ms": self.queue_wait_ms,
+            "duration_ms": self.duration_ms,
+            "loop_blocked_ms": self.loop_blocked_ms,
+            "error": self.error,
+        }
+
+
+def resolve_timeout(plugin: PluginBase, default: float = settings.plugin_default_timeout_seconds) -> float:
+    """
+    Determine the collection timeout for a plugin.
+
+    Order of precedence: plugin config 'timeout_seconds', metadata
+    timeout_seconds, then the engine default.
+
+    Args:
+        plugin: Plugin instance
+        default: Fallback timeout in seconds
+
+    Returns:
+        Timeout in seconds
+    """
+    configured = (plugin.config or {}).get("timeout_seconds")
+    if configured:
+        try:
+            return float(configured)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring invalid timeout_seconds in config: {configured!r}")
+
+    try:
+        metadata_timeout = plugin.get_metadata().timeout_seconds
+    except Exception:
+        metadata_timeout = None
+
+    return float(metadata_timeout) if metadata_timeout else default
+
+
+class PluginExecutionEngine:
+    """
+    Bounded, timeout-aware plugin runner.
+
+    A single engine is shared by the scheduler, the periodic cycle in
+    main.py and on-demand executions so the concurrency limit is global.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = settings.plugin_max_concurrency,
+        default_timeout: float = settings.plugin_default_timeout_seconds,
+        jitter_seconds: float = settings.plugin_schedule_jitter_seconds,
+        db_session_factory=SessionLocal
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            max_concurrency: Maximum plugins collecting at the same time
+            default_timeout: Timeout for plugins without their own setting
+            jitter_seconds: Upper bound of the random start delay in run_all()
+            db_session_factory: Factory for sessions used to record executions
+        """
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self.jitter_seconds = jitter_seconds
+        self.db_session_factory = db_session_factory
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = {
+            "runs": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "cancelled": 0,
+            "skipped": 0,
+        }
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run(self, plugin_id: str, plugin: PluginBase, jitter: float = 0.0) -> PluginRunResult:
+        """
+        Run one plugin: wait for a slot, collect under a timeout, queue
+        metrics and record the execution.
+
+        Args:
+            plugin_id: Plugin identifier
+            plugin: Plugin instance
+            jitter: Seconds to sleep before queueing for a slot
+
+        Returns:
+            PluginRunResult
+        """
+        if plugin_id in self._inflight:
+            logger.warning(f"Plugin {plugin_id} is still running, skipping this cycle")
+            self._stats["skipped"] += 1
+            return PluginRunResult(plugin_id=plugin_id, status="skipped",
+                                   error="Previous execution still running")
+
+        task = asyncio.create_task(self._run(plugin_id, plugin, jitter))
+        self._inflight[plugin_id] = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            # If our caller is being cancelled the error must propagate;
+            # otherwise the run was cancelled through cancel()/cancel_all().
+            current = asyncio.current_task()
+            if current is not None and current.cancelling():
+                raise
+            return PluginRunResult(plugin_id=plugin_id, status="cancelled",
+                                   error="Execution cancelled")
+        finally:
+            self._inflight.pop(plugin_id, None)
+
+    async def run_all(self, plugins: Dict[str, PluginBase]) -> List[PluginRunResult]:
+        """
+        Run many plugins concurrently within the concurrency limit.
+
+        Start times are spread randomly over [0, jitter_seconds).
+
+        Args:
+            plugins: Mapping of plugin_id to plugin instance
+
+        Returns:
+            List of PluginRunResult in the same order as plugins
+        """
+        coros = [
+            self.run(plugin_id, plugin, jitter=random.uniform(0, self.jitter_seconds))
+            for plugin_id, plugin in plugins.items()
+        ]
+        results = await asyncio.gather(*coros, return_exceptions=True)
+
+        normalized: List[PluginRunResult] = []
+        for plugin_id, result in zip(plugins.keys(), results):
+            if isinstance(result, BaseException):
+                logger.error(f"Unexpected error running plugin {plugin_id}: {result}")
+                result = PluginRunResult(plugin_id=plugin_id, status="failed", error=str(result))
+            normalized.append(result)
+        return normalized
+
+    def cancel(self, plugin_id: str) -> bool:
+        """
+        Cancel an in-flight plugin run.
+
+        Returns:
+            True if a run was cancelled
+        """
+        task = self._inflight.get(plugin_id)
+        if task and not task.done():
+            task.cancel()
+            return True
+        return False
+
+    def cancel_all(self) -> int:
+        """
+        Cancel every in-flight plugin run.
+
+        Returns:
+            Number of runs cancelled
+        """
+        return sum(1 for plugin_id in list(self._inflight) if self.cancel(plugin_id))
+
+    async def _run(self, plugin_id: str, plugin: PluginBase, jitter: float) -> PluginRunResult:
+        if jitter > 0:
+            await asyncio.sleep(jitter)
+
+        timeout = resolve_timeout(plugin, self.default_timeout)
+        result = PluginRunResult(plugin_id=plugin_id, status="running")
+        self._stats["runs"] += 1
+
+        queued_at = time.perf_counter()
+        async with self.semaphore:
+            started = time.perf_counter()
+            result.queue_wait_ms = int((started - queued_at) * 1000)
+            result.started_at = datetime.now()
+
+            try:
+                data = await asyncio.wait_for(plugin.collect(), timeout=timeout)
+                if not data:
+                    raise ValueError("Plugin returned no data")
+
+                result.data = data
+                result.metrics_count = await get_metric_pipeline().submit_plugin_data(
+                    plugin_id, data, timestamp=result.started_at
+                )
+                result.status = "success"
+                self._stats["succeeded"] += 1
+                plugin._last_execution = result.started_at
+                plugin._execution_count += 1
+                plugin._last_error = None
+
+            except asyncio.TimeoutError:
+                result.status = "timeout"
+                result.error = f"Collection timed out after {timeout:g}s"
+                self._stats["timed_out"] += 1
+                await plugin.on_error(TimeoutError(result.error))
+
+            except asyncio.CancelledError:
+                result.status = "cancelled"
+                result.error = "Execution cancelled"
+                self._stats["cancelled"] += 1
+                result.duration_ms = int((time.perf_counter() - started) * 1000)
+                result.completed_at = datetime.now()
+                self._record_execution(result)
+                raise
+
+            except Exception as e:
+                result.status = "failed"
+                result.error = str(e)
+                self._stats["failed"] += 1
+                await plugin.on_error(e)
+
+            result.duration_ms = int((time.perf_counter() - started) * 1000)
+            result.completed_at = datetime.now()
+            result.loop_blocked_ms = int(plugin.loop_block_stats.last_total_ms)
+
+        if result.success:
+            logger.info(
+                f"✅ {plugin_id}: collected {result.metrics_count} metrics "
+                f"in {result.duration_ms}ms (waited {result.queue_wait_ms}ms, "
+                f"loop blocked {result.loop_blocked_ms}ms)"
+            )
+        else:
+            logger.warning(f"❌ {plugin_id}: {result.status}: {result.error}")
+
+        self._record_execution(result)
+        return result
+
+    def _record_execution(self, result: PluginRunResult):
+        """Persist a PluginExecution row for a finished run."""
+        get_latest_index().update_execution(LatestExecution(
+            plugin_id=result.plugin_id,
+            status=result.status,
+            started_at=result.started_at or datetime.now(),
+            completed_at=result.completed_at,
+            duration_ms=result.duration_ms,
+            error=result.error
+        ))
+
+        db = self.db_session_factory()
+        try:
+            inserted = db.execute(
+                insert(PluginExecution.__table__).values(
+                    plugin_id=result.plugin_id,
+                    started_at=result.started_at,
+                    completed_at=result.completed_at,
+                    status=result.status,
+                    error_message=result.error,
+                    metrics_count=result.metrics_count,
+                    queue_wait_ms=result.queue_wait_ms,
+                    duration_ms=result.duration_ms
+                )
+            )
+            db.commit()
+            result.execution_id = inserted.inserted_primary_key[0]
+        except Exception as e:
+            logger.error(f"Failed to record execution for {result.plugin_id}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get engine counters.
+
+        Returns:
+            Dictionary with limits, in-flight plugins and outcome counts
+        """
+        return {
+            "max_concurrency": self.max_concurrency,
+            "default_timeout_seconds": self.default_timeout,
+            "jitter_seconds": self.jitter_seconds,
+            "in_flight": sorted(self._inflight.keys()),
+            **self._stats,
+        }
+
+
+# Global engine shared by all plugin execution paths
+_engine: Optional[PluginExecutionEngine] = None
+
+
+def get_execution_engine() -> PluginExecutionEngine:
+    """
+    Get or create the process-wide plugin execution engine.
+
+    Returns:
+        PluginExecutionEngine instance
+    """
+    global _engine
+
+    if _engine is None:
+        _engine = PluginExecutionEngine()
+
+    return _engine
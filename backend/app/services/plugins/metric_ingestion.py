@@ -0,0 +1,456 @@
+"""
+Plugin Metric Ingestion Pipeline
+
+Buffers plugin metric rows in a bounded in-process queue and writes them to
+the plugin_metrics table in batches from a background worker thread:
+- PostgreSQL (psycopg2): COPY ... FROM STDIN
+- Other databases: multi-row INSERT ... VALUES
+
+Producers on the event loop never touch the database directly. When the queue
+is full, submit() waits for room (backpressure) instead of growing unbounded.
+"""
+import asyncio
+import csv
+import io
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.models.plugin import PluginMetric
+from app.services.monitoring.latest_values import get_latest_index
+
+logger = logging.getLogger(__name__)
+
+# Rows per multi-row INSERT statement (keeps SQLite under its bound-parameter limit)
+INSERT_CHUNK_SIZE = 500
+
+# Window used to compute the rows-per-second rate
+RATE_WINDOW_SECONDS = 60.0
+
+COPY_COLUMNS = ("timestamp", "plugin_id", "metric_name", "value", "tags")
+
+
+@dataclass
+class MetricRow:
+    """A single plugin_metrics row waiting to be written."""
+    timestamp: datetime
+    plugin_id: str
+    metric_name: str
+    value: Any
+    tags: Optional[Dict[str, Any]] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "timestamp": self.timestamp,
+            "plugin_id": self.plugin_id,
+            "metric_name": self.metric_name,
+            "value": self.value,
+            "tags": self.tags,
+        }
+
+
+@dataclass
+class IngestionStats:
+    """Counters exposed by the ingestion pipeline."""
+    rows_enqueued: int = 0
+    rows_flushed: int = 0
+    rows_dropped: int = 0
+    backpressure_waits: int = 0
+    flush_count: int = 0
+    flush_errors: int = 0
+    last_flush_latency_ms: float = 0.0
+    max_flush_latency_ms: float = 0.0
+    total_flush_latency_ms: float = 0.0
+    last_flush_at: Optional[datetime] = None
+    recent_flushes: Deque[Tuple[float, int]] = field(default_factory=deque)
+
+
+def rows_from_plugin_data(
+    plugin_id: str,
+    data: Dict[str, Any],
+    timestamp: Optional[datetime] = None,
+    tags: Optional[Dict[str, Any]] = None
+) -> List[MetricRow]:
+    """
+    Flatten plugin output into metric rows.
+
+    Each top-level key becomes one metric; the 'timestamp' key is skipped.
+
+    Args:
+        plugin_id: Plugin identifier
+        data: Data returned by collect_data()
+        timestamp: Timestamp shared by all rows (defaults to now)
+        tags: Tags attached to every row
+
+    Returns:
+        List of MetricRow objects
+    """
+    timestamp = timestamp or datetime.now()
+    tags = tags if tags is not None else {"source": "unity"}
+
+    return [
+        MetricRow(
+            timestamp=timestamp,
+            plugin_id=plugin_id,
+            metric_name=metric_name,
+            value=metric_value,
+            tags=tags
+        )
+        for metric_name, metric_value in data.items()
+        if metric_name != "timestamp"
+    ]
+
+
+class MetricIngestionPipeline:
+    """
+    Bounded, batching writer for plugin_metrics.
+
+    Rows are flushed when a batch reaches batch_size or when flush_interval
+    seconds have passed since the first row of the batch was dequeued,
+    whichever comes first.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[Engine] = None,
+        max_queue_size: int = settings.metric_ingest_queue_size,
+        batch_size: int = settings.metric_ingest_batch_size,
+        flush_interval: float = settings.metric_ingest_flush_interval_seconds,
+        put_timeout: float = settings.metric_ingest_put_timeout_seconds
+    ):
+        """
+        Initialize pipeline.
+
+        Args:
+            engine: SQLAlchemy engine to write to (defaults to the app engine)
+            max_queue_size: Maximum number of rows buffered in memory
+            batch_size: Maximum rows written per flush
+            flush_interval: Maximum seconds a row waits before being flushed
+            put_timeout: Seconds submit() waits for queue space before dropping a row
+        """
+        if engine is None:
+            from app.core.database import engine as default_engine
+            engine = default_engine
+
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue[MetricRow]" = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = IngestionStats()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and self._worker.is_alive()
+
+    def start(self):
+        """Start the background flush thread (idempotent)."""
+        with self._start_lock:
+            if self.running:
+                return
+            self._stop_event.clear()
+            self._worker = threading.Thread(
+                target=self._run,
+                name="metric-ingestion",
+                daemon=True
+            )
+            self._worker.start()
+            logger.info(
+                f"Metric ingestion pipeline started "
+                f"(queue={self._queue.maxsize}, batch={self.batch_size}, "
+                f"interval={self.flush_interval}s)"
+            )
+
+    def stop(self, timeout: Optional[float] = 30.0):
+        """
+        Stop the worker after draining all queued rows.
+
+        Args:
+            timeout: Seconds to wait for the drain to finish
+        """
+        with self._start_lock:
+            if not self._worker:
+                return
+            self._stop_event.set()
+            self._worker.join(timeout)
+            if self._worker.is_alive():
+                logger.warning(
+                    f"Metric ingestion worker did not stop within {timeout}s "
+                    f"({self._queue.qsize()} rows still queued)"
+                )
+            self._worker = None
+            logger.info("Metric ingestion pipeline stopped")
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    async def submit(self, rows: Iterable[MetricRow]) -> int:
+        """
+        Enqueue rows for writing.
+
+        Waits (without blocking the event loop) for queue space when the
+        queue is full. Rows that still cannot be queued after put_timeout
+        seconds are dropped and counted.
+
+        Args:
+            rows: Metric rows to write
+
+        Returns:
+            Number of rows accepted
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        accepted_rows: List[MetricRow] = []
+
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                with self._stats_lock:
+                    self._stats.backpressure_waits += 1
+                try:
+                    await loop.run_in_executor(
+                        None, partial(self._queue.put, row, True, self.put_timeout)
+                    )
+                except queue.Full:
+                    with self._stats_lock:
+                        self._stats.rows_dropped += 1
+                    logger.warning(
+                        f"Metric ingestion queue full, dropped {row.plugin_id}.{row.metric_name}"
+                    )
+                    continue
+            accepted_rows.append(row)
+
+        get_latest_index().update_metrics(accepted_rows)
+        with self._stats_lock:
+            self._stats.rows_enqueued += len(accepted_rows)
+        return len(accepted_rows)
+
+    async def submit_plugin_data(
+        self,
+        plugin_id: str,
+        data: Dict[str, Any],
+        timestamp: Optional[datetime] = None
+    ) -> int:
+        """Flatten plugin output into rows and enqueue them."""
+        return await self.submit(rows_from_plugin_data(plugin_id, data, timestamp))
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self.flush(batch)
+            elif self._stop_event.is_set():
+                break
+
+    def _next_batch(self) -> List[MetricRow]:
+        """Collect up to batch_size rows, waiting at most flush_interval."""
+        batch: List[MetricRow] = []
+        deadline: Optional[float] = None
+
+        while len(batch) < self.batch_size:
+            if deadline is None:
+                # Idle: wake periodically to notice stop requests
+                timeout = self.flush_interval
+            else:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+            try:
+                batch.append(self._queue.get(timeout=min(timeout, 0.5)))
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    break
+                continue
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+
+        return batch
+
+    def flush(self, batch: List[MetricRow]):
+        """
+        Write a batch of rows to the database.
+
+        Runs on the worker thread; safe to call directly from tests or
+        synchronous code.
+        """
+        started = time.perf_counter()
+        try:
+            if self.engine.dialect.name == "postgresql" and self.engine.dialect.driver == "psycopg2":
+                try:
+                    self._copy_rows(batch)
+                except Exception as e:
+                    # COPY aborts the whole batch on a single conflicting row;
+                    # retry with INSERT ... ON CONFLICT DO NOTHING.
+                    logger.warning(f"COPY into plugin_metrics failed, falling back to INSERT: {e}")
+                    self._insert_rows(batch)
+            else:
+                self._insert_rows(batch)
+        except Exception as e:
+            with self._stats_lock:
+                self._stats.flush_errors += 1
+                self._stats.rows_dropped += len(batch)
+            logger.error(f"Failed to flush {len(batch)} plugin metrics: {e}")
+            return
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        now = time.monotonic()
+        with self._stats_lock:
+            stats = self._stats
+            stats.rows_flushed += len(batch)
+            stats.flush_count += 1
+            stats.last_flush_latency_ms = latency_ms
+            stats.max_flush_latency_ms = max(stats.max_flush_latency_ms, latency_ms)
+            stats.total_flush_latency_ms += latency_ms
+            stats.last_flush_at = datetime.utcnow()
+            stats.recent_flushes.append((now, len(batch)))
+            while stats.recent_flushes and now - stats.recent_flushes[0][0] > RATE_WINDOW_SECONDS:
+                stats.recent_flushes.popleft()
+
+    def _copy_rows(self, batch: List[MetricRow]):
+        """Bulk load rows with PostgreSQL COPY (CSV format)."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            writer.writerow([
+                row.timestamp.isoformat(),
+                row.plugin_id,
+                row.metric_name,
+                json.dumps(row.value, default=str),
+                json.dumps(row.tags, default=str) if row.tags is not None else ""
+            ])
+        buffer.seek(0)
+
+        columns = ", ".join(f'"{c}"' for c in COPY_COLUMNS)
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            try:
+                cursor.copy_expert(
+                    f"COPY {PluginMetric.__tablename__} ({columns}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+            finally:
+                cursor.close()
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+    def _insert_rows(self, batch: List[MetricRow]):
+        """Write rows as chunked multi-row INSERT ... VALUES statements."""
+        table = PluginMetric.__table__
+        dialect = self.engine.dialect.name
+
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            dialect_insert = None
+
+        with self.engine.begin() as conn:
+            for i in range(0, len(batch), INSERT_CHUNK_SIZE):
+                values = [row.as_dict() for row in batch[i:i + INSERT_CHUNK_SIZE]]
+                if dialect_insert is not None:
+                    stmt = dialect_insert(table).values(values).on_conflict_do_nothing()
+                else:
+                    stmt = insert(table).values(values)
+                conn.execute(stmt)
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pipeline counters.
+
+        Returns:
+            Dictionary with queue depth, flush latency and throughput
+        """
+        with self._stats_lock:
+            stats = self._stats
+            now = time.monotonic()
+            recent_rows = sum(
+                count for ts, count in stats.recent_flushes
+                if now - ts <= RATE_WINDOW_SECONDS
+            )
+            avg_latency = (
+                stats.total_flush_latency_ms / stats.flush_count
+                if stats.flush_count else 0.0
+            )
+            return {
+                "running": self.running,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "rows_enqueued": stats.rows_enqueued,
+                "rows_flushed": stats.rows_flushed,
+                "rows_dropped": stats.rows_dropped,
+                "backpressure_waits": stats.backpressure_waits,
+                "flush_count": stats.flush_count,
+                "flush_errors": stats.flush_errors,
+                "last_flush_latency_ms": round(stats.last_flush_latency_ms, 2),
+                "avg_flush_latency_ms": round(avg_latency, 2),
+                "max_flush_latency_ms": round(stats.max_flush_latency_ms, 2),
+                "rows_per_second": round(recent_rows / RATE_WINDOW_SECONDS, 2),
+                "last_flush_at": stats.last_flush_at.isoformat() if stats.last_flush_at else None,
+            }
+
+
+# Global pipeline shared by every plugin producer
+_pipeline: Optional[MetricIngestionPipeline] = None
+
+
+def get_metric_pipeline() -> MetricIngestionPipeline:
+    """
+    Get or create the process-wide ingestion pipeline.
+
+    Returns:
+        MetricIngestionPipeline instance
+    """
+    global _pipeline
+
+    if _pipeline is None:
+        _pipeline = MetricIngestionPipeline()
+
+    return _pipeline
+
+
+def shutdown_metric_pipeline():
+    """
+    Drain and stop the global pipeline.
+
+    Should be called on application shutdown.
+    """
+    global _pipeline
+
+    if _pipeline is not None:
+        _pipeline.stop()
+        _pipeline = None
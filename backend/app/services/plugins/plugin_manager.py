@@ -16,9 +16,10 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
-from app.models import Plugin, PluginMetric, PluginExecution
+from app.models import Plugin
 from app.plugins import PluginLoader, PluginBase
 from app.plugins.base import PluginMetadata
+from app.services.plugins.execution_engine import get_execution_engine
 
 logger = logging.getLogger(__name__)
 
@@ -240,6 +241,9 @@ class PluginManager:
         """
         Execute a plugin and store results.
         
+        Runs through the shared PluginExecutionEngine, which applies the
+        concurrency limit and per-plugin timeout and records the execution.
+        
         Args:
             plugin_id: Plugin identifier
             
@@ -253,52 +257,22 @@ class PluginManager:
             }
         
         plugin = self.plugin_instances[plugin_id]
+        run = await get_execution_engine().run(plugin_id, plugin)
+        
+        result = {
+            "success": run.success,
+            "status": run.status,
+            "timestamp": (run.started_at or datetime.utcnow()).isoformat(),
+            "plugin_id": plugin_id,
+            "queue_wait_ms": run.queue_wait_ms,
+            "duration_ms": run.duration_ms
+        }
+        if run.success:
+            result["data"] = run.data
+        else:
+            result["error"] = run.error
         
-        # Create execution record
-        execution = PluginExecution(
-            plugin_id=plugin_id,
-            started_at=datetime.utcnow(),
-            status="running"
-        )
-        self.db.add(execution)
-        self.db.commit()
-        
-        try:
-            # Execute plugin
-            result = await plugin.execute()
-            
-            # Update execution record
-            execution.completed_at = datetime.utcnow()
-            execution.status = "success" if result.get("success") else "failed"
-            execution.error_message = result.get("error")
-            
-            # Store metrics if successful
-            if result.get("success") and result.get("data"):
-                metric = PluginMetric(
-                    plugin_id=plugin_id,
-                    timestamp=datetime.utcnow(),
-                    data=result["data"]
-                )
-                self.db.add(metric)
-                execution.metrics_count = 1
-            
-            self.db.commit()
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Plugin execution failed for {plugin_id}: {e}")
-            
-            execution.completed_at = datetime.utcnow()
-            execution.status = "failed"
-            execution.error_message = str(e)
-            self.db.commit()
-            
-            return {
-                "success": False,
-                "error": str(e),
-                "plugin_id": plugin_id
-            }
+        return result
     
     async def check_plugin_health(self, plugin_id: str) -> Dict[str, Any]:
         """
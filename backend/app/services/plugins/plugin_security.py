@@ -19,6 +19,7 @@ from sqlalchemy import select, and_
 from fastapi import HTTPException, status
 
 from app.models import Plugin, User
+from app.services.core.rate_limiter import RateLimiter, get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -316,60 +317,5 @@ class PluginSecurityService:
             logger.warning(log_message)
 
 
-class RateLimiter:
-    """Simple in-memory rate limiter for plugin operations"""
-    
-    def __init__(self):
-        self._requests: Dict[str, list] = {}
-        self._limits = {
-            "plugin_execution": (10, 60),      # 10 per minute
-            "metric_reporting": (100, 60),     # 100 per minute
-            "health_check": (30, 60),          # 30 per minute
-            "config_update": (5, 60),          # 5 per minute
-        }
-    
-    def check_rate_limit(self, key: str, operation: str) -> bool:
-        """
-        Check if rate limit is exceeded.
-        
-        Args:
-            key: Identifier (plugin_id or user_id)
-            operation: Operation type
-            
-        Returns:
-            True if within limit
-            
-        Raises:
-            HTTPException: If rate limit exceeded
-        """
-        if operation not in self._limits:
-            return True
-        
-        limit, window = self._limits[operation]
-        now = datetime.utcnow()
-        rate_key = f"{key}:{operation}"
-        
-        # Initialize or clean old requests
-        if rate_key not in self._requests:
-            self._requests[rate_key] = []
-        
-        # Remove requests outside window
-        cutoff = now - timedelta(seconds=window)
-        self._requests[rate_key] = [
-            ts for ts in self._requests[rate_key] if ts > cutoff
-        ]
-        
-        # Check limit
-        if len(self._requests[rate_key]) >= limit:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail=f"Rate limit exceeded for {operation}: {limit} per {window}s"
-            )
-        
-        # Add current request
-        self._requests[rate_key].append(now)
-        return True
-
-
-# Global rate limiter instance
-rate_limiter = RateLimiter()
+# Global rate limiter instance (GCRA; see app.services.core.rate_limiter)
+rate_limiter = get_rate_limiter()
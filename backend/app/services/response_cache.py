@@ -0,0 +1,358 @@
+"""
+Two-Tier Response Cache
+
+Stores encoded HTTP responses for CacheMiddleware:
+- L1: small in-process LRU bounded by entry count and total bytes
+- L2: Redis, shared by every API worker
+
+Entries are invalidated by tag. Each tag has a version counter (in Redis
+when available, in-process otherwise); an entry remembers the tag versions
+it was built under and is discarded once any of them moves. Because the
+versions are read before the endpoint runs, a write that lands while a
+response is being built also makes that response stale.
+
+Write paths call invalidate_cache_tags(), which works from sync and async
+code alike.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ENTRY_PREFIX = "unity:rc:entry:"
+TAG_PREFIX = "unity:rc:tag:"
+
+# How long to stop using Redis after an error
+REDIS_RETRY_SECONDS = 30.0
+
+# Tags fired by write paths
+TAG_PLUGINS = "plugins"
+TAG_ALERTS = "alerts"
+TAG_CONTAINERS = "containers"
+
+Headers = List[Tuple[str, str]]
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag for an encoded response body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+@dataclass
+class CachedResponse:
+    """An encoded response plus the tag versions it was built under."""
+    status: int
+    headers: Headers
+    body: bytes
+    etag: str
+    tag_versions: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers)
+
+    def dumps(self) -> bytes:
+        meta = json.dumps({
+            "status": self.status,
+            "headers": self.headers,
+            "etag": self.etag,
+            "tags": self.tag_versions,
+        }).encode()
+        return meta + b"\n" + self.body
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "CachedResponse":
+        meta, _, body = raw.partition(b"\n")
+        data = json.loads(meta)
+        return cls(
+            status=data["status"],
+            headers=[tuple(h) for h in data["headers"]],
+            body=body,
+            etag=data["etag"],
+            tag_versions=data["tags"],
+        )
+
+
+@dataclass
+class CacheLookup:
+    """Result of ResponseCache.lookup()."""
+    key: str
+    versions: Dict[str, int]
+    local_versions: Dict[str, int]
+    entry: Optional[CachedResponse] = None
+
+
+class LRUCache:
+    """Thread-safe LRU of CachedResponse bounded by entries and bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[CachedResponse, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires_at = item
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CachedResponse, ttl: float):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (entry, time.monotonic() + ttl)
+            self._bytes += entry.size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+    def discard_tags(self, tags: Iterable[str]) -> int:
+        tags = set(tags)
+        with self._lock:
+            stale = [k for k, (e, _) in self._entries.items() if tags & e.tag_versions.keys()]
+            for key in stale:
+                self._remove(key)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        entry, _ = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+
+class ResponseCache:
+    """LRU in front of Redis with tag-versioned invalidation."""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        local_max_entries: int = settings.response_cache_local_max_entries,
+        local_max_bytes: int = settings.response_cache_local_max_bytes,
+        local_ttl: float = settings.response_cache_local_ttl_seconds,
+        async_client=None,
+        sync_client=None
+    ):
+        """
+        Initialize response cache.
+
+        Args:
+            redis_url: Redis URL for the shared tier (None for L1 only)
+            local_max_entries: Maximum entries in the in-process LRU
+            local_max_bytes: Maximum total size of the in-process LRU
+            local_ttl: Upper bound on how long an entry lives in the LRU when
+                Redis is shared (other workers' invalidations reach this
+                worker through Redis only)
+            async_client: Prebuilt redis.asyncio client (overrides redis_url)
+            sync_client: Prebuilt redis client used by invalidate()
+        """
+        self.local = LRUCache(local_max_entries, local_max_bytes)
+        self.local_ttl = local_ttl
+        self._redis = async_client
+        self._redis_sync = sync_client
+        if redis_url and async_client is None:
+            self._redis = aioredis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+        if redis_url and sync_client is None:
+            self._redis_sync = redis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+        self._redis_retry_at = 0.0
+        self._local_versions: Dict[str, int] = {}
+        self._versions_lock = threading.Lock()
+        self._stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "stores": 0, "stale": 0, "invalidations": 0}
+
+    @property
+    def shared(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, e: Exception):
+        logger.warning(f"Response cache Redis unavailable, using local cache only: {e}")
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _local_tag_versions(self, tags: Sequence[str]) -> Dict[str, int]:
+        with self._versions_lock:
+            return {tag: self._local_versions.get(tag, 0) for tag in tags}
+
+    async def lookup(self, key: str, tags: Sequence[str]) -> "CacheLookup":
+        """
+        Find a fresh entry.
+
+        Args:
+            key: Cache key
+            tags: Tags of the route
+
+        Returns:
+            CacheLookup with the entry (if any) and the tag versions a new
+            entry must be stored under
+        """
+        local_versions = self._local_tag_versions(tags)
+        versions = dict(local_versions)
+        remote_raw = None
+
+        if self.shared:
+            try:
+                pipe = self._redis.pipeline(transaction=False)
+                pipe.get(ENTRY_PREFIX + key)
+                if tags:
+                    pipe.mget([TAG_PREFIX + tag for tag in tags])
+                results = await pipe.execute()
+                remote_raw = results[0]
+                # Redis counters are shared by all workers and win over ours
+                versions = {tag: int(value or 0) for tag, value in zip(tags, results[1])} if tags else {}
+            except Exception as e:
+                self._redis_failed(e)
+
+        lookup = CacheLookup(key=key, versions=versions, local_versions=local_versions)
+
+        entry = self.local.get(key)
+        if entry is not None:
+            if entry.tag_versions == versions:
+                self._stats["l1_hits"] += 1
+                lookup.entry = entry
+                return lookup
+            self._stats["stale"] += 1
+
+        if remote_raw is not None:
+            remote = CachedResponse.loads(remote_raw)
+            if remote.tag_versions == versions:
+                self._stats["l2_hits"] += 1
+                self.local.set(key, remote, self.local_ttl)
+                lookup.entry = remote
+                return lookup
+            self._stats["stale"] += 1
+
+        self._stats["misses"] += 1
+        return lookup
+
+    async def store(self, lookup: "CacheLookup", entry: CachedResponse, ttl: float):
+        """
+        Store a response built after lookup() missed.
+
+        Responses whose tags were invalidated in this process while they
+        were being built are dropped.
+
+        Args:
+            lookup: Result of the lookup() that missed
+            entry: Response to store
+            ttl: Time-to-live in seconds
+        """
+        current = self._local_tag_versions(list(lookup.local_versions))
+        if current != lookup.local_versions:
+            return
+
+        entry.tag_versions = dict(lookup.versions)
+        self._stats["stores"] += 1
+        self.local.set(lookup.key, entry, min(ttl, self.local_ttl) if self.shared else ttl)
+        if self.shared:
+            try:
+                await self._redis.set(ENTRY_PREFIX + lookup.key, entry.dumps(), ex=max(int(ttl), 1))
+            except Exception as e:
+                self._redis_failed(e)
+
+    def invalidate(self, *tags: str):
+        """
+        Invalidate every entry carrying any of the tags.
+
+        Args:
+            tags: Tags to invalidate
+        """
+        if not tags:
+            return
+        self._stats["invalidations"] += 1
+        with self._versions_lock:
+            for tag in tags:
+                self._local_versions[tag] = self._local_versions.get(tag, 0) + 1
+        self.local.discard_tags(tags)
+
+        if self._redis_sync is not None and self.shared:
+            try:
+                pipe = self._redis_sync.pipeline(transaction=False)
+                for tag in tags:
+                    pipe.incr(TAG_PREFIX + tag)
+                pipe.execute()
+            except Exception as e:
+                self._redis_failed(e)
+
+    def clear_local(self):
+        """Drop every L1 entry."""
+        self.local.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with hit/miss counts and L1 size
+        """
+        return {
+            **self._stats,
+            "l1_entries": len(self.local),
+            "l1_bytes": self.local.bytes,
+            "redis": self.shared,
+        }
+
+
+# Global response cache instance
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get or create global response cache instance.
+
+    Returns:
+        ResponseCache instance
+    """
+    global _response_cache
+
+    if _response_cache is None:
+        redis_url = settings.redis_url if settings.response_cache_redis_enabled else None
+        _response_cache = ResponseCache(redis_url=redis_url)
+
+    return _response_cache
+
+
+def invalidate_cache_tags(*tags: str):
+    """
+    Invalidate cached responses for the given tags.
+
+    Safe to call from request handlers, services and scheduled jobs; a no-op
+    when the response cache is disabled.
+
+    Args:
+        tags: Tags to invalidate (TAG_PLUGINS, TAG_ALERTS, ...)
+    """
+    if not settings.response_cache_enabled:
+        return
+    try:
+        get_response_cache().invalidate(*tags)
+    except Exception as e:
+        logger.warning(f"Response cache invalidation failed for {tags}: {e}")
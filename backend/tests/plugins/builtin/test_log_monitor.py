@@ -0,0 +1,156 @@
+"""Tests for the log monitor plugin."""
+import os
+
+import pytest
+
+from app.plugins.builtin.log_monitor import LogMonitorPlugin, LogPatternSet
+
+
+def _write(path, text, mode="w"):
+    with open(path, mode) as f:
+        f.write(text)
+
+
+class TestLogPatternSet:
+    """Tests for compiled pattern sets."""
+    
+    def test_reports_every_pattern_matching_a_line(self):
+        patterns = LogPatternSet((
+            ("Error", r"\berror\b", "error", False),
+            ("Timeout", r"timed out", "warning", True),
+        ))
+        text = "ok\nERROR: request timed out\nfine\nerror again"
+        
+        hits = [(line_num, pattern.name) for line_num, _, pattern in patterns.scan(text)]
+        
+        assert hits == [(2, "Error"), (2, "Timeout"), (4, "Error")]
+    
+    def test_anchored_patterns_match_at_line_boundaries(self):
+        patterns = LogPatternSet((
+            ("Starts", r"^ERROR", "error", False),
+            ("Ends", r"failed$", "warning", False),
+        ))
+        text = "info: start\nERROR disk\nbackup failed\nERROR: job failed\ninfo: ERROR failed again"
+
+        hits = [(line_num, pattern.name) for line_num, _, pattern in patterns.scan(text)]
+
+        assert patterns.prefilter is not None
+        assert hits == [(2, "Starts"), (3, "Ends"), (4, "Starts"), (4, "Ends")]
+
+    def test_text_anchors_fall_back_to_per_line_matching(self):
+        patterns = LogPatternSet((("Starts", r"\Aerror", "error", False),))
+
+        assert patterns.prefilter is None
+        assert [line_num for line_num, _, _ in patterns.scan("ok\nerror\nerror")] == [2, 3]
+
+    def test_invalid_regex_is_reported_and_skipped(self):
+        patterns = LogPatternSet((("Broken", r"(unclosed", "error", False), ("Ok", r"ok", "info", False)))
+        
+        assert "Broken" in patterns.errors
+        assert [p.name for p in patterns.patterns] == ["Ok"]
+    
+    def test_uncombinable_patterns_fall_back_to_per_line_matching(self):
+        patterns = LogPatternSet((("Repeat", r"(a)\1", "info", False), ("B", r"b", "info", False)))
+        
+        assert patterns.prefilter is None
+        assert [p.name for _, _, p in patterns.scan("aa\nb\nab")] == ["Repeat", "B", "B"]
+
+
+class TestLogMonitorPlugin:
+    """Tests for LogMonitorPlugin."""
+    
+    @pytest.fixture
+    def log_path(self, tmp_path):
+        return str(tmp_path / "app.log")
+    
+    @pytest.fixture
+    def plugin(self, log_path):
+        return LogMonitorPlugin(config={
+            "log_files": [{
+                "name": "app",
+                "path": log_path,
+                "patterns": [{"name": "Custom", "regex": r"disk full", "severity": "critical", "alert": True}]
+            }],
+            "tail_only": True,
+            "max_lines_per_check": 1000
+        })
+    
+    @pytest.mark.asyncio
+    async def test_collect_data_matches_patterns(self, plugin, log_path):
+        _write(log_path, "starting\nERROR disk full\nwarning: low memory\n")
+        
+        data = await plugin.collect_data()
+        
+        log = data["log_files"][0]
+        assert log["lines_read"] == 3
+        assert log["match_summary"]["by_pattern"] == {"Error": 1, "Warning": 1, "Custom": 1}
+        assert log["alert_count"] == 1
+        assert log["alerts"][0]["line_number"] == 2
+        assert data["summary"]["total_matches"] == 3
+    
+    def test_tail_reads_only_new_complete_lines(self, plugin, log_path):
+        config = plugin.config["log_files"][0]
+        _write(log_path, "error one\npartial err")
+        
+        first = plugin._read_log_file(config)
+        assert first["lines_read"] == 1
+        assert first["new_position"] == len("error one\n")
+        
+        _write(log_path, "or line\nnothing\n", mode="a")
+        second = plugin._read_log_file(config)
+        assert second["lines_read"] == 2
+        assert second["matches"][0]["line"] == "partial error line"
+        
+        assert plugin._read_log_file(config)["lines_read"] == 0
+    
+    def test_rotation_restarts_from_the_beginning(self, plugin, log_path):
+        config = plugin.config["log_files"][0]
+        _write(log_path, "line\n" * 10)
+        plugin._read_log_file(config)
+        
+        os.rename(log_path, log_path + ".1")
+        _write(log_path, "fatal: crashed\n")
+        result = plugin._read_log_file(config)
+        
+        assert result["rotated"] is True
+        assert result["lines_read"] == 1
+        assert result["match_summary"]["by_pattern"] == {"Critical": 1}
+    
+    def test_truncation_restarts_from_the_beginning(self, plugin, log_path):
+        config = plugin.config["log_files"][0]
+        _write(log_path, "line\n" * 10)
+        plugin._read_log_file(config)
+        
+        _write(log_path, "error\n")
+        result = plugin._read_log_file(config)
+        
+        assert result["rotated"] is True
+        assert result["lines_read"] == 1
+    
+    def test_max_lines_per_check_limits_each_read(self, plugin, log_path):
+        plugin.config["max_lines_per_check"] = 3
+        config = plugin.config["log_files"][0]
+        _write(log_path, "".join(f"error {i}\n" for i in range(5)))
+        
+        first = plugin._read_log_file(config)
+        second = plugin._read_log_file(config)
+        
+        assert (first["lines_read"], second["lines_read"]) == (3, 2)
+        assert second["matches"][0]["line"] == "error 3"
+    
+    def test_invalid_regex_is_reported(self, plugin, log_path):
+        config = dict(plugin.config["log_files"][0], patterns=[{"name": "Bad", "regex": "[", "severity": "info"}])
+        _write(log_path, "error\n")
+        
+        result = plugin._read_log_file(config)
+        
+        assert "regex_error_Bad" in result
+        assert result["match_summary"]["total_matches"] == 1
+    
+    def test_undecodable_bytes_are_replaced(self, plugin, log_path):
+        config = plugin.config["log_files"][0]
+        _write(log_path, b"\xff\xfe error\n", mode="wb")
+        
+        result = plugin._read_log_file(config)
+        
+        assert result["match_summary"]["by_pattern"] == {"Error": 1}
@@ -0,0 +1,125 @@
+"""Tests for the bounded plugin execution engine."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.plugin import Plugin, PluginExecution
+from app.plugins.base import PluginBase, PluginMetadata, PluginCategory
+from app.services.plugins.execution_engine import PluginExecutionEngine, resolve_timeout
+
+
+class SleepyPlugin(PluginBase):
+    """Plugin whose collection takes a configurable amount of time."""
+
+    running = 0
+    peak = 0
+
+    def __init__(self, delay=0.0, metadata_timeout=None, config=None):
+        super().__init__(config=config)
+        self.delay = delay
+        self.metadata_timeout = metadata_timeout
+
+    def get_metadata(self) -> PluginMetadata:
+        return PluginMetadata(
+            id="sleepy",
+            name="Sleepy",
+            version="1.0.0",
+            description="Sleeps",
+            author="Test",
+            category=PluginCategory.CUSTOM,
+            timeout_seconds=self.metadata_timeout
+        )
+
+    async def collect_data(self):
+        SleepyPlugin.running += 1
+        SleepyPlugin.peak = max(SleepyPlugin.peak, SleepyPlugin.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            SleepyPlugin.running -= 1
+        return {"value": 1}
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'exec.db'}")
+    Base.metadata.create_all(engine, tables=[Plugin.__table__, PluginExecution.__table__])
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    SleepyPlugin.running = 0
+    SleepyPlugin.peak = 0
+
+
+@pytest.fixture(autouse=True)
+def fake_pipeline():
+    pipeline = AsyncMock()
+    pipeline.submit_plugin_data.return_value = 1
+    with patch("app.services.plugins.execution_engine.get_metric_pipeline", return_value=pipeline):
+        yield pipeline
+
+
+def test_resolve_timeout_precedence():
+    """Config overrides metadata, which overrides the default."""
+    assert resolve_timeout(SleepyPlugin(), default=30) == 30
+    assert resolve_timeout(SleepyPlugin(metadata_timeout=10), default=30) == 10
+    assert resolve_timeout(SleepyPlugin(metadata_timeout=10, config={"timeout_seconds": 5}), default=30) == 5
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded(session_factory):
+    """No more than max_concurrency plugins collect at once."""
+    engine = PluginExecutionEngine(max_concurrency=2, jitter_seconds=0, db_session_factory=session_factory)
+    plugins = {f"p{i}": SleepyPlugin(delay=0.05) for i in range(6)}
+
+    results = await engine.run_all(plugins)
+
+    assert all(r.success for r in results)
+    assert SleepyPlugin.peak == 2
+    assert max(r.queue_wait_ms for r in results) > 0
+
+
+@pytest.mark.asyncio
+async def test_timeout_is_recorded(session_factory):
+    """A hung plugin times out without blocking the others."""
+    engine = PluginExecutionEngine(max_concurrency=2, jitter_seconds=0, db_session_factory=session_factory)
+    plugins = {
+        "hung": SleepyPlugin(delay=10, config={"timeout_seconds": 0.05}),
+        "fast": SleepyPlugin(delay=0),
+    }
+
+    results = {r.plugin_id: r for r in await engine.run_all(plugins)}
+
+    assert results["hung"].status == "timeout"
+    assert results["fast"].status == "success"
+
+    db = session_factory()
+    rows = {e.plugin_id: e for e in db.execute(select(PluginExecution.__table__))}
+    db.close()
+    assert rows["hung"].status == "timeout"
+    assert rows["hung"].duration_ms is not None
+    assert rows["fast"].queue_wait_ms is not None
+
+
+@pytest.mark.asyncio
+async def test_cancel_and_overlap(session_factory):
+    """A running plugin is not started twice and can be cancelled."""
+    engine = PluginExecutionEngine(db_session_factory=session_factory)
+    plugin = SleepyPlugin(delay=10)
+
+    first = asyncio.create_task(engine.run("slow", plugin))
+    await asyncio.sleep(0.01)
+
+    second = await engine.run("slow", plugin)
+    assert second.status == "skipped"
+
+    assert engine.cancel_all() == 1
+    result = await first
+    assert result.status == "cancelled"
+    assert engine.get_stats()["in_flight"] == []
@@ -147,3 +147,57 @@ def test_plugin_inheritance():
     assert hasattr(plugin, 'get_metadata')
     assert hasattr(plugin, 'collect_data')
     assert hasattr(plugin, 'config')
+
+
+class BlockingPlugin(MockPlugin):
+    """Plugin that blocks inside collect_data()."""
+    
+    def __init__(self, blocking_io: bool, config=None):
+        super().__init__(config=config)
+        self.blocking_io = blocking_io
+        self.thread_name = None
+    
+    def get_metadata(self) -> PluginMetadata:
+        metadata = super().get_metadata()
+        metadata.blocking_io = self.blocking_io
+        return metadata
+    
+    async def collect_data(self):
+        import threading
+        import time
+        self.thread_name = threading.current_thread().name
+        time.sleep(0.05)
+        return {"test": "data"}
+
+
+class TestPluginOffload:
+    """Tests for executor offloading and loop-blocking measurement."""
+    
+    @pytest.mark.asyncio
+    async def test_inline_collection_records_loop_blocking(self):
+        """Blocking work on the loop shows up in loop_block_stats."""
+        plugin = BlockingPlugin(blocking_io=False)
+        data = await plugin.collect()
+        
+        assert data == {"test": "data"}
+        assert plugin.thread_name == "MainThread"
+        assert plugin.loop_block_stats.last_max_step_ms >= 40
+        assert plugin.get_status()["loop_blocking"]["runs"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_blocking_io_plugin_runs_on_thread_pool(self):
+        """blocking_io=True moves collection off the event loop."""
+        plugin = BlockingPlugin(blocking_io=True)
+        data = await plugin.collect()
+        
+        assert data == {"test": "data"}
+        assert plugin.thread_name.startswith("plugin-io")
+        assert plugin.loop_block_stats.last_max_step_ms < 40
+    
+    @pytest.mark.asyncio
+    async def test_run_blocking_helpers(self):
+        """run_blocking and run_cpu_bound return the function result."""
+        plugin = MockPlugin(config={})
+        
+        assert await plugin.run_blocking(sum, [1, 2, 3]) == 6
+        assert await plugin.run_cpu_bound(max, 4, 9) == 9
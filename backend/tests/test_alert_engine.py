@@ -0,0 +1,119 @@
+"""
+Tests for the set-based alert evaluation engine.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+import app.models.core  # noqa: F401  (registers tables referenced by foreign keys)
+import app.models.credentials  # noqa: F401
+from app.models.alert_rules import AlertCondition, AlertRule, AlertSeverity, ResourceType
+from app.models.infrastructure import MonitoredServer, StorageDevice, StoragePool, PoolType
+from app.models.monitoring import Alert
+from app.services.infrastructure.alert_evaluator import AlertEvaluator
+
+
+@pytest.fixture
+def alert_db():
+    """In-memory database holding only the tables the evaluator touches."""
+    engine = create_engine("sqlite:///:memory:")
+    tables = [model.__table__ for model in (MonitoredServer, StorageDevice, StoragePool, AlertRule, Alert)]
+    Base.metadata.create_all(engine, tables=tables)
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def _seed(db, device_temps, cooldown_minutes=15):
+    server = MonitoredServer(hostname="nas", ip_address="10.0.0.2", username="root")
+    db.add(server)
+    db.flush()
+    devices = [
+        StorageDevice(server_id=server.id, device_name=f"/dev/sd{chr(97 + i)}", temperature_celsius=temp)
+        for i, temp in enumerate(device_temps)
+    ]
+    db.add(StoragePool(server_id=server.id, pool_name="tank", pool_type=PoolType.ZFS,
+                       fragmentation_percent=80.0))
+    db.add_all(devices)
+    db.add_all([
+        AlertRule(name="Hot disk", resource_type=ResourceType.DEVICE, metric_name="temperature_celsius",
+                  condition=AlertCondition.GT, threshold=60.0, severity=AlertSeverity.WARNING,
+                  cooldown_minutes=cooldown_minutes),
+        AlertRule(name="Very hot disk", resource_type=ResourceType.DEVICE, metric_name="temperature_celsius",
+                  condition=AlertCondition.GTE, threshold=70.0, severity=AlertSeverity.CRITICAL,
+                  cooldown_minutes=cooldown_minutes),
+        AlertRule(name="Fragmented pool", resource_type=ResourceType.POOL, metric_name="fragmentation_percent",
+                  condition=AlertCondition.GT, threshold=50.0, cooldown_minutes=cooldown_minutes),
+    ])
+    db.commit()
+    return devices
+
+
+def _count_queries(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+def test_triggers_once_per_rule_and_resource(alert_db):
+    _seed(alert_db, [45, 65, 75, None])
+
+    triggered, resolved = AlertEvaluator(alert_db).evaluate_all_rules()
+    assert (triggered, resolved) == (4, 0)  # 65 and 75 hot, 75 very hot, pool fragmented
+
+    # Already active: nothing new on the next cycle
+    assert AlertEvaluator(alert_db).evaluate_all_rules() == (0, 0)
+    alerts = alert_db.query(Alert).all()
+    assert {a.status for a in alerts} == {"active"}
+    assert any("'/dev/sdc' temperature_celsius=75.00 >= 70.00" in a.message for a in alerts)
+
+
+def test_resolves_when_condition_clears_and_respects_cooldown(alert_db):
+    devices = _seed(alert_db, [65])
+    AlertEvaluator(alert_db).evaluate_all_rules()
+
+    devices[0].temperature_celsius = 40
+    alert_db.commit()
+    assert AlertEvaluator(alert_db).evaluate_all_rules() == (0, 1)
+    assert alert_db.query(Alert).filter(Alert.status == "resolved").one().resolved is True
+
+    # Condition returns inside the cooldown window: no new alert
+    devices[0].temperature_celsius = 65
+    alert_db.commit()
+    assert AlertEvaluator(alert_db).evaluate_all_rules() == (0, 0)
+
+    # Once the cooldown has elapsed it fires again
+    alert_db.query(Alert).update({Alert.triggered_at: datetime.now(timezone.utc) - timedelta(minutes=30)})
+    alert_db.commit()
+    assert AlertEvaluator(alert_db).evaluate_all_rules() == (1, 0)
+
+
+def test_query_count_is_independent_of_rule_and_resource_count(alert_db):
+    _seed(alert_db, [65] * 20)
+    for i in range(20):
+        alert_db.add(AlertRule(name=f"Rule {i}", resource_type=ResourceType.DEVICE,
+                              metric_name="temperature_celsius", condition=AlertCondition.GT,
+                              threshold=float(i)))
+    alert_db.commit()
+
+    statements = _count_queries(alert_db)
+    triggered, _ = AlertEvaluator(alert_db).evaluate_all_rules()
+
+    assert triggered == 20 * 21 + 1
+    # rules, devices, pools, alert index, bulk insert (executemany)
+    assert len([s for s in statements if s.lstrip().upper().startswith(("SELECT", "INSERT", "UPDATE"))]) == 5
+
+
+def test_unknown_metric_is_skipped(alert_db):
+    _seed(alert_db, [65])
+    alert_db.add(AlertRule(name="Bogus", resource_type=ResourceType.DEVICE, metric_name="no_such_metric",
+                          condition=AlertCondition.GT, threshold=1.0))
+    alert_db.commit()
+
+    triggered, _ = AlertEvaluator(alert_db).evaluate_all_rules()
+    assert triggered == 2
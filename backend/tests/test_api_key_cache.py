@@ -0,0 +1,155 @@
+"""
+Tests for the API key validation cache and write-behind usage buffer.
+"""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, String, create_engine, event
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.auth import APIKey
+from app.models.users import User
+from app.services.auth import api_key_cache
+from app.services.auth.api_key_cache import PLUGIN_KEY, USER_KEY, APIKeyCache, APIKeyUsageBuffer, CachedAPIKey
+from app.services.auth.api_key_manager import create_api_key, hash_api_key, revoke_api_key, validate_api_key
+
+
+class _PluginKeyBase(DeclarativeBase):
+    pass
+
+
+class PluginKeyRow(_PluginKeyBase):
+    """Stand-in for the plugin_api_keys usage columns."""
+    __tablename__ = "plugin_api_keys"
+    id = Column(Integer, primary_key=True)
+    last_used = Column(DateTime(timezone=True))
+    uses_count = Column(Integer, default=0)
+
+
+@pytest.fixture
+def key_db(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    User.__table__.create(engine)
+    APIKey.__table__.create(engine)
+    _PluginKeyBase.metadata.create_all(engine)
+
+    buffer = APIKeyUsageBuffer(engine=engine, flush_interval=3600)
+    monkeypatch.setattr(api_key_cache, "_api_key_cache", APIKeyCache(max_entries=16, ttl=60))
+    monkeypatch.setattr(api_key_cache, "_usage_buffer", buffer)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    db = sessionmaker(bind=engine)()
+    user = User(username="alice", hashed_password="x")
+    db.add(user)
+    db.commit()
+    yield db, engine, buffer, user, statements
+    buffer.stop()
+    db.close()
+    engine.dispose()
+
+
+def _key_queries(statements):
+    return [s for s in statements if "api_keys" in s]
+
+
+def test_validation_is_cached_and_usage_is_not_committed_per_call(key_db):
+    db, _, buffer, user, statements = key_db
+    record, plaintext = create_api_key(db, user.id, "ci", scopes=["read"])
+    statements.clear()
+
+    for _ in range(5):
+        key = validate_api_key(db, plaintext)
+        assert key.id == record.id
+        assert key.scopes == ("read",)
+
+    assert len(_key_queries(statements)) == 1  # one lookup, no UPDATE
+    assert buffer.pending_count() == 1
+
+    assert buffer.flush() == 1
+    updates = [s for s in _key_queries(statements) if s.lstrip().upper().startswith("UPDATE")]
+    assert len(updates) == 1
+    db.expire_all()
+    assert db.get(APIKey, record.id).last_used_at is not None
+
+
+def test_revoke_invalidates_cached_key(key_db):
+    db, _, _, user, _ = key_db
+    record, plaintext = create_api_key(db, user.id, "ci")
+    assert validate_api_key(db, plaintext) is not None
+
+    assert revoke_api_key(db, record.id, user.id) is True
+    assert validate_api_key(db, plaintext) is None
+
+
+def test_cached_plugin_key_is_not_accepted_as_a_user_key(key_db):
+    db, _, _, _, _ = key_db
+    plaintext = "plugin-key"
+    plugin_key = SimpleNamespace(id=7, key_hash=hash_api_key(plaintext), permissions=["metrics:write"],
+                                 expires_at=None, plugin_id="ext")
+    api_key_cache.get_api_key_cache().set(CachedAPIKey.from_plugin_key(plugin_key))
+
+    assert validate_api_key(db, plaintext) is None
+
+
+def test_cached_user_key_is_not_returned_as_a_plugin_key(key_db):
+    db, _, _, user, _ = key_db
+    record, plaintext = create_api_key(db, user.id, "ci")
+    assert validate_api_key(db, plaintext) is not None
+    cache = api_key_cache.get_api_key_cache()
+
+    assert cache.get(USER_KEY, record.key_hash).id == record.id
+    assert cache.get(PLUGIN_KEY, record.key_hash) is None
+
+
+def test_invalidation_can_be_limited_to_one_kind():
+    cache = APIKeyCache(max_entries=16, ttl=60)
+    cache.set(CachedAPIKey(id=1, key_hash="h", kind=USER_KEY, permissions=()))
+    cache.set(CachedAPIKey(id=1, key_hash="h", kind=PLUGIN_KEY, permissions=(), plugin_id="ext"))
+
+    assert cache.invalidate(key_id=1, kind=PLUGIN_KEY) == 1
+    assert cache.get(PLUGIN_KEY, "h") is None
+    assert cache.get(USER_KEY, "h").kind == USER_KEY
+
+
+def test_expired_key_is_rejected(key_db):
+    db, _, _, user, _ = key_db
+    record, plaintext = create_api_key(db, user.id, "old")
+    record.expires_at = datetime.utcnow() - timedelta(minutes=1)
+    db.commit()
+
+    assert validate_api_key(db, plaintext) is None
+
+
+def test_plugin_key_usage_is_flushed_as_one_bulk_update(key_db):
+    db, engine, buffer, _, statements = key_db
+    db.add_all([PluginKeyRow(id=1, uses_count=3), PluginKeyRow(id=2)])
+    db.commit()
+    statements.clear()
+
+    later = datetime.now(timezone.utc)
+    for _ in range(4):
+        buffer.record(PluginKeyRow, 1)
+    buffer.record(PluginKeyRow, 2, used_at=later)
+
+    assert buffer.flush() == 2
+    assert len([s for s in statements if s.lstrip().upper().startswith("UPDATE")]) == 1
+
+    rows = {row.id: row for row in db.query(PluginKeyRow).all()}
+    assert rows[1].uses_count == 7
+    assert rows[2].uses_count == 1
+    assert rows[2].last_used is not None
+
+
+def test_failed_flush_keeps_usage_for_the_next_cycle(key_db):
+    _, engine, buffer, _, _ = key_db
+    buffer.record(PluginKeyRow, 1)
+
+    PluginKeyRow.__table__.drop(engine)
+    assert buffer.flush() == 0
+    assert buffer.pending_count() == 1
+    assert buffer.get_stats()["flush_errors"] == 1
@@ -0,0 +1,219 @@
+"""
+Tests for the infrastructure collection sweep.
+"""
+import asyncio
+import importlib
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from cryptography.fernet import Fernet
+
+import app.models
+from app.models.alert_rules import AlertRule
+from app.models.infrastructure import DatabaseInstance, MonitoredServer, ServerStatus, StorageDevice
+
+# Names the SSH and credential services import from app.models, which the
+# models package does not define
+MISSING_MODELS = ("SSHKey", "Certificate", "ServerCredential", "ServerProfile", "CredentialAuditLog", "MonitoredServer")
+
+
+@pytest.fixture
+def collection_task(monkeypatch):
+    monkeypatch.setenv("ENCRYPTION_KEY", Fernet.generate_key().decode())
+    for name in MISSING_MODELS:
+        if not hasattr(app.models, name):
+            monkeypatch.setattr(app.models, name, type(name, (), {}), raising=False)
+    return importlib.import_module("app.services.infrastructure.collection_task")
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def all(self):
+        return list(self.rows)
+
+
+class FakeSession:
+    """Session recording its own commits, rollbacks and close."""
+
+    def __init__(self, server=None):
+        self.server = server
+        self.events = []
+
+    def query(self, *args):
+        return FakeQuery([self.server] if self.server else [])
+
+    def commit(self):
+        self.events.append("commit")
+
+    def rollback(self):
+        self.events.append("rollback")
+
+    def close(self):
+        self.events.append("close")
+
+
+class Phases:
+    """Discovery phases recording the session each one got and how many overlapped."""
+
+    def __init__(self, fail=None):
+        self.fail = fail or {}
+        self.sessions = {}
+        self.active = 0
+        self.max_active = 0
+
+    def phase(self, name, result):
+        async def discover(server, db):
+            self.sessions[name] = db
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            await asyncio.sleep(0.01)
+            self.active -= 1
+            if name in self.fail:
+                raise self.fail[name]
+            return result
+        return discover
+
+
+@pytest.fixture
+def sweep(collection_task, monkeypatch):
+    def setup(dialect="postgresql", fail=None):
+        server = SimpleNamespace(id=1, hostname="nas", monitoring_enabled=True, status=None, last_error=None)
+        sessions = []
+
+        def session_factory():
+            # The first session loads the server; the phases get their own
+            sessions.append(FakeSession(server if not sessions else None))
+            return sessions[-1]
+
+        phases = Phases(fail)
+        monkeypatch.setattr(collection_task, "SessionLocal", session_factory)
+        monkeypatch.setattr(collection_task, "engine", SimpleNamespace(dialect=SimpleNamespace(name=dialect)))
+        monkeypatch.setattr(collection_task, "_discover_devices", phases.phase("devices", (2, [])))
+        monkeypatch.setattr(collection_task, "_discover_pools", phases.phase("pools", (1, ["pool warning"])))
+        monkeypatch.setattr(collection_task, "_discover_databases", phases.phase("databases", (3, [], 2)))
+        return server, sessions, phases
+    return setup
+
+
+async def test_phases_run_in_parallel_each_through_its_own_session(collection_task, sweep):
+    server, sessions, phases = sweep()
+
+    success, message = await collection_task.collect_server(1)
+
+    assert success
+    assert message == "Collected: 2 devices, 1 pools, 3 databases, 2 metrics (1 errors)"
+    assert phases.max_active == 3
+    phase_sessions = list(phases.sessions.values())
+    assert len({id(db) for db in phase_sessions}) == 3
+    assert sessions[0] not in phase_sessions
+    assert all(db.events == ["commit", "close"] for db in phase_sessions)
+    assert server.status == ServerStatus.ONLINE
+    assert server.last_error == "pool warning"
+    assert sessions[0].events == ["commit", "close"]
+
+
+async def test_phases_run_one_at_a_time_on_sqlite(collection_task, sweep):
+    _, _, phases = sweep(dialect="sqlite")
+
+    success, _ = await collection_task.collect_server(1)
+
+    assert success
+    assert phases.max_active == 1
+    assert len(phases.sessions) == 3
+
+
+async def test_ssh_failure_rolls_back_the_phase_and_marks_the_server_offline(collection_task, sweep):
+    error = collection_task.SSHConnectionError("connection refused")
+    server, _, phases = sweep(fail={"pools": error})
+
+    success, message = await collection_task.collect_server(1)
+
+    assert not success
+    assert "connection refused" in message
+    assert phases.sessions["pools"].events == ["rollback", "close"]
+    assert phases.sessions["devices"].events == ["commit", "close"]
+    assert server.status == ServerStatus.OFFLINE
+
+
+async def test_fleet_is_bounded_and_alerts_are_evaluated_once(collection_task, monkeypatch):
+    active = {"now": 0, "max": 0}
+    calls = {"evaluate": 0, "ssh_pool_closed": 0}
+    submitted = []
+
+    async def collect_server(server_id):
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        return server_id != 3, f"server {server_id}"
+
+    def evaluate_alerts():
+        calls["evaluate"] += 1
+        return 1, 0, [({"id": 7}, {"alert_id": 11})]
+
+    async def close_ssh_pool():
+        calls["ssh_pool_closed"] += 1
+
+    class Dispatcher:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        def submit(self, channel, alert_data):
+            submitted.append((channel["id"], alert_data["alert_id"]))
+
+    monkeypatch.setattr(collection_task, "collect_server", collect_server)
+    monkeypatch.setattr(collection_task, "evaluate_alerts", evaluate_alerts)
+    monkeypatch.setattr(collection_task, "close_ssh_pool", close_ssh_pool)
+    monkeypatch.setattr(collection_task, "NotificationDispatcher", Dispatcher)
+    monkeypatch.setattr(collection_task.settings, "infrastructure_collection_concurrency", 2)
+
+    results = await collection_task.collect_fleet([1, 2, 3, 4])
+
+    assert active["max"] == 2
+    assert (results["successful"], results["failed"]) == (3, 1)
+    assert results["errors"] == ["3: server 3"]
+    assert results["alerts_triggered"] == 1
+    assert calls == {"evaluate": 1, "ssh_pool_closed": 1}
+    assert submitted == [(7, 11)]
+
+
+def test_alert_payloads_resolve_the_rule_and_owning_server(collection_task):
+    rows = {
+        AlertRule: [(1, "Disk hot"), (2, "DB connections")],
+        StorageDevice: [(5, 1)],
+        DatabaseInstance: [(9, 2)],
+        MonitoredServer: [(1, "nas"), (2, "db-1")],
+    }
+
+    class PayloadSession:
+        def query(self, *columns):
+            return FakeQuery(rows[columns[0].class_])
+
+    triggered_at = datetime(2026, 10, 16, 12, 0, tzinfo=timezone.utc)
+    alerts = [
+        SimpleNamespace(id=100, alert_rule_id=1, resource_type="device", resource_id=5, severity="warning",
+                        message="sda temperature > 50", metric_value=55, triggered_at=triggered_at),
+        SimpleNamespace(id=101, alert_rule_id=2, resource_type="database", resource_id=9, severity="critical",
+                        message="app connections > 90", metric_value=95, triggered_at=triggered_at),
+    ]
+
+    payloads = collection_task._alert_payloads(PayloadSession(), alerts)
+
+    assert [(p['alert_id'], p['rule_name'], p['server_id'], p['server_name']) for p in payloads] == [
+        (100, "Disk hot", 1, "nas"),
+        (101, "DB connections", 2, "db-1"),
+    ]
+    assert payloads[0]['resource_type'] == "device" and payloads[0]['resource_id'] == 5
+    assert payloads[0]['timestamp'] == int(triggered_at.timestamp())
@@ -0,0 +1,28 @@
+"""
+Shared setup for container service tests.
+
+The app.services.containers package __init__ (and its security subpackage)
+import the Docker runtime managers and policy engine, whose annotations name
+models (DockerHost, Container) that app.models does not define. When such a
+package fails to import, it is registered without running its __init__ so the
+individual service modules can still be imported and tested.
+"""
+import importlib
+import sys
+import types
+
+
+def _register_package(name: str):
+    try:
+        importlib.import_module(name)
+    except AttributeError:
+        parent_name, _, child = name.rpartition(".")
+        parent = sys.modules[parent_name]
+        package = types.ModuleType(name)
+        package.__path__ = [f"{path}/{child}" for path in parent.__path__]
+        sys.modules[name] = package
+        setattr(parent, child, package)
+
+
+_register_package("app.services.containers")
+_register_package("app.services.containers.security")
@@ -0,0 +1,153 @@
+"""
+Tests for registry digest caching, token reuse and image deduplication.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+
+from app.services.containers.registry_client import RegistryClient
+from app.services.containers.update_checker import UpdateChecker
+
+DIGEST = "sha256:" + "a" * 64
+CHALLENGE = 'Bearer realm="https://auth.example.io/token",service="registry.example.io"'
+
+
+class FakeRegistry:
+    """Registry answering HEAD manifest requests behind a bearer token."""
+
+    def __init__(self):
+        self.requests = []
+        self.digest = DIGEST
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append((request.method, request.url.host, request.url.path))
+        if request.url.host == "auth.example.io":
+            return httpx.Response(200, json={"token": "t0k", "expires_in": 300})
+        if request.headers.get("Authorization") != "Bearer t0k":
+            return httpx.Response(401, headers={"WWW-Authenticate": CHALLENGE})
+        etag = f'"{self.digest}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, headers={"Docker-Content-Digest": self.digest, "ETag": etag})
+
+    def count(self, method, host=None):
+        return sum(1 for m, h, _ in self.requests if m == method and (host is None or h == host))
+
+
+def client_for(registry: FakeRegistry, ttl=300.0) -> RegistryClient:
+    client = RegistryClient(digest_ttl_seconds=ttl)
+    transport = httpx.MockTransport(registry.handler)
+    client._http_client = lambda host: client._http_clients.setdefault(
+        host, httpx.AsyncClient(transport=transport)
+    )
+    return client
+
+
+def test_parse_image_name_handles_registry_ports():
+    client = RegistryClient()
+    assert client.parse_image_name("postgres:16")["full_name"] == "docker.io/library/postgres:16"
+    parsed = client.parse_image_name("localhost:5000/team/app")
+    assert (parsed["registry"], parsed["repository"], parsed["tag"]) == ("localhost:5000", "team/app", "latest")
+
+
+async def test_digest_lookups_reuse_token_and_cache():
+    registry = FakeRegistry()
+    client = client_for(registry)
+
+    info = await client.get_latest_digest("registry.example.io/team/app", "1.0")
+    assert info["digest"] == DIGEST
+    again = await client.get_latest_digest("registry.example.io/team/app:1.0")
+    assert again["digest"] == DIGEST
+    other = await client.get_latest_digest("registry.example.io/team/app", "2.0")
+    assert other["digest"] == DIGEST
+
+    # One challenge, one token for the shared scope, HEAD only, second call cached
+    assert registry.count("GET", "auth.example.io") == 1
+    assert registry.count("HEAD") == 3  # 401 challenge + 1.0 + 2.0
+    assert registry.count("GET", "registry.example.io") == 0
+    assert client.get_stats()["cache_hits"] == 1
+    await client.close()
+
+
+async def test_stale_entry_is_revalidated_with_etag():
+    registry = FakeRegistry()
+    client = client_for(registry, ttl=0)
+
+    await client.get_latest_digest("registry.example.io/team/app:1.0")
+    await client.get_latest_digest("registry.example.io/team/app:1.0")
+    assert client.get_stats()["not_modified"] == 1
+
+    registry.digest = "sha256:" + "b" * 64
+    info = await client.get_latest_digest("registry.example.io/team/app:1.0")
+    assert info["digest"] == registry.digest
+    await client.close()
+
+
+async def test_concurrent_lookups_share_one_request():
+    registry = FakeRegistry()
+    client = client_for(registry)
+
+    results = await asyncio.gather(*(
+        client.get_latest_digest("registry.example.io/team/app:1.0") for _ in range(10)
+    ))
+    assert {r["digest"] for r in results} == {DIGEST}
+    assert registry.count("HEAD") == 2  # challenge + one lookup
+    await client.close()
+
+
+async def test_update_checker_queries_each_image_once():
+    lookups = []
+
+    class FakeRegistryClient(RegistryClient):
+        async def get_latest_digest(self, image, tag=None):
+            lookups.append((image, tag))
+            return {"digest": DIGEST}
+
+    checker = UpdateChecker.__new__(UpdateChecker)
+    checker.registry_client = FakeRegistryClient()
+    seen = []
+
+    async def check_container_update(container_id, registry_info=None):
+        seen.append((container_id, registry_info["digest"]))
+        return {"update_available": container_id == 3}
+
+    checker.check_container_update = check_container_update
+    containers = [
+        SimpleNamespace(id=1, name="a", image="postgres", current_tag="16"),
+        SimpleNamespace(id=2, name="b", image="docker.io/library/postgres", current_tag="16"),
+        SimpleNamespace(id=3, name="c", image="redis", current_tag="7"),
+    ]
+
+    summary = await checker._check_containers(containers)
+
+    assert len(lookups) == 2
+    assert seen == [(1, DIGEST), (2, DIGEST), (3, DIGEST)]
+    assert summary["total_checked"] == 3 and summary["updates_found"] == 1
+
+
+async def test_cancelling_the_first_caller_does_not_strand_the_others():
+    registry = FakeRegistry()
+    client = client_for(registry)
+    release = asyncio.Event()
+    fetch = client._fetch_digest
+
+    async def slow_fetch(key, cached):
+        await release.wait()
+        return await fetch(key, cached)
+
+    client._fetch_digest = slow_fetch
+    first = asyncio.create_task(client.get_latest_digest("registry.example.io/team/app:1.0"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(client.get_latest_digest("registry.example.io/team/app:1.0"))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    release.set()
+    info = await asyncio.wait_for(second, timeout=1)
+
+    assert first.cancelled()
+    assert info["digest"] == DIGEST
+    assert client.get_stats()["shared_inflight"] == 1
+    assert client._inflight == {}
+    await client.close()
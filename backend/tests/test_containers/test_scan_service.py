@@ -0,0 +1,148 @@
+"""
+Tests for the cached, queued vulnerability scan service.
+"""
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.containers.security.scan_service import ScanQueueFull, ScanService
+
+DIGEST = "sha256:" + "c" * 64
+TRIVY_OUTPUT = {"Results": [{"Vulnerabilities": [
+    {"VulnerabilityID": "CVE-1", "Severity": "CRITICAL", "PkgName": "openssl"},
+    {"VulnerabilityID": "CVE-2", "Severity": "HIGH", "PkgName": "zlib"},
+]}]}
+
+
+class FakeQuery:
+    def filter(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def limit(self, n):
+        return self
+
+    def all(self):
+        return []
+
+
+class FakeSession:
+    threads = []
+
+    def __init__(self):
+        self.threads.append(threading.get_ident())
+        self.added = []
+
+    def query(self, *args):
+        return FakeQuery()
+
+    def add(self, row):
+        self.added.append(row)
+
+    def flush(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeScanner:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.scans = []
+        self.release = asyncio.Event()
+
+    async def download_db(self):
+        pass
+
+    async def get_versions(self):
+        return "0.50.0", "2026-10-16T00:00:00Z"
+
+    async def execute_scan(self, image, timeout):
+        self.scans.append(image)
+        await asyncio.wait_for(self.release.wait(), timeout)
+        return TRIVY_OUTPUT
+
+    def parse_scan(self, raw):
+        from app.services.containers.security.trivy_scanner import TrivyScanner
+        return TrivyScanner.parse_scan(TrivyScanner(), raw)
+
+
+def service_with(scanner, **kwargs):
+    return ScanService(scanner=scanner, session_factory=FakeSession, **kwargs)
+
+
+async def test_identical_scans_are_joined_and_then_served_from_cache():
+    scanner = FakeScanner()
+    service = service_with(scanner)
+    try:
+        first = await service.submit(f"nginx@{DIGEST}", image_digest=DIGEST)
+        second = await service.submit(f"nginx@{DIGEST}", image_digest=DIGEST)
+        assert second is first
+        assert first.status in ("queued", "running")
+
+        scanner.release.set()
+        await first.wait(1)
+        assert first.status == "completed"
+        assert first.result["counts"]["critical"] == 1
+        assert first.result["db_version"] == "2026-10-16T00:00:00Z"
+
+        again = await service.submit(f"nginx@{DIGEST}", image_digest=DIGEST)
+        assert again.cached and again.status == "completed"
+        assert scanner.scans == [f"nginx@{DIGEST}"]
+        assert service.get_job(again.id) is again
+        assert service.get_stats()["cache_hits"] == 1
+    finally:
+        await service.stop()
+
+
+async def test_timeouts_fail_the_job():
+    scanner = FakeScanner()
+    service = service_with(scanner, scan_timeout=0.01)
+    try:
+        job = await service.submit("nginx:latest")
+        await job.wait(1)
+        assert job.status == "failed"
+        assert "timeout" in job.error
+    finally:
+        await service.stop()
+
+
+async def test_queue_is_bounded():
+    scanner = FakeScanner()
+    service = service_with(scanner, concurrency=1, queue_size=1)
+    try:
+        await service.submit("a:1")
+        await asyncio.sleep(0)  # worker takes the first job
+        await service.submit("b:1")
+        with pytest.raises(ScanQueueFull):
+            await service.submit("c:1")
+    finally:
+        await service.stop()
+
+
+async def test_database_work_runs_off_the_event_loop():
+    FakeSession.threads = []
+    scanner = FakeScanner()
+    scanner.release.set()
+    service = service_with(scanner)
+    # Scan rows need the full model registry; record plain objects instead
+    service.build_scan_record = lambda job, container_id: SimpleNamespace(id=container_id * 10)
+    try:
+        job = await service.submit(f"nginx@{DIGEST}", image_digest=DIGEST, container_id=7)
+        await job.wait(1)
+        assert job.status == "completed"
+        assert job.scan_ids == {7: 70}
+
+        # The queued job's cache lookup and the scan record each used a session
+        assert len(FakeSession.threads) == 2
+        assert threading.get_ident() not in FakeSession.threads
+    finally:
+        await service.stop()
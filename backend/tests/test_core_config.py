@@ -43,3 +43,30 @@ def test_jwt_secret_key_exists():
     
     assert settings.jwt_secret_key is not None
     assert len(settings.jwt_secret_key) > 0
+
+
+@pytest.mark.unit
+def test_async_database_url_uses_async_drivers():
+    """Test the async engine URL is derived from database_url."""
+    assert Settings(database_url="postgresql://u:p@db:5432/unity").get_async_database_url() == \
+        "postgresql+asyncpg://u:p@db:5432/unity"
+    assert Settings(database_url="postgresql+psycopg2://u:p@db/unity").get_async_database_url() == \
+        "postgresql+asyncpg://u:p@db/unity"
+    assert Settings(database_url="sqlite:///./data/homelab.db").get_async_database_url() == \
+        "sqlite+aiosqlite:///./data/homelab.db"
+    assert Settings(
+        database_url="postgresql://db/unity",
+        async_database_url="postgresql+asyncpg://pgbouncer/unity"
+    ).get_async_database_url() == "postgresql+asyncpg://pgbouncer/unity"
+
+
+@pytest.mark.unit
+def test_engine_options_size_pools_for_server_databases():
+    """Test pool sizing applies to PostgreSQL but not SQLite."""
+    postgres = Settings(database_url="postgresql://db/unity", database_pool_size=5).get_engine_options()
+    assert postgres["pool_size"] == 5
+    assert postgres["pool_pre_ping"] is True
+
+    sqlite = Settings(database_url="sqlite:///./data/homelab.db").get_engine_options()
+    assert "pool_size" not in sqlite
+    assert sqlite["pool_recycle"] > 0
@@ -0,0 +1,88 @@
+"""
+Tests for connection pool instrumentation and the async engine.
+"""
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.core import db_pool
+from app.core.db_pool import TimedQueuePool, get_checkout_stats, pool_status
+
+
+@pytest.fixture
+def timed_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_pool, "_checkout_stats", {})
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.2,
+        pool_logging_name="test",
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_checkout_wait_is_recorded(timed_engine):
+    held = timed_engine.connect()
+    released = threading.Event()
+
+    def release_later():
+        time.sleep(0.1)
+        held.close()
+        released.set()
+
+    threading.Thread(target=release_later).start()
+    with timed_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    released.wait(1)
+
+    stats = get_checkout_stats("test").get_stats()
+    assert stats["checkouts"] == 2
+    assert stats["max_wait_ms"] >= 50
+    assert stats["timeouts"] == 0
+
+
+def test_checkout_timeouts_are_counted(timed_engine):
+    held = timed_engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        timed_engine.connect()
+    held.close()
+
+    status = pool_status(timed_engine)
+    assert status["checkout"]["timeouts"] == 1
+    assert status["size"] == 1
+    assert status["checked_out"] == 0
+
+
+def test_stats_survive_pool_recreation(timed_engine):
+    with timed_engine.connect():
+        pass
+    timed_engine.dispose()
+    with timed_engine.connect():
+        pass
+
+    assert isinstance(timed_engine.pool, TimedQueuePool)
+    assert get_checkout_stats("test").get_stats()["checkouts"] == 2
+
+
+async def test_async_session_runs_queries(tmp_path, monkeypatch):
+    pytest.importorskip("greenlet")
+    pytest.importorskip("aiosqlite")
+    from app.core import async_database
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "async_database_url", f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+    monkeypatch.setattr(async_database, "_async_engine", None)
+    monkeypatch.setattr(async_database, "_async_session_factory", None)
+
+    try:
+        async for session in async_database.get_async_db():
+            assert (await session.execute(text("SELECT 1"))).scalar() == 1
+        assert "async" in db_pool.get_pool_metrics()
+    finally:
+        await async_database.dispose_async_engine()
+    assert "async" not in db_pool.get_pool_metrics()
@@ -0,0 +1,118 @@
+"""
+Tests for the Kubernetes informer cache.
+"""
+from types import SimpleNamespace
+
+import pytest
+from kubernetes.client.rest import ApiException
+
+from app.services.k8s_informer import Informer, InformerManager, ResourceStore
+
+
+def pod(name, namespace="default", labels=None, node=None, rv="1"):
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name=name, namespace=namespace, labels=labels, resource_version=rv),
+        spec=SimpleNamespace(node_name=node),
+    )
+
+
+def pod_list(items, rv):
+    return SimpleNamespace(items=items, metadata=SimpleNamespace(resource_version=rv))
+
+
+class FakeWatch:
+    """Replays scripted streams; each stream() call consumes the next script."""
+
+    def __init__(self, scripts, calls):
+        self.scripts = scripts
+        self.calls = calls
+
+    def stream(self, func, **kwargs):
+        self.calls.append(kwargs["resource_version"])
+        script = self.scripts.pop(0)
+        if isinstance(script, Exception):
+            raise script
+        yield from script
+
+    def stop(self):
+        pass
+
+
+def test_store_indexes_by_namespace_label_and_node():
+    store = ResourceStore()
+    store.replace([
+        pod("web-1", labels={"app": "web", "tier": "front"}, node="n1"),
+        pod("web-2", namespace="prod", labels={"app": "web"}, node="n2"),
+        pod("db-1", namespace="prod", labels={"app": "db"}, node="n1"),
+    ], "10")
+
+    assert {p.metadata.name for p in store.list(namespace="prod")} == {"web-2", "db-1"}
+    assert {p.metadata.name for p in store.list(label_selector="app=web")} == {"web-1", "web-2"}
+    assert [p.metadata.name for p in store.list(label_selector="app=web,tier")] == ["web-1"]
+    assert [p.metadata.name for p in store.list(label_selector="app!=web", node_name="n1")] == ["db-1"]
+
+    store.upsert(pod("web-1", labels={"app": "api"}, node="n2"))
+    assert {p.metadata.name for p in store.list(label_selector="app=web")} == {"web-2"}
+    assert {p.metadata.name for p in store.list(node_name="n1")} == {"db-1"}
+
+    store.delete(pod("db-1", namespace="prod"))
+    assert store.get("prod", "db-1") is None
+    assert store.list(node_name="n1") == []
+
+    with pytest.raises(ValueError):
+        store.list(label_selector="app in (web, db)")
+
+
+def test_informer_applies_watch_events_and_relists_on_410():
+    lists = [
+        pod_list([pod("a"), pod("b")], "100"),
+        pod_list([pod("a"), pod("c")], "300"),
+    ]
+    watch_calls = []
+    scripts = [
+        [
+            {"type": "ADDED", "object": pod("d", rv="101")},
+            {"type": "DELETED", "object": pod("b", rv="102")},
+            {"type": "BOOKMARK", "object": None, "raw_object": {"metadata": {"resourceVersion": "150"}}},
+        ],
+        ApiException(status=410, reason="Gone"),
+    ]
+    informer = Informer("Pod", lambda: lists.pop(0), resync_seconds=0,
+                        watch_factory=lambda: FakeWatch(scripts, watch_calls))
+    seen = []
+    informer.add_handler(lambda event_type, obj: seen.append((event_type, obj.metadata.name)))
+
+    def stop_after_relist():
+        informer.stop()
+        yield from ()
+
+    scripts.append(stop_after_relist())
+
+    informer.run()
+
+    # The expired watch triggered a fresh list instead of a resumed watch
+    assert watch_calls == ["100", "150", "300"]
+    assert ("ADDED", "d") in seen and ("DELETED", "b") in seen
+    assert {p.metadata.name for p in informer.store.list()} == {"a", "c"}
+    assert informer.store.resource_version == "300"
+    assert informer.get_stats()["relists_410"] == 1
+    assert informer.synced
+
+
+def test_manager_only_serves_synced_stores():
+    manager = InformerManager()
+    informer = Informer("Node", lambda: pod_list([pod("n1", namespace=None)], "5"), resync_seconds=0)
+    manager.register("cluster-a", informer, start=False)
+
+    assert manager.synced_store("cluster-a", "Node") is None
+    informer.relist()
+    assert manager.synced_store("cluster-a", "Node").get(None, "n1") is not None
+    assert manager.synced_store("cluster-b", "Node") is None
+
+    def unreachable():
+        raise ConnectionError("apiserver down")
+
+    informer.list_func = unreachable
+    with pytest.raises(ConnectionError):
+        informer.relist()
+    assert manager.synced_store("cluster-a", "Node") is None
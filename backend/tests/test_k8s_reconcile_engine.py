@@ -0,0 +1,151 @@
+"""
+Tests for the rate-limited work queue and the Kubernetes reconciliation engine.
+"""
+import asyncio
+from types import SimpleNamespace
+
+from app.services.k8s_reconciler import (
+    ReconciliationEngine,
+    desired_state_hash,
+    managed_fields_diff,
+    normalize_manifest,
+)
+from app.services.k8s_work_queue import RateLimitedQueue
+
+
+async def test_queue_deduplicates_and_requeues_items_added_while_processing():
+    queue = RateLimitedQueue()
+    queue.add(1)
+    queue.add(1)
+    assert len(queue) == 1
+
+    item = await queue.get()
+    queue.add(1)  # changed again while a worker holds it
+    assert len(queue) == 0
+
+    queue.done(item)
+    assert len(queue) == 1
+
+
+async def test_queue_backoff_grows_and_forget_resets():
+    queue = RateLimitedQueue(base_delay=1.0, max_delay=3.0)
+    assert [queue.add_rate_limited("r") for _ in range(4)] == [1.0, 2.0, 3.0, 3.0]
+    queue.forget("r")
+    assert queue.add_rate_limited("r") == 1.0
+    queue.shutdown()
+
+
+def test_desired_state_hash_ignores_key_order():
+    assert desired_state_hash({"a": 1, "b": {"c": 2, "d": 3}}) == desired_state_hash({"b": {"d": 3, "c": 2}, "a": 1})
+    assert desired_state_hash({"a": 1}) != desired_state_hash({"a": 2})
+
+
+class FakeSession:
+    def close(self):
+        pass
+
+
+def engine_with(results, workers=2):
+    engine = ReconciliationEngine(workers=workers, session_factory=FakeSession, retry_base_seconds=0.01)
+    calls = []
+
+    def reconcile(resource_id, triggered_by):
+        calls.append((resource_id, triggered_by))
+        return results(resource_id)
+
+    engine._reconcile = reconcile
+    engine._load_resources = lambda: sorted(engine._resource_ids)
+    return engine, calls
+
+
+async def wait_for(predicate, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.005)
+
+
+async def test_engine_reconciles_queued_resources_and_counts_outcomes():
+    engine, calls = engine_with(lambda rid: {"success": True, "skipped": rid == 2, "drift_detected": rid == 3})
+    engine._resource_ids = {1, 2, 3}
+    try:
+        assert await engine.resync() == 3
+        await wait_for(lambda: len(calls) == 3)
+        stats = engine.get_stats()
+        assert stats["reconciled"] == 2
+        assert stats["skipped"] == 1
+        assert stats["drift_detected"] == 1
+        assert {trigger for _, trigger in calls} == {"scheduler"}
+    finally:
+        await engine.stop()
+
+
+async def test_engine_retries_failing_resource_with_backoff():
+    attempts = []
+
+    def results(rid):
+        attempts.append(rid)
+        return {"success": len(attempts) >= 3, "error": "boom"}
+
+    engine, calls = engine_with(results, workers=1)
+    engine._resource_ids = {7}
+    try:
+        await engine.resync()
+        await wait_for(lambda: len(calls) == 3)
+        stats = engine.get_stats()
+        assert stats["failed"] == 2
+        assert stats["retried"] == 2
+        assert engine.queue.failures(7) == 0
+    finally:
+        await engine.stop()
+
+
+async def test_watch_events_queue_only_the_matching_resource():
+    engine, calls = engine_with(lambda rid: {"success": True})
+    engine._watched = {("cluster", "Deployment"): {("prod", "web"): 5}}
+    try:
+        engine.start()
+        handler = engine._watch_handler("cluster", "Deployment")
+        obj = lambda ns, name: SimpleNamespace(metadata=SimpleNamespace(namespace=ns, name=name))
+        handler("MODIFIED", obj("prod", "web"))
+        handler("MODIFIED", obj("prod", "other"))
+        await wait_for(lambda: len(calls) == 1)
+        assert calls == [(5, "drift_detection")]
+        assert engine.get_stats()["watch_triggers"] == 1
+    finally:
+        await engine.stop()
+
+
+def test_managed_fields_diff_ignores_server_defaults():
+    desired = {"spec": {"replicas": 2, "template": {"spec": {"containers": [
+        {"name": "web", "image": "nginx:1.27", "resources": {"limits": {"cpu": "0.5", "memory": "1Gi"}}},
+    ]}}}}
+    live = {"spec": {"replicas": 2, "revisionHistoryLimit": 10, "template": {"spec": {
+        "dnsPolicy": "ClusterFirst",
+        "containers": [
+            {"name": "sidecar", "image": "envoy"},
+            {"name": "web", "image": "nginx:1.27", "imagePullPolicy": "IfNotPresent",
+             "resources": {"limits": {"cpu": "500m", "memory": "1073741824"}}},
+        ],
+    }}}}
+    assert managed_fields_diff(desired, live) == {}
+
+    live["spec"]["template"]["spec"]["containers"][1]["image"] = "nginx:1.26"
+    assert managed_fields_diff(desired, live) == {
+        "spec.template.spec.containers[web].image": {"desired": "nginx:1.27", "current": "nginx:1.26"}
+    }
+
+
+def test_normalized_manifest_hash_ignores_server_metadata():
+    resource = SimpleNamespace(kind="ConfigMap", name="cfg", namespace="prod", api_version="v1")
+    stored = {"metadata": {"labels": {"a": "1"}}, "data": {"k": "v"}}
+    observed = {
+        "metadata": {"labels": {"a": "1"}, "resourceVersion": "42", "uid": "x", "annotations": None},
+        "data": {"k": "v"},
+        "status": {},
+    }
+
+    manifest = normalize_manifest(stored, resource)
+    assert manifest["metadata"] == {"labels": {"a": "1"}, "name": "cfg", "namespace": "prod"}
+    assert manifest["apiVersion"] == "v1" and manifest["kind"] == "ConfigMap"
+    assert desired_state_hash(manifest) == desired_state_hash(normalize_manifest(observed, resource))
@@ -0,0 +1,94 @@
+"""
+Tests for the latest-value index.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.plugin import Plugin, PluginExecution, PluginMetric
+from app.services.monitoring.latest_values import LatestExecution, LatestValue, LatestValueIndex
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.fail = False
+
+    def hset(self, key, mapping):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def hmget(self, key, fields):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return [self.hashes.get(key, {}).get(f) for f in fields]
+
+
+@pytest.fixture
+def metrics_db():
+    engine = create_engine("sqlite:///:memory:")
+    for model in (Plugin, PluginMetric, PluginExecution):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_update_keeps_newest_value_per_series():
+    index = LatestValueIndex()
+    now = datetime.now()
+
+    index.update_metrics([
+        LatestValue("system_info", "cpu_percent", 10.0, now),
+        LatestValue("system_info", "cpu_percent", 5.0, now - timedelta(minutes=1)),
+        LatestValue("system_info", "memory_percent", 40.0, now),
+    ])
+
+    assert index.get("system_info", "cpu_percent").value == 10.0
+    assert index.get("system_info", "memory_percent").value == 40.0
+    assert index.get("system_info", "missing") is None
+
+
+def test_seed_loads_latest_rows_within_window(metrics_db):
+    now = datetime.utcnow()
+    metrics_db.execute(insert(PluginMetric.__table__), [
+        {"timestamp": now - timedelta(minutes=5), "plugin_id": "system_info",
+         "metric_name": "cpu_percent", "value": 1.0, "tags": None},
+        {"timestamp": now - timedelta(minutes=1), "plugin_id": "system_info",
+         "metric_name": "cpu_percent", "value": 2.0, "tags": None},
+        {"timestamp": now - timedelta(days=3), "plugin_id": "system_info",
+         "metric_name": "old_metric", "value": 3.0, "tags": None},
+    ])
+    metrics_db.execute(insert(PluginExecution.__table__), [
+        {"plugin_id": "system_info", "started_at": now - timedelta(minutes=5), "status": "failed"},
+        {"plugin_id": "system_info", "started_at": now - timedelta(minutes=1), "status": "success"},
+    ])
+    metrics_db.commit()
+
+    index = LatestValueIndex()
+    counts = index.seed(metrics_db, window=timedelta(hours=24))
+
+    assert counts == {"metrics": 1, "executions": 1}
+    assert index.get("system_info", "cpu_percent").value == 2.0
+    assert index.get_executions(["system_info"])["system_info"].status == "success"
+
+
+def test_redis_mirror_shares_values_and_falls_back_when_down():
+    redis = FakeRedis()
+    writer = LatestValueIndex(redis_client=redis)
+    reader = LatestValueIndex(redis_client=redis)
+    now = datetime.now()
+
+    writer.update_metrics([LatestValue("disk_monitor", "disk_usage_percent", 71.5, now)])
+    writer.update_execution(LatestExecution("disk_monitor", "success", now, duration_ms=12))
+
+    assert reader.get("disk_monitor", "disk_usage_percent").value == 71.5
+    assert reader.get_executions(["disk_monitor"])["disk_monitor"].duration_ms == 12
+
+    redis.fail = True
+    assert writer.get("disk_monitor", "disk_usage_percent").value == 71.5
+    assert writer.get_stats()["redis_available"] is False
@@ -0,0 +1,87 @@
+"""
+Tests for downsampled metric history queries.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.plugin import Plugin, PluginMetric
+from app.services.monitoring.metric_downsampling import (
+    choose_bucket_seconds,
+    query_downsampled,
+)
+
+
+@pytest.fixture
+def metrics_db():
+    engine = create_engine("sqlite:///:memory:")
+    Plugin.__table__.create(engine)
+    PluginMetric.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _insert(db, rows):
+    db.execute(insert(PluginMetric.__table__), [
+        {"timestamp": ts, "plugin_id": plugin_id, "metric_name": name, "value": value, "tags": None}
+        for ts, plugin_id, name, value in rows
+    ])
+    db.commit()
+
+
+def test_choose_bucket_seconds_snaps_to_friendly_widths():
+    assert choose_bucket_seconds(timedelta(hours=1), 300) == 15
+    assert choose_bucket_seconds(timedelta(days=7), 300) == 3600
+    assert choose_bucket_seconds(timedelta(minutes=10), 1000) == 10
+    assert choose_bucket_seconds(timedelta(days=365), 10) == 86400 * 37
+
+
+def test_query_downsampled_aggregates_multiple_series_in_buckets(metrics_db):
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    rows = []
+    for i in range(6):
+        # 6 samples 10s apart -> two 30s buckets
+        rows.append((base + timedelta(seconds=10 * i), "system_info", "cpu_percent", float(i)))
+        rows.append((base + timedelta(seconds=10 * i), "system_info", "memory_percent", 50 + i))
+    rows.append((base, "system_info", "hostname", "web01"))
+    _insert(metrics_db, rows)
+
+    result = query_downsampled(
+        metrics_db,
+        [("system_info", "cpu_percent"), ("system_info", "memory_percent"), ("system_info", "hostname")],
+        start=base,
+        end=base + timedelta(minutes=1),
+        bucket_seconds=30
+    )
+
+    cpu = result["system_info.cpu_percent"]
+    assert len(cpu) == 2
+    assert [b.count for b in cpu] == [3, 3]
+    assert (cpu[0].avg, cpu[0].min, cpu[0].max, cpu[0].last) == (1.0, 0.0, 2.0, 2.0)
+    assert (cpu[1].avg, cpu[1].min, cpu[1].max, cpu[1].last) == (4.0, 3.0, 5.0, 5.0)
+    assert cpu[1].bucket - cpu[0].bucket == timedelta(seconds=30)
+
+    memory = result["system_info.memory_percent"]
+    assert [b.last for b in memory] == [52.0, 55.0]
+
+    # Non-numeric series are returned empty rather than failing the query
+    assert result["system_info.hostname"] == []
+
+
+def test_query_downsampled_respects_window(metrics_db):
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    _insert(metrics_db, [
+        (base - timedelta(minutes=5), "system_info", "cpu_percent", 99.0),
+        (base, "system_info", "cpu_percent", 10.0),
+    ])
+
+    result = query_downsampled(
+        metrics_db, [("system_info", "cpu_percent")],
+        start=base, end=base + timedelta(minutes=1), bucket_seconds=60
+    )
+
+    assert [b.to_dict()["value"] for b in result["system_info.cpu_percent"]] == [10.0]
@@ -0,0 +1,103 @@
+"""Tests for the plugin metric ingestion pipeline."""
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, func, select
+
+from app.core.database import Base
+from app.models.plugin import Plugin, PluginMetric
+from app.services.plugins.metric_ingestion import (
+    MetricIngestionPipeline,
+    MetricRow,
+    rows_from_plugin_data,
+)
+
+
+@pytest.fixture
+def metrics_engine(tmp_path):
+    """File-backed SQLite engine so the worker thread shares the database."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'metrics.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(engine, tables=[Plugin.__table__, PluginMetric.__table__])
+    yield engine
+    engine.dispose()
+
+
+def count_rows(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(PluginMetric.__table__)).scalar()
+
+
+def test_rows_from_plugin_data_skips_timestamp():
+    """Each top-level key except 'timestamp' becomes a row."""
+    ts = datetime(2024, 1, 1, 12, 0, 0)
+    rows = rows_from_plugin_data("system_info", {"cpu_percent": 12.5, "timestamp": "x", "mem": {"a": 1}}, ts)
+
+    assert [r.metric_name for r in rows] == ["cpu_percent", "mem"]
+    assert all(r.timestamp == ts for r in rows)
+    assert rows[0].tags == {"source": "unity"}
+
+
+def test_flush_writes_multi_row_insert(metrics_engine):
+    """A direct flush writes every row and updates counters."""
+    pipeline = MetricIngestionPipeline(engine=metrics_engine, batch_size=10)
+    ts = datetime(2024, 1, 1)
+    batch = [MetricRow(ts + timedelta(seconds=i), "system_info", "cpu_percent", i) for i in range(25)]
+
+    pipeline.flush(batch)
+
+    assert count_rows(metrics_engine) == 25
+    stats = pipeline.get_stats()
+    assert stats["rows_flushed"] == 25
+    assert stats["flush_count"] == 1
+    assert stats["flush_errors"] == 0
+
+
+def test_duplicate_rows_are_ignored(metrics_engine):
+    """Conflicting primary keys do not fail the batch."""
+    pipeline = MetricIngestionPipeline(engine=metrics_engine)
+    row = MetricRow(datetime(2024, 1, 1), "system_info", "cpu_percent", 1)
+
+    pipeline.flush([row])
+    pipeline.flush([row])
+
+    assert count_rows(metrics_engine) == 1
+    assert pipeline.get_stats()["flush_errors"] == 0
+
+
+@pytest.mark.asyncio
+async def test_submit_and_drain_on_stop(metrics_engine):
+    """Rows submitted from the event loop are flushed by the worker thread."""
+    pipeline = MetricIngestionPipeline(engine=metrics_engine, batch_size=4, flush_interval=0.05)
+
+    accepted = await pipeline.submit_plugin_data(
+        "system_info", {f"metric_{i}": i for i in range(10)}, timestamp=datetime(2024, 1, 1)
+    )
+    pipeline.stop()
+
+    assert accepted == 10
+    assert count_rows(metrics_engine) == 10
+    stats = pipeline.get_stats()
+    assert stats["queue_depth"] == 0
+    assert stats["rows_enqueued"] == 10
+    assert stats["rows_flushed"] == 10
+
+
+@pytest.mark.asyncio
+async def test_backpressure_drops_after_timeout(metrics_engine):
+    """A full queue makes submit() wait, then drop once put_timeout expires."""
+    pipeline = MetricIngestionPipeline(
+        engine=metrics_engine, max_queue_size=2, put_timeout=0.01
+    )
+    # Keep the worker from draining so the queue stays full
+    pipeline.start = lambda: None
+
+    rows = [MetricRow(datetime(2024, 1, 1), "p", f"m{i}", i) for i in range(3)]
+    accepted = await pipeline.submit(rows)
+
+    assert accepted == 2
+    stats = pipeline.get_stats()
+    assert stats["backpressure_waits"] == 1
+    assert stats["rows_dropped"] == 1
+    assert stats["queue_depth"] == 2
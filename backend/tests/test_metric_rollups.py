@@ -0,0 +1,110 @@
+"""
+Tests for the plugin_metrics rollup tiers.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.plugin import Plugin, PluginMetric, PluginMetricRollup
+from app.services.monitoring import metric_downsampling
+from app.services.monitoring.metric_downsampling import query_downsampled, select_tier
+from app.services.monitoring.metric_rollups import MetricRollupManager
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite:///:memory:")
+    Plugin.__table__.create(engine)
+    PluginMetric.__table__.create(engine)
+    PluginMetricRollup.__table__.create(engine)
+    metric_downsampling.reset_capability_cache()
+    yield sessionmaker(bind=engine)
+    metric_downsampling.reset_capability_cache()
+    engine.dispose()
+
+
+def _insert_samples(factory, start, count, step_seconds):
+    db = factory()
+    db.execute(insert(PluginMetric.__table__), [
+        {
+            "timestamp": start + timedelta(seconds=step_seconds * i),
+            "plugin_id": "system_info",
+            "metric_name": "cpu_percent",
+            "value": float(i % 10),
+            "tags": None,
+        }
+        for i in range(count)
+    ])
+    db.commit()
+    db.close()
+
+
+def test_select_tier_picks_coarsest_dividing_tier():
+    assert select_tier(30) is None
+    assert select_tier(300).name == "1m"
+    assert select_tier(7200).name == "1h"
+    assert select_tier(86400 * 2).name == "1d"
+
+
+def test_refresh_builds_tiers_hierarchically(session_factory):
+    now = datetime(2026, 1, 2, 0, 0, tzinfo=timezone.utc)
+    start = now - timedelta(hours=2)
+    # One sample every 30s for two hours
+    _insert_samples(session_factory, start, 240, 30)
+
+    written = MetricRollupManager(session_factory).refresh(now=now)
+
+    assert written == {"1m": 120, "1h": 2, "1d": 1}
+
+    db = session_factory()
+    table = PluginMetricRollup.__table__
+    hourly = db.execute(
+        select(table).where(table.c.tier == "1h").order_by(table.c.bucket)
+    ).all()
+    assert [row.sample_count for row in hourly] == [120, 120]
+    assert hourly[0].avg_value == pytest.approx(4.5)
+    assert (hourly[0].min_value, hourly[0].max_value) == (0.0, 9.0)
+    assert hourly[-1].last_value == 9.0
+    db.close()
+
+
+def test_query_downsampled_reads_rollups_matching_raw(session_factory):
+    now = datetime(2026, 1, 2, 0, 0, tzinfo=timezone.utc)
+    start = now - timedelta(hours=2)
+    _insert_samples(session_factory, start, 240, 30)
+    manager = MetricRollupManager(session_factory)
+    manager.refresh(now=now)
+
+    db = session_factory()
+    series = [("system_info", "cpu_percent")]
+
+    from_rollups = query_downsampled(db, series, start, now, 600)["system_info.cpu_percent"]
+    raw = metric_downsampling.aggregate_raw(db, series, start, now, 600)
+
+    assert metric_downsampling.rollups_available(db)
+    assert [b.to_dict() for b in from_rollups] == [b.to_dict() for _, _, b in raw]
+
+    # A second refresh only rewrites the tail and keeps the tiers consistent
+    _insert_samples(session_factory, now, 20, 30)
+    later = now + timedelta(minutes=10)
+    manager.refresh(now=later)
+    latest = query_downsampled(db, series, now, later, 600)["system_info.cpu_percent"]
+    assert [b.count for b in latest] == [20]
+    db.close()
+
+
+def test_retention_drops_expired_tier_rows(session_factory):
+    now = datetime(2026, 1, 2, 0, 0, tzinfo=timezone.utc)
+    _insert_samples(session_factory, now - timedelta(hours=1), 10, 60)
+    manager = MetricRollupManager(session_factory)
+    manager.refresh(now=now)
+
+    db = session_factory()
+    deleted = manager.apply_retention(db, now=now + timedelta(days=8))
+    remaining = {row.tier for row in db.execute(select(PluginMetricRollup.__table__.c.tier))}
+    db.close()
+
+    assert deleted == 10
+    assert remaining == {"1h", "1d"}
@@ -0,0 +1,174 @@
+"""
+Tests for the pooled, coalescing notification dispatcher.
+"""
+import asyncio
+import importlib.util
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+import sqlalchemy as sa
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.services.monitoring.notification_dispatcher import (
+    NOTIFICATION_LOGS,
+    NotificationDispatcher,
+    RetryTransport,
+    build_digest,
+)
+
+MIGRATIONS = Path(__file__).resolve().parents[1] / "alembic" / "versions"
+
+WEBHOOK = {'id': 1, 'name': 'hooks', 'channel_type': 'webhook', 'config': {'url': 'http://hooks.test/alert'}}
+
+
+def _alert(alert_id, severity='warning', server='web-1'):
+    return {
+        'alert_id': alert_id,
+        'severity': severity,
+        'message': f"cpu high #{alert_id}",
+        'metric_value': 90 + alert_id,
+        'server_name': server,
+        'server_id': alert_id,
+        'rule_name': 'cpu',
+        'triggered_at': f"2026-10-16T12:00:0{alert_id}+00:00",
+        'timestamp': 1760616000 + alert_id,
+    }
+
+
+def _migration(filename):
+    spec = importlib.util.spec_from_file_location(filename, MIGRATIONS / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    # notification_logs exactly as the migrations leave it
+    with engine.begin() as conn, Operations.context(MigrationContext.configure(conn)) as op:
+        _migration("70974ae864ff_add_notification_tables.py").upgrade()
+        # The tenant migration adds a required tenant_id to every table
+        with op.batch_alter_table("notification_logs") as batch:
+            batch.add_column(sa.Column("tenant_id", sa.String(50), nullable=False))
+        _migration("20261016_add_notification_log_latency.py").upgrade()
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+class Recorder:
+    """MockTransport handler recording request bodies."""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.bodies = []
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        self.bodies.append(json.loads(request.content))
+        return httpx.Response(self.statuses.pop(0) if self.statuses else 200)
+
+
+def _dispatcher(session_factory, handler, **kwargs):
+    kwargs.setdefault('coalesce_window', 0.05)
+    kwargs.setdefault('retry_backoff', 0)
+    return NotificationDispatcher(
+        session_factory=session_factory,
+        transport_factory=lambda: httpx.MockTransport(handler),
+        **kwargs
+    )
+
+
+async def test_alerts_within_the_window_are_sent_as_one_digest(session_factory):
+    recorder = Recorder()
+    async with _dispatcher(session_factory, recorder) as dispatcher:
+        for alert_id in (1, 2, 3):
+            dispatcher.submit(WEBHOOK, _alert(alert_id, severity='critical' if alert_id == 2 else 'warning'))
+        await asyncio.sleep(0.1)
+
+    assert len(recorder.bodies) == 1
+    digest = recorder.bodies[0]
+    assert digest['alert_ids'] == [1, 2, 3]
+    assert digest['severity'] == 'critical'
+    assert digest['message'].startswith("3 alerts")
+    assert digest['triggered_at'] == "2026-10-16T12:00:01+00:00"
+    assert dispatcher.get_stats()['deliveries'] == 1
+
+
+async def test_every_alert_is_logged_with_delivery_latency(session_factory):
+    async with _dispatcher(session_factory, Recorder()) as dispatcher:
+        dispatcher.submit(WEBHOOK, _alert(1))
+        dispatcher.submit(WEBHOOK, _alert(2))
+
+    db = session_factory()
+    logs = db.execute(select(NOTIFICATION_LOGS).order_by(NOTIFICATION_LOGS.c.trigger_id)).all()
+    assert [(log.trigger_type, log.trigger_id) for log in logs] == [("alert", "1"), ("alert", "2")]
+    assert [log.body for log in logs] == ["cpu high #1", "cpu high #2"]
+    assert all(log.success and log.error_message is None for log in logs)
+    assert all(log.latency_ms is not None and log.latency_ms > 0 for log in logs)
+    assert all(log.tenant_id == "default" and log.sent_at is not None for log in logs)
+    assert logs[0].title == "hooks: WARNING alert (digest of 2 alerts)"
+    assert logs[0].id != logs[1].id
+    db.close()
+
+
+async def test_deliveries_are_bounded_and_clients_pooled_per_channel(session_factory):
+    recorder = Recorder()
+    channels = [dict(WEBHOOK, id=i, name=f"hook-{i}") for i in range(1, 7)]
+    dispatcher = _dispatcher(session_factory, recorder, coalesce_window=0, max_concurrency=2)
+    for channel in channels:
+        dispatcher.submit(channel, _alert(1))
+        dispatcher.submit(channel, _alert(2))
+    await dispatcher.flush()
+
+    assert len(recorder.bodies) == 12
+    assert recorder.max_active == 2
+    assert dispatcher.get_stats()['http_clients'] == 6
+    await dispatcher.close()
+    assert dispatcher.get_stats()['http_clients'] == 0
+
+
+async def test_retryable_responses_are_retried_with_backoff(session_factory):
+    recorder = Recorder(statuses=[503, 429, 200])
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    transport = RetryTransport(httpx.MockTransport(recorder), max_retries=3, backoff=0.5, sleep=sleep)
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.post('http://hooks.test/alert', json={'n': 1})
+
+    assert response.status_code == 200
+    assert len(recorder.bodies) == 3
+    assert delays == [0.5, 1.0]
+
+
+async def test_failure_is_logged_after_retries_are_exhausted(session_factory):
+    recorder = Recorder(statuses=[502, 502])
+    async with _dispatcher(session_factory, recorder, coalesce_window=0, max_retries=1) as dispatcher:
+        dispatcher.submit(WEBHOOK, _alert(1))
+
+    db = session_factory()
+    log = db.execute(select(NOTIFICATION_LOGS)).one()
+    assert not log.success
+    assert "502" in log.error_message
+    assert dispatcher.get_stats()['failed'] == 1
+    assert dispatcher.get_stats()['log_write_errors'] == 0
+    db.close()
+
+
+def test_single_alert_digest_is_the_alert_itself():
+    alert = _alert(1)
+    assert build_digest([alert]) is alert
@@ -0,0 +1,125 @@
+"""
+Tests for request-scoped principal resolution and the principal cache.
+"""
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import get_db
+from app.middleware.auth import AuthContextMiddleware
+from app.middleware.tenant_context import TenantContextMiddleware
+from app.models.users import User
+from app.services.auth import principal as principal_module
+from app.services.auth.auth_service import get_current_active_user
+from app.services.auth.jwt_handler import create_access_token
+from app.services.auth.principal import Principal, PrincipalCache
+
+
+@pytest.fixture
+def user_db(monkeypatch):
+    """In-memory database with only the users table, shared by every session."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    User.__table__.create(engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(principal_module, "SessionLocal", Session)
+    monkeypatch.setattr(principal_module, "_principal_cache", PrincipalCache(max_entries=16, ttl=60))
+
+    user_queries = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: user_queries.append(statement)
+                 if "FROM users" in statement else None)
+
+    db = Session()
+    db.add(User(username="alice", hashed_password="x", role="admin", is_active=True))
+    db.commit()
+    yield db, Session, user_queries
+    db.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def client(user_db):
+    _, Session, _ = user_db
+    app = FastAPI()
+    app.add_middleware(AuthContextMiddleware)
+    app.add_middleware(TenantContextMiddleware, multi_tenancy_enabled=True)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.get("/me")
+    async def me(request: Request, current_user=Depends(get_current_active_user)):
+        return {
+            "username": current_user.username,
+            "role": current_user.role,
+            "same_as_middleware": request.state.user is current_user,
+            "tenant": request.state.tenant_id,
+        }
+
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+
+def _auth(**claims):
+    return {"Authorization": f"Bearer {create_access_token(dict(sub='alice', **claims))}"}
+
+
+def test_warm_request_needs_no_user_query(client, user_db):
+    _, _, user_queries = user_db
+
+    first = client.get("/me", headers=_auth())
+    assert first.status_code == 200
+    assert first.json() == {"username": "alice", "role": "admin", "same_as_middleware": True, "tenant": "default"}
+    assert len(user_queries) == 1
+
+    assert client.get("/me", headers=_auth()).status_code == 200
+    assert len(user_queries) == 1
+
+
+def test_tenant_claim_is_read_from_the_shared_payload(client):
+    assert client.get("/me", headers=_auth(tenant_id="acme")).json()["tenant"] == "acme"
+
+
+def test_invalid_token_is_rejected(client):
+    response = client.get("/me", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+    assert response.headers["X-Tenant-ID"] == "default"
+
+
+def test_user_update_invalidates_cached_principal(client, user_db):
+    db, _, user_queries = user_db
+    client.get("/me", headers=_auth())
+
+    user = db.query(User).filter(User.username == "alice").one()
+    user.role = "viewer"
+    db.commit()
+
+    assert client.get("/me", headers=_auth()).json()["role"] == "viewer"
+
+    user.is_active = False
+    db.commit()
+    assert client.get("/me", headers=_auth()).status_code == 400
+
+
+def test_cache_is_bounded_and_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(principal_module.time, "monotonic", lambda: now[0])
+    cache = PrincipalCache(max_entries=2, ttl=10)
+    principals = [Principal(i, f"user{i}", None, "viewer", "default", True, False) for i in range(3)]
+    for p in principals:
+        cache.set(p.username, p)
+
+    assert len(cache) == 2
+    assert cache.get("user0") is None
+    assert cache.get("user2") is principals[2]
+
+    assert cache.invalidate(user_id=1) == 1
+    now[0] += 11
+    assert cache.get("user2") is None
@@ -0,0 +1,143 @@
+"""
+Tests for the GCRA rate limiter.
+"""
+import pytest
+from fastapi import HTTPException
+
+from app.services.core.rate_limiter import (
+    MemoryRateLimitBackend,
+    RateLimit,
+    RateLimiter,
+    RedisRateLimitBackend,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(clock):
+    return RateLimiter(
+        limits={"metric_reporting": (3, 60)},
+        memory_backend=MemoryRateLimitBackend(sweep_interval=120, clock=clock)
+    )
+
+
+def test_allows_a_burst_up_to_the_limit_then_rejects(limiter):
+    for _ in range(3):
+        assert limiter.check_rate_limit("plugin-a", "metric_reporting") is True
+
+    with pytest.raises(HTTPException) as exc:
+        limiter.check_rate_limit("plugin-a", "metric_reporting")
+    assert exc.value.status_code == 429
+    assert exc.value.headers["Retry-After"] == "20"
+
+    # Other keys have their own bucket
+    assert limiter.check_rate_limit("plugin-b", "metric_reporting") is True
+
+
+def test_replenishes_one_request_per_emission_interval(limiter, clock):
+    for _ in range(3):
+        limiter.check_rate_limit("plugin-a", "metric_reporting")
+
+    clock.now += 19.5
+    with pytest.raises(HTTPException):
+        limiter.check_rate_limit("plugin-a", "metric_reporting")
+
+    clock.now += 0.5
+    assert limiter.check_rate_limit("plugin-a", "metric_reporting") is True
+    with pytest.raises(HTTPException):
+        limiter.check_rate_limit("plugin-a", "metric_reporting")
+
+
+def test_unknown_operations_are_not_limited(limiter):
+    for _ in range(100):
+        assert limiter.check_rate_limit("user-1", "plugin_list") is True
+
+
+def test_counts_rejections_per_operation(limiter):
+    for _ in range(5):
+        try:
+            limiter.check_rate_limit("plugin-a", "metric_reporting")
+        except HTTPException:
+            pass
+
+    stats = limiter.get_stats()
+    assert stats["allowed"] == {"metric_reporting": 3}
+    assert stats["rejected"] == {"metric_reporting": 2}
+    assert stats["backend"] == "memory"
+
+
+def test_idle_keys_are_swept(clock):
+    backend = MemoryRateLimitBackend(sweep_interval=120, clock=clock)
+    rate = RateLimit(limit=10, window=60)
+    for i in range(50):
+        backend.hit(f"plugin-{i}", rate)
+    assert len(backend) == 50
+
+    clock.now += 121
+    backend.hit("plugin-new", rate)
+    assert len(backend) == 1
+
+
+class StubScript:
+    def __init__(self, result=(1, 0), error=None):
+        self.result = result
+        self.error = error
+        self.calls = []
+
+    def __call__(self, keys, args):
+        self.calls.append((keys, args))
+        if self.error:
+            raise self.error
+        return list(self.result)
+
+
+class StubRedis:
+    def __init__(self, script):
+        self.script = script
+
+    def register_script(self, source):
+        assert "redis.call('TIME')" in source
+        return self.script
+
+
+def test_redis_backend_runs_the_script_per_check(clock):
+    script = StubScript(result=(0, 1500))
+    limiter = RateLimiter(
+        limits={"metric_reporting": (100, 60)},
+        redis_backend=RedisRateLimitBackend(StubRedis(script), prefix="rl:"),
+        memory_backend=MemoryRateLimitBackend(clock=clock)
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        limiter.check_rate_limit("plugin-a", "metric_reporting")
+
+    assert script.calls == [(["rl:plugin-a:metric_reporting"], [600.0, 60000])]
+    assert exc.value.headers["Retry-After"] == "2"
+    assert limiter.get_stats()["backend"] == "redis"
+
+
+def test_falls_back_to_memory_when_redis_fails(clock):
+    script = StubScript(error=ConnectionError("down"))
+    limiter = RateLimiter(
+        limits={"metric_reporting": (1, 60)},
+        redis_backend=RedisRateLimitBackend(StubRedis(script)),
+        memory_backend=MemoryRateLimitBackend(clock=clock)
+    )
+
+    assert limiter.check_rate_limit("plugin-a", "metric_reporting") is True
+    with pytest.raises(HTTPException):
+        limiter.check_rate_limit("plugin-a", "metric_reporting")
+    assert len(script.calls) == 1  # Redis is not retried immediately
+    assert limiter.get_stats()["backend"] == "memory"
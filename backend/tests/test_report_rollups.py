@@ -0,0 +1,139 @@
+"""
+Tests for the daily rollups behind the 7-day and monthly reports.
+"""
+import importlib
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateTable
+
+import app.models
+from app.models.core import ServerDailyRollup, ServerProfile, ServerSnapshot
+
+DAY = date(2026, 10, 14)
+NEXT_DAY = DAY + timedelta(days=1)
+START = datetime(2026, 10, 14, 0, 0, 0)
+
+
+def _snapshot(snapshot_id, timestamp, cpu, memory_used=None, temperature=None):
+    data = {"cpu": {"usage_percent": cpu}}
+    if memory_used is not None:
+        data["memory"] = {"used_bytes": memory_used, "total_bytes": 1000}
+    if temperature is not None:
+        data["temperatures"] = {"coretemp": {"Core 0": {"temp1_input": temperature}}}
+    return {"id": snapshot_id, "server_id": 1, "timestamp": timestamp, "data": data}
+
+
+@pytest.fixture
+def reports(monkeypatch):
+    # app.models does not re-export the core models the report generator names
+    monkeypatch.setattr(app.models, "ServerProfile", ServerProfile, raising=False)
+    monkeypatch.setattr(app.models, "ServerSnapshot", ServerSnapshot, raising=False)
+    return importlib.import_module("app.services.core.report_generation")
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(CreateTable(ServerSnapshot.__table__))
+        conn.execute(CreateTable(ServerDailyRollup.__table__))
+        conn.execute(insert(ServerSnapshot.__table__), [
+            _snapshot(1, START + timedelta(hours=1), 10, memory_used=200, temperature=40),
+            _snapshot(2, START + timedelta(hours=2), 20, memory_used=400, temperature=50),
+            _snapshot(3, START + timedelta(hours=3), 30),
+            _snapshot(4, START + timedelta(hours=4), 40),
+            # Next day: outside the window of DAY
+            _snapshot(5, START + timedelta(days=1), 90),
+        ])
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _stored_days(db):
+    table = ServerDailyRollup.__table__
+    return [row.day for row in db.execute(select(table).order_by(table.c.day))]
+
+
+def test_snapshot_window_is_aggregated_in_sql(reports, db):
+    stats = reports.aggregate_snapshot_window(db, 1, START, START + timedelta(days=1))
+
+    assert stats["snapshot_count"] == 4
+    assert stats["cpu"] == {"count": 4, "sum": 100, "min": 10, "max": 40, "p95": pytest.approx(38.5)}
+    assert stats["memory"]["count"] == 2
+    assert (stats["memory"]["min"], stats["memory"]["max"]) == (20, 40)
+    assert stats["temperatures"] == {"coretemp.Core 0": {"sum": 90, "count": 2, "max": 50}}
+
+
+def test_empty_window_has_no_metrics(reports, db):
+    stats = reports.aggregate_snapshot_window(db, 2, START, START + timedelta(days=1))
+
+    assert stats["snapshot_count"] == 0
+    assert stats["cpu"]["count"] == 0 and stats["cpu"]["p95"] is None
+
+
+def test_missing_days_are_stored_but_empty_days_are_not(reports, db):
+    daily = reports.ensure_daily_rollups(db, 1, DAY - timedelta(days=1), NEXT_DAY)
+
+    assert [(day, stats["snapshot_count"]) for day, stats in daily] == [
+        (DAY - timedelta(days=1), 0),
+        (DAY, 4),
+        (NEXT_DAY, 1),
+    ]
+    assert _stored_days(db) == [DAY, NEXT_DAY]
+
+    # Stored days are read back instead of recomputed
+    again = reports.ensure_daily_rollups(db, 1, DAY, DAY)
+    assert again[0][1]["cpu"]["sum"] == 100
+    assert again[0][1]["temperatures"] == daily[1][1]["temperatures"]
+
+
+def test_snapshots_reaching_an_empty_day_later_are_picked_up(reports, db):
+    empty_day = DAY - timedelta(days=1)
+    reports.ensure_daily_rollups(db, 1, empty_day, empty_day)
+    db.execute(insert(ServerSnapshot.__table__), [_snapshot(6, START - timedelta(hours=1), 70)])
+
+    daily = reports.ensure_daily_rollups(db, 1, empty_day, empty_day)
+
+    assert daily[0][1]["snapshot_count"] == 1
+    assert _stored_days(db) == [empty_day]
+
+
+def test_day_stored_concurrently_by_another_job_is_skipped(reports, db, monkeypatch):
+    # Another report job stores DAY between this job's read and its insert
+    original = reports.aggregate_snapshot_window
+
+    def aggregate_while_another_job_stores(db, server_id, start_time, end_time):
+        stats = original(db, server_id, start_time, end_time)
+        db.execute(insert(ServerDailyRollup.__table__), {
+            "server_id": server_id, "day": start_time.date(), "tenant_id": "default",
+            "snapshot_count": stats["snapshot_count"], "cpu_count": 0, "memory_count": 0,
+            "disk_count": 0, "temperatures": {},
+        })
+        return stats
+
+    monkeypatch.setattr(reports, "aggregate_snapshot_window", aggregate_while_another_job_stores)
+
+    daily = reports.ensure_daily_rollups(db, 1, DAY, DAY)
+
+    assert daily[0][1]["snapshot_count"] == 4
+    assert _stored_days(db) == [DAY]
+
+
+def test_merged_p95_is_the_highest_daily_p95(reports, db):
+    daily = reports.ensure_daily_rollups(db, 1, DAY, NEXT_DAY)
+
+    merged = reports._merge_stats([stats for _, stats in daily])
+
+    assert merged["snapshot_count"] == 5
+    assert merged["cpu"]["count"] == 5
+    assert merged["cpu"]["sum"] == 190
+    assert (merged["cpu"]["min"], merged["cpu"]["max"]) == (10, 90)
+    assert merged["cpu"]["p95"] == 90
+    summary = reports._summarize_stats(merged, p95_suffix="p95_daily_max")
+    assert summary["cpu_usage_percent_avg"] == 38
+    assert summary["cpu_usage_percent_p95_daily_max"] == 90
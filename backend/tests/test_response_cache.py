@@ -0,0 +1,100 @@
+"""
+Tests for the tag-invalidated response cache middleware.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.cache_middleware import CacheMiddleware, CacheRule
+from app.services.response_cache import CachedResponse, ResponseCache
+
+
+@pytest.fixture
+def cached_app():
+    calls = {"count": 0}
+    app = FastAPI()
+
+    @app.get("/plugins")
+    def list_plugins():
+        calls["count"] += 1
+        return {"plugins": ["system_info"], "call": calls["count"]}
+
+    @app.get("/big")
+    def big():
+        calls["count"] += 1
+        return {"data": "x" * 5000}
+
+    cache = ResponseCache(redis_url=None)
+    app.add_middleware(
+        CacheMiddleware,
+        rules=(CacheRule("/plugins", 600, ("plugins",)),),
+        cache=cache,
+        max_body_bytes=1024
+    )
+    return TestClient(app), cache, calls
+
+
+def test_hits_replay_bytes_and_support_etag(cached_app):
+    client, _, calls = cached_app
+
+    first = client.get("/plugins")
+    second = client.get("/plugins")
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.content == first.content
+    assert calls["count"] == 1
+
+    not_modified = client.get("/plugins", headers={"If-None-Match": first.headers["etag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+
+def test_key_includes_caller_identity(cached_app):
+    client, _, calls = cached_app
+
+    client.get("/plugins", headers={"Authorization": "Bearer alice"})
+    client.get("/plugins", headers={"Authorization": "Bearer bob"})
+    client.get("/plugins", headers={"Authorization": "Bearer alice"})
+
+    assert calls["count"] == 2
+
+
+def test_tag_invalidation_and_large_bodies(cached_app):
+    client, cache, calls = cached_app
+
+    client.get("/plugins")
+    cache.invalidate("plugins")
+    refreshed = client.get("/plugins")
+
+    assert refreshed.headers["x-cache"] == "MISS"
+    assert refreshed.json()["call"] == 2
+
+    # Bodies over max_body_bytes stream through uncached
+    assert len(client.get("/big").content) > 1024
+    assert "x-cache" not in client.get("/big").headers
+    assert calls["count"] == 4
+
+
+def test_cached_response_round_trips_through_redis_format():
+    entry = CachedResponse(
+        status=200,
+        headers=[("content-type", "application/json")],
+        body=b'{"a":\n1}',
+        etag='"abc"',
+        tag_versions={"plugins": 3},
+    )
+
+    assert CachedResponse.loads(entry.dumps()) == entry
+
+
+def test_default_rules_keep_volatile_and_unmatched_paths_short():
+    middleware = CacheMiddleware(app=None)
+
+    assert middleware._rule_for_path("/alerts/").ttl == 600
+    assert middleware._rule_for_path("/plugins/v2").ttl == 600
+    assert middleware._rule_for_path("/plugins/v2/system_info/executions").ttl == 30
+
+    unmatched = middleware._rule_for_path("/api/k8s/clusters")
+    assert unmatched.ttl == 60
+    assert unmatched.tags == ()
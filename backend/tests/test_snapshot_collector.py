@@ -0,0 +1,95 @@
+"""
+Tests for the batched remote snapshot script and its parser.
+"""
+import shutil
+import subprocess
+
+import pytest
+
+from app.services.core.snapshot_collector import (
+    CPU_SAMPLE_SECONDS,
+    build_snapshot_data,
+    build_snapshot_script,
+    parse_sections,
+)
+
+
+def _section(name, output, rc=0):
+    return f"@@unity-section {name}@@\n{output}\n@@unity-status {name} {rc}@@\n"
+
+
+def test_parse_sections_handles_missing_trailing_newline_and_status():
+    payload = (
+        _section("hostname", "web01")
+        + "@@unity-section uptime@@\n12.5 3.0\n@@unity-status uptime 0@@\n"
+        + _section("sensors", "", rc=127)
+    )
+
+    sections = parse_sections(payload)
+
+    assert sections["hostname"].output == "web01"
+    assert sections["uptime"].output == "12.5 3.0"
+    assert sections["sensors"].exit_code == 127
+    assert not sections["sensors"].ok
+
+
+def test_build_snapshot_data_from_proc_sections():
+    payload = "".join([
+        _section("cpu_stat_start", "cpu  100 0 100 700 100 0 0 0 0 0"),
+        _section("uname", "Linux\n6.1.0\nx86_64"),
+        _section("hostname", "web01"),
+        _section("cpu_model", "model name\t: Example CPU"),
+        _section("nproc", "4"),
+        _section("meminfo", "MemTotal: 1000 kB\nMemFree: 200 kB\nMemAvailable: 600 kB\n"
+                            "Buffers: 100 kB\nCached: 200 kB\nSwapTotal: 400 kB\nSwapFree: 300 kB"),
+        _section("loadavg", "0.50 0.25 0.10 1/100 1234"),
+        _section("file_nr", "512\t0\t1024"),
+        _section("uptime", "3600.42 100.00"),
+        _section("disk_root", "/dev/sda1 1000 400 600 40% /"),
+        _section("network", '[{"ifname": "eth0"}]'),
+        _section("sensors", "", rc=127),
+        _section("plugin:demo", '{"value": 1}'),
+        _section("plugin:broken", "", rc=2),
+        _section("cpu_stat_end", "cpu  150 0 150 750 100 0 0 0 0 0"),
+    ])
+
+    data = build_snapshot_data(
+        parse_sections(payload),
+        plugin_parsers={"demo": "json", "broken": "text"},
+        server_name="web01"
+    )
+
+    assert data["os"] == {"system": "Linux", "release": "6.1.0", "hostname": "web01", "machine": "x86_64"}
+    assert data["cpu"] == {"model": "Example CPU", "cores": 4, "usage_percent": 66.7}
+    assert data["memory"]["total_bytes"] == 1000 * 1024
+    assert data["memory"]["used_bytes"] == 500 * 1024
+    assert data["memory"]["swap_used_bytes"] == 100 * 1024
+    assert data["load_average"]["1min"] == 0.5
+    assert data["file_descriptors"] == {"open": 512, "max": 1024}
+    assert data["uptime_seconds"] == 3600
+    assert data["disk"] == {"root_total_bytes": 1000, "root_used_bytes": 400}
+    assert data["network_interfaces"] == [{"ifname": "eth0"}]
+    assert data["temperatures"] == {}
+    assert data["plugins"]["demo"] == {"value": 1}
+    assert "exit code 2" in data["plugins"]["broken"]["error"]
+
+
+@pytest.mark.skipif(shutil.which("sh") is None, reason="requires a POSIX shell")
+def test_script_runs_in_one_shell_invocation():
+    script = build_snapshot_script({"echo": "echo 'a b'; echo c", "fails": "exit 3"})
+
+    output = subprocess.run(["sh", "-s"], input=script, capture_output=True, text=True).stdout
+    sections = parse_sections(output)
+
+    assert sections["plugin:echo"].output == "a b\nc"
+    assert sections["plugin:fails"].exit_code == 3
+    assert "cpu_stat_start" in sections and "cpu_stat_end" in sections
+
+
+def test_cpu_sample_is_a_fixed_window_before_other_probes():
+    script = build_snapshot_script({"slow": "sleep 5"})
+    probe_lines = [line for line in script.splitlines() if line.startswith("probe ")]
+
+    assert probe_lines[0].startswith("probe cpu_stat_start ")
+    assert probe_lines[1].startswith("probe cpu_stat_end ")
+    assert f"sleep {CPU_SAMPLE_SECONDS}" in probe_lines[1]
@@ -0,0 +1,57 @@
+"""
+Tests for the single-query latest-snapshot lookup.
+"""
+import importlib
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateTable
+
+import app.models
+from app.models.core import ServerProfile, ServerSnapshot
+
+START = datetime(2026, 10, 16, 12, 0, 0)
+
+
+@pytest.fixture
+def snapshot_service(monkeypatch):
+    # app.models does not re-export the core models the snapshot service names
+    monkeypatch.setattr(app.models, "ServerProfile", ServerProfile, raising=False)
+    monkeypatch.setattr(app.models, "ServerSnapshot", ServerSnapshot, raising=False)
+    return importlib.import_module("app.services.core.snapshot_service").SnapshotService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    table = ServerSnapshot.__table__
+    with engine.begin() as conn:
+        conn.execute(CreateTable(table))
+        conn.execute(insert(table), [
+            {"id": 1, "server_id": 1, "timestamp": START, "data": {"cpu": {"percent": 10}}},
+            {"id": 2, "server_id": 1, "timestamp": START + timedelta(minutes=5), "data": {"cpu": {"percent": 20}}},
+            {"id": 3, "server_id": 2, "timestamp": START + timedelta(minutes=5), "data": {"cpu": {"percent": 30}}},
+            # Same timestamp as id 3: the higher id wins
+            {"id": 4, "server_id": 2, "timestamp": START + timedelta(minutes=5), "data": {"cpu": {"percent": 40}}},
+            {"id": 5, "server_id": 3, "timestamp": START, "data": {}},
+        ])
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_latest_snapshot_of_every_server(snapshot_service, db):
+    latest = snapshot_service.get_latest_snapshots(db)
+
+    assert {server_id: row.id for server_id, row in latest.items()} == {1: 2, 2: 4, 3: 5}
+    assert latest[1].data == {"cpu": {"percent": 20}}
+
+
+def test_latest_snapshots_restricted_to_servers(snapshot_service, db):
+    latest = snapshot_service.get_latest_snapshots(db, [2, 3, 99])
+    assert sorted(latest) == [2, 3]
+
+    assert snapshot_service.get_latest_snapshots(db, []) == {}
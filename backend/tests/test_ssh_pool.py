@@ -0,0 +1,139 @@
+"""
+Tests for the pooled SSH connection manager and credential cache.
+"""
+import asyncio
+
+import asyncssh
+import pytest
+
+from app.services.core.ssh_pool import CredentialCache, SSHConnectionPool, SSHTarget
+
+
+class FakeResult:
+    def __init__(self, stdout="", exit_status=0):
+        self.stdout = stdout
+        self.stderr = ""
+        self.exit_status = exit_status
+
+
+class FakeConnection:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.closed = False
+        self.commands = []
+        self.fail_next = False
+
+    def is_closed(self):
+        return self.closed
+
+    async def run(self, command, input=None, timeout=None, check=False):
+        if self.fail_next:
+            self.fail_next = False
+            self.closed = True
+            raise asyncssh.ConnectionLost("connection reset")
+        self.commands.append(command)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return FakeResult(stdout=f"ran {command}")
+
+    def close(self):
+        self.closed = True
+
+    def abort(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        return None
+
+
+class FakeConnector:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.connections = []
+
+    async def __call__(self, **kwargs):
+        conn = FakeConnection(delay=self.delay)
+        self.connections.append(conn)
+        return conn
+
+
+TARGET = SSHTarget(host="10.0.0.5", port=22, username="unity", auth_id="test")
+
+
+async def test_commands_reuse_one_connection():
+    connector = FakeConnector()
+    pool = SSHConnectionPool(connect=connector)
+
+    for i in range(5):
+        result = await pool.run(TARGET, {"host": TARGET.host}, f"echo {i}")
+        assert result.stdout == f"ran echo {i}"
+
+    assert len(connector.connections) == 1
+    assert connector.connections[0].commands == [f"echo {i}" for i in range(5)]
+    assert pool.get_stats()["reused"] == 4
+    await pool.close_all()
+
+
+async def test_concurrency_limited_by_host_and_session_caps():
+    connector = FakeConnector(delay=0.05)
+    pool = SSHConnectionPool(
+        max_connections_per_host=2,
+        max_sessions_per_connection=2,
+        connect=connector
+    )
+
+    results = await asyncio.gather(*(pool.run(TARGET, {}, f"cmd {i}") for i in range(10)))
+
+    assert len(results) == 10
+    assert len(connector.connections) == 2
+    assert pool.get_stats()["waits"] > 0
+    await pool.close_all()
+
+
+async def test_reconnects_once_when_connection_drops():
+    connector = FakeConnector()
+    pool = SSHConnectionPool(connect=connector)
+
+    await pool.run(TARGET, {}, "uptime")
+    connector.connections[0].fail_next = True
+
+    result = await pool.run(TARGET, {}, "hostname")
+
+    assert result.stdout == "ran hostname"
+    assert len(connector.connections) == 2
+    assert pool.get_stats()["reconnects"] == 1
+    assert pool.get_stats()["open_connections"] == 1
+    await pool.close_all()
+
+
+async def test_idle_connections_are_evicted():
+    connector = FakeConnector()
+    pool = SSHConnectionPool(idle_timeout=0.0, connect=connector)
+
+    await pool.run(TARGET, {}, "uptime")
+    await asyncio.sleep(0.01)
+
+    assert await pool.evict_idle() == 1
+    assert connector.connections[0].closed
+    assert pool.get_stats()["open_connections"] == 0
+
+
+def test_credential_cache_ttl_and_invalidation():
+    cache = CredentialCache(ttl=60)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return {"password": "secret"}
+
+    assert cache.get_or_load("server:1", loader) == {"password": "secret"}
+    assert cache.get_or_load("server:1", loader) == {"password": "secret"}
+    assert len(loads) == 1
+
+    cache.invalidate()
+    cache.get_or_load("server:1", loader)
+    assert len(loads) == 2
+
+    expired = CredentialCache(ttl=0)
+    expired.set("server:1", "value")
+    assert expired.get("server:1") is None
@@ -0,0 +1,95 @@
+"""
+Tests for the WebSocket fan-out engine.
+"""
+import asyncio
+import json
+
+from fastapi.websockets import WebSocketState
+
+from app.api.websocket import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0, block=False):
+        self.client_state = WebSocketState.CONNECTED
+        self.delay = delay
+        self.block = block
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        return None
+
+    async def send_text(self, text):
+        if self.block:
+            await asyncio.Event().wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self):
+        self.closed = True
+        self.client_state = WebSocketState.DISCONNECTED
+
+
+async def _drain():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_slow_client_does_not_delay_others():
+    manager = ConnectionManager(max_queue=10, send_timeout=5)
+    slow, fast = FakeWebSocket(block=True), FakeWebSocket()
+    await manager.connect(slow)
+    await manager.connect(fast)
+
+    await asyncio.wait_for(manager.broadcast({"type": "alert:update", "n": 1}), timeout=0.1)
+    await _drain()
+
+    assert fast.sent == [{"type": "alert:update", "n": 1}]
+    assert slow.sent == []
+    await manager.disconnect(slow)
+    await manager.disconnect(fast)
+
+
+async def test_topic_index_routes_by_plugin_subscription():
+    manager = ConnectionManager()
+    everything, disk_only = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(everything)
+    await manager.connect(disk_only)
+    manager.subscribe(disk_only, plugin_ids=["disk_monitor"])
+
+    await manager.broadcast({"type": "plugin:status", "plugin_id": "system_info"}, plugin_id="system_info")
+    await manager.broadcast({"type": "plugin:status", "plugin_id": "disk_monitor"}, plugin_id="disk_monitor")
+    await _drain()
+
+    assert [m["plugin_id"] for m in everything.sent] == ["system_info", "disk_monitor"]
+    assert [m["plugin_id"] for m in disk_only.sent] == ["disk_monitor"]
+    assert manager.get_stats()["topics"] == 1
+
+    manager.unsubscribe(disk_only, plugin_ids=["disk_monitor"])
+    assert manager.get_stats()["topics"] == 0
+    await manager.disconnect(everything)
+    await manager.disconnect(disk_only)
+
+
+async def test_metrics_updates_coalesce_and_full_queue_drops_oldest():
+    manager = ConnectionManager(max_queue=3)
+    ws = FakeWebSocket(block=True)
+    await manager.connect(ws)
+    client = manager.connections[ws]
+    await manager.broadcast({"type": "heartbeat"})
+    await _drain()  # writer is now parked on the first send
+
+    for value in range(5):
+        await manager.broadcast({"type": "metrics:update", "plugin_id": "system_info", "v": value},
+                                plugin_id="system_info")
+    assert client.queued == 1
+    assert client.coalesced == 4
+    assert json.loads(client._queue[0][1])["v"] == 4
+
+    for n in range(4):
+        await manager.broadcast({"type": "alert:update", "n": n})
+    assert client.queued == 3
+    assert client.dropped == 2
+    await manager.disconnect(ws)